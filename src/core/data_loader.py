@@ -1,7 +1,7 @@
 import pandas as pd
-import akshare as ak
 import os
 import re
+import sys
 import glob
 from colorama import init, Fore
 
@@ -9,6 +9,12 @@ init(autoreset=True)
 
 CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
 PROJECT_ROOT = os.path.dirname(os.path.dirname(CURRENT_DIR))
+if PROJECT_ROOT not in sys.path: sys.path.append(PROJECT_ROOT)
+
+from src.utils.dataset_registry import get_table
+from src.utils.zt_pool_cache import get_pool
+from src.utils.normalize import to_code, to_text, float_col, str_col, join_tags, to_records
+
 TDX_DIR = os.path.join(PROJECT_ROOT, 'data', 'input', 'tdx')
 THS_DIR = os.path.join(PROJECT_ROOT, 'data', 'input', 'ths')
 
@@ -126,23 +132,15 @@ def load_yesterday_ths_data():
 
 def _parse_ths_csv(target_file):
     try:
-        # --- 关键修改：使用正则分隔符处理不规则的 tab ---
-        # sep=r'\t+' 表示把连续的 tab 当作一个分隔符
-        try:
-            df = pd.read_csv(target_file, sep=r'\t+', engine='python', encoding='gbk', dtype=str)
-        except:
-            try:
-                df = pd.read_csv(target_file, sep=r'\t+', engine='python', encoding='utf-16', dtype=str)
-            except:
-                df = pd.read_csv(target_file, sep=r'\t+', engine='python', encoding='utf-8', dtype=str)
-
-        df.columns = [c.strip() for c in df.columns]
+        # 正则分隔符 + 多编码解析在 table_cache；同一进程内经 registry 只解析一次
+        df = get_table(target_file)
+        if df is None:
+            print(f"{Fore.RED}❌ 读取失败: 无法解析 {os.path.basename(target_file)}")
+            return {}
 
         # 打印前几列名，用于调试
         # print(f"   (Debug) 解析列名: {df.columns.tolist()[:5]}...")
 
-        data_map = {}
-
         col_code = next((c for c in df.columns if '代码' in c), None)
         col_name = next((c for c in df.columns if '名称' in c), None)
         col_price = next((c for c in df.columns if '现价' in c), None)
@@ -166,56 +164,50 @@ def _parse_ths_csv(target_file):
             print(f"{Fore.RED}❌ 解析失败：未找到【代码】列，可能是文件格式太乱。")
             return {}
 
-        for _, row in df.iterrows():
-            code = clean_code(row[col_code])
-            if len(code) != 6: continue
-
-            # 基础数据
-            name = safe_str(row.get(col_name))
-            price = safe_float(row.get(col_price))
-            pct = safe_float(row.get(col_pct))
-
-            # --- 校验：防止错位 (如把价格当成涨幅) ---
-            if abs(pct) > 60 and 'N' not in name and 'C' not in name:
-                pct = 0.0
-            if '%' in name or len(name) > 10:
-                continue
-
-            item = {
-                'source': 'THS',
-                'code': code,
-                'name': name,
-                'price': price,
-                'today_pct': pct,
-                'amount': safe_float(row.get(col_amt)),
-                'turnover': safe_float(row.get(col_to)),
-                'pct_10': safe_float(row.get(col_pct10)),
-                'open_pct': safe_float(row.get(col_auc_pct)),
-                
-                # New Fields
-                'call_auction_amount': safe_float(row.get(col_auc_amt)),
-                'open_num': int(safe_float(row.get(col_open_num))) if col_open_num else 0,
-                'industry': safe_str(row.get(col_industry)),
-                'pct_20': safe_float(row.get(col_pct20)),
-            }
-
-            item['limit_days'] = int(safe_float(row.get(col_zt_days, 0)))
-            item['is_zt'] = (item['limit_days'] > 0 and item['today_pct'] > 0) or (item['today_pct'] > 9.8)
-
-            tags = []
-            desc = safe_str(row.get(col_desc))
-            if desc and len(desc) < 20: tags.append(desc) 
-
-            # Sanity check
-            if item['limit_days'] > 50: item['limit_days'] = 0
-
-            if item['limit_days'] > 0: tags.append(f"{item['limit_days']}板")
-
-            reason = safe_str(row.get(col_reason))
-            if reason: tags.append(reason)
-
-            item['tag_ths'] = "/".join(tags)
-            data_map[code] = item
+        # --- 整列清洗 (替代逐行 safe_float)，只转换用到的列 ---
+        codes = to_code(df[col_code])
+        name = str_col(df, col_name)
+        pct = float_col(df, col_pct)
+
+        # --- 校验：防止错位 (如把价格当成涨幅) ---
+        is_new = name.str.contains('N', regex=False) | name.str.contains('C', regex=False)
+        pct = pct.mask((pct.abs() > 60) & ~is_new, 0.0)
+        valid = (codes.str.len() == 6) & ~name.str.contains('%', regex=False) & (name.str.len() <= 10)
+
+        limit_days = float_col(df, col_zt_days).astype(int)
+        is_zt = ((limit_days > 0) & (pct > 0)) | (pct > 9.8)
+        # Sanity check (is_zt 用的是修正前的值)
+        limit_days = limit_days.mask(limit_days > 50, 0)
+
+        desc = str_col(df, col_desc)
+        desc = desc.where(desc.str.len() < 20, '')
+        days_tag = (limit_days.astype(str) + '板').where(limit_days > 0, '')
+
+        out = pd.DataFrame({
+            'source': 'THS',
+            'code': codes,
+            'name': name,
+            'price': float_col(df, col_price),
+            'today_pct': pct,
+            'amount': float_col(df, col_amt),
+            'turnover': float_col(df, col_to),
+            'pct_10': float_col(df, col_pct10),
+            'open_pct': float_col(df, col_auc_pct),
+
+            # New Fields
+            'call_auction_amount': float_col(df, col_auc_amt),
+            'open_num': float_col(df, col_open_num).astype(int),
+            'industry': str_col(df, col_industry),
+            'pct_20': float_col(df, col_pct20),
+
+            'limit_days': limit_days,
+            'is_zt': is_zt,
+            'tag_ths': join_tags(desc, days_tag, str_col(df, col_reason)),
+        })[valid]
+
+        data_map = {}
+        for item in to_records(out):
+            data_map[item['code']] = item
 
         print(f"   ↳ 成功解析 {len(data_map)} 条数据")
         return data_map
@@ -278,24 +270,22 @@ def load_tdx_data():
 
         if not col_code: return {}
 
-        for _, row in df.iterrows():
-            code = clean_code(row[col_code])
-            if len(code) != 6: continue
-
-            item = {
-                'source': 'TDX',
-                'code': code,
-                'name': safe_str(row.get(col_name)),
-                'price': safe_float(row.get(col_price)),
-                'today_pct': safe_float(row.get(col_pct)),
-                'amount': safe_float(row.get(col_amt)),
-                'turnover': safe_float(row.get(col_to)),
-                'pct_10': 0.0,
-                'limit_days': 0,
-                'is_zt': False
-            }
-            if item['today_pct'] > 9.8: item['is_zt'] = True
-            data_map[code] = item
+        pct = float_col(df, col_pct)
+        out = pd.DataFrame({
+            'source': 'TDX',
+            'code': to_code(df[col_code]),
+            'name': str_col(df, col_name),
+            'price': float_col(df, col_price),
+            'today_pct': pct,
+            'amount': float_col(df, col_amt),
+            'turnover': float_col(df, col_to),
+            'pct_10': 0.0,
+            'limit_days': 0,
+            'is_zt': pct > 9.8
+        })
+        out = out[out['code'].str.len() == 6]
+        for item in to_records(out):
+            data_map[item['code']] = item
         return data_map
     except:
         return {}
@@ -308,7 +298,7 @@ def fetch_akshare_ladder():
     try:
         from datetime import datetime
         today = datetime.now().strftime("%Y%m%d")
-        df_zt = ak.stock_zt_pool_em(date=today)
+        df_zt = get_pool('zt', today)
         if not df_zt.empty:
             for _, row in df_zt.iterrows():
                 code = row['代码']
@@ -318,7 +308,7 @@ def fetch_akshare_ladder():
                 if days == 1 and row['首次封板时间'] == row['最后封板时间']: tag = "首板/硬"
                 ladder_map[code] = {'limit_days': days, 'tag_api': f"{tag}/{reason}", 'is_zt': True}
 
-        df_zb = ak.stock_zt_pool_zbgc_em(date=today)
+        df_zb = get_pool('zbgc', today)
         if not df_zb.empty:
             for _, row in df_zb.iterrows():
                 ladder_map[row['代码']] = {'limit_days': 0, 'tag_api': "炸板", 'is_zt': False}
@@ -450,24 +440,11 @@ def load_ths_data_enhanced():
 
     print(f"{Fore.BLUE}📂 [Data] 加载同花顺数据: {os.path.basename(target_file)}")
     
-    # Robust read
-    df = None
-    encodings = ['gbk', 'utf-8', 'utf-16']
-    for enc in encodings:
-        try:
-            # use header=0 usually
-            df = pd.read_csv(target_file, sep=r'\t+', engine='python', encoding=enc, dtype=str)
-            # Check if columns look right
-            if any('代码' in c for c in df.columns):
-                break
-        except:
-            continue
-            
+    # Robust read (多编码尝试 + 列式缓存 + 进程内共享)
+    df = get_table(target_file)
     if df is None:
-        print(f"{Fore.RED}❌ 读取失败，尝试了 {encodings} 均无法解析")
+        print(f"{Fore.RED}❌ 读取失败，多种编码均无法解析")
         return {}
-        
-    df.columns = [c.strip() for c in df.columns]
     
     # Mapping
     col_code = next((c for c in df.columns if '代码' in c), None)
@@ -484,45 +461,34 @@ def load_ths_data_enhanced():
         print(f"{Fore.RED}❌ 关键列缺失 (代码/成交额)")
         return {}
         
+    codes = to_code(df[col_code])
+    amt = float_col(df, col_amt)
+
+    boards = pd.Series(0.0, index=df.index)
+    if col_zt:
+        # 提取最后一个数字 usually "3天2板" -> 2
+        nums = to_text(df[col_zt]).str.findall(r'\d+').str[-1]
+        boards = pd.to_numeric(nums, errors='coerce').fillna(0)
+        # Sanity check for weird THS coding (e.g. 65537)
+        boards = boards.mask(boards > 100, 0)
+
+    valid = codes.str.len() == 6
+    cnt_zero = int(((amt <= 0) & valid).sum())
+
+    out = pd.DataFrame({
+        'code': codes,
+        'yest_amt': amt,
+        'circ_mv': float_col(df, col_mv),
+        'yest_pct': float_col(df, col_pct),
+        'boards': boards.astype(int),
+        'yest_bid_amt': float_col(df, col_auc_amt), # Yesterday's Bid Amount
+        'industry': to_text(df[col_ind]) if col_ind else '未知',
+    })[valid]
+
     res_map = {}
-    cnt_zero = 0
-    
-    for _, row in df.iterrows():
-        try:
-            code = clean_code(row[col_code])
-            if len(code) != 6: continue
-            
-            amt = safe_float(row.get(col_amt))
-            mv = safe_float(row.get(col_mv))
-            pct = safe_float(row.get(col_pct))
-            
-            boards = 0
-            if col_zt:
-                b_str = str(row.get(col_zt, ''))
-                # 提取数字
-                nums = re.findall(r'\d+', b_str)
-                if nums: boards = int(nums[-1]) # 取最后一个数字 usually "3天2板" -> 2
-                
-                # Sanity check for weird THS coding (e.g. 65537)
-                if boards > 100: boards = 0
-            
-            auc_amt = 0.0
-            if col_auc_amt:
-                auc_amt = safe_float(row.get(col_auc_amt))
-            
-            if amt <= 0: cnt_zero += 1
-            
-            res_map[code] = {
-                'yest_amt': amt,
-                'circ_mv': mv,
-                'yest_pct': pct,
-                'boards': boards,
-                'yest_bid_amt': auc_amt, # Yesterday's Bid Amount
-                'industry': str(row.get(col_ind, '未知')) if col_ind else '未知'
-            }
-        except:
-            continue
-            
+    for item in to_records(out):
+        res_map[item.pop('code')] = item
+
     if cnt_zero > 0:
         print(f"   ⚠️ 其中 {cnt_zero} 只标的无成交额数据")
         
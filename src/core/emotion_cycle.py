@@ -1,15 +1,105 @@
 # src/core/emotion_cycle.py
 
-import akshare as ak
+import os
+import sys
+import numpy as np
 import pandas as pd
 import datetime
 from src.config import ProjectConfig
+from src.utils.trade_calendar import get_calendar
+from src.utils.zt_pool_cache import get_pool_cache
+from src.utils.panel_store import PanelStore, as_float64
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_THS_DIR = os.path.join(PROJECT_ROOT, 'data', 'input', 'ths')
+
+# 情绪数据来源
+BACKEND_AKSHARE = 'akshare'   # 联网: 东方财富涨停池
+BACKEND_PANEL = 'panel'       # 离线: 本地同花顺 Table 导出的面板历史
+
+
+def _round(values):
+    return [round(float(v), 2) for v in values]
+
+
+def panel_mood(dates, pct, boards, open_num, zt, auc_pct=None, not_st=None):
+    """
+    面板窗口 (n_days, n_codes) -> 每日情绪统计 (一次性整块计算)
+    第一天只作为后一天的"昨日"，不输出；口径与 market_breadth.compute_market_stats 一致:
+      limit_up_count  涨停家数            max_height   最高连板
+      zhaban_rate     炸板/(涨停+炸板)     promotion_rate  昨日涨停今日继续涨停的比例
+      promotion_rates 各高度晋级率 {'1进2': {count, promoted, rate}}
+      yesterday_zt_premium / yesterday_zt_open_premium  昨日涨停今日平均涨幅 / 竞价涨幅
+    """
+    pct = as_float64(pct)
+    n_days, n_codes = pct.shape
+    if n_days < 2:
+        return []
+    cols = np.ones(n_codes, dtype=bool) if not_st is None else np.asarray(not_st, dtype=bool)
+    listed = ~np.isnan(pct) & cols
+    height = np.where(listed, np.nan_to_num(np.asarray(boards, dtype=np.float64)), 0)
+
+    is_zt = (np.asarray(zt) > 0) & listed
+    zhaban = ~is_zt & (np.asarray(open_num) > 0) & listed
+    zt_count, zb_count = is_zt.sum(axis=1), zhaban.sum(axis=1)
+    touched = zt_count + zb_count
+    zhaban_rate = np.where(touched > 0, zb_count / np.maximum(touched, 1) * 100, 0)
+
+    # 昨日涨停 -> 今日
+    yest, today = is_zt[:-1], is_zt[1:]
+    promoted = yest & today
+    y_count = yest.sum(axis=1)
+    promotion_rate = np.where(y_count > 0, promoted.sum(axis=1) / np.maximum(y_count, 1) * 100, 0)
+
+    def premium(values):
+        values = as_float64(values)[1:]
+        hit = yest & ~np.isnan(values)
+        n = hit.sum(axis=1)
+        return np.where(n > 0, np.where(hit, values, 0).sum(axis=1) / np.maximum(n, 1), 0)
+
+    close_premium = premium(pct)
+    open_premium = premium(auc_pct) if auc_pct is not None else np.zeros(n_days - 1)
+
+    # 各高度晋级: (日, 高度) 二维计数，首板连板数为 0 时按 1 板计
+    y_height = np.maximum(height[:-1], 1).astype(np.int64)
+    rows, codes = np.nonzero(yest)
+    h = y_height[rows, codes]
+    max_h = int(h.max()) if len(h) else 1
+    count = np.zeros((n_days - 1, max_h + 1), dtype=np.int64)
+    hit = np.zeros_like(count)
+    np.add.at(count, (rows, h), 1)
+    np.add.at(hit, (rows, h), promoted[rows, codes].astype(np.int64))
+
+    stats = []
+    zip_cols = zip(dates[1:], zt_count[1:].tolist(), height.max(axis=1)[1:].tolist(), zb_count[1:].tolist(),
+                   _round(zhaban_rate[1:]), _round(promotion_rate), _round(close_premium), _round(open_premium))
+    for i, (d, lu, mh, zb, zr, pr, cp, op) in enumerate(zip_cols):
+        levels = np.nonzero(count[i])[0]
+        stats.append({
+            'date': d,
+            'limit_up_count': int(lu),
+            'max_height': int(mh),
+            'zhaban_count': int(zb),
+            'zhaban_rate': zr,
+            'promotion_rate': pr,
+            'promotion_rates': {f"{k}进{k + 1}": {'count': c, 'promoted': p, 'rate': round(p / c * 100, 2)}
+                                for k, c, p in zip(levels.tolist(), count[i, levels].tolist(),
+                                                   hit[i, levels].tolist())},
+            'yesterday_zt_premium': cp,
+            'yesterday_zt_open_premium': op,
+        })
+    return stats
+
 
 class EmotionalCycleEngine:
-    def __init__(self):
+    def __init__(self, backend=BACKEND_AKSHARE, data_dir=None):
+        if backend not in (BACKEND_AKSHARE, BACKEND_PANEL):
+            raise ValueError(f"未知情绪数据来源: {backend}")
         self.config = ProjectConfig()
         self.current_phase = self.config.PHASE_DIVERGENCE
         self.history_stats = []
+        self.backend = backend
+        self.data_dir = data_dir or DEFAULT_THS_DIR
 
     def fetch_market_mood(self, days=15):
         """
@@ -17,23 +107,24 @@ class EmotionalCycleEngine:
         1. 涨停家数
         2. 连板最高高度
         3. 炸板率 (可选)
+        backend='panel' 时改从本地面板计算 (不联网，字段更全)
         """
+        if self.backend == BACKEND_PANEL:
+            return self.fetch_panel_mood(days)
+
         end_date = datetime.datetime.now()
         stats = []
         
         print(f"Analyzing market sentiment for the last {days} days...")
         
-        for i in range(days):
-            date_check = end_date - datetime.timedelta(days=i)
-            date_str = date_check.strftime("%Y%m%d")
-            
-            # 跳过周末简单判断 (实际akshare会报错或返回空，这里做个预过滤更好)
-            if date_check.weekday() > 4: 
-                continue
+        # 只请求窗口内的交易日 (周末和节假日由交易日历过滤，不再白白联网)；
+        # 已定型的日期走本地缓存，缺失的并发补齐
+        start_date = end_date - datetime.timedelta(days=days - 1)
+        dates = get_calendar().between(start_date, end_date)
+        pools = get_pool_cache().ensure('zt', dates)
 
+        for date_str, df_zt in pools.items():
             try:
-                # 获取当日涨停池
-                df_zt = ak.stock_zt_pool_em(date=date_str)
                 if df_zt.empty: 
                     continue
                 
@@ -50,13 +141,46 @@ class EmotionalCycleEngine:
                 })
                 
             except Exception as e:
-                # 某些日期可能没数据（节假日），忽略
+                # 列缺失等异常数据，忽略该日
                 continue
         
         # 按日期正序排列
         self.history_stats = sorted(stats, key=lambda x: x['date'])
         return self.history_stats
 
+    def fetch_panel_mood(self, days=15):
+        """
+        离线版: 从 data_dir 的 Table 导出面板取最近 days 个自然日 (截至最新一份导出)，
+        整块计算每日 涨停家数/最高板/炸板率/晋级率/昨日涨停溢价 (剔除 ST)
+        """
+        store = PanelStore(self.data_dir)
+        store.sync()
+        all_dates = sorted(store.dates)
+        if not all_dates:
+            self.history_stats = []
+            return self.history_stats
+
+        latest = datetime.datetime.strptime(all_dates[-1], "%Y%m%d")
+        start = (latest - datetime.timedelta(days=days - 1)).strftime("%Y%m%d")
+        n = sum(d >= start for d in all_dates)
+        print(f"Analyzing market sentiment for the last {days} days (local panel, {n} trade days)...")
+
+        # 多取一天作为窗口第一天的"昨日"
+        dates, pct = store.window('pct', n + 1)
+        arrays = {'pct': pct}
+        for f in ('boards', 'open_num', 'zt', 'auc_pct'):
+            arrays[f] = store.window(f, n + 1)[1]
+        if len(dates) == n:
+            # 面板里没有更早的一天: 空行占位，第一天的晋级率/溢价记 0
+            dates = [None] + dates
+            arrays = {f: np.vstack([np.full((1, a.shape[1]), np.nan, dtype=a.dtype), a]) for f, a in arrays.items()}
+
+        not_st = np.array(['ST' not in str(name).upper() for name in store.names], dtype=bool)
+        stats = panel_mood(dates, arrays['pct'], arrays['boards'], arrays['open_num'], arrays['zt'],
+                           auc_pct=arrays['auc_pct'], not_st=not_st)
+        self.history_stats = stats
+        return self.history_stats
+
     def determine_phase(self):
         """
         根据最近的数据判定当前周期阶段
@@ -105,7 +229,8 @@ class EmotionalCycleEngine:
             return "分歧震荡: 去弱留强，关注弱转强机会"
 
 if __name__ == "__main__":
-    engine = EmotionalCycleEngine()
+    # python emotion_cycle.py --panel  使用本地 Table 面板 (离线)
+    engine = EmotionalCycleEngine(backend=BACKEND_PANEL if '--panel' in sys.argv else BACKEND_AKSHARE)
     data = engine.fetch_market_mood(days=5)
     print("Recent Stats:", data)
     print("Current Phase:", engine.determine_phase())
@@ -1,7 +1,11 @@
 import akshare as ak
+import numpy as np
 import pandas as pd
 import os
+import sys
+import time
 import shutil
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from colorama import init, Fore
 
@@ -14,6 +18,22 @@ OUTPUT_DIR = os.path.join(PROJECT_ROOT, 'data', 'output')
 LHB_DIR = os.path.join(OUTPUT_DIR, 'lhb') # New dedicated folder
 ARCHIVE_DIR = os.path.join(OUTPUT_DIR, 'archive')
 
+if PROJECT_ROOT not in sys.path: sys.path.append(PROJECT_ROOT)
+from src.utils.rate_limit import TokenBucket, retry_call
+from src.utils.seat_matcher import load_matcher
+from src.utils.seat_db import SeatDB, famous_rows
+from src.utils import trade_calendar
+
+# 深度扫描并发配置 (每只 2 次 stock_lhb_stock_detail_em: 买入 + 卖出)
+LHB_SCAN_WORKERS = 8      # 并发线程数
+LHB_RATE_LIMIT = 6.0      # 全部线程合计每秒请求数
+LHB_RATE_BURST = 6        # 令牌桶容量 (允许的瞬时突发)
+LHB_MAX_RETRIES = 2       # 单次请求失败重试次数
+LHB_RETRY_BACKOFF = 0.5   # 重试退避基数 (秒，指数递增)
+
+# 锁仓判定回看的上榜日数 (1 = 只看上一个上榜日，已锁仓的会逐日延续)
+LHB_HOLD_WINDOW = 1
+
 # 知名游资/席位映射配置
 # 格式: '游资标签': ['关键词1', '关键词2']
 # 知名游资/席位映射配置
@@ -93,6 +113,141 @@ os.makedirs(LHB_DIR, exist_ok=True)
 os.makedirs(ARCHIVE_DIR, exist_ok=True)
 
 
+def fetch_seat_detail(code, date_str, limiter=None, retries=LHB_MAX_RETRIES, backoff=LHB_RETRY_BACKOFF):
+    """
+    个股龙虎榜营业部明细 (买入榜 + 卖出榜合并去重)
+    每次请求先从 limiter 取令牌，失败按退避重试；重试后仍失败直接抛出
+    """
+    # stock_lhb_stock_detail_em: 东方财富-个股龙虎榜详情
+    # Fix: Must fetch both '买入' and '卖出' lists to get complete data
+    df_buy = retry_call(ak.stock_lhb_stock_detail_em, symbol=code, date=date_str, flag="买入",
+                        retries=retries, backoff=backoff, limiter=limiter)
+    df_sell = retry_call(ak.stock_lhb_stock_detail_em, symbol=code, date=date_str, flag="卖出",
+                         retries=retries, backoff=backoff, limiter=limiter)
+
+    df_detail = pd.concat([df_buy, df_sell], ignore_index=True)
+    # Deduplicate based on Branch and Type (as one branch might appear in multiple list types, e.g., 3-day and 1-day)
+    # Warning: valid to have same branch in 1-day AND 3-day list (different '类型').
+    # If same branch/type appears in buy and sell list, it is identical.
+    return df_detail.drop_duplicates(subset=['交易营业部名称', '类型'])
+
+
+def scan_seat_details(codes, date_str, max_workers=LHB_SCAN_WORKERS, rate=LHB_RATE_LIMIT, burst=LHB_RATE_BURST,
+                      retries=LHB_MAX_RETRIES, backoff=LHB_RETRY_BACKOFF, fetch=None):
+    """
+    线程池并发抓取多只股票的营业部明细，所有线程共用一个令牌桶限速
+    :return: ([(code, df_detail or None)] 与 codes 顺序一致, [{'code', 'error'}] 失败清单)
+    """
+    from tqdm import tqdm
+    fetch = fetch or fetch_seat_detail
+    limiter = TokenBucket(rate, capacity=burst)
+    results = [None] * len(codes)
+    errors = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='lhb') as executor:
+        futures = {executor.submit(fetch, code, date_str, limiter, retries, backoff): i
+                   for i, code in enumerate(codes)}
+        for f in tqdm(as_completed(futures), total=len(futures), desc="Scanning Seats"):
+            i = futures[f]
+            try:
+                results[i] = f.result()
+            except Exception as e:
+                errors[i] = f"{type(e).__name__}: {e}"
+
+    failures = [{'code': codes[i], 'error': errors[i]} for i in sorted(errors)]
+    return list(zip(codes, results)), failures
+
+
+def report_scan_failures(failures, total, date_str, name_map=None):
+    """打印失败清单并落盘 lhb_scan_failures_YYYYMMDD.csv (无失败时删除旧文件)"""
+    file_path = os.path.join(LHB_DIR, f"lhb_scan_failures_{date_str}.csv")
+    if not failures:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        return
+    name_map = name_map or {}
+    print(f"{Fore.RED}⚠️ 深度扫描失败 {len(failures)}/{total} 只 (重试后仍失败，席位数据不完整):")
+    for f in failures:
+        print(f"   ❌ {f['code']} {name_map.get(f['code'], '')}: {f['error']}")
+    rows = [{'代码': f['code'], '名称': name_map.get(f['code'], ''), '错误': f['error']} for f in failures]
+    pd.DataFrame(rows).to_csv(file_path, index=False, encoding='utf-8-sig')
+    print(f"   📄 失败清单: {file_path}")
+
+
+def _branch_col(df):
+    """营业部名称 (为空时退回 交易营业部名称)，口径同原先的 row.get(...) or row.get(...)"""
+    fallback = df['交易营业部名称'] if '交易营业部名称' in df.columns else [''] * len(df)
+    primary = df['营业部名称'] if '营业部名称' in df.columns else [None] * len(df)
+    return [str(p or f).strip() for p, f in zip(primary, fallback)]
+
+
+def _amount_col(df, col):
+    """金额列 -> float ndarray；缺列或无法解析的值记 0"""
+    if col not in df.columns:
+        return np.zeros(len(df))
+    raw = df[col]
+    num = pd.to_numeric(raw, errors='coerce')
+    return num.where(num.notna() | raw.isna(), 0.0).to_numpy(dtype=np.float64)
+
+
+def seat_hits(details, name_map, seats=None):
+    """
+    [(code, df_detail)] -> 知名游资命中记录 {游资标签, 营业部名称, 股票代码, 股票名称, 操作, 买入金额, 卖出金额, 榜单标签}
+    顺序: 股票 (details 顺序) -> 明细行 -> 标签 (FAMOUS_SEATS 顺序)；同一营业部可命中多个标签
+    """
+    frames = []
+    for code, df_detail in details:
+        if df_detail is None or df_detail.empty: continue
+
+        # Check columns to ensure we access correctly
+        # Expected: 营业部名称, 买入金额, 卖出金额 (values usually in float or string)
+        try:
+            lhb_type = df_detail['类型'].astype(str).tolist() if '类型' in df_detail.columns else [''] * len(df_detail)
+            frames.append(pd.DataFrame({
+                '营业部名称': _branch_col(df_detail),
+                '股票代码': code,
+                '类型': lhb_type,
+                '买入金额': _amount_col(df_detail, '买入金额'),
+                '卖出金额': _amount_col(df_detail, '卖出金额'),
+            }))
+        except Exception as e:
+            # print(f"Error scanning {code}: {e}")
+            continue
+    if not frames:
+        return []
+
+    rows = pd.concat(frames, ignore_index=True)
+    matcher = load_matcher(seats or FAMOUS_SEATS)
+    rows['游资标签'] = matcher.match(rows['营业部名称'])
+    rows = rows.explode('游资标签').dropna(subset=['游资标签']).reset_index(drop=True)
+    if rows.empty:
+        return []
+
+    # 解析榜单类型 (日榜 vs 3日榜)；严重异常波动 usually covers longer period (e.g. 10 days)
+    lhb_type = rows['类型']
+    rows['榜单标签'] = np.select(
+        [lhb_type.str.contains('三', regex=False) | lhb_type.str.contains('3', regex=False),
+         lhb_type.str.contains('严重', regex=False)],
+        ['3日', '严重异动'], '日')
+
+    # 阈值调整: 避免微量买入被误判为做T
+    buy, sell = rows['买入金额'].to_numpy(), rows['卖出金额'].to_numpy()
+    is_buy_sig = buy > 100000   # 10万
+    is_sell_sig = sell > 100000 # 10万
+    both = is_buy_sig & is_sell_sig
+    rows['操作'] = np.select(
+        [is_buy_sig & ~is_sell_sig,
+         is_sell_sig & ~is_buy_sig,
+         both & (buy > sell * 5),   # 买入远大于卖出
+         both & (sell > buy * 5),   # 卖出远大于买入 (如 陈小群卖雷科 1.1亿 vs 买 200万)
+         both],                     # 双向都有且相当
+        ['买入', '卖出', '买入', '卖出', '做T'], '观望')
+
+    rows['股票名称'] = rows['股票代码'].map(name_map)
+    cols = ['游资标签', '营业部名称', '股票代码', '股票名称', '操作', '买入金额', '卖出金额', '榜单标签']
+    return rows[cols].to_dict('records')
+
+
 def fetch_famous_seats(date_str=None):
     """
     获取知名游资活跃数据 (通过遍历当日龙虎榜标的详情)
@@ -115,279 +270,37 @@ def fetch_famous_seats(date_str=None):
         codes = df_lhb['代码'].unique().tolist()
         print(f"   📋 待扫描标的: {len(codes)} 只")
         
-        hits = [] # {游资, 营业部, 股票, 操作, 金额}
-        
-        from tqdm import tqdm
-        for code in tqdm(codes, desc="Scanning Seats"):
-            try:
-                # 获取个股详情
-                # stock_lhb_stock_detail_em: 东方财富-个股龙虎榜详情
-                # Fix: Must fetch both '买入' and '卖出' lists to get complete data
-                try:
-                    df_buy = ak.stock_lhb_stock_detail_em(symbol=code, date=date_str, flag="买入")
-                    df_sell = ak.stock_lhb_stock_detail_em(symbol=code, date=date_str, flag="卖出")
-                    
-                    df_detail = pd.concat([df_buy, df_sell], ignore_index=True)
-                    # Deduplicate based on Branch and Type (as one branch might appear in multiple list types, e.g., 3-day and 1-day)
-                    # But merging duplicates with same values is fine. 
-                    # Warning: valid to have same branch in 1-day AND 3-day list (different '类型'). 
-                    # If same branch/type appears in buy and sell list, it is identical.
-                    df_detail = df_detail.drop_duplicates(subset=['交易营业部名称', '类型'])
-                    
-                except Exception as e:
-                    # print(f"Error fetching detail for {code}: {e}")
-                    continue
-
-                if df_detail.empty: continue
-                
-                # Check columns to ensure we access correctly
-                # Expected: 营业部名称, 买入金额, 卖出金额 (values usually in float or string)
-                if code == "002413":
-                    print(f"DEBUG {code} COLUMNS:", df_detail.columns.tolist())
-                    print(df_detail.head(2)) 
-                
-                stock_name = df_lhb[df_lhb['代码'] == code]['名称'].values[0]
-                
-                for _, row in df_detail.iterrows():
-                    # Column name might be '营业部名称' or '交易营业部名称'
-                    branch = str(row.get('营业部名称') or row.get('交易营业部名称', ''))
-                    branch = branch.strip()
-                    
-                    # Amt might be string with commas
-                    try:
-                        buy_amt = float(row.get('买入金额', 0))
-                    except: buy_amt = 0
-                    
-                    try:
-                        sell_amt = float(row.get('卖出金额', 0))
-                    except: sell_amt = 0
-                    
-                    # 匹配知名游资
-                    for label, keywords in FAMOUS_SEATS.items():
-                        for kw in keywords:
-                            if kw in branch:
-                                # 命中
-                                action_type = "观望"
-                                
-                                # 解析榜单类型 (日榜 vs 3日榜)
-                                lhb_type = row.get('类型', '')
-                                time_tag = "日" # Default
-                                if "三" in lhb_type or "3" in lhb_type:
-                                    time_tag = "3日"
-                                elif "严重" in lhb_type: # 严重异常波动 usually covers longer period (e.g. 10 days) or specific check
-                                    time_tag = "严重异动"
-                                
-                                # 阈值调整: 避免微量买入被误判为做T
-                                # 1. 显著性判断
-                                is_buy_sig = buy_amt > 100000  # 10万
-                                is_sell_sig = sell_amt > 100000 # 10万
-                                
-                                if is_buy_sig and not is_sell_sig:
-                                    action_type = "买入"
-                                elif is_sell_sig and not is_buy_sig:
-                                    action_type = "卖出"
-                                elif is_buy_sig and is_sell_sig:
-                                    # 双向都有，看比例
-                                    if buy_amt > sell_amt * 5:
-                                        action_type = "买入" # 买入远大于卖出
-                                    elif sell_amt > buy_amt * 5:
-                                        action_type = "卖出" # 卖出远大于买入 (如 陈小群卖雷科 1.1亿 vs 买 200万)
-                                    else:
-                                        action_type = "做T"
-                                else:
-                                    action_type = "观望"
-                                
-                                hits.append({
-                                    '游资标签': label,
-                                    '营业部名称': branch,
-                                    '股票代码': code,
-                                    '股票名称': stock_name,
-                                    '操作': action_type,
-                                    '买入金额': buy_amt,
-                                    '卖出金额': sell_amt,
-                                    '榜单标签': time_tag
-                                })
-                                break # Match one label only
-            except Exception as e:
-                # print(f"Error scanning {code}: {e}")
-                continue
+        name_map = dict(zip(*df_lhb.drop_duplicates('代码')[['代码', '名称']].to_numpy().T))
+
+        # 并发抓取 (限速 + 重试)，结果按 codes 原顺序返回，失败单独汇报
+        t0 = time.perf_counter()
+        details, failures = scan_seat_details(codes, date_str)
+        print(f"   ⏱️ 明细抓取耗时 {time.perf_counter() - t0:.1f}s "
+              f"(并发 {LHB_SCAN_WORKERS}, 限速 {LHB_RATE_LIMIT:g} 次/秒)")
+        report_scan_failures(failures, len(codes), date_str, name_map)
+
+        # 席位识别: 明细整列拼接后用编译好的关键词自动机一次匹配
+        hits = seat_hits(details, name_map)
+        print(f"   🎯 命中知名席位 {len(hits)} 条")
                 
-        # --- Locking Position Detection (Suocang) ---
-        # Logic: If (Seat, Stock) in Yesterday's Famous Buy List AND Stock in Today's LHB AND Seat NOT in Today's Sell List -> Locked
-        
+        # --- 入库 + 锁仓/加仓 (Suocang) ---
+        # 前 LHB_HOLD_WINDOW 个上榜日买入 (或已锁仓) 且今日仍在榜:
+        #   该游资今日未上榜 -> 锁仓；今日只买不卖 -> 加仓；今日卖出/做T -> 已离场
+        db = SeatDB()
+        db.record_day(date_str, hits)
         try:
-            # 1. Find previous famous file
-            # Simple lookback for now
-            import datetime as dt
-            curr_date = datetime.strptime(date_str, "%Y%m%d")
-            prev_file = None
-            for i in range(1, 5): # Check back 4 days for previous trading day
-                prev_d_str = (curr_date - dt.timedelta(days=i)).strftime("%Y%m%d")
-                p_path = os.path.join(LHB_DIR, f"lhb_famous_{prev_d_str}.csv")
-                if os.path.exists(p_path):
-                    prev_file = p_path
-                    print(f"   🔍 对比昨日数据: {prev_d_str}")
-                    break
-            
-            if prev_file:
-                df_prev = pd.read_csv(prev_file)
-                # Prepare today's sell set: {(Label, Stock)}
-                today_sell_set = set()
-                for h in hits:
-                    if "卖" in h['操作'] or "做T" in h['操作']:
-                        today_sell_set.add((h['游资标签'], h['股票名称']))
-                
-                # Check previous buys
-                for _, row in df_prev.iterrows():
-                    p_label = row['游资标签']
-                    p_buys = str(row['买入股票'])
-                    if pd.isna(p_buys) or not p_buys.strip(): continue
-                    
-                    # Buy string might be "StockA StockB(1.2亿)"
-                    import re
-                    # Extract stock names from "StockA(1亿) StockB"
-                    # Simple split by space
-                    p_stocks_raw = p_buys.split(' ')
-                    for s_raw in p_stocks_raw:
-                        if not s_raw: continue
-                        # Remove amount info like (1.2亿)
-                        s_name = re.sub(r'\(.*?\)', '', s_raw)
-                        s_name = s_name.strip()
-                        
-                        # Check if this stock is in TODAY'S LHB List (df_lhb)
-                        if s_name in df_lhb['名称'].values:
-                            # Start check
-                            has_sold = (p_label, s_name) in today_sell_set
-                            has_bought_today = False
-                            for h in hits:
-                                if h['游资标签'] == p_label and h['股票名称'] == s_name and ("买" in h['操作'] or "做T" in h['操作']):
-                                    has_bought_today = True
-                                    
-                            if not has_sold:
-                                status = "🔒 锁仓"
-                                if has_bought_today:
-                                    status = "➕ 加仓" # Bought and didn't sell
-                                
-                                already_recorded = False
-                                for h in hits:
-                                    if h['游资标签'] == p_label and h['股票名称'] == s_name:
-                                        # Update existing hit special status if needed, but easier to just skip adding duplicative "Lock" entry
-                                        # Only add if completely missing from today's active list
-                                        already_recorded = True 
-                                        break
-                                        
-                                if not already_recorded:
-                                    hits.append({
-                                        '游资标签': p_label,
-                                        '营业部名称': f"{p_label}席位(推测)",
-                                        '股票代码': "", 
-                                        '股票名称': s_name,
-                                        '操作': status,
-                                        '买入金额': 0,
-                                        '卖出金额': 0,
-                                        '榜单标签': "日" # Lock means checking against today's status, usually implies keeping daily position
-                                    })
+            prev_dates = db.dates(before=date_str, limit=LHB_HOLD_WINDOW)
+            if prev_dates:
+                print(f"   🔍 对比前 {len(prev_dates)} 个上榜日: {', '.join(sorted(prev_dates))}")
+            marks = db.derive_status(date_str, codes, name_map, window=LHB_HOLD_WINDOW)
+            if marks:
+                print(f"   🔒 锁仓/加仓 {len(marks)} 条")
         except Exception as e:
             print(f"Error checking locks: {e}")
 
-        # 整理输出
-        if hits:
-            # Aggregation v2:
-            # 1. Group by (Label, Branch, Stock, Tag) -> Take MAX amounts (Dedup 1-day/3-day for same branch IF SAME TAG)
-            # 2. Group by (Label, Stock, Tag) -> SUM amounts (Combine multiple branches for same investor)
-            
-            # Step 1: Branch Level Max (Per Tag)
-            # If a branch appears in Daily list, we take its max for Daily.
-            # If it appears in 3-Day list, we take its max for 3-Day.
-            branch_map = {} # (Label, Branch, Stock, Tag) -> {'buy': max_b, 'sell': max_s, 'status': s}
-            
-            for h in hits:
-                lbs_key = (h['游资标签'], h['营业部名称'], h['股票名称'].strip(), h['榜单标签'])
-                if lbs_key not in branch_map:
-                    branch_map[lbs_key] = {'buy': 0, 'sell': 0, 'special_status': None}
-                
-                curr = branch_map[lbs_key]
-                curr['buy'] = max(curr['buy'], h['买入金额'])
-                curr['sell'] = max(curr['sell'], h['卖出金额'])
-                if "锁仓" in h['操作'] or "加仓" in h['操作']:
-                    curr['special_status'] = h['操作']
-
-            # Step 2: Investor Level Sum (Per Tag)
-            final_map = {} # (Label) -> { (Stock, Tag): {'buy': sum_b, 'sell': sum_s, 'status': ...} }
-            
-            for (label, branch, stock, tag), vals in branch_map.items():
-                if label not in final_map: final_map[label] = {}
-                st_key = (stock, tag)
-                if st_key not in final_map[label]: final_map[label][st_key] = {'buy': 0, 'sell': 0, 'statuses': set()}
-                
-                f_curr = final_map[label][st_key]
-                f_curr['buy'] += vals['buy']
-                f_curr['sell'] += vals['sell']
-                if vals['special_status']:
-                    f_curr['statuses'].add(vals['special_status'])
-            
-            # Step 3: Format Rows
-            final_rows = []
-            for label, item_dict in final_map.items():
-                buy_strs = []
-                sell_strs = []
-                
-                # Sort items: First by Stock Name, then by Tag (Daily before 3-Day)
-                # item_dict keys are (Stock, Tag)
-                sorted_keys = sorted(item_dict.keys(), key=lambda x: (x[0], x[1] != '日')) # '日' comes first
-                
-                for s_name, tag in sorted_keys:
-                    vals = item_dict[(s_name, tag)]
-                    b_amt = vals['buy']
-                    s_amt = vals['sell']
-                    
-                    s_display = s_name
-                    # Append Tag if not '日'
-                    if tag != '日':
-                        s_display += f"/{tag}"
-                        
-                    if vals['statuses']:
-                        # prioritizing Lock status display
-                        status_str = "/".join(list(vals['statuses']))
-                        s_display = f"{s_display}({status_str})"
-                    
-                    # Formatting check: Show if Buy > 100k OR if "Lock" status (even if buy=0)
-                    has_buy_sig = b_amt > 100000
-                    has_sell_sig = s_amt > 100000
-                    is_special = len(vals['statuses']) > 0
-                    
-                    if has_buy_sig or (is_special and "锁仓" not in str(vals['statuses'])): 
-                        amt_str = ""
-                        if b_amt > 100000:
-                            amt_str = f"({b_amt/10000:.0f}万)"
-                            if b_amt > 100000000:
-                                amt_str = f"({b_amt/100000000:.1f}亿)"
-                        
-                        buy_strs.append(f"{s_display}{amt_str}")
-
-                    elif is_special and "锁仓" in str(vals['statuses']):
-                        buy_strs.append(f"{s_display}")
-
-                    if has_sell_sig:
-                        amt_str = f"({s_amt/10000:.0f}万)"
-                        if s_amt > 100000000:
-                            amt_str = f"({s_amt/100000000:.1f}亿)"
-                        sell_strs.append(f"{s_display}{amt_str}")
-
-                if not buy_strs and not sell_strs:
-                    continue
-                
-                final_rows.append({
-                    '游资标签': label,
-                    '营业部名称': "多席位/聚合", 
-                    '买入股票': " ".join(buy_strs),
-                    '卖出股票': " ".join(sell_strs),
-                    '上榜次数': len(buy_strs) + len(sell_strs)
-                })
-
-            # Sort by Label
-            final_rows.sort(key=lambda x: x['游资标签'])
-            
+        # 整理输出 (lhb_famous_*.csv 由库内当日数据聚合生成)
+        final_rows = famous_rows(db.summary(date_str))
+        if final_rows:
             df_res = pd.DataFrame(final_rows)
             file_path = os.path.join(LHB_DIR, f"lhb_famous_{date_str}.csv")
             df_res.to_csv(file_path, index=False, encoding='utf-8-sig')
@@ -489,29 +402,9 @@ def get_recent_trade_dates(days=5):
     """
     获取最近 N 个交易日 (包括今天如果今天也是交易日)
     返回格式: ['20230101', '20230102', ...] (从旧到新)
+    交易日历走本地缓存 (src.utils.trade_calendar)，不再每次运行都下载
     """
-    try:
-        # fetch trade dates
-        df = ak.tool_trade_date_hist_sina()
-        df['trade_date'] = pd.to_datetime(df['trade_date'])
-        
-        today = datetime.now().date()
-        # Filter dates <= today
-        past_dates = df[df['trade_date'].dt.date <= today]
-        
-        if past_dates.empty:
-            return [today.strftime("%Y%m%d")]
-
-        # Get last N dates
-        recent = past_dates.iloc[-days:]['trade_date'].dt.strftime("%Y%m%d").tolist()
-        return recent
-    except Exception as e:
-        print(f"{Fore.RED}⚠️ 获取交易日历失败: {e}")
-        # Fallback: return today and yesterday
-        today_str = datetime.now().strftime("%Y%m%d")
-        from datetime import timedelta
-        yest_str = (datetime.now() - timedelta(days=1)).strftime("%Y%m%d")
-        return [yest_str, today_str]
+    return trade_calendar.last_n(days)
 
 if __name__ == "__main__":
     # 智能查找最近的龙虎榜数据
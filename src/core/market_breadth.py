@@ -0,0 +1,137 @@
+# src/core/market_breadth.py
+# ==============================================================================
+# 市场宽度/情绪统计引擎
+# 今日/昨日全市场数据各建一张以代码为索引的表，按代码对齐后一次性算出：
+# 涨跌停家数、连板高度、昨日涨停溢价 (开盘/收盘)、各高度晋级率、炸板率、涨跌幅分布。
+# 结果并入 market_sentiment_YYYYMMDD.json。
+# ==============================================================================
+import numpy as np
+import pandas as pd
+
+# 口径与原 calculate_market_stats 一致 (不区分主板/创业板的简化阈值)
+LIMIT_UP_PCT = 9.8
+LIMIT_DOWN_PCT = -9.0
+
+# 涨跌幅分布: 负区间左闭右开，正区间左开右闭，0 单独一档
+_NEG_EDGES = [-9.0, -7.0, -5.0, -3.0, 0.0]
+_POS_EDGES = [0.0, 3.0, 5.0, 7.0, LIMIT_UP_PCT]
+HIST_LABELS = ['<-9%', '-9~-7%', '-7~-5%', '-5~-3%', '-3~0%', '0%',
+               '0~3%', '3~5%', '5~7%', '7~9.8%', '>9.8%']
+
+_FRAME_DEFAULTS = {
+    'name': '',
+    'today_pct': 0.0,
+    'open_pct': 0.0,
+    'limit_days': 0,
+    'open_num': 0,
+    'is_zt': False,
+    'tag': '',
+}
+
+
+def market_frame(data):
+    """
+    get_merged_data 的列表 / load_yesterday_ths_data 的 {code: item} -> 以代码为索引的 DataFrame
+    代码重复时保留第一条 (与原先 next(...) 线性查找的结果一致)
+    """
+    records = list(data.values()) if isinstance(data, dict) else list(data)
+    raw = pd.DataFrame(records)
+    if raw.empty or 'code' not in raw.columns:
+        return pd.DataFrame({k: pd.Series(dtype=type(v)) for k, v in _FRAME_DEFAULTS.items()},
+                            index=pd.Index([], name='code', dtype=object))
+
+    cols = {}
+    for col, default in _FRAME_DEFAULTS.items():
+        if col in raw.columns:
+            s = raw[col]
+            s = s.where(s.notna(), default) if s.dtype == object else s.fillna(default)
+        else:
+            s = pd.Series(default, index=raw.index)
+        cols[col] = s.astype(type(default))
+    df = pd.DataFrame(cols)
+    df.index = pd.Index(raw['code'].astype(str), name='code')
+    return df[~df.index.duplicated(keep='first')]
+
+
+def _not_st(frame):
+    return ~frame['name'].str.upper().str.contains('ST', regex=False).to_numpy(dtype=bool)
+
+
+def _mean(values):
+    return round(float(values.mean()), 2) if len(values) else 0
+
+
+def breadth_histogram(pct):
+    """涨跌幅分布 {档位: 家数}，档位见 HIST_LABELS"""
+    pct = np.asarray(pct, dtype=np.float64)
+    bins = np.where(pct < 0,
+                    np.searchsorted(_NEG_EDGES, pct, side='right'),
+                    len(_NEG_EDGES) + np.searchsorted(_POS_EDGES, pct, side='left'))
+    counts = np.bincount(bins, minlength=len(HIST_LABELS))
+    return dict(zip(HIST_LABELS, counts.tolist()))
+
+
+def promotion_rates(yest, today_zt):
+    """
+    昨日各高度涨停 -> 今日继续涨停的比例
+    yest: 昨日表 (已剔除 ST)；today_zt: 以代码为索引的今日涨停 bool Series
+    返回 {'1进2': {'count': 昨日家数, 'promoted': 晋级家数, 'rate': 百分比}, ...}
+    """
+    zt = yest[yest['is_zt']]
+    if zt.empty:
+        return {}
+    # 首板在导出里连板数可能为 0，按 1 板计
+    height = np.maximum(zt['limit_days'].to_numpy(dtype=np.int64), 1)
+    promoted = today_zt.reindex(zt.index, fill_value=False).to_numpy(dtype=bool)
+
+    heights = np.unique(height)
+    count = np.bincount(height)[heights]
+    hit = np.bincount(height, weights=promoted.astype(np.float64))[heights].astype(np.int64)
+    return {
+        f"{h}进{h + 1}": {'count': int(n), 'promoted': int(k), 'rate': round(k / n * 100, 2)}
+        for h, n, k in zip(heights.tolist(), count.tolist(), hit.tolist())
+    }
+
+
+def compute_market_stats(today, yesterday):
+    """
+    today / yesterday: market_frame 的结果 (或可被 market_frame 接受的原始数据)
+    返回可直接并入 market_sentiment JSON 的 dict
+    """
+    if not isinstance(today, pd.DataFrame):
+        today = market_frame(today)
+    if not isinstance(yesterday, pd.DataFrame):
+        yesterday = market_frame(yesterday)
+
+    stats = {}
+
+    # --- 1. 涨跌停家数 / 连板高度 (非 ST) ---
+    t = today[_not_st(today)]
+    pct = t['today_pct'].to_numpy(dtype=np.float64)
+    is_up = pct > LIMIT_UP_PCT
+    stats['limit_up_count'] = int(is_up.sum())
+    stats['limit_down_count'] = int((pct < LIMIT_DOWN_PCT).sum())
+    stats['highest_space'] = int(max(t['limit_days'].max(), 0)) if len(t) else 0
+
+    # --- 2. 昨日涨停溢价 (按代码对齐，ST 不剔除，与原口径一致) ---
+    yest_zt = yesterday.index[yesterday['is_zt'].to_numpy(dtype=bool)]
+    hit = today.reindex(yest_zt).dropna(subset=['today_pct'])
+    stats['yesterday_limit_up_premium'] = _mean(hit['open_pct'])
+    stats['yesterday_limit_up_premium_close'] = _mean(hit['today_pct'])
+
+    # --- 3. 连板晋级率 (非 ST) ---
+    today_zt = pd.Series(is_up | t['is_zt'].to_numpy(dtype=bool), index=t.index)
+    stats['promotion_rates'] = promotion_rates(yesterday[_not_st(yesterday)], today_zt)
+
+    # --- 4. 炸板率 = 炸板 / (涨停 + 炸板) ---
+    # 炸板: 导出里的 开板次数 (open_num，_parse_ths_csv 读入) > 0，或 zbgc 炸板池给的 炸板 标签
+    # (没有 开板次数 列的导出 open_num 为 0，只靠标签)
+    zhaban = ~today_zt.to_numpy() & ((t['open_num'].to_numpy() > 0)
+                                      | t['tag'].str.contains('炸板', regex=False).to_numpy(dtype=bool))
+    touched = int(today_zt.sum()) + int(zhaban.sum())
+    stats['zhaban_count'] = int(zhaban.sum())
+    stats['zhaban_rate'] = round(zhaban.sum() / touched * 100, 2) if touched else 0
+
+    # --- 5. 涨跌幅分布 ---
+    stats['breadth_histogram'] = breadth_histogram(pct)
+    return stats
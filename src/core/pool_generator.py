@@ -3,6 +3,7 @@
 # Version: 1.2 | Last Modified: 2026-01-13
 # Update: 集成筹码结构分析 (Chip Analysis)
 # ==============================================================================
+import numpy as np
 import pandas as pd
 import os
 import shutil
@@ -18,15 +19,16 @@ sys.path.append(current_dir)
 
 from data_loader import get_merged_data, load_yesterday_ths_data
 from market_data import MarketDataManager
+from market_breadth import compute_market_stats, market_frame
 
 # Add project root to path for strategies import if needed
 # But assume standard import works if we fix the paths later or relies on existing sys.path
 try:
-    from strategies.f_lao_model import load_ths_history, check_fen_jue
+    from strategies.f_lao_model import fen_jue_tag_matrix, fen_jue_tags
 except ImportError:
     # Fallback if run from different dir
     sys.path.append(os.path.join(os.path.dirname(os.path.dirname(current_dir)), 'src')) 
-    from strategies.f_lao_model import load_ths_history, check_fen_jue
+    from strategies.f_lao_model import fen_jue_tag_matrix, fen_jue_tags
 # --------------
 
 init(autoreset=True)
@@ -36,17 +38,24 @@ init(autoreset=True)
 PROJECT_ROOT = os.path.dirname(os.path.dirname(current_dir))
 sys.path.append(PROJECT_ROOT) # Fix import src issue
 
+from src.utils.dataset_registry import registry as dataset_registry
+from src.utils.normalize import to_records
+from src.utils import kline_store
+from src.utils import seat_db
+
 # --- 导入筹码分析模块 ---
 # 假设 chip_analyzer.py 放在 src/tools/ 下
 try:
     sys.path.append(os.path.join(PROJECT_ROOT, 'src')) 
-    from tools.chip_analyzer import get_chip_metrics, generate_chip_tag
+    from tools.chip_analyzer import generate_chip_tag, analyze_chips, format_chip_stats, ChipStateStore
     print(f"{Fore.GREEN}✅ 筹码分析模块加载成功")
 except ImportError as e:
     print(f"{Fore.YELLOW}⚠️ 筹码分析模块加载失败: {e} (将跳过筹码分析)")
     # 定义空函数防止报错
-    def get_chip_metrics(*args): return None
     def generate_chip_tag(*args): return ""
+    def analyze_chips(codes, **kwargs): return {}, None
+    def format_chip_stats(stats): return "筹码分析已跳过"
+    def ChipStateStore(*args, **kwargs): return None
 
 OUTPUT_DIR = os.path.join(PROJECT_ROOT, 'data', 'output')
 ARCHIVE_DIR = os.path.join(OUTPUT_DIR, 'archive')
@@ -71,6 +80,14 @@ LINK_DRAGON_MAP = {
     '002009': '002931',
 }
 
+# 筹码分析并发配置 (日线走本地 kline_store，每只每天最多联网一次)
+CHIP_MAX_WORKERS = 8         # 并发请求数
+CHIP_REQUEST_TIMEOUT = 15.0  # 单次请求超时 (秒)
+CHIP_MAX_RETRIES = 2         # 失败重试次数
+CHIP_RETRY_BACKOFF = 1.0     # 重试退避基数 (秒，指数递增)
+# 每只股票的筹码状态 (最近120日K线 + 筹码剩余量)，次日只拉新K线增量更新
+CHIP_STATE_DIR = os.path.join(PROJECT_ROOT, 'data', '.cache', 'chips')
+
 
 # ================= 2. 辅助函数 =================
 
@@ -176,7 +193,19 @@ def load_lhb_info():
             print(f"{Fore.RED}❌ LHB加载失败: {e}")
 
     seat_map = {}
-    if os.path.exists(seat_path):
+    # 优先从席位库生成 (结构化数据，不用再解析 "股票(1亿)" 字符串)；库不存在时回退读 CSV
+    seat_date = None
+    if os.path.exists(seat_db.DEFAULT_DB_PATH):
+        try:
+            db = seat_db.SeatDB()
+            seat_date = db.latest_date()
+            if seat_date:
+                seat_map = seat_db.seat_tags(db.summary(seat_date))
+        except Exception as e:
+            print(f"{Fore.RED}❌ 席位库读取失败: {e}")
+            seat_date = None
+
+    if seat_date is None and os.path.exists(seat_path):
          try:
              df = pd.read_csv(seat_path, dtype=str)
              import re
@@ -304,15 +333,9 @@ def get_unique_concepts(base_str, new_concepts_str):
 
 
 def get_core_concepts_local(name, raw_tag):
-    """本地提取核心概念"""
-    matched = set()
+    """本地提取核心概念 (按 CORE_KEYWORDS 顺序，结果稳定)"""
     source_text = f"{name} {raw_tag}"
-
-    for key in CORE_KEYWORDS:
-        if key in source_text:
-            matched.add(key)
-
-    return "/".join(list(matched))
+    return "/".join(key for key in CORE_KEYWORDS if key in source_text)
 
 
 
@@ -321,55 +344,14 @@ def get_core_concepts_local(name, raw_tag):
 
 def calculate_market_stats(all_data, yesterday_data):
     """
-    计算: 
-    1. 涨跌停家数 (非ST)
-    2. 昨日涨停溢价
-    3. 连板高度
+    计算 (market_breadth 按代码对齐一次算完):
+    1. 涨跌停家数 (非ST) / 连板高度
+    2. 昨日涨停溢价 (开盘/收盘)
+    3. 各高度晋级率 / 炸板率 / 涨跌幅分布
     
     * 板块涨幅/资金流向数据现在由 MarketDataManager 直接读取 ths 文件提供
     """
-    stats = {}
-    
-    # --- 1. Limit Up/Down Counts ---
-    limit_up = 0
-    limit_down = 0
-    max_height = 0
-    
-    for item in all_data:
-        name = item['name']
-        if 'ST' in name.upper(): continue
-        
-        pct = item.get('today_pct', 0)
-        
-        # Simple ZT/DT check (approximate)
-        if pct > 9.8: limit_up += 1
-        if pct < -9.0: limit_down += 1
-        
-        h = item.get('limit_days', 0)
-        if h > max_height: max_height = h
-        
-    stats['limit_up_count'] = limit_up
-    stats['limit_down_count'] = limit_down
-    stats['highest_space'] = max_height
-    
-    # --- 2. Yesterday ZT Premium ---
-    # Find stocks that were ZT yesterday
-    yest_zt_codes = [c for c, v in yesterday_data.items() if v.get('is_zt')]
-    
-    total_premium = 0
-    valid_premium_count = 0
-    for c in yest_zt_codes:
-        # Check current performance
-        # need to find item in all_data by code
-        curr = next((x for x in all_data if x['code'] == c), None)
-        if curr:
-            total_premium += curr.get('open_pct', 0)
-            valid_premium_count += 1
-            
-    avg_premium = round(total_premium / valid_premium_count, 2) if valid_premium_count > 0 else 0
-    stats['yesterday_limit_up_premium'] = avg_premium
-    
-    return stats
+    return compute_market_stats(market_frame(all_data), market_frame(yesterday_data))
 
 
 def check_special_shape(item):
@@ -403,6 +385,199 @@ def check_special_shape(item):
 
 
 
+# ================= 2.5 选股规则表 =================
+# 每条规则: (标签列名, 是否计入入选, 规则函数)
+#   规则函数 fn(u, ctx) -> (mask, tags)
+#   u: 全市场 DataFrame (一行一只)，ctx: 当日加载好的各类名单
+#   mask: 命中的行 (bool Series)；tags: 标量字符串 / 与 u 对齐的 Series (值为 str 或 list)，None 表示只入选不打标签
+# 表中顺序即最终 tag 的拼接顺序。新增规则只需在表里加一行，不会多一次逐只循环。
+
+def _seat_sort_key(t):
+    # Sort order: Lock/Add (🔒/➕) > Buy (💰) > Sell (🏃)
+    if t.startswith("🔒") or t.startswith("➕"): return 0
+    if t.startswith("💰"): return 1
+    if t.startswith("🏃"): return 2
+    return 3
+
+
+def rule_manual(u, ctx):
+    """持仓 / F佬关注 (关注名单只有几十只，逐只清洗手动备注)"""
+    base_focus, holdings_map, f_lao_map = ctx['base_focus'], ctx['holdings_map'], ctx['f_lao_map']
+    mask = u['code'].isin(base_focus.keys())
+    tags = pd.Series('', index=u.index, dtype=object)
+    for idx, code, name, is_zt in zip(u.index[mask], u['code'][mask], u['name'][mask], u['is_zt'][mask]):
+        if code in HOLDING_STRATEGIES:
+            # 特殊策略，直接使用
+            tags[idx] = HOLDING_STRATEGIES[code][0]
+        elif code in holdings_map:
+            tags[idx] = f"持仓/{name}"
+        else:
+            # F佬关注 - 进行深度清洗 (有涨停状态时移除过时板数)
+            cleaned_note = clean_manual_tag(f_lao_map[code], is_zt)
+            tags[idx] = f"F佬/{cleaned_note}" if cleaned_note != "关注" else "F佬/关注"
+    return mask, tags
+
+
+def rule_lhb(u, ctx):
+    return u['code'].isin(ctx['lhb_codes']), "🐉龙虎榜"
+
+
+def rule_seats(u, ctx):
+    # 游资标签 (load_lhb_info 已去重)
+    seat_tags = {n: sorted(list(tags), key=_seat_sort_key) for n, tags in ctx['lhb_seat_map'].items()}
+    mask = u['name'].isin(seat_tags.keys())
+    return mask, u['name'].map(seat_tags)
+
+
+def rule_popular(u, ctx):
+    """辨识度/人气: 手动人气股 / 3连板以上高标 / 成交额>=20亿 (板数后面会自动加，这里不重复加)"""
+    manual = ctx['manual_recognition_map']
+    mask = (u['code'].isin(manual.keys()) | u['name'].isin(manual.keys())
+            | (u['limit_days'] >= 3) | (u['amount'] >= 20_0000_0000))
+    return mask, "★人气"
+
+
+def rule_popular_amount(u, ctx):
+    return u['amount'] >= 20_0000_0000, "成交"
+
+
+def rule_broken_rebound(u, ctx):
+    """断板反包: 昨日在炸板池 + 今日收红 (成交额放大标注爆量)"""
+    yest_amt = u['code'].map({c: v['amount'] for c, v in ctx['broken_pool_map'].items()})
+    mask = yest_amt.notna() & (u['pct'] > 0)
+    boom = (yest_amt > 10000) & (u['amount'] > yest_amt)
+    return mask, pd.Series(np.where(boom, "🔥断板反包/爆量", "🔥断板反包"), index=u.index)
+
+
+def rule_fen_jue(u, ctx):
+    tags = u['code'].map(ctx['fen_jue_map'])
+    return tags.notna(), tags
+
+
+def rule_zt(u, ctx):
+    limit_days = u['limit_days'] + 1
+    tag = pd.Series(np.where(limit_days > 1, limit_days.astype(str) + "板", "首板"), index=u.index)
+    tag = tag.where(u['open_num'] <= 0, tag + "/回封(炸" + u['open_num'].astype(str) + "次)")
+    tag = tag.where(~((u['open_num'] <= 0) & u['is_first_limit']), tag + "/硬板")
+    return u['is_zt'], tag
+
+
+def rule_zb(u, ctx):
+    is_zb = u['raw_tag'].str.contains("炸板", regex=False) | ((u['max_pct'] > 9.0) & (u['pct'] < 9.0))
+    return is_zb & (u['pct'] > -7.0), "👀焚诀预期/炸板"
+
+
+def rule_dt(u, ctx):
+    return u['pct'] <= -9.0, "📉跌停/博弈修复"
+
+
+def rule_big_amount(u, ctx):
+    # 大额成交 (补录，不打标签)
+    return (u['amount'] / 100000000.0 > 20.0) & (u['pct'] > 0), None
+
+
+POOL_RULES = [
+    ('manual', True, rule_manual),
+    ('lhb', True, rule_lhb),
+    ('seats', True, rule_seats),
+    ('popular', True, rule_popular),
+    ('popular_amount', False, rule_popular_amount),
+    ('broken_rebound', True, rule_broken_rebound),
+    ('fen_jue', True, rule_fen_jue),
+    ('zt', True, rule_zt),
+    ('zb', True, rule_zb),
+    ('dt', True, rule_dt),
+    ('big_amount', True, rule_big_amount),
+]
+
+
+def build_universe(all_data):
+    """get_merged_data 的结果 -> DataFrame，缺失字段按原逐只逻辑的默认值补齐"""
+    u = pd.DataFrame(all_data)
+
+    def col(name, default):
+        if name not in u.columns:
+            return pd.Series(default, index=u.index)
+        return u[name].fillna(default)
+
+    raw_tag = col('tag', '').astype(str)
+    u = pd.DataFrame({
+        'code': u['code'].astype(str),
+        'name': u['name'],
+        'pct': col('today_pct', 0),
+        'raw_is_zt': col('is_zt', False).astype(bool),
+        'limit_days': col('limit_days', 0).astype(int),
+        'open_num': col('open_num', 0).astype(int),
+        'is_first_limit': col('is_first_limit', False).astype(bool),
+        'raw_tag': raw_tag.where(~raw_tag.str.contains('nan', regex=False), ''),
+        'max_pct': col('max_pct', 0),
+        'amount': col('amount', 0),
+        'turnover': col('turnover', 0),
+        'open_pct': col('open_pct', 0),
+        'price': col('price', 0),
+        'pct_10': col('pct_10', 0),
+        'vol': col('vol', 0),
+        'vol_prev': col('vol_prev', 0),
+        'vol_ratio': col('vol_ratio', 0),
+    })
+    u['is_zt'] = u['raw_is_zt'] | (u['pct'] >= 9.8)
+    return u
+
+
+def apply_rules(u, ctx, rules=POOL_RULES):
+    """逐条规则计算 mask，返回 (是否入选, {标签列名: 标签 Series})"""
+    selected = pd.Series(False, index=u.index)
+    tag_cols = {}
+    for name, selects, fn in rules:
+        mask, tags = fn(u, ctx)
+        mask = mask.fillna(False).astype(bool)
+        if selects:
+            selected |= mask
+        if tags is None:
+            continue
+        if not isinstance(tags, pd.Series):
+            tags = pd.Series(tags, index=u.index, dtype=object)
+        tag_cols[name] = tags.where(mask, '')
+    return selected, tag_cols
+
+
+def zt_type_tags(u):
+    """板型 (同 check_special_shape，只看原始 is_zt)"""
+    kind = pd.Series(np.where(u['open_pct'] > 9.0, np.where(u['open_num'] == 0, "一字", "T字"), "换手板"),
+                     index=u.index)
+    kind = kind.where(u['open_num'] <= 5, kind + "/烂板")
+    return kind.where(u['raw_is_zt'], '')
+
+
+def concept_tags(u, manual_tags):
+    """核心概念 (按 CORE_KEYWORDS 顺序)，并剔除手动标签里已经出现过的词"""
+    text = u['name'].astype(str) + " " + u['raw_tag']
+    hits = np.column_stack([text.str.contains(key, regex=False).to_numpy(dtype=bool) for key in CORE_KEYWORDS])
+    keywords = np.array(CORE_KEYWORDS, dtype=object)
+    concepts = pd.Series(["/".join(keywords[row]) for row in hits], index=u.index, dtype=object)
+    has_manual = manual_tags != ''
+    concepts[has_manual] = [get_unique_concepts(m, c) for m, c in zip(manual_tags[has_manual], concepts[has_manual])]
+    return concepts
+
+
+def assemble_tags(columns):
+    """按规则顺序拼接所有标签列：去重 (保留首次出现) 后用 / 连接，只在最后做一次"""
+    def parts(values):
+        out = []
+        for v in values:
+            if isinstance(v, list):
+                out.extend(v)
+            elif v:
+                out.append(v)
+        return "/".join(dict.fromkeys(out))
+
+    joined = pd.Series([parts(vals) for vals in zip(*columns)], index=columns[0].index, dtype=object)
+    # 再次清理可能产生的双斜杠；确保 焚诀 关键字显眼
+    return joined.str.replace('//', '/', regex=False).str.replace("🔥断板反包", "🔥A大焚诀", regex=False)
+
+
+
+
 # ================= 3. 主生成逻辑 =================
 
 def generate_strategy_pool():
@@ -434,13 +609,18 @@ def generate_strategy_pool():
     market_loaded = md_manager.load_data()
     
     # --- F佬模型历史数据加载 (New) ---
-    print(f"{Fore.MAGENTA}� 正在加载最近5日历史数据 (for F佬模型)...")
+    print(f"{Fore.MAGENTA}� 正在计算F佬焚诀标签 (最近5日面板)...")
     ths_input_dir = os.path.join(PROJECT_ROOT, 'data', 'input', 'ths')
-    history_map = load_ths_history(ths_input_dir, days=5)
+    # 全市场一次性计算焚诀标签矩阵，循环里只做字典查找
+    fen_jue_map = fen_jue_tags(fen_jue_tag_matrix(ths_input_dir, days=5))
     
     # Calculate enhanced stats
     market_stats = calculate_market_stats(all_data, yest_full_data)
     md_manager.update_extra_stats(market_stats) # Implicitly assume MarketDataManager can hold this, or just merge into final json
+    promo = market_stats['promotion_rates'].get('1进2')
+    print(f"   📊 涨停 {market_stats['limit_up_count']} / 跌停 {market_stats['limit_down_count']} | "
+          f"炸板率 {market_stats['zhaban_rate']}% | 昨日涨停溢价 {market_stats['yesterday_limit_up_premium']}% | "
+          f"1进2 {promo['rate'] if promo else '-'}%")
     
     if market_loaded:
         print(f"   ✅ {md_manager.get_formatted_summary()}")
@@ -453,246 +633,84 @@ def generate_strategy_pool():
 
     print(f"{Fore.CYAN}📋 离线生成启动 | 数据源: {len(all_data)}条 | 持仓: {len(holdings_map)} | 关注: {len(f_lao_map)} | LHB: {len(lhb_codes)}")
 
-    pool = []
-
-    for item in all_data:
-        code = str(item['code'])
-        name = item['name']
-        pct = item.get('today_pct', 0)
-        is_holding = (code in holdings_map) # 标记是否为持仓
-
-        raw_tag_str = str(item.get('tag', ''))
-        if 'nan' in raw_tag_str: raw_tag_str = ""
-        
-        # --- 0. 全局过滤: 剔除 ST 股 ---
-        if 'ST' in name.upper():
-            continue
-
-        base_tags = []
-        is_selected = False
-        has_zt_status = False  # 是否有涨停状态
-
-        # --- 1. 涨停状态预判 ---
-        # 先判断涨停，方便后续清洗手动标签时知道是否要移除旧板数
-        is_zt = item.get('is_zt') or (pct >= 9.8)
-        zt_tag = ""
-        if is_zt:
-            has_zt_status = True
-            limit_days = item.get('limit_days', 0) + 1
-            zt_tag = f"{limit_days}板" if limit_days > 1 else "首板"
-            open_num = item.get('open_num', 0)
-            if open_num > 0:
-                zt_tag += f"/回封(炸{open_num}次)"
-            elif item.get('is_first_limit'):
-                zt_tag += "/硬板"
-
-        # --- 2. 身份判定 (持仓/关注) ---
-        manual_cleaned_tag = ""
-        if code in base_focus:
-            is_selected = True
-            if code in HOLDING_STRATEGIES:
-                # 特殊策略，直接使用
-                base_tags.append(HOLDING_STRATEGIES[code][0])
-                manual_cleaned_tag = HOLDING_STRATEGIES[code][0]  # 记录下来用于去重
-            elif code in holdings_map:
-                t = f"持仓/{name}"
-                base_tags.append(t)
-                manual_cleaned_tag = t
-            else:
-                # F佬关注 - 进行深度清洗
-                raw_note = f_lao_map[code]
-                cleaned_note = clean_manual_tag(raw_note, has_zt_status)
-
-                # 重新组装
-                final_manual = f"F佬/{cleaned_note}" if cleaned_note != "关注" else "F佬/关注"
-                base_tags.append(final_manual)
-                manual_cleaned_tag = final_manual
-                
-        # --- 2.1 龙虎榜 & 游资判定 (新增) ---
-        if code in lhb_codes:
-            is_selected = True
-            base_tags.append("🐉龙虎榜")
-        
-        if name in lhb_seat_map:
-            is_selected = True
-            # 添加游资标签 (已去重)
-            # Sort order: Lock/Add (🔒/➕) > Buy (💰) > Sell (🏃)
-            def tag_sort_key(t):
-                if t.startswith("🔒") or t.startswith("➕"): return 0
-                if t.startswith("💰"): return 1
-                if t.startswith("🏃"): return 2
-                return 3
-                
-            seat_tags = sorted(list(lhb_seat_map[name]), key=tag_sort_key)
-            base_tags.extend(seat_tags)
-        
-        # --- 2.5 辨识度/人气判定 (新增) ---
-        is_popular = False
-        pop_reasons = set()
-        
-        # A. 手动维护的人气股
-        if code in manual_recognition_map or name in manual_recognition_map:
-            is_popular = True
-            
-        # B. 自动判定：3连板以上高标
-        limit_days = item.get('limit_days', 0)
-        if limit_days >= 3:
-            is_popular = True
-            # 板数后面会自动加，这里不重复加
-            
-        # C. 自动判定：大成交额前排 (>=20亿)
-        amount_val = item.get('amount', 0)
-        if amount_val >= 20_0000_0000: # 20亿
-            is_popular = True
-            pop_reasons.add("成交") 
-        
-        if is_popular:
-            is_selected = True
-            base_tags.append("★人气")
-            if pop_reasons:
-                base_tags.extend(sorted(list(pop_reasons)))
-
-        # --- 2.6 断板反包 (新策略) ---
-        # 逻辑：昨日在炸板池 + 今日收红 (最好爆量)
-        if code in broken_pool_map:
-            # 只要是红盘，就纳入
-            if pct > 0:
-                is_selected = True
-                
-                # 计算是否爆量
-                yest_amt = broken_pool_map[code]['amount']
-                curr_amt = item.get('amount', 0)
-                
-                label = "🔥断板反包"
-                if yest_amt > 10000 and curr_amt > yest_amt: # 简单判断成交额增加
-                     label += "/爆量"
-                
-                base_tags.append(label)
-
-        # --- 2.7 F佬焚诀模型 (New) ---
-        if code in history_map:
-             f_tags = check_fen_jue(history_map[code])
-             if f_tags:
-                 base_tags.extend(f_tags)
-                 is_selected = True # model selected it
-
-
-        # --- 3. 标签组装 ---
-
-        # 涨停标签
-        if is_zt:
-            is_selected = True
-            base_tags.append(zt_tag)
-
-        # 炸板
-        is_zb = False
-        if "炸板" in raw_tag_str:
-            is_zb = True
-        elif item.get('max_pct', 0) > 9.0 and pct < 9.0:
-            is_zb = True
-
-        if is_zb and pct > -7.0:
-            is_selected = True
-            base_tags.append("👀焚诀预期/炸板")
-
-        # 跌停
-        if pct <= -9.0:
-            is_selected = True
-            base_tags.append("📉跌停/博弈修复")
-
-        # 大额成交 (补录)
-        amount_yi = item.get('amount', 0) / 100000000.0
-        if amount_yi > 20.0 and pct > 0:
-            is_selected = True
-
-        # --- 🔴 新增：筹码与做T分析 (仅对持仓或高关注度标的) ---
-        # 触发条件：是持仓股 OR 是昨日炸板关注股 OR 是人气高标
-        should_analyze_chips = is_holding or (code in broken_pool_map) or (item.get('limit_days', 0) >= 3)
-        
-        if is_selected and should_analyze_chips:
-            print(f"   🔎 分析筹码: {name} ({code}) ...", end="")
-            chip_metrics = get_chip_metrics(code)
-            if chip_metrics:
-                chip_tag = generate_chip_tag(chip_metrics)
-                if chip_tag:
-                    base_tags.append(chip_tag) # 直接追加到 tag 列表
-                    print(f" {Fore.YELLOW}Tags: {chip_tag}")
-                else:
-                    print(" (无显著特征)")
-            else:
-                print(" (数据获取失败)")
-
-        # --- 4. 最终合并 ---
-        if is_selected:
-            # 提取概念 (并去重)
-            local_concepts = get_core_concepts_local(name, raw_tag_str)
-            # 关键：从自动概念中剔除已经在手动标签里出现过的词
-            unique_concepts = get_unique_concepts(manual_cleaned_tag, local_concepts)
-
-            # 特殊形态 & 板型
-            shape_tags, zt_type = check_special_shape(item)
-            if zt_type: 
-                # Avoid dup with 'x板' tag? 
-                # append zt_type to tags e.g. "3板/T字"
-                # Need to find existing ZT tag and append logic, or just add independent tag
-                base_tags.append(f"[{zt_type}]")
-                item['limit_up_type'] = zt_type
-                
-            # --- Call Auction Ratio ---
-            # Ratio = CallAmt / YestAmt
-            yest_item = yest_full_data.get(code)
-            call_auc_ratio = 0.0
-            call_auc_amt = item.get('call_auction_amount', 0)
-            if yest_item:
-                y_amt = yest_item.get('amount', 0)
-                if y_amt > 0:
-                    call_auc_ratio = call_auc_amt / y_amt
-            
-            item['call_auction_ratio'] = round(call_auc_ratio, 3)
-
-            # 合并列表
-            final_parts = []
-            final_parts.extend(base_tags)
-            if unique_concepts: final_parts.append(unique_concepts)
-            final_parts.extend(shape_tags)
-
-            # 简单去重 (防止完全一样的字符串重复)
-            seen_parts = set()
-            clean_parts = []
-            for p in final_parts:
-                if p not in seen_parts:
-                    clean_parts.append(p)
-                    seen_parts.add(p)
-
-            final_tag_str = "/".join(clean_parts)
-
-            # 再次清理可能产生的双斜杠
-            final_tag_str = final_tag_str.replace('//', '/')
-            
-            # --- 最终 Tag 修正: 确保 焚诀 关键字显眼 ---
-            final_tag_str = final_tag_str.replace("🔥断板反包", "🔥A大焚诀") 
-            # If explicit "🔥A大焚诀" from model, it will be kept. 
-            
-                # If explicit "🔥A大焚诀" from model, it will be kept. 
-            
-            row = {
-                'sina_code': format_sina(code),
-                'name': name,
-                'tag': final_tag_str,
-                'amount': item.get('amount', 0),
-                'last_amount': yest_item.get('amount', 0) if yest_item else 0, # Export Yesterday's Amount
-                'today_pct': pct,
-                'turnover': item.get('turnover', 0),
-                'open_pct': item.get('open_pct', 0),
-                'price': item.get('price', 0),
-                'pct_10': item.get('pct_10', 0),
-                'link_dragon': get_link_dragon(code),
-                'vol': item.get('vol', 0),
-                'vol_prev': item.get('vol_prev', 0),
-                'vol_ratio': item.get('vol_ratio', 0),
-                'code': code
-            }
-            pool.append(row)
+    # --- 0. 全市场表 + 全局过滤: 剔除 ST 股 ---
+    u = build_universe(all_data)
+    u = u[~u['name'].astype(str).str.upper().str.contains('ST', regex=False)]
+
+    ctx = {
+        'base_focus': base_focus,
+        'holdings_map': holdings_map,
+        'f_lao_map': f_lao_map,
+        'manual_recognition_map': manual_recognition_map,
+        'broken_pool_map': broken_pool_map,
+        'lhb_codes': lhb_codes,
+        'lhb_seat_map': lhb_seat_map,
+        'fen_jue_map': fen_jue_map,
+    }
+
+    # --- 1~3. 规则表: 每条规则一个 mask + 一列标签 ---
+    selected, tag_cols = apply_rules(u, ctx)
+    sel = u[selected]
+    tag_cols = {k: v[selected] for k, v in tag_cols.items()}
+
+    # --- 🔴 筹码与做T分析 (仅对入选的持仓 / 昨日炸板关注股 / 人气高标，独立阶段并发联网获取) ---
+    should_analyze_chips = (sel['code'].isin(holdings_map.keys()) | sel['code'].isin(broken_pool_map.keys())
+                            | (sel['limit_days'] >= 3))
+    chip_names = dict(zip(sel['code'][should_analyze_chips], sel['name'][should_analyze_chips]))
+    chip_tag_map = {}
+
+    def report_chip(code, chip_metrics, done, total):
+        head = f"   🔎 [{done}/{total}] 筹码: {chip_names.get(code, '')} ({code})"
+        if not chip_metrics:
+            print(f"{head} (数据获取失败)")
+            return
+        chip_tag = generate_chip_tag(chip_metrics)
+        if chip_tag:
+            chip_tag_map[code] = chip_tag
+            print(f"{head} {Fore.YELLOW}Tags: {chip_tag}")
+        else:
+            print(f"{head} (无显著特征)")
+
+    if chip_names:
+        print(f"{Fore.MAGENTA}🧮 并发分析筹码: {len(chip_names)} 只 (并发 {CHIP_MAX_WORKERS})...")
+        _, chip_stats = analyze_chips(list(chip_names), max_workers=CHIP_MAX_WORKERS,
+                                      timeout=CHIP_REQUEST_TIMEOUT, retries=CHIP_MAX_RETRIES,
+                                      backoff=CHIP_RETRY_BACKOFF, on_result=report_chip,
+                                      store=ChipStateStore(CHIP_STATE_DIR))
+        print(f"   ⏱️ {format_chip_stats(chip_stats)}")
+        print(f"   🗄️ {kline_store.get_store().summary()}")
+    # 按代码合并回入选表
+    chip_col = sel['code'].map(chip_tag_map).fillna('').astype(object)
+
+    # --- 4. 最终合并: 板型 + 概念，统一拼接一次 ---
+    zt_type = zt_type_tags(sel)
+    shape_col = ("[" + zt_type + "]").where(zt_type != '', '')
+    concepts = concept_tags(sel, tag_cols['manual'])
+    final_tags = assemble_tags(list(tag_cols.values()) + [chip_col, shape_col, concepts])
+
+    yest_amount = {c: v.get('amount', 0) for c, v in yest_full_data.items()}
+    link_dragon = {c: get_link_dragon(c) for c in set(HOLDING_STRATEGIES) | set(LINK_DRAGON_MAP)}
+    sina_prefix = np.select([sel['code'].str.startswith('6'), sel['code'].str.startswith(('8', '4'))],
+                            ['sh', 'bj'], 'sz')
+
+    pool_df = pd.DataFrame({
+        'sina_code': sina_prefix + sel['code'],
+        'name': sel['name'],
+        'tag': final_tags,
+        'amount': sel['amount'],
+        'last_amount': sel['code'].map(yest_amount).fillna(0), # Export Yesterday's Amount
+        'today_pct': sel['pct'],
+        'turnover': sel['turnover'],
+        'open_pct': sel['open_pct'],
+        'price': sel['price'],
+        'pct_10': sel['pct_10'],
+        'link_dragon': sel['code'].map(link_dragon).fillna(''),
+        'vol': sel['vol'],
+        'vol_prev': sel['vol_prev'],
+        'vol_ratio': sel['vol_ratio'],
+        'code': sel['code'],
+    })
+    pool = to_records(pool_df)
 
     # --- 4.5 异动风险计算 (改为读取手动文件) ---
     print(f"{Fore.MAGENTA}🔎 正在加载异动风险数据 (手动文件)...")
@@ -814,6 +832,7 @@ def generate_strategy_pool():
         print(f"\n{Fore.GREEN}🎉 离线复盘完成！生成标的: {len(pool)} 只")
         print(f"📄 日期文件: {dated_path}")
         print(f"📄 通用文件: {latest_path} (已更新)")
+        print(f"🗂️ {dataset_registry.summary()}")
 
     else:
         print(f"{Fore.RED}❌ 筛选结果为空。")
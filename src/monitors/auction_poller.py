@@ -0,0 +1,175 @@
+# ==============================================================================
+# 📌 集合竞价轮询 (src\monitors\auction_poller.py) - 【9:15 ~ 9:25 运行】
+# 每 N 秒抓一帧全市场快照写入 AuctionTape，追踪竞价金额/涨幅轨迹:
+#   9:20 前挂单、9:20 后撤掉的 (假单) 降分；临近 9:25 加速抢筹的加分。
+# 每帧只对快照有变化的代码重新打分 (evaluate_batch)，其余沿用上一帧结果。
+# 用法: python src/monitors/auction_poller.py [间隔秒数]
+# ==============================================================================
+import os
+import sys
+import time
+import datetime
+
+import numpy as np
+import pandas as pd
+from colorama import Fore, Style, Back
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(os.path.dirname(CURRENT_DIR))
+sys.path.append(PROJECT_ROOT)
+
+from src.monitors.call_auction_screener import (
+    evaluate_batch, fetch_spot_snapshot, get_sector_map, load_history_data, load_watch_scope,
+    load_call_auction_data_from_file, print_report, print_ddd_hits, scan_ddd_market,
+)
+from src.utils.auction_tape import AuctionTape, AUCTION_START, AUCTION_END, seconds_of_day
+from src.utils.normalize import to_code, to_records
+from src.utils.rate_limit import TokenBucket, retry_call
+from src.utils.sector_cache import get_sector_cache, prefetch_sector_map
+
+POLL_INTERVAL = 3.0      # 每帧间隔 (秒)
+POLL_GRACE = 15          # 9:25 之后再取几帧，等撮合结果
+POLL_RETRIES = 1
+WITHDRAW_PENALTY = 20    # 9:20 后撤单
+ACCEL_BONUS = 5          # 临近 9:25 加速
+
+
+class AuctionPoller:
+    """
+    用法:
+        poller = AuctionPoller(history_map, pool_map, sector_map, targets=codes, focus_names=names)
+        changed = poller.poll_once()      # 抓一帧，返回快照变化的代码
+        poller.ranked()                   # 当前排名 (DataFrame)
+        poller.run()                      # 等到 9:15 开始，轮询到 9:25 + POLL_GRACE 秒
+    """
+
+    def __init__(self, history_map, pool_map, sector_map=None, targets=None, focus_names=None,
+                 last_amt=None, fetch=None, interval=POLL_INTERVAL, limiter=None, tape=None, now=None,
+                 sectors=None, sleep=None):
+        self.history_map = history_map
+        self.pool_map = pool_map or {}
+        self.sector_map = sector_map or {}
+        self.sectors = sectors                  # 可选: 每帧取最新板块快照的函数 (不阻塞)
+        self.targets = targets
+        self.focus_names = focus_names
+        self.last_amt = last_amt or {}          # {code: 昨日成交额(万)}，快照里没有该列时补上
+        self.fetch = fetch or fetch_spot_snapshot
+        self.interval = interval
+        # 令牌桶既限速 (含重试) 也负责帧间隔
+        self.limiter = limiter or TokenBucket(rate=1.0 / interval, capacity=1)
+        self.tape = tape or AuctionTape()
+        self._now = now or datetime.datetime.now
+        self._sleep = sleep or time.sleep
+        self.results = {}                       # code -> 最新打分行
+        self.last_snapshot = pd.DataFrame()
+        self.stats = {'polls': 0, 'failed': 0, 'changed': 0, 'rescored': 0}
+
+    def _snapshot(self):
+        df = retry_call(self.fetch, retries=POLL_RETRIES, backoff=0.5, limiter=self.limiter)
+        df = df.reset_index(drop=True)
+        df['code'] = to_code(df['code']).str.zfill(6)
+        df = df[~df['code'].duplicated()]
+        if 'last_amt' not in df.columns and self.last_amt:
+            df['last_amt'] = df['code'].map(self.last_amt).fillna(0.0)
+        return df
+
+    def poll_once(self, now=None):
+        """抓一帧并增量重算，返回快照有变化的代码列表 (抓取失败返回空列表)"""
+        try:
+            snap = self._snapshot()
+        except Exception as e:
+            self.stats['failed'] += 1
+            print(f"{Fore.YELLOW}⚠️ 竞价快照获取失败: {e}{Style.RESET_ALL}")
+            return []
+        now = now or self._now()
+        self.stats['polls'] += 1
+        self.last_snapshot = snap
+
+        changed = self.tape.record(now, snap['code'], snap['open_pct'], snap['auc_amt'])
+        self.stats['changed'] += len(changed)
+        if changed:
+            self._rescore(snap[snap['code'].isin(set(changed))], changed, now)
+        return changed
+
+    def _rescore(self, snap, changed, now):
+        if self.sectors is not None:
+            self.sector_map = self.sectors() or self.sector_map
+        res = evaluate_batch(snap, self.history_map, self.pool_map, self.sector_map,
+                             targets=self.targets, focus_names=self.focus_names)
+        for code in changed:
+            self.results.pop(code, None)
+        if res.empty:
+            return
+        self.stats['rescored'] += len(res)
+
+        feats = self.tape.features(now, res['code'].tolist()).reindex(res['code'])
+        withdrawn = feats['withdrawn'].fillna(False).to_numpy(dtype=bool)
+        accel = feats['accelerating'].fillna(False).to_numpy(dtype=bool)
+        res['score'] = res['score'] - np.where(withdrawn, WITHDRAW_PENALTY, 0) + np.where(accel, ACCEL_BONUS, 0)
+        res['decision'] = (res['decision']
+                           + np.where(withdrawn, f" {Fore.YELLOW}⚠️撤单{Style.RESET_ALL}", "")
+                           + np.where(accel, f" {Fore.RED}🚀加速{Style.RESET_ALL}", ""))
+        res['amt_drop'] = feats['amt_drop'].to_numpy()
+        res['amt_recent'] = feats['amt_recent'].to_numpy()
+        for item in to_records(res):
+            self.results[item['code']] = item
+
+    def ranked(self):
+        """当前全部打分行，按 (score, open_pct) 降序"""
+        if not self.results:
+            return pd.DataFrame()
+        df = pd.DataFrame(list(self.results.values()))
+        return df.sort_values(['score', 'open_pct'], ascending=False, kind='stable').reset_index(drop=True)
+
+    def run(self, until=None, on_update=None, start=AUCTION_START):
+        """
+        从 start (当天秒数，默认 9:15) 轮询到 until (默认 9:25 + POLL_GRACE)；每帧有变化时回调 on_update(poller, changed)
+        帧间隔由令牌桶控制。9:15 之前的快照还是上一交易日的数据，提前启动时先等到 start
+        """
+        until = AUCTION_END + POLL_GRACE if until is None else until
+        wait = start - seconds_of_day(self._now())
+        if wait > 0:
+            print(f"⏳ 距竞价开始还有 {wait:.0f} 秒，等待中...")
+            self._sleep(wait)
+        while seconds_of_day(self._now()) < until:
+            changed = self.poll_once()
+            if changed and on_update:
+                on_update(self, changed)
+        return self.ranked()
+
+
+def _print_tick(poller, changed):
+    ranked = poller.ranked()
+    s = poller.stats
+    top = ' '.join(f"{r['code']}({r['score']})" for r in to_records(ranked.head(8))) if not ranked.empty else '-'
+    print(f"⏱️ {poller._now().strftime('%H:%M:%S')} 变化 {len(changed)} | 入选 {len(ranked)} | "
+          f"帧 {s['polls']} 失败 {s['failed']} | Top: {top}")
+
+
+def main(interval=POLL_INTERVAL):
+    print(f"\n{Back.BLUE}{Fore.WHITE} 集合竞价轮询 (9:15 ~ 9:25 轨迹跟踪) {Style.RESET_ALL}")
+    prefetch_sector_map()
+    history_map = load_history_data()
+    if not history_map: return
+    pool_map, manual_focus, holdings, valid_codes = load_watch_scope()
+    sector_map = get_sector_map()
+
+    # 昨日成交额只有同花顺竞价导出里有，快照里没有
+    local_df = load_call_auction_data_from_file()
+    last_amt = {}
+    if local_df is not None and 'last_amt' in local_df.columns:
+        last_amt = dict(zip(local_df['code'], local_df['last_amt']))
+
+    poller = AuctionPoller(history_map, pool_map, sector_map, targets=valid_codes,
+                           focus_names=manual_focus, last_amt=last_amt, interval=interval,
+                           sectors=get_sector_cache().latest)
+    print(f"🎯 过滤范围: 持仓 {len(holdings)} + 策略 {len(pool_map)} + 手动 {len(manual_focus)} | 间隔 {interval}秒")
+    ranked = poller.run(on_update=_print_tick)
+
+    print_report(to_records(ranked), len(poller.last_snapshot), title="📊 竞价轨迹报告")
+    if not poller.last_snapshot.empty:
+        print_ddd_hits(scan_ddd_market(poller.last_snapshot, history_map), pool_map)
+
+
+if __name__ == "__main__":
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else POLL_INTERVAL)
@@ -3,8 +3,8 @@
 # v12.0 全自动实盘版 - (Table.txt做底库 + Akshare实时抓取)
 # Last Modified: 2026-01-11
 # ==============================================================================
+import numpy as np
 import pandas as pd
-import akshare as ak
 import os
 import re
 import sys
@@ -29,6 +29,9 @@ PROJECT_ROOT = os.path.dirname(os.path.dirname(CURRENT_DIR))
 sys.path.append(PROJECT_ROOT)
 
 from src.utils.data_loader import load_holdings, HOLDINGS_PATH
+from src.utils.normalize import to_code, to_number, to_text, to_records
+from src.utils.sector_cache import get_sector_cache, prefetch_sector_map
+from src.utils.quote_client import get_quote_provider
 
 # 静态底库目录
 THS_DATA_DIR = os.path.join(PROJECT_ROOT, 'data', 'input', 'ths')
@@ -61,10 +64,10 @@ from src.utils.data_loader import parse_call_auction_file, get_latest_call_aucti
 
 # [新增] 引入 DDD 策略模块
 try:
-    from src.strategies.ddd_mode import check_ddd_strategy
+    from src.strategies.ddd_mode import check_ddd_strategy, batch_ddd
 except ImportError:
     sys.path.append(os.path.join(PROJECT_ROOT, 'src', 'strategies'))
-    from ddd_mode import check_ddd_strategy
+    from ddd_mode import check_ddd_strategy, batch_ddd
 
 def load_history_data():
     """Wrapper specifically for this script's display messages"""
@@ -80,33 +83,20 @@ def load_history_data():
 # ================= [新增] 获取板块数据的辅助函数 =================
 def get_sector_map():
     """
-    获取全市场实时板块涨幅数据
+    获取全市场实时板块涨幅数据 (行业全部 + 涨幅前 100 的热门概念)
+    走 sector_cache: 启动时已 prefetch 的话这里只是取后台结果
     返回: dict { '行业名称': 涨跌幅%, ... }
     """
     print(f"{Fore.CYAN}📡 [2.5/3] 正在获取板块热度数据 (用于共振分析)...{Style.RESET_ALL}")
-    sector_map = {}
-    try:
-        # 1. 获取行业板块
-        df_bk = ak.stock_board_industry_name_em()
-        for _, row in df_bk.iterrows():
-            name = row['板块名称']
-            pct = float(row['涨跌幅'])
-            sector_map[name] = pct
-
-        # 2. 获取概念板块 (补充热门概念如AI、卫星等)
-        # 注意：概念板块数据量大，只取涨幅前 50 的热门概念，提高效率
-        df_con = ak.stock_board_concept_name_em()
-        df_con = df_con.sort_values(by='涨跌幅', ascending=False).head(100)
-        for _, row in df_con.iterrows():
-            name = row['板块名称']
-            pct = float(row['涨跌幅'])
-            sector_map[name] = pct
-
-        print(f"✅ 板块情绪加载完成，捕捉到 {len(sector_map)} 个热点方向")
-        return sector_map
-    except Exception as e:
-        print(f"{Fore.YELLOW}⚠️ 板块数据获取略过 (不影响个股): {e}{Style.RESET_ALL}")
-        return {}
+    cache = get_sector_cache()
+    sector_map = cache.get()
+    if sector_map:
+        if cache.last_error:
+            print(f"{Fore.YELLOW}⚠️ 部分板块数据获取失败: {cache.last_error}{Style.RESET_ALL}")
+        print(f"✅ 板块情绪加载完成，捕捉到 {len(sector_map)} 个热点方向 (快照 {cache.age():.0f} 秒前)")
+    else:
+        print(f"{Fore.YELLOW}⚠️ 板块数据获取略过 (不影响个股): {cache.last_error}{Style.RESET_ALL}")
+    return sector_map
 
 
 # ================= 2. 获取实时数据 (Akshare + 本地文件优先) =================
@@ -128,51 +118,78 @@ def load_call_auction_data_from_file():
         
     return None
 
-def get_live_data():
+def get_live_data(codes=None):
+    """
+    实时竞价数据: 本地同花顺文件优先；否则联网
+    codes 给定时只批量请求这些代码 (盯盘名单 + DDD 候选)，None 为全市场
+    """
     # 1. Try Local File First
     local_df = load_call_auction_data_from_file()
     if local_df is not None and not local_df.empty:
         return local_df
 
-    print(f"{Fore.CYAN}📡 [2B/3] 未找到本地文件，正在请求 Akshare 实时行情 (全市场)...{Style.RESET_ALL}")
+    scope = "全市场" if codes is None else f"{len(codes)} 只"
+    print(f"{Fore.CYAN}📡 [2B/3] 未找到本地文件，正在请求实时行情 ({scope})...{Style.RESET_ALL}")
     start_time = time.time()
 
     try:
-        # 获取A股实时行情：包含 代码, 名称, 最新价, 涨跌幅, 成交额(即竞价金额)
-        # 注意：9:25-9:30期间，'成交额'字段即为'竞价成交额'
-        df = ak.stock_zh_a_spot_em()
-
-        # 映射列名
-        # Akshare 返回列通常为: 序号, 代码, 名称, 最新价, 涨跌幅, 涨跌额, 成交量, 成交额, ...
-        # 我们需要：代码, 名称, 涨跌幅(作为竞价涨幅), 成交额(作为竞价金额)
-
-        # 重命名方便处理
-        rename_map = {
-            '代码': 'code',
-            '名称': 'name',
-            '涨跌幅': 'open_pct',
-            '成交额': 'auc_amt',
-            '最新价': 'current_price'
-        }
-        df = df.rename(columns=rename_map)
-
-        # 简单清洗
-        df['code'] = df['code'].astype(str)
-
-        # 过滤掉退市或无数据
-        df = df[df['open_pct'].notnull()]
-        
-        # [Fix] Akshare returns Amount in Yuan, convert to Wan to match local file
-        df['auc_amt'] = df['auc_amt'].fillna(0) / 10000.0
-
-        print(f"✅ 实时数据获取成功，耗时 {time.time() - start_time:.2f}秒，共 {len(df)} 条")
+        df = fetch_spot_snapshot(codes)
+        provider = get_quote_provider()
+        source = "批量接口" if provider.source == 'batch' else "全市场快照"
+        if provider.last_error:
+            print(f"{Fore.YELLOW}⚠️ 批量行情失败，已退回全市场快照: {provider.last_error}{Style.RESET_ALL}")
+        print(f"✅ 实时数据获取成功 ({source})，耗时 {time.time() - start_time:.2f}秒，共 {len(df)} 条")
         return df
     except Exception as e:
-        print(f"{Fore.RED}❌ Akshare 接口请求失败: {e}{Style.RESET_ALL}")
+        print(f"{Fore.RED}❌ 行情接口请求失败: {e}{Style.RESET_ALL}")
         print("请检查网络连接或 Akshare 版本 (pip install --upgrade akshare)")
         return pd.DataFrame()
 
 
+def fetch_spot_snapshot(codes=None):
+    """
+    实时快照 -> code/name/open_pct/auc_amt(万)/current_price，失败抛出
+    codes=None 为东财全市场快照；给定时走 quote_client 批量接口 (失败自动退回全市场)
+    9:25-9:30 期间 '成交额' 即竞价成交额；9:15-9:25 为虚拟匹配金额
+    """
+    # 获取A股实时行情：包含 代码, 名称, 最新价, 涨跌幅, 成交额(即竞价金额)
+    df = get_quote_provider().quotes(codes)
+
+    # 映射列名
+    # 两个来源的列名一致: 代码, 名称, 最新价, 涨跌幅, 涨跌额, 成交量, 成交额, ...
+    # 我们需要：代码, 名称, 涨跌幅(作为竞价涨幅), 成交额(作为竞价金额)
+    rename_map = {
+        '代码': 'code',
+        '名称': 'name',
+        '涨跌幅': 'open_pct',
+        '成交额': 'auc_amt',
+        '最新价': 'current_price'
+    }
+    df = df.rename(columns=rename_map)
+
+    # 简单清洗
+    df['code'] = df['code'].astype(str)
+
+    # 过滤掉退市或无数据
+    df = df[df['open_pct'].notnull()]
+
+    # [Fix] Akshare returns Amount in Yuan, convert to Wan to match local file
+    df['auc_amt'] = df['auc_amt'].fillna(0) / 10000.0
+    return df
+
+
+def watch_codes(valid_codes, manual_focus, history_map):
+    """
+    联网时要请求的代码: 关注范围 + 昨日 1~3 板 (DDD 全市场扫描的候选)
+    手动关注里有按名称写的票时无法按代码请求，返回 None (退回全市场)
+    """
+    if any(not item.isdigit() for item in manual_focus):
+        return None
+    boards = pd.to_numeric(pd.Series({code: info.get('boards') for code, info in history_map.items()},
+                                     dtype=object), errors='coerce')
+    return sorted(set(valid_codes) | set(boards.index[boards.between(1, 3)]))
+
+
 
 # ================= 1.5 加载策略池 (重点关注) =================
 def load_strategy_pool():
@@ -216,6 +233,17 @@ def load_manual_focus():
     print(f"✅ 手动关注加载完成: {len(s)} 个")
     return s
 
+def load_watch_scope():
+    """关注范围: (策略池 {code: tag}, 手动关注, 持仓, 代码集合 = 池 + 持仓 + 手动里的代码)"""
+    pool_map = load_strategy_pool()
+    manual_focus = load_manual_focus()
+    holdings = load_holdings()
+
+    valid_codes = set(pool_map.keys()) | set(holdings.keys())
+    for item in manual_focus:
+        if item.isdigit(): valid_codes.add(item)
+    return pool_map, manual_focus, holdings, valid_codes
+
 
 # ================= 3. 策略判定 (核心升级版) =================
 def analyze_stock(row, history_info, pool_map, phase, sector_map=None):
@@ -340,7 +368,11 @@ def analyze_stock(row, history_info, pool_map, phase, sector_map=None):
         }
 
     # --- [新增] DDD 策略兼容 ---
-    ddd_score, ddd_dec, ddd_tag = check_ddd_strategy(row, history_info[code])
+    # DDD 口径全是 元 (竞价额/昨额/市值在这里是 万)
+    ddd_score, ddd_dec, ddd_tag = check_ddd_strategy(
+        {'auc_amt': auc_amt * 10000, 'open_pct': open_pct},
+        {'turnover': last_amt * 10000, 'circ_mv': circ_mv * 10000, 'board_count': boards,
+         'last_bid_amt': info.get('yest_bid_amt', 0)})
     if ddd_score > 0:
         score = ddd_score
         decision = ddd_dec
@@ -449,61 +481,271 @@ def analyze_stock(row, history_info, pool_map, phase, sector_map=None):
     }
 
 
-# ================= 🚀 主程序 =================
-def main():
-    print(f"\n{Back.BLUE}{Fore.WHITE} F佬 · 盘中实时监控系统 (Akshare Plus版) {Style.RESET_ALL}")
-    print("=" * 120)
+# ================= 3B. 批量策略判定 (向量化) =================
+# 口径与 analyze_stock 逐行版一致：竞价表 + 底库 + 策略池 + 板块只做一次 join，
+# 比值/门槛/打分都是整列运算，只有最终入选的行才拼装展示字符串。
+MIN_AUC_AMT = 300_0000    # 非策略池标的的竞价金额门槛 (万)
+SECTOR_HOT_PCT = 1.5      # 板块涨幅 >= 1.5% 算热点
+SECTOR_WEAK_PCT = -0.5    # 板块涨幅 < -0.5% 算弱势
 
-    # 0. 情绪周期 (Mock)
-    current_phase = "Rising"
-    print(f"{Fore.CYAN}🌊 [0/4] 正在分析情绪周期... {Fore.MAGENTA}{current_phase}{Style.RESET_ALL}")
+HISTORY_COLUMNS = ['circ_mv', 'yest_pct', 'boards', 'industry', 'yest_bid_amt']
+RESULT_COLUMNS = ['code', 'name', 'score', 'decision', 'open_pct', 'auc', 'r_yest', 'r_mv',
+                  'yest_pct', 'boards', 'circ_mv', 'tag', 'sector_info', 'last_amt']
 
-    # 1. 加载数据
-    history_map = load_history_data()
-    if not history_map: return
-    pool_map = load_strategy_pool()
-    manual_focus = load_manual_focus()
-    holdings = load_holdings()
 
-    valid_codes = set(pool_map.keys()) | set(holdings.keys())
-    for item in manual_focus:
-        if item.isdigit(): valid_codes.add(item)
+def history_frame(history_map, codes=None):
+    """底库 {code: {...}} -> 以 code 为索引的 DataFrame (codes 给定时只取这些代码)"""
+    if codes is not None:
+        history_map = {c: history_map[c] for c in codes if c in history_map}
+    df = pd.DataFrame.from_dict(history_map, orient='index')
+    for col, default in (('circ_mv', 0.0), ('yest_pct', 0.0), ('boards', 0), ('industry', '未知'),
+                         ('yest_bid_amt', 0.0)):
+        if col not in df.columns:
+            df[col] = default
+    df['industry'] = df['industry'].fillna('未知')
+    return df
 
-    # 2. 获取实时数据
-    live_df = get_live_data()
-    if live_df.empty: return
 
-    # 2.5 [新增] 获取板块数据
-    sector_map = get_sector_map()
+def _num_col(live, col):
+    """整列 float()，缺列按 0 (同 row.get(col, 0))，无法解析的格子 -> NaN"""
+    if col not in live.columns:
+        return pd.Series(0.0, index=live.index)
+    return pd.to_numeric(live[col], errors='coerce')
 
-    print(f"{Fore.CYAN}⚙️ [3/3] 正在进行策略计算 (含板块共振分析)...{Style.RESET_ALL}")
-    print(f"🎯 过滤范围: 持仓 {len(holdings)} + 策略 {len(pool_map)} + 手动 {len(manual_focus)}")
 
-    results = []
-    seen_codes = set()
+def _yest_amount(live):
+    """
+    昨成交额 (万): 优先数值列 last_amt；为 0 时解析 '昨日成交额' / '昨成交' 的单位字符串
+    (1.5亿 -> 15000，1500万 -> 1500，纯数字按元 -> /10000，解析失败 -> 0)
+    """
+    last = _num_col(live, 'last_amt').fillna(0.0)
 
-    for _, row in live_df.iterrows():
-        code = clean_code(row['code'])
-        if code in seen_codes: continue
-        seen_codes.add(code)
+    col = next((c for c in ('昨日成交额', '昨成交') if c in live.columns), None)
+    if col is None or not (last == 0).any():
+        return last
 
-        # 过滤
-        is_target = False
-        if code in valid_codes: is_target = True
-        if not is_target and str(row['name']) in manual_focus: is_target = True
-        if not is_target: continue
+    raw = to_text(live[col]).str.strip()
+    is_yi = raw.str.contains('亿', regex=False)
+    is_wan = ~is_yi & raw.str.contains('万', regex=False)
+    parsed = np.select(
+        [is_yi, is_wan],
+        [to_number(raw.str.replace('亿', '', regex=False)) * 10000,
+         to_number(raw.str.replace('万', '', regex=False))],
+        to_number(raw) / 10000)
+    parsed = pd.Series(parsed, index=live.index).fillna(0.0)
+    return last.where(last != 0, parsed)
 
-        # 核心分析
-        res = analyze_stock(row, history_map, pool_map, current_phase, sector_map)
-        if res:
-            results.append(res)
 
-    # 3. 排序与展示
-    results.sort(key=lambda x: (x['score'], x['open_pct']), reverse=True)
+def _join_history(live_df, history_map, targets=None, focus_names=None):
+    """
+    竞价快照清洗后 join 底库: 代码补齐 6 位并去重 (保留首次出现)，按关注范围过滤，
+    数值解析失败 / 不在底库的行丢弃；circ_mv 统一为 万
+    """
+    # 1. 代码清洗 + 去重 + 关注范围过滤
+    live = live_df.reset_index(drop=True)
+    live['code'] = to_code(live['code']).str.zfill(6)
+    live = live[~live['code'].duplicated()]
+    if targets is not None or focus_names is not None:
+        mask = live['code'].isin(set(targets or ()))
+        if focus_names:
+            mask |= to_text(live['name']).isin(set(focus_names))
+        live = live[mask]
+
+    # 2. 实时数值 (解析失败的行丢弃)
+    open_pct = _num_col(live, 'open_pct')
+    auc_amt = _num_col(live, 'auc_amt')
+    bad = open_pct.isna() | auc_amt.isna()
+    if bad.any():
+        print(f"数据解析错误: {int(bad.sum())} 行竞价数据无法解析，已跳过")
+    live = live.assign(open_pct=open_pct, auc_amt=auc_amt, last_amt=_yest_amount(live))[~bad]
+
+    # 3. join 底库
+    hist = history_frame(history_map, live['code'].tolist())
+    if hist.empty:
+        return pd.DataFrame(columns=list(live.columns) + HISTORY_COLUMNS)
+    live = live.drop(columns=[c for c in HISTORY_COLUMNS if c in live.columns])
+    df = live.join(hist[HISTORY_COLUMNS], on='code', how='inner')
+
+    circ_mv = pd.to_numeric(df['circ_mv'], errors='coerce').fillna(0.0)
+    # 超过 1 亿的一定是 元，统一转成 万
+    df['circ_mv'] = circ_mv.where(circ_mv <= 100_000_000, circ_mv / 10000.0)
+    return df
+
+
+def _ddd_columns(df):
+    """
+    对 join 好的帧跑 DDD 批量判定。DDD 口径全是 元，这里的竞价额/昨额/市值是 万:
+    昨日成交额取竞价文件的昨额 (与竞昨比同一基数)，昨日竞价额取底库 yest_bid_amt (元)
+    """
+    return batch_ddd(
+        df['auc_amt'].to_numpy(dtype=np.float64) * 10000,
+        df['open_pct'].to_numpy(dtype=np.float64),
+        df['last_amt'].to_numpy(dtype=np.float64) * 10000,
+        df['circ_mv'].to_numpy(dtype=np.float64) * 10000,
+        pd.to_numeric(df['boards'], errors='coerce').to_numpy(dtype=np.float64),
+        pd.to_numeric(df['yest_bid_amt'], errors='coerce').fillna(0.0).to_numpy(dtype=np.float64),
+    )
+
+
+def evaluate_batch(live_df, history_map, pool_map, sector_map=None, targets=None, focus_names=None):
+    """
+    批量版 analyze_stock
+    live_df: 竞价快照 (code/name/open_pct/auc_amt[万]/last_amt[万] 或 昨日成交额 字符串)
+    targets: 关注代码集合 (持仓/策略池/手动)，focus_names: 按名称关注的集合；都为 None 时评估全部
+    返回按 (score, open_pct) 降序排列的结果 DataFrame (列见 RESULT_COLUMNS)
+    """
+    pool_map = pool_map or {}
+    sector_map = sector_map or {}
+    empty = pd.DataFrame(columns=RESULT_COLUMNS)
+    if live_df is None or live_df.empty:
+        return empty
+
+    df = _join_history(live_df, history_map, targets, focus_names)
+    if df.empty:
+        return empty
+
+    in_pool = df['code'].isin(set(pool_map))
+    keep = (df['last_amt'] != 0) & (df['circ_mv'] != 0) & ~(df['auc_amt'] < np.where(in_pool, 0, MIN_AUC_AMT))
+    df, in_pool = df[keep], in_pool[keep].to_numpy()
+    if df.empty:
+        return empty
+
+    code = df['code']
+    open_pct = df['open_pct'].to_numpy(dtype=np.float64)
+    auc = df['auc_amt'].to_numpy(dtype=np.float64)
+    r_yest = auc / df['last_amt'].to_numpy(dtype=np.float64) * 100
+    r_mv = auc / df['circ_mv'].to_numpy(dtype=np.float64) * 100
+    tag = code.map(pool_map).fillna('').astype(str)
+    industry = df['industry'].astype(str)
+
+    # 4. 板块共振
+    sector_pct = industry.map(sector_map)
+    has_sector = sector_pct.notna().to_numpy()
+    sp = sector_pct.fillna(0.0).to_numpy(dtype=np.float64)
+    hot = has_sector & (sp >= SECTOR_HOT_PCT)
+    weak = has_sector & ~hot & (sp < SECTOR_WEAK_PCT)
+    pct_text = industry + ':' + sector_pct.map(lambda v: f"{v:.1f}%" if v == v else '')
+    sector_info = np.select(
+        [hot, weak, has_sector],
+        [f"{Fore.RED}🔥" + pct_text + Style.RESET_ALL, f"{Fore.GREEN}❄️" + pct_text + Style.RESET_ALL, pct_text],
+        industry)
+
+    # 5. 一字板 / DDD
+    limit = open_pct > 9.8
+    ddd_score, ddd_dec, ddd_tag = _ddd_columns(df)
+    ddd_hit = ~limit & (ddd_score > 0)
+    ddd_decision = ddd_dec + np.where(hot, " 共振", "") + " [" + ddd_tag + "]"
+
+    # 6. 核心策略 (F佬/A大)
+    tag_low = tag.str.contains('低吸|趋势|F佬').to_numpy()
+    tag_a = tag.str.contains('A大焚诀|F佬').to_numpy()
+    tag_fast = tag.str.contains('加速', regex=False).to_numpy()
+    deep = open_pct <= -5.0
+    branch_a = ~deep & tag_a
+    branch_c = ~deep & ~tag_a & (open_pct < 3.0)
+    branch_d = ~deep & ~tag_a & ~(open_pct < 3.0)
+
+    a_red = branch_a & (open_pct > 0)
+    a_burst = a_red & (r_mv > 1.0)
+    c_strong = branch_c & (r_mv > 0.8)
+    d_risk = branch_d & (open_pct > 5.0) & (open_pct < 9.8) & ~(tag_fast | hot)
+
+    score = np.select(
+        [deep & tag_low, a_red & hot, a_red & weak, a_red, branch_a, c_strong & hot],
+        [88, 98, 75, 90, 50, 70], 60) + np.where(a_burst, 2, 0)
+    decision = pd.Series(np.select(
+        [deep & tag_low, a_red, branch_a, c_strong, d_risk],
+        [f"{Fore.GREEN}✅ 深水低吸{Style.RESET_ALL}", f"{Fore.RED}🔥 A大反包{Style.RESET_ALL}",
+         f"{Fore.YELLOW}等待翻红{Style.RESET_ALL}", f"{Fore.MAGENTA}★ 弱转强{Style.RESET_ALL}",
+         f"{Fore.YELLOW}⚠️ 高开风险{Style.RESET_ALL}"],
+        "观察"), index=df.index)
+    decision += np.select(
+        [a_red & hot, a_red & weak, c_strong & hot],
+        [f" {Back.RED}{Fore.WHITE}共振{Style.RESET_ALL}", f" {Fore.YELLOW}⚠️孤狼{Style.RESET_ALL}",
+         "/" + industry + "强"], "")
+    decision += np.where(a_burst, "/爆量", "")
+
+    open_list = open_pct.tolist()
+    fail_deep = deep & ~tag_low
+    fail_weak = branch_c & ~c_strong & (tag == '').to_numpy()
+    fail_msg = np.select([fail_deep, fail_weak],
+                         [[f"深水({v}%)" for v in open_list], [f"竞价弱({v}%)" for v in open_list]], "")
+    failed = fail_msg != ""
+
+    # 策略池: 低分补 10 分，失败的改为 70 分黄字展示
+    score = np.where(in_pool & (score < 80), score + 10, score)
+    score = np.where(in_pool & failed, 70, score)
+    decision = decision.where(~(in_pool & failed),
+                              pd.Series([f"{Fore.YELLOW}{m}{Style.RESET_ALL}" for m in fail_msg], index=df.index))
+    decision += np.where(in_pool, f"{Back.MAGENTA}{Fore.WHITE} 池 {Style.RESET_ALL}", "")
+    core_keep = in_pool | ~failed
+
+    # 7. 合并三种出口
+    score = np.where(limit, np.where(in_pool, 90, 0),
+                     np.where(ddd_hit, ddd_score + 5 * in_pool + 5 * hot, score))
+    decision = np.where(limit, f"{Fore.BLUE}一字板{Style.RESET_ALL}",
+                        np.where(ddd_hit, ddd_decision, decision))
+    out = pd.DataFrame({
+        'code': code.to_numpy(),
+        'name': to_text(df['name']).to_numpy(),
+        'score': score.astype(np.int64),
+        'decision': decision,
+        'open_pct': open_pct,
+        'auc': auc,
+        'r_yest': r_yest,
+        'r_mv': r_mv,
+        'yest_pct': df['yest_pct'].to_numpy(),
+        'boards': df['boards'].to_numpy(),
+        'circ_mv': df['circ_mv'].to_numpy(),
+        'tag': tag.to_numpy(),
+        'sector_info': sector_info,
+        'last_amt': df['last_amt'].to_numpy(),
+    })[limit | ddd_hit | core_keep]
+
+    return out.sort_values(['score', 'open_pct'], ascending=False, kind='stable').reset_index(drop=True)
+
+
+DDD_COLUMNS = ['code', 'name', 'score', 'decision', 'detail', 'open_pct', 'auc', 'boards', 'circ_mv']
+
 
+def scan_ddd_market(live_df, history_map):
+    """
+    全市场 DDD 扫描: 昨日 1~3 板的全部标的一次性过 batch_ddd (不限于关注列表)
+    返回命中行 DataFrame (列见 DDD_COLUMNS)，按 (score, open_pct) 降序
+    """
+    empty = pd.DataFrame(columns=DDD_COLUMNS)
+    if live_df is None or live_df.empty or not history_map:
+        return empty
+    df = _join_history(live_df, history_map)
+    if df.empty:
+        return empty
+    boards = pd.to_numeric(df['boards'], errors='coerce')
+    # 与 evaluate_batch 同口径: 缺昨额/市值的不判，一字板不判
+    df = df[boards.between(1, 3) & (df['open_pct'] <= 9.8) & (df['last_amt'] != 0) & (df['circ_mv'] != 0)]
+    if df.empty:
+        return empty
+
+    score, decision, detail = _ddd_columns(df)
+    out = pd.DataFrame({
+        'code': df['code'].to_numpy(),
+        'name': to_text(df['name']).to_numpy(),
+        'score': score,
+        'decision': decision,
+        'detail': detail,
+        'open_pct': df['open_pct'].to_numpy(),
+        'auc': df['auc_amt'].to_numpy(),
+        'boards': df['boards'].to_numpy(),
+        'circ_mv': df['circ_mv'].to_numpy(),
+    })[score > 0]
+    return out.sort_values(['score', 'open_pct'], ascending=False, kind='stable').reset_index(drop=True)
+
+
+# ================= 📊 报告输出 =================
+def print_report(results, scanned, title="📊 实时监控报告"):
+    """打印决策表 (results: evaluate_batch 结果的 records，已排序)"""
     print("\n" + "=" * 125)
     print(
-        f"📊 实时监控报告 | 时间: {datetime.datetime.now().strftime('%H:%M:%S')} | 扫描: {len(live_df)} | 命中: {len(results)}")
+        f"{title} | 时间: {datetime.datetime.now().strftime('%H:%M:%S')} | 扫描: {scanned} | 命中: {len(results)}")
     # [新增] 这里增加了 '板块情况' 列
     print(f"{'代码':<8} {'名称':<8} {'竞价%':<6} {'昨幅%':<6} {'连板':<6} {'市值':<8} {'昨额':<8} {'板块情况':<12} {'AI决策'}")
     print("-" * 140)
@@ -560,6 +802,62 @@ def main():
     print("=" * 125)
 
 
+def print_ddd_hits(ddd_hits, pool_map):
+    """打印全市场 DDD 扫描命中 (scan_ddd_market 结果)"""
+    print(f"\n💎 DDD 全市场扫描 (昨日1~3板) | 命中: {len(ddd_hits)}")
+    for item in to_records(ddd_hits):
+        c_open = Fore.RED if item['open_pct'] > 0 else Fore.GREEN
+        in_pool_mark = f" {Back.MAGENTA}{Fore.WHITE} 池 {Style.RESET_ALL}" if item['code'] in pool_map else ""
+        print(
+            f"{item['code']:<8} "
+            f"{item['name'][:4]:<8} "
+            f"{c_open}{item['open_pct']:>6.2f}{Style.RESET_ALL} "
+            f"{Fore.RED}{int(item['boards'])}板{Style.RESET_ALL} "
+            f"{item['circ_mv'] / 10000.0:.1f}亿 "
+            f"{Fore.CYAN}{item['decision']}{Style.RESET_ALL} [{item['detail']}] "
+            f"额:{int(item['auc'])}万{in_pool_mark}"
+        )
+    print("=" * 125)
+
+
+# ================= 🚀 主程序 =================
+def main():
+    print(f"\n{Back.BLUE}{Fore.WHITE} F佬 · 盘中实时监控系统 (Akshare Plus版) {Style.RESET_ALL}")
+    print("=" * 120)
+
+    # 板块快照后台先拉，和下面加载底库/策略池并行
+    prefetch_sector_map()
+
+    # 0. 情绪周期 (Mock)
+    current_phase = "Rising"
+    print(f"{Fore.CYAN}🌊 [0/4] 正在分析情绪周期... {Fore.MAGENTA}{current_phase}{Style.RESET_ALL}")
+
+    # 1. 加载数据
+    history_map = load_history_data()
+    if not history_map: return
+    pool_map, manual_focus, holdings, valid_codes = load_watch_scope()
+
+    # 2. 获取实时数据 (只请求关注范围 + DDD 候选)
+    live_df = get_live_data(watch_codes(valid_codes, manual_focus, history_map))
+    if live_df.empty: return
+
+    # 2.5 [新增] 获取板块数据
+    sector_map = get_sector_map()
+
+    print(f"{Fore.CYAN}⚙️ [3/3] 正在进行策略计算 (含板块共振分析)...{Style.RESET_ALL}")
+    print(f"🎯 过滤范围: 持仓 {len(holdings)} + 策略 {len(pool_map)} + 手动 {len(manual_focus)}")
+
+    calc_start = time.time()
+    results = to_records(evaluate_batch(live_df, history_map, pool_map, sector_map,
+                                        targets=valid_codes, focus_names=manual_focus))
+    print(f"⏱️ 策略计算耗时 {time.time() - calc_start:.3f}秒")
+
+    print_report(results, len(live_df))
+
+    # 4. 全市场 DDD 扫描 (昨日 1~3 板，不限关注列表)
+    print_ddd_hits(scan_ddd_market(live_df, history_map), pool_map)
+
+
 if __name__ == "__main__":
     # 检查当前时间，如果在9:25之前提醒用户
     now = datetime.datetime.now()
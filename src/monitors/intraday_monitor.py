@@ -1,8 +1,11 @@
 # ==============================================================================
 # 📌 F佬/Bo佬 盘中实时作战指挥室 (src/monitors/intraday_monitor.py) - 【优化版】
 # v1.2 精简信号版 - 解决满屏信号问题，优化金额显示
+# 用法: python src/monitors/intraday_monitor.py          刷新一次
+#       python src/monitors/intraday_monitor.py 5        常驻，每 5 秒刷新 (只重画变化的行)
 # Last Modified: 2026-01-12
 # ==============================================================================
+import numpy as np
 import pandas as pd
 import akshare as ak
 import os
@@ -11,6 +14,8 @@ import re
 import time
 import datetime
 import json
+import warnings
+from concurrent.futures import ThreadPoolExecutor
 from colorama import init, Fore, Style, Back
 
 # 解决 Windows 终端输出编码问题
@@ -29,8 +34,14 @@ sys.path.append(PROJECT_ROOT)
 
 from src.utils.data_loader import (
     load_holdings, load_pool_full, load_history_basics,
-    load_manual_focus, get_latest_call_auction_file, parse_call_auction_file
+    load_manual_focus, get_latest_call_auction_file, parse_call_auction_file,
+    HOLDINGS_PATH, STRATEGY_POOL_PATH, MANUAL_FOCUS_PATH
 )
+from src.utils.file_watch import WatchedInput
+from src.utils.live_screen import LiveScreen
+from src.utils.quote_client import get_quote_provider, fill_volume_ratio
+from src.utils.minute_bars import MinuteBars
+from src.strategies.signal_engine import SignalEngine
 
 
 # ================= 🛠️ 辅助函数 =================
@@ -50,6 +61,39 @@ def format_amount(num):
         return str(num)
 
 
+BASELINE_WORKERS = 8     # 量比基准同步日线的并发数
+
+
+def load_volume_baseline(codes, days=5):
+    """
+    近 N 日日均成交量(手)，用于批量行情补算量比
+    先把这些代码的日线同步到本地库 (每只每天最多联网一次，监控启动/监控名单变化时才调用)，
+    同步失败且本地也没有的代码不在结果里，量比留空而不是 0
+    """
+    try:
+        from src.utils.kline_store import get_store
+        store = get_store()
+        with ThreadPoolExecutor(max_workers=BASELINE_WORKERS, thread_name_prefix='baseline') as executor:
+            list(executor.map(lambda code: _try_sync(store, code), codes))
+        _, arrays = store.panel(codes, ['成交量'], days=days, sync=False)
+    except Exception:
+        return {}
+    vol = arrays['成交量']
+    if vol.size == 0:
+        return {}
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)   # 全 NaN 行
+        avg = np.nanmean(vol, axis=1)
+    return {code: v for code, v in zip(codes, avg.tolist()) if v > 0}
+
+
+def _try_sync(store, code):
+    try:
+        return store.sync(code)
+    except Exception:
+        return None
+
+
 def get_market_mood():
     """获取市场情绪：领涨板块"""
     try:
@@ -89,6 +133,7 @@ def get_index_status():
 def check_signals(row, holding_info, tag, index_pct, current_time_str):
     """
     分析单只股票，生成信号 (逻辑收紧版)
+    逐行参考实现；监控主流程走 signal_engine.SignalEngine (整列 + 滞回/冷却)，单轮结果与此一致
     """
     is_holding = holding_info is not None
     cost = holding_info.get('cost', 0) if is_holding else 0
@@ -185,51 +230,55 @@ def load_call_auction_data():
         return {}, f"Error: {str(e)}"
 
 
-# ================= 🚀 主程序 =================
-
-def main():
-    print(f"\n{Back.RED}{Fore.WHITE} F佬 · 作战指挥室 (实时监控) v1.2 {Style.RESET_ALL}")
-
-    # 1. 加载数据
-    holdings = load_holdings()
-    pool_map_full = load_pool_full()
-    manual_map = load_manual_focus()
-    call_auction_map, call_source_info = load_call_auction_data()
+# ================= 🖥️ 计算与排版 =================
 
-    # 2. 确定监控名单
-    monitor_codes = set(holdings) | set(pool_map_full.keys()) | set(manual_map.keys())
-    monitor_list = list(monitor_codes)
+def signal_inputs(df, holdings):
+    """行情帧 -> SignalEngine.update 的整列入参 (量比缺列时为 0，同 check_signals)"""
+    def col(name, default=np.nan):
+        if name not in df.columns:
+            return np.full(len(df), default)
+        return pd.to_numeric(df[name], errors='coerce').to_numpy(dtype=np.float64)
 
-    print(f"🎯 监控目标: {len(monitor_list)} 只 (持仓 {len(holdings)} | 策略 {len(pool_map_full)})")
+    codes = df['代码'].tolist()
+    return {
+        'price': col('最新价'), 'pct': col('涨跌幅'), 'high': col('最高'), 'open': col('今开'),
+        'vr': col('量比', 0.0), 'amt': col('成交额'), 'vol': col('成交量'),
+        'cost': np.array([holdings[c].get('cost', 0) if c in holdings else 0 for c in codes], dtype=np.float64),
+        'holding': np.array([c in holdings for c in codes], dtype=bool),
+    }
 
-    # 3. 获取实时行情
-    try:
-        df = ak.stock_zh_a_spot_em()
-    except:
-        print("⚠️ 无法连接行情服务器")
-        return
 
-    # 4. 获取环境数据
-    idx_info = get_index_status()
-    total_amt = idx_info['sh_amt'] + idx_info['sz_amt']
-    total_amt_str = f"{total_amt / 1000000000000:.2f}万亿" if total_amt > 1000000000000 else f"{total_amt / 100000000:.0f}亿"
-    sector_summary = get_market_mood()
-    current_time = datetime.datetime.now().strftime('%H:%M:%S')
-
-    # 5. 筛选与计算
-    df_target = df[df['代码'].isin(monitor_list)].copy()
+def collect_display_rows(df, holdings, pool_map_full, manual_map, call_auction_map, index_pct, now, engine=None,
+                         bars=None):
+    """
+    筛选 + 信号检测 + 排序 (持仓在前，然后按涨幅)，返回显示行列表
+    engine: 常驻模式传入同一个 SignalEngine (滞回 + 冷却)；不传为单轮无状态判定，等同逐行 check_signals
+    bars: 常驻模式累出来的本地 1 分钟线 (MinuteBars)，5 分钟涨速优先用它算；
+          不够 5 分钟或没传时退回行情源的 '5分钟涨跌' 字段；批量接口没有这一列，此时为 NaN (显示 '-')
+    """
+    monitor_list = set(holdings) | set(pool_map_full.keys()) | set(manual_map.keys())
+    df_target = df[df['代码'].isin(monitor_list)]
+    df_target = df_target[~df_target['代码'].duplicated()]
     display_list = []
 
-    for _, row in df_target.iterrows():
+    # 信号检测 (全部监控代码一次算完)
+    if engine is None:
+        engine = SignalEngine()
+    sig, _ = engine.update(now, df_target['代码'].tolist(), index_pct=index_pct,
+                           **signal_inputs(df_target, holdings))
+    local_speed = bars.speed(df_target['代码'].tolist(), now=now, minutes=5).to_numpy() if bars is not None \
+        else np.full(len(df_target), np.nan)
+
+    for (_, row), sig_level, sig_text, sig_color, bias, speed in zip(
+            df_target.iterrows(), sig['level'], sig['signal'], sig['color'], sig['bias'], local_speed):
         code = row['代码']
         name = row['名称']
         price = float(row['最新价'])
         pct = float(row['涨跌幅'])
-        speed5 = float(row.get('5分钟涨跌', 0))
+        speed5 = float(speed) if np.isfinite(speed) else float(row.get('5分钟涨跌', np.nan))
 
         # 关联信息
-        holding_info = holdings.get(code)
-        is_hold = holding_info is not None
+        is_hold = code in holdings
         strat_info = pool_map_full.get(code, {})
         tag = strat_info.get('tag', "")
 
@@ -238,10 +287,6 @@ def main():
         call_amt = call_info.get('amount', 0)
         call_pct = call_info.get('pct', 0)
 
-        # 信号检测
-        sig_level, sig_text, sig_color, bias, cost_ratio = check_signals(row, holding_info, tag, idx_info['pct'],
-                                                                         current_time)
-
         # 筛选显示条件：持仓 OR 手动关注 OR 有重要信号(Level>=5) OR 竞价爆量
         show_it = is_hold or (code in manual_map) or (sig_level >= 5)
 
@@ -255,56 +300,232 @@ def main():
                 'code': code, 'name': name, 'price': price, 'pct': pct, 'speed5': speed5,
                 'bias': bias, 'sig_text': sig_text, 'sig_color': sig_color,
                 'is_hold': is_hold, 'is_manual': code in manual_map,
-                'vr': float(row.get('量比', 0)),
+                'vr': float(row.get('量比', 0)),          # 没有量比基准时为 NaN，显示 '-'
                 'call_amt': call_amt, 'call_pct': call_pct,
                 'tag': tag
             })
 
-    # 6. 排序 (持仓在前，然后按涨幅)
     display_list.sort(key=lambda x: (not x['is_hold'], not x['is_manual'], -x['pct']))
-
-    # 7. 打印输出
+    return display_list
+
+
+def format_row(item):
+    # 颜色处理
+    c_pct = Fore.RED if item['pct'] > 0 else Fore.GREEN
+    c_code = Back.YELLOW + Fore.BLACK if item['is_hold'] else (Back.BLUE + Fore.WHITE if item['is_manual'] else "")
+
+    # --- 优化点 1: 使用 format_amount 优化竞价额显示 ---
+    amt_str = format_amount(item['call_amt'])
+
+    # --- 优化点 2: 构造 Tag 字符串 (放宽到 20 字符) ---
+    tag_str = item['tag'].replace('★人气', '').replace('成交', '').strip()[:20]
+
+    # 没有量比基准 (NaN) 显示 '-'
+    vr_str = f"{item['vr']:.1f}" if np.isfinite(item['vr']) else "-"
+    # 本地分钟线不够 5 分钟且行情源没有 5分钟涨跌 时显示 '-'
+    speed_str = f"{item['speed5']:.2f}" if np.isfinite(item['speed5']) else "-"
+
+    return (
+        f"{c_code}{item['code']}{Style.RESET_ALL:<0} "
+        f"{item['name']:<8} "
+        f"{c_pct}{item['pct']:>6.2f}{Style.RESET_ALL} "
+        f"{speed_str:>5} "
+        f"{item['price']:>7.2f} "
+        f"{item['bias']:>6.1f} "
+        f"{vr_str:>5} "
+        f"{amt_str:<8} "  # <--- 这里使用的是格式化后的 amt_str
+        f"{item['call_pct']:>5.2f}  "
+        f"{item['sig_color']}{item['sig_text']:<6}{Style.RESET_ALL} "
+        f"{Fore.CYAN}{tag_str}{Style.RESET_ALL}"
+    )
+
+
+def frame_lines(frame):
+    """一帧的全部文本行 (表头 + 每只票一行 + 分隔线)"""
+    idx_info = frame['idx_info']
+    total_amt = idx_info['sh_amt'] + idx_info['sz_amt']
+    total_amt_str = f"{total_amt / 1000000000000:.2f}万亿" if total_amt > 1000000000000 else f"{total_amt / 100000000:.0f}亿"
     idx_color = Fore.RED if idx_info['pct'] > 0 else Fore.GREEN
     header = f"上证: {idx_color}{idx_info['price']} ({idx_info['pct']}%) {Style.RESET_ALL} | 量比: {idx_info['sh_vr']} | 成交: {total_amt_str}"
-    print(f"\n{Back.BLUE}{Fore.WHITE} {current_time} {Style.RESET_ALL} | {header} | 竞价源: {call_source_info}")
-    print(f"{Fore.YELLOW}🔥 领涨: {sector_summary}{Style.RESET_ALL}")
-
-    print("-" * 120)
-    # 调整了列宽
-    print(
-        f"{'代码':<7} {'名称':<8} {'涨幅%':<7} {'现价':<7} {'乖离%':<6} {'量比':<5} {'竞价额':<8} {'竞价%':<6} {'信号'}")
-    print("-" * 120)
-
-    for item in display_list:
-        # 颜色处理
-        c_pct = Fore.RED if item['pct'] > 0 else Fore.GREEN
-        c_code = Back.YELLOW + Fore.BLACK if item['is_hold'] else (Back.BLUE + Fore.WHITE if item['is_manual'] else "")
-
-        # 格式化数据
-        name_disp = item['name'][:4]  # 截断名字防对齐乱
-
-        # --- 优化点 1: 使用 format_amount 优化竞价额显示 ---
-        amt_str = format_amount(item['call_amt'])
-
-        # --- 优化点 2: 构造 Tag 字符串 (放宽到 20 字符) ---
-        tag_str = item['tag'].replace('★人气', '').replace('成交', '').strip()[:20]
-
-        row_str = (
-            f"{c_code}{item['code']}{Style.RESET_ALL:<0} "
-            f"{item['name']:<8} "
-            f"{c_pct}{item['pct']:>6.2f}{Style.RESET_ALL} "
-            f"{item['price']:>7.2f} "
-            f"{item['bias']:>6.1f} "
-            f"{item['vr']:>5.1f} "
-            f"{amt_str:<8} "  # <--- 这里使用的是格式化后的 amt_str
-            f"{item['call_pct']:>5.2f}  "
-            f"{item['sig_color']}{item['sig_text']:<6}{Style.RESET_ALL} "
-            f"{Fore.CYAN}{tag_str}{Style.RESET_ALL}"
-        )
-        print(row_str)
-
-    print("-" * 120)
+    lines = [
+        f"{Back.BLUE}{Fore.WHITE} {frame['time']} {Style.RESET_ALL} | {header} | 竞价源: {frame['call_source']} | 行情: {frame['quote_src']}",
+        f"{Fore.YELLOW}🔥 领涨: {frame['sectors']}{Style.RESET_ALL}",
+        "-" * 120,
+        # 调整了列宽
+        f"{'代码':<7} {'名称':<8} {'涨幅%':<7} {'5分%':<5} {'现价':<7} {'乖离%':<6} {'量比':<5} {'竞价额':<8} {'竞价%':<6} {'信号'}",
+        "-" * 120,
+    ]
+    lines.extend(format_row(item) for item in frame['rows'])
+    lines.append("-" * 120)
+    return lines
+
+
+def event_lines(events):
+    """最近的信号切换 (新的在上)"""
+    if not events:
+        return []
+    lines = [f"{Fore.YELLOW}📣 最近信号:{Style.RESET_ALL}"]
+    for e in reversed(events):
+        extra = f" (第{e['breaks']}次开板)" if e['breaks'] else ""
+        lines.append(f"  {e['time']} {e['code']} {e['prev']} -> {e['color']}{e['signal']}{Style.RESET_ALL} "
+                     f"{e['price']:.2f} ({e['pct']:+.2f}%){extra}")
+    return lines
+
+
+# ================= 🔁 常驻监控 =================
+
+REFRESH_INTERVAL = 5.0   # 常驻模式默认刷新间隔 (秒)
+EVENT_ROWS = 8           # 屏幕底部显示最近几条信号切换
+
+
+class IntradayMonitor:
+    """
+    用法:
+        monitor = IntradayMonitor()
+        frame = monitor.refresh()       # 抓一轮 (指数/板块/个股并发)，行情失败返回 None
+        monitor.run(interval=5)         # 常驻: 每 interval 秒刷新，只重画数值变化的行
+
+    持仓/策略池/手动关注/竞价文件常驻内存，源文件变化 (mtime/size) 时才重新解析
+    """
+
+    def __init__(self, provider=None, fetch_index=None, fetch_sectors=None, volume_baseline=None, screen=None,
+                 now=None):
+        self.holdings = WatchedInput(load_holdings, HOLDINGS_PATH, name='持仓')
+        self.pool = WatchedInput(load_pool_full, [STRATEGY_POOL_PATH, MANUAL_FOCUS_PATH], name='策略池')
+        self.manual = WatchedInput(load_manual_focus, MANUAL_FOCUS_PATH, name='手动关注')
+        self.auction = WatchedInput(load_call_auction_data, get_latest_call_auction_file, name='竞价')
+        self.provider = provider or get_quote_provider()
+        self.fetch_index = fetch_index or get_index_status
+        self.fetch_sectors = fetch_sectors or get_market_mood
+        self.volume_baseline = volume_baseline or load_volume_baseline
+        self.screen = screen
+        self._now = now or datetime.datetime.now
+        self._executor = ThreadPoolExecutor(max_workers=3, thread_name_prefix='monitor')
+        self._baseline = (None, {})
+        self.signals = SignalEngine()      # 跨轮保留每只票的信号状态，只报切换
+        self.bars = MinuteBars()           # 每轮快照累成本地 1 分钟线 (涨速/VWAP/高低点不再调分钟接口)
+        self.last_frame = None
+        self.last_error = None
+        self.reloaded = []
+        self.stats = {'ticks': 0, 'failed': 0, 'reloads': 0}
+
+    def load_inputs(self):
+        """静态输入 (没变的直接用内存里的)，顺带记下本轮重新加载了哪些"""
+        holdings = self.holdings.get()
+        pool_map_full = self.pool.get()
+        manual_map = self.manual.get()
+        call_auction_map, call_source_info = self.auction.get()
+        self.reloaded = [w.name for w in (self.holdings, self.pool, self.manual, self.auction) if w.changed]
+        self.stats['reloads'] += len(self.reloaded)
+        return holdings, pool_map_full, manual_map, call_auction_map, call_source_info
+
+    def _volume_baseline(self, codes):
+        key = frozenset(codes)
+        if self._baseline[0] != key:
+            self._baseline = (key, self.volume_baseline(sorted(codes)))
+        return self._baseline[1]
+
+    def _quotes(self, codes, sina_map):
+        df = self.provider.quotes(codes, symbols=sina_map)
+        return fill_volume_ratio(df, self._volume_baseline(codes), now=self._now())
+
+    def refresh(self):
+        holdings, pool_map_full, manual_map, call_auction_map, call_source_info = self.load_inputs()
+        monitor_list = sorted(set(holdings) | set(pool_map_full.keys()) | set(manual_map.keys()))
+        sina_map = {code: item.get('sina_code') for code, item in pool_map_full.items()}
+
+        # 指数 / 板块 / 个股三个请求同时发出
+        f_spot = self._executor.submit(self._quotes, monitor_list, sina_map)
+        f_index = self._executor.submit(self.fetch_index)
+        f_sectors = self._executor.submit(self.fetch_sectors)
+        self.stats['ticks'] += 1
+        try:
+            df = f_spot.result()
+        except Exception as e:
+            self.stats['failed'] += 1
+            self.last_error = str(e)
+            return None
+        self.last_error = None
+        idx_info = f_index.result()
+        sector_summary = f_sectors.result()
+
+        now = self._now()
+        current_time = now.strftime('%H:%M:%S')
+        self.bars.update(now, df['代码'], pd.to_numeric(df['最新价'], errors='coerce'),
+                         pd.to_numeric(df['成交量'], errors='coerce'), pd.to_numeric(df['成交额'], errors='coerce'))
+        frame = {
+            'time': current_time,
+            'idx_info': idx_info,
+            'sectors': sector_summary,
+            'call_source': call_source_info,
+            'quote_src': "批量" if self.provider.source == 'batch' else "全市场",
+            'monitored': len(monitor_list),
+            'holdings': len(holdings),
+            'pool': len(pool_map_full),
+            'rows': collect_display_rows(df, holdings, pool_map_full, manual_map, call_auction_map,
+                                         idx_info['pct'], now, engine=self.signals, bars=self.bars),
+        }
+        self.last_frame = frame
+        return frame
+
+    def status_line(self, elapsed):
+        s = self.stats
+        frame = self.last_frame or {}
+        text = (f"⏱️ 第 {s['ticks']} 轮 | 耗时 {elapsed:.2f}秒 | 监控 {frame.get('monitored', 0)} 只 "
+                f"| 失败 {s['failed']}")
+        if self.reloaded:
+            text += f" | 已重新加载: {'/'.join(self.reloaded)}"
+        if self.last_error:
+            text += f" | {Fore.YELLOW}⚠️ 行情失败，显示上一轮: {self.last_error[:60]}{Style.RESET_ALL}"
+        return text
+
+    def run(self, interval=REFRESH_INTERVAL, max_ticks=None):
+        """常驻刷新；行情失败时保留上一帧，只更新状态行"""
+        self.screen = self.screen or LiveScreen()
+        ticks = 0
+        while max_ticks is None or ticks < max_ticks:
+            start = time.monotonic()
+            self.refresh()
+            elapsed = time.monotonic() - start
+            lines = frame_lines(self.last_frame) if self.last_frame else []
+            lines += event_lines(list(self.signals.events)[-EVENT_ROWS:])
+            self.screen.draw(lines + [self.status_line(elapsed)])
+            ticks += 1
+            if max_ticks is None or ticks < max_ticks:
+                time.sleep(max(0.0, interval - (time.monotonic() - start)))
+        return self.last_frame
+
+
+# ================= 🚀 主程序 =================
+
+def main(interval=None):
+    """interval 为 None 时刷新一次后退出 (原行为)；给定秒数时常驻刷新"""
+    print(f"\n{Back.RED}{Fore.WHITE} F佬 · 作战指挥室 (实时监控) v1.2 {Style.RESET_ALL}")
+    monitor = IntradayMonitor()
+
+    if interval is not None:
+        try:
+            monitor.run(interval)
+        except KeyboardInterrupt:
+            print(f"\n👋 监控已退出 (共 {monitor.stats['ticks']} 轮)")
+        return
+
+    # 1~2. 加载数据、确定监控名单 (首次 load 即解析文件)
+    holdings, pool_map_full, manual_map, _, _ = monitor.load_inputs()
+    monitor_count = len(set(holdings) | set(pool_map_full.keys()) | set(manual_map.keys()))
+    print(f"🎯 监控目标: {monitor_count} 只 (持仓 {len(holdings)} | 策略 {len(pool_map_full)})")
+
+    # 3~6. 行情 + 环境数据 (并发) -> 筛选计算
+    frame = monitor.refresh()
+    if frame is None:
+        print("⚠️ 无法连接行情服务器")
+        return
+
+    # 7. 打印输出
+    print()
+    for line in frame_lines(frame):
+        print(line)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else None)
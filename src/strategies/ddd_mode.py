@@ -5,6 +5,14 @@
 # ==============================================================================
 
 # src/strategies/ddd_mode.py
+import numpy as np
+
+# 市值分档 (元)
+SMALL_CAP = 20_0000_0000
+MID_CAP = 27_0000_0000
+# 1进2 量能门槛系数 (微盘 / 小盘 / 中大盘)
+GATE_RATIO = (0.0095, 0.0078, 0.0082)
+TIER_TAGS = ("微盘", "小盘", "中大盘")
 
 def check_ddd_strategy(row_live, history_item):
     """
@@ -113,4 +121,69 @@ def check_ddd_strategy(row_live, history_item):
             return 95, "💎DDD/3进4", f"竞值比:{ratio_bid_cap * 100:.1f}%"
 
     # 其他情况或未通过
-    return 0, "", ""
\ No newline at end of file
+    return 0, "", ""
+
+
+def batch_ddd(bid_amt, bid_pct, turnover_prev, circ_mv, boards, bid_amt_prev):
+    """
+    全市场批量版 check_ddd_strategy，判定口径逐元素一致。
+    参数均为等长数组 (单位: 元 / %)：今日竞价额、竞价涨幅、昨日成交额、流通市值、昨日连板数、昨日竞价额
+    Returns: (score int ndarray, decision object ndarray, detail object ndarray)
+    """
+    bid = np.asarray(bid_amt, dtype=np.float64)
+    pct = np.asarray(bid_pct, dtype=np.float64)
+    turnover = np.asarray(turnover_prev, dtype=np.float64)
+    circ = np.asarray(circ_mv, dtype=np.float64)
+    prev = np.asarray(bid_amt_prev, dtype=np.float64)
+    boards_f = np.asarray(boards, dtype=np.float64)
+    n = len(bid)
+
+    score = np.zeros(n, dtype=np.int64)
+    decision = np.full(n, "", dtype=object)
+    detail = np.full(n, "", dtype=object)
+
+    # int(NaN) 在逐只版里抛错 -> "数据错误"
+    bad = np.isnan(boards_f)
+    detail[bad] = "数据错误"
+    boards_i = np.trunc(np.where(bad, 0, boards_f))
+    base = ~bad & ~(pct < 1.8)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # === Pool A: 1进2 ===
+        a = base & (boards_i == 1) & ~(pct < 3.7)
+        too_hot = a & (turnover > 0) & (bid / turnover > 0.18)
+        detail[too_hot] = "Fail:竞昨比>18%"
+        a &= ~too_hot
+        tier = np.where(circ < SMALL_CAP, 0, np.where((SMALL_CAP <= circ) & (circ < MID_CAP), 1, 2))
+        cap_gate = np.take(GATE_RATIO, tier) * circ
+        amt_gate = 0.06 * turnover
+        gate = np.where(amt_gate > cap_gate, amt_gate, cap_gate)   # 同 max(cap_gate, amt_gate)
+        a_pass = a & (bid > gate)
+        score[a_pass] = np.where(pct[a_pass] > 5.0, 90, 85)
+        for i in np.flatnonzero(a_pass):
+            decision[i] = f"💎DDD/1进2({TIER_TAGS[tier[i]]})"
+            detail[i] = f"阈值:{int(gate[i] / 10000)}w|实际:{int(bid[i] / 10000)}w"
+
+        # === Pool B / C: 2进3、3进4 需要昨日竞价额 ===
+        bc = base & ((boards_i == 2) | (boards_i == 3)) & ~(pct <= 3.0)
+        no_prev = bc & (prev <= 0)
+        detail[no_prev & (boards_i == 2)] = "缺昨日竞价"
+        bc &= ~no_prev
+        growth = bid / prev
+        small = circ < MID_CAP
+
+        b_pass = bc & (boards_i == 2) & np.where(small, growth > 1.7, growth > 1.3)
+        score[b_pass] = 90
+        decision[b_pass] = "💎DDD/2进3"
+        for i in np.flatnonzero(b_pass):
+            detail[i] = f"竞增比:{growth[i]:.2f}"
+
+        bid_cap = np.where(circ > 0, bid / circ, 0.0)
+        c_pass = (bc & (boards_i == 3) & (growth > 0.9)
+                  & np.where(small, bid_cap > 0.02, bid_cap > 0.011))
+        score[c_pass] = 95
+        decision[c_pass] = "💎DDD/3进4"
+        for i in np.flatnonzero(c_pass):
+            detail[i] = f"竞值比:{bid_cap[i] * 100:.1f}%"
+
+    return score, decision, detail
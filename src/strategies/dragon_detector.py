@@ -1,8 +1,15 @@
+import os
+import sys
 import akshare as ak
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if PROJECT_ROOT not in sys.path: sys.path.append(PROJECT_ROOT)
+
+from src.utils.kline_store import get_daily
+
 # ==========================================
 # 策略参数：捕捉“断板妖股”
 # ==========================================
@@ -42,7 +49,8 @@ def analyze_stock_trend(code, name):
         start_date = (datetime.now() - timedelta(days=60)).strftime("%Y%m%d")
 
         # 获取日线数据
-        df = ak.stock_zh_a_hist(symbol=code, period="daily", start_date=start_date, end_date=end_date, adjust="qfq")
+        # 盘中带上今天的实时 K 线 (同原 ak.stock_zh_a_hist)，否则回看窗口整体错后一天
+        df = get_daily(code, start_date=start_date, end_date=end_date, include_live=True)
 
         if df.empty or len(df) < 15:
             return None
@@ -1,10 +1,17 @@
 
 import os
+import sys
+import numpy as np
 import pandas as pd
 import re
 import glob
 from datetime import datetime
 
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if PROJECT_ROOT not in sys.path: sys.path.append(PROJECT_ROOT)
+
+from src.utils.panel_store import PanelStore, as_float64
+
 # Define rules
 # 1. 焚诀-趋势强: 连续3日放量收红 (Vol(t) > Vol(t-1) AND Pct > 0)
 # 2. 焚诀-买点: 趋势强后，首日缩量阴线 (Vol(t) < Vol(t-1) AND Pct < 0) 且未破5日线(近似)
@@ -13,87 +20,42 @@ from datetime import datetime
 def load_ths_history(data_dir, days=5):
     """
     Load last N days of THS data.
-    Returns: {code: [ {date, pct, vol, amount, price, name, is_zt, ...} ] sorted by date}
+    Returns: {code: [ {date, pct, amount, price, name, is_zt} ] sorted by date}
+
+    Backed by the panel store: new Table-YYYYMMDD.txt files are appended to
+    data_dir/.cache/panel once, then the N-day window is sliced from memmaps.
     """
     if not os.path.exists(data_dir):
         return {}
-    
-    # 1. Find all Table-YYYYMMDD.txt
-    files = []
-    for f in os.listdir(data_dir):
-        if f.startswith("Table") and f.endswith(".txt"):
-            match = re.search(r'(\d{8})', f)
-            if match:
-                files.append({'path': os.path.join(data_dir, f), 'date': match.group(1)})
-    
-    # Sort by date desc and take last N
-    files.sort(key=lambda x: x['date'], reverse=True)
-    target_files = files[:days]
-    target_files.sort(key=lambda x: x['date']) # Sort ASC for processing
-    
+
+    store = PanelStore(data_dir)
+    store.sync()
+
+    dates, pct = store.window('pct', days)
+    if not dates:
+        return {}
+    # float32 -> 导出时的十进制值，保证 is_zt / 涨幅阈值比较不受精度影响
+    pct = as_float64(pct)
+    amount = as_float64(store.window('amount', days)[1])
+    price = as_float64(store.window('price', days)[1])
+    is_zt = store.window('zt', days)[1] > 0
+
     history_map = {}
-    
-    for f_info in target_files:
-        path = f_info['path']
-        date_str = f_info['date']
-        
-        try:
-            # Flexible reading for encoding/header
-            df = None
-            encodings = ['gbk', 'utf-8', 'utf-16']
-            for enc in encodings:
-                try:
-                    df = pd.read_csv(path, sep=r'\t+', engine='python', encoding=enc, dtype=str)
-                    if any('代码' in c for c in df.columns): break
-                except:
-                    continue
-            
-            if df is None: continue
-            
-            df.columns = [c.strip() for c in df.columns]
-            
-            # Identify columns
-            col_code = next((c for c in df.columns if '代码' in c), None)
-            col_pct = next((c for c in df.columns if '涨幅' in c and '竞价' not in c and '10' not in c), None)
-            col_vol = next((c for c in df.columns if '成交量' in c or '现手' in c), None) # THS usually has '现手' for current vol, but history uses '成交量' or just derive from amount? 
-            # Table.txt usually has '成交额'. Let's use Amount as proxy for Volume if Volume missing, or try find '现手'
-            col_amt = next((c for c in df.columns if '成交额' in c), None)
-            col_price = next((c for c in df.columns if '现价' in c), None)
-            col_zt = next((c for c in df.columns if '涨停' in c or '连板' in c), None)
-            col_name = next((c for c in df.columns if '名称' in c), None)
-            
-            for _, row in df.iterrows():
-                try:
-                    code = str(row[col_code]).strip()
-                    code = re.sub(r'\D', '', code)
-                    if len(code) != 6: continue
-                    
-                    pct = float(row.get(col_pct, 0)) if col_pct else 0.0
-                    amt = float(row.get(col_amt, 0)) if col_amt else 0.0
-                    price = float(row.get(col_price, 0)) if col_price else 0.0
-                    name = str(row.get(col_name, ''))
-                    
-                    # Clean Amt/Vol
-                    # Usually in data_loader we handle '万/亿', here assume simple parse or re-use logic
-                    # Simplification: THS export usually raw numbers or consistent. 
-                    # If strings with units, need parsing. Let's assume raw or simple.
-                    # Wait, data_loader uses safe_float. Let's define simple safe_float here.
-                    
-                    if code not in history_map: history_map[code] = []
-                    
-                    history_map[code].append({
-                        'date': date_str,
-                        'pct': pct,
-                        'amount': amt, # Use amount as primary volume indicator for 'Fen Jue' (funds flow)
-                        'price': price,
-                        'name': name,
-                        'is_zt': (pct > 9.8) or (str(row.get(col_zt, '')) not in ['--', '', 'nan'])
-                    })
-                except:
-                    continue
-        except Exception as e:
-            print(f"Error loading {path}: {e}")
-            
+    codes, names = store.codes, store.names
+    # 按代码转置后一次性 tolist，避免逐格从 ndarray 取值
+    for code, name, p_row, a_row, c_row, z_row in zip(codes, names, pct.T.tolist(), amount.T.tolist(),
+                                                      price.T.tolist(), is_zt.T.tolist()):
+        days_list = [{
+            'date': d,
+            'pct': p,
+            'amount': a, # Use amount as primary volume indicator for 'Fen Jue' (funds flow)
+            'price': c,
+            'name': name,
+            'is_zt': z,
+        } for d, p, a, c, z in zip(dates, p_row, a_row, c_row, z_row) if p == p]  # NaN = 当日不在导出里
+        if days_list:
+            history_map[code] = days_list
+
     return history_map
 
 def check_fen_jue(history_list):
@@ -169,6 +131,82 @@ def check_fen_jue(history_list):
 
     return tags
 
+# 批量版标签 (列顺序即 check_fen_jue 输出顺序)
+FEN_JUE_TAGS = ["🔥焚诀/加速", "🔥焚诀/趋势", "👀焚诀/分歧低吸", "🔥A大焚诀/爆量", "🔥A大焚诀/缩量"]
+
+
+def batch_fen_jue(pct, amount, is_zt, trend_days=3):
+    """
+    全市场批量版 check_fen_jue。
+    pct / amount / is_zt: (days, n_codes) 按日期升序，NaN (is_zt 对应位置任意) 表示当天不在导出里。
+    trend_days: 连续放量收红的天数 (3 = 与 check_fen_jue 相同)，窗口再长也只是多几次数组比较。
+    Returns: bool ndarray (n_codes, len(FEN_JUE_TAGS))
+    """
+    if trend_days < 3:
+        raise ValueError("trend_days 至少为 3")
+
+    pct = np.asarray(pct, dtype=np.float64)
+    amount = np.asarray(amount, dtype=np.float64)
+    is_zt = np.asarray(is_zt, dtype=bool)
+    n_days, n_codes = pct.shape
+    result = np.zeros((n_codes, len(FEN_JUE_TAGS)), dtype=bool)
+    if n_days < trend_days:
+        return result
+
+    # 停牌/缺失的日子挤到窗口前面，保持与逐只版 history_list (只含出现过的日子) 一致
+    present = ~np.isnan(pct)
+    order = np.argsort(present, axis=0, kind='stable')
+    pct = np.take_along_axis(pct, order, axis=0)
+    amount = np.take_along_axis(amount, order, axis=0)
+    is_zt = np.take_along_axis(is_zt, order, axis=0)
+    enough = present.sum(axis=0) >= trend_days
+
+    # up[k]: 倒数第 k 天相对前一天放量且收红 (k=0 为今天)
+    up = [(amount[-1 - k] > amount[-2 - k]) & (pct[-1 - k] > 0) for k in range(trend_days - 1)]
+
+    pct_t, vol_t, vol_y = pct[-1], amount[-1], amount[-2]
+    zt_t, zt_y, zt_3 = is_zt[-1], is_zt[-2], is_zt[-3]
+
+    # 1. 连续放量阳线
+    is_trend_up = np.logical_and.reduce(up) & enough
+    result[:, 0] = is_trend_up & zt_t
+    result[:, 1] = is_trend_up & ~zt_t
+
+    # 2. 焚诀买点：昨日仍在趋势中 (或涨停)，今日缩量且 绿盘/小红
+    trend_yest = np.logical_and.reduce(up[1:]) | zt_y
+    result[:, 2] = enough & trend_yest & (vol_t < vol_y) & ((pct_t < 0) | ((pct_t < 3.0) & ~zt_t))
+
+    # 3. A大焚诀：T-2 涨停、T-1 断板、T 收红
+    is_duanban = enough & zt_3 & ~zt_y & (pct_t > 0)
+    result[:, 3] = is_duanban & (vol_t > vol_y)
+    result[:, 4] = is_duanban & ~(vol_t > vol_y)
+    return result
+
+
+def fen_jue_tag_matrix(data_dir, days=5, trend_days=3):
+    """
+    从面板取最近 days 日，返回 DataFrame (index=code, columns=FEN_JUE_TAGS, bool)
+    """
+    if not os.path.exists(data_dir):
+        return pd.DataFrame(columns=FEN_JUE_TAGS, dtype=bool)
+
+    store = PanelStore(data_dir)
+    store.sync()
+    days = max(days, trend_days)
+    dates, pct = store.window('pct', days)
+    amount = store.window('amount', days)[1]
+    is_zt = store.window('zt', days)[1] > 0
+    matrix = batch_fen_jue(pct, amount, is_zt, trend_days=trend_days)
+    return pd.DataFrame(matrix, index=store.codes, columns=FEN_JUE_TAGS)
+
+
+def fen_jue_tags(matrix):
+    """标签矩阵 -> {code: [tag, ...]}，只保留命中至少一条规则的代码"""
+    hit = matrix[matrix.any(axis=1)]
+    tags = np.array(matrix.columns, dtype=object)
+    return {code: tags[row].tolist() for code, row in zip(hit.index, hit.to_numpy())}
+
+
 def safe_float(val):
     if pd.isna(val) or val == '--' or val == '': return 0.0
     s = str(val).strip()
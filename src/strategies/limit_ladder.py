@@ -1,4 +1,5 @@
-import akshare as ak
+import os
+import sys
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
@@ -6,6 +7,13 @@ from colorama import init, Fore, Style
 from tabulate import tabulate
 import time
 
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if PROJECT_ROOT not in sys.path: sys.path.append(PROJECT_ROOT)
+
+from src.utils.kline_store import get_daily
+from src.utils.trade_calendar import get_calendar
+from src.utils.zt_pool_cache import get_pool
+
 # 初始化颜色
 init(autoreset=True)
 
@@ -20,10 +28,8 @@ CONFIG = {
 # =======================================
 
 def get_latest_trading_date():
-    """获取最近的一个交易日"""
-    now = datetime.now()
-    # 简单处理：如果是下午3点后，取今天；否则取今天（akshare会自动处理非交易日返回空或报错，我们尽量传今天日期）
-    return now.strftime("%Y%m%d")
+    """获取最近的一个交易日 (今天是交易日取今天，周末/节假日取之前最近一个交易日)"""
+    return get_calendar().latest() or datetime.now().strftime("%Y%m%d")
 
 
 def get_limit_up_pool():
@@ -33,9 +39,9 @@ def get_limit_up_pool():
 
     try:
         # 1. 涨停池
-        df_zt = ak.stock_zt_pool_em(date=date_str)
+        df_zt = get_pool('zt', date_str)
         # 2. 炸板池 (计算情绪用)
-        df_zb = ak.stock_zt_pool_zbgc_em(date=date_str)
+        df_zb = get_pool('zbgc', date_str)
 
         return df_zt, df_zb
     except Exception as e:
@@ -53,8 +59,8 @@ def calculate_regulatory_risk(code, current_price):
         end_date = datetime.now().strftime("%Y%m%d")
         start_date = (datetime.now() - timedelta(days=60)).strftime("%Y%m%d")
 
-        df_hist = ak.stock_zh_a_hist(symbol=code, period="daily", start_date=start_date, end_date=end_date,
-                                     adjust="qfq")
+        # 盘中带上今天的实时 K 线 (同原 ak.stock_zh_a_hist)，否则回看窗口整体错后一天
+        df_hist = get_daily(code, start_date=start_date, end_date=end_date, include_live=True)
 
         if df_hist.empty or len(df_hist) < 30:
             return None
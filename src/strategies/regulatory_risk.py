@@ -1,11 +1,18 @@
 # src/strategies/regulatory_risk.py
 
+import os
+import sys
 import akshare as ak
 import pandas as pd
 import datetime
 from colorama import Fore, Style
 import time
 
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if PROJECT_ROOT not in sys.path: sys.path.append(PROJECT_ROOT)
+
+from src.utils.kline_store import get_daily
+
 class RegulatoryCalculator:
     def __init__(self):
         # Cache for index data to avoid repeated fetching
@@ -49,9 +56,9 @@ class RegulatoryCalculator:
                 print(f"Error fetching index {code}: {e}")
                 return pd.DataFrame()
         else:
-            # For stocks, we assume we might need to fetch if not passed in
+            # For stocks, read from the shared local kline store (synced at most once a day)
             try:
-                df = ak.stock_zh_a_hist(symbol=code, period="daily", adjust="qfq")
+                df = get_daily(code, days=days)
                 df = df.sort_values('日期', ascending=False).head(days)
                 df = df.rename(columns={'日期': 'date', '收盘': 'close'})
                 df['date'] = df['date'].astype(str)
@@ -0,0 +1,261 @@
+# ==============================================================================
+# 🚦 盘中信号状态机 (src/strategies/signal_engine.py)
+# intraday_monitor.check_signals 是无状态的：常驻刷新时同一只票每一轮都重复报
+# "炸板回落 / 急拉卖T / 弱转强"，贴着阈值的条件来回闪。
+# 这里每只票保留一份紧凑状态 (各信号是否激活、当前信号、进入时间、日内峰值、封板/开板)，
+#   - 进入用原阈值，退出要回落过 HYSTERESIS 回差带 (滞回)
+#   - 只在当前信号切换时产生事件；同一信号 COOLDOWN 秒内不重复提醒
+# 全部监控代码按数组一次算完 (每轮成本与名单长度基本无关)。
+# 单轮、无历史状态时输出与 check_signals 逐行结果一致。
+# ==============================================================================
+from collections import deque
+
+import numpy as np
+import pandas as pd
+from colorama import Fore
+
+# (键, 等级, 文案, 颜色)；同等级时列表里靠前的优先 (同 check_signals 的追加顺序)
+SIGNALS = [
+    ('limit_up', 10, "🚀涨停封板", Fore.MAGENTA),
+    ('broken', 9, "⚠️炸板回落", Fore.YELLOW),
+    ('pull_sell', 8, "🚀急拉卖T", Fore.MAGENTA),      # 持仓
+    ('dip_buy', 8, "🌊急杀买T", Fore.CYAN),          # 持仓
+    ('stop_loss', 7, "⚠️止损提醒", Fore.RED),        # 持仓
+    ('weak_strong', 6, "★弱转强", Fore.RED),        # 策略池
+    ('steady', 4, "👀缩量稳住", Fore.WHITE),         # 策略池
+    ('sweep', 7, "🔥人气扫板", Fore.RED),            # 策略池
+    ('volume_up', 5, "📈放量拉升", Fore.YELLOW),      # 策略池
+]
+SIGNAL_KEYS = [s[0] for s in SIGNALS]
+SIGNAL_LEVELS = np.array([s[1] for s in SIGNALS], dtype=np.int64)
+SIGNAL_TEXTS = np.array([s[2] for s in SIGNALS], dtype=object)
+SIGNAL_COLORS = np.array([s[3] for s in SIGNALS], dtype=object)
+# 取最高等级，同级取靠前的
+_PRIORITY = SIGNAL_LEVELS * 100 - np.arange(len(SIGNALS))
+
+IDLE_TEXT = "观察"
+IDLE_COLOR = Fore.WHITE
+
+# 退出回差: 已激活的信号在条件放宽这么多之前保持激活
+HYSTERESIS = {
+    'pct': 0.3,       # 涨幅阈值 (百分点)
+    'bias': 0.3,      # 乖离阈值 (百分点)
+    'vr': 0.2,        # 量比阈值
+    'ratio': 0.005,   # 价格比例阈值 (如 现价 < 最高 × 0.98)
+}
+COOLDOWN = 300        # 秒: 同一只票同一信号两次提醒的最小间隔
+EVENT_HISTORY = 50
+
+
+def signal_features(price, pct, high, open_p, vr, amt, vol, cost, is_holding):
+    """
+    check_signals 的中间量 (整列):
+    vwap = 成交额 / (成交量(手) × 100)，无成交时取现价；bias/cost_ratio 单位 % (只算持仓)
+    """
+    price = np.asarray(price, dtype=np.float64)
+    vol = np.asarray(vol, dtype=np.float64)
+    is_holding = np.asarray(is_holding, dtype=bool)
+    cost = np.where(is_holding, np.asarray(cost, dtype=np.float64), 0.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        vwap = np.where(vol > 0, np.asarray(amt, dtype=np.float64) / (vol * 100), price)
+        bias = (price - vwap) / vwap * 100
+        cost_ratio = np.where(cost > 0, (price - cost) / cost * 100, 0.0)
+    return {
+        'price': price,
+        'pct': np.asarray(pct, dtype=np.float64),
+        'high': np.asarray(high, dtype=np.float64),
+        'open': np.asarray(open_p, dtype=np.float64),
+        'vr': np.asarray(vr, dtype=np.float64),
+        'vwap': vwap,
+        'bias': bias,
+        'cost_ratio': cost_ratio,
+        'holding': is_holding,
+    }
+
+
+def signal_conditions(f, index_pct, relax=0.0):
+    """
+    各信号条件 -> bool 矩阵 (n, len(SIGNALS))
+    relax=0 为进入阈值 (与 check_signals 一致)；relax=1 时每个阈值向宽松方向挪一个回差带
+    """
+    p, b, v, r = (HYSTERESIS[k] * relax for k in ('pct', 'bias', 'vr', 'ratio'))
+    price, pct, high, open_p, vr = f['price'], f['pct'], f['high'], f['open'], f['vr']
+    vwap, bias, cost_ratio, holding = f['vwap'], f['bias'], f['cost_ratio'], f['holding']
+    pool = ~holding
+
+    # 涨停 (粗略判断) / 炸板 (最高价接近涨停，但现价回落)；"非涨停" 一律按当前快照判断
+    limit_up_now = ((pct > 9.8) & (price < 30)) | (pct > 19.8)
+    limit_up = ((pct > 9.8 - p) & (price < 30)) | (pct > 19.8 - p)
+    broken = (high > open_p * 1.09) & (price < high * (0.98 + r)) & (pct > 0 - p) & ~limit_up_now
+    return np.column_stack([
+        limit_up,
+        broken,
+        holding & (bias > 4.0 - b) & ~limit_up_now,
+        holding & (bias < -3.0 + b) & (index_pct > -0.5 - p),
+        holding & (pct < -4.0 + p) & (cost_ratio < -2.0 + p),
+        pool & (open_p < vwap) & (price > vwap * (1 - r)) & (pct > 3.0 - p) & (vr > 1.2 - v) & ~limit_up_now,
+        pool & (np.abs(bias) < 0.3 + b) & (pct > 0 - p) & (pct < 5.0 + p) & (vr < 0.9 + v),
+        pool & (pct > 8.0 - p) & ~limit_up_now,
+        pool & (vr > 2.5 - v) & (pct > 4.0 - p) & (pct < 8.0 + p),
+    ])
+
+
+def top_signal(active):
+    """激活矩阵 -> 每行的当前信号下标 (没有为 -1)"""
+    if active.shape[0] == 0:
+        return np.zeros(0, dtype=np.int64)
+    score = np.where(active, _PRIORITY, -1)
+    idx = np.argmax(score, axis=1)
+    return np.where(active.any(axis=1), idx, -1)
+
+
+def batch_signals(price, pct, high, open_p, vr, amt, vol, cost, is_holding, index_pct):
+    """
+    check_signals 的整列版 (无状态)
+    返回 (level, text, color, bias, cost_ratio)；行情数值缺失的行为 (0, "", "", 0.0, 0.0)
+    """
+    f = signal_features(price, pct, high, open_p, vr, amt, vol, cost, is_holding)
+    idx = top_signal(signal_conditions(f, index_pct))
+    return _labels(idx, f, _bad_rows(f))
+
+
+def _bad_rows(f):
+    # 量比可以缺 (NaN，没有基准)：与 check_signals 一样只让量比相关的条件不成立
+    return ~np.isfinite(np.column_stack([f['price'], f['pct'], f['high'], f['open'], f['bias']])).all(axis=1)
+
+
+def _labels(idx, f, bad):
+    has = idx >= 0
+    level = np.where(has, SIGNAL_LEVELS[np.maximum(idx, 0)], 0)
+    text = np.where(has, SIGNAL_TEXTS[np.maximum(idx, 0)], IDLE_TEXT).astype(object)
+    color = np.where(has, SIGNAL_COLORS[np.maximum(idx, 0)], IDLE_COLOR).astype(object)
+    level = np.where(bad, 0, level)
+    text[bad] = ""
+    color[bad] = ""
+    bias = np.where(bad, 0.0, f['bias'])
+    cost_ratio = np.where(bad, 0.0, f['cost_ratio'])
+    return level, text, color, bias, cost_ratio
+
+
+class SignalEngine:
+    """
+    用法:
+        engine = SignalEngine()
+        table, events = engine.update(now, codes, price=..., pct=..., high=..., open=..., vr=...,
+                                      amt=..., vol=..., cost=..., holding=..., index_pct=0.3)
+        table    # DataFrame(index=code): level/signal/color/bias/cost_ratio/since/peak/sealed/breaks
+        events   # 本轮信号切换 [{'time', 'code', 'signal', 'level', 'prev', ...}]，冷却中的不报
+        engine.events   # 最近 EVENT_HISTORY 条事件
+    跨日自动清空状态
+    """
+
+    def __init__(self, hysteresis=True, cooldown=COOLDOWN, history=EVENT_HISTORY):
+        self.relax = 1.0 if hysteresis else 0.0
+        self.cooldown = cooldown
+        self.events = deque(maxlen=history)
+        self.stats = {'ticks': 0, 'events': 0, 'suppressed': 0}
+        self._reset(None)
+
+    def _reset(self, day):
+        self._day = day
+        self.codes = []
+        self._row = {}
+        self._index = pd.Index([], dtype=object)
+        k = len(SIGNALS)
+        self._active = np.zeros((0, k), dtype=bool)
+        self._emitted = np.full((0, k), -np.inf)      # 各信号上次提醒时间 (epoch 秒)
+        self._top = np.zeros(0, dtype=np.int64)       # 当前信号下标，-1 = 观察
+        self._since = np.zeros(0)                     # 当前信号进入时间
+        self._peak = np.zeros(0)                      # 日内最高价
+        self._sealed = np.zeros(0, dtype=bool)        # 当前是否封板
+        self._breaks = np.zeros(0, dtype=np.int64)    # 今日开板次数
+
+    def __len__(self):
+        return len(self.codes)
+
+    def _rows(self, codes):
+        """代码 -> 行号，新代码追加状态行"""
+        new = [c for c in dict.fromkeys(codes) if c not in self._row]
+        if new:
+            n, k = len(new), len(SIGNALS)
+            for i, c in enumerate(new):
+                self._row[c] = len(self.codes) + i
+            self.codes.extend(new)
+            self._index = pd.Index(self.codes, dtype=object)
+            self._active = np.vstack([self._active, np.zeros((n, k), dtype=bool)])
+            self._emitted = np.vstack([self._emitted, np.full((n, k), -np.inf)])
+            self._top = np.concatenate([self._top, np.full(n, -1, dtype=np.int64)])
+            self._since = np.concatenate([self._since, np.full(n, np.nan)])
+            self._peak = np.concatenate([self._peak, np.full(n, np.nan)])
+            self._sealed = np.concatenate([self._sealed, np.zeros(n, dtype=bool)])
+            self._breaks = np.concatenate([self._breaks, np.zeros(n, dtype=np.int64)])
+        return self._index.get_indexer(codes)
+
+    def update(self, now, codes, price, pct, high, open, vr, amt, vol, cost, holding, index_pct):
+        if self._day != now.date():
+            self._reset(now.date())
+        ts = now.timestamp()
+        codes = [str(c) for c in codes]
+        if not codes:
+            return pd.DataFrame(columns=['level', 'signal', 'color', 'bias', 'cost_ratio']), []
+        rows = self._rows(codes)
+        self.stats['ticks'] += 1
+
+        f = signal_features(price, pct, high, open, vr, amt, vol, cost, holding)
+        bad = _bad_rows(f)
+        enter = signal_conditions(f, index_pct)
+        stay = signal_conditions(f, index_pct, relax=self.relax)
+        active = (enter | (self._active[rows] & stay)) & ~bad[:, None]
+        idx = top_signal(active)
+
+        # 封板 / 开板 / 峰值
+        sealed = active[:, 0]
+        self._breaks[rows] += (self._sealed[rows] & ~sealed & ~bad)
+        self._sealed[rows] = np.where(bad, self._sealed[rows], sealed)
+        self._peak[rows] = np.fmax(self._peak[rows], np.where(bad, np.nan, f['high']))
+
+        # 信号切换 -> 事件 (冷却中的不报，但状态照常切换)
+        prev = self._top[rows]
+        switched = idx != prev
+        self._since[rows] = np.where(switched, ts, self._since[rows])
+        entered = switched & (idx >= 0)
+        last = self._emitted[rows, np.maximum(idx, 0)]
+        cooling = entered & (ts - last < self.cooldown)
+        emit = entered & ~cooling
+        self.stats['suppressed'] += int(cooling.sum())
+
+        events = []
+        for i in np.flatnonzero(emit):
+            r, k = rows[i], idx[i]
+            self._emitted[r, k] = ts
+            event = {
+                'time': now.strftime('%H:%M:%S'),
+                'code': codes[i],
+                'signal': SIGNAL_TEXTS[k],
+                'level': int(SIGNAL_LEVELS[k]),
+                'color': SIGNAL_COLORS[k],
+                'prev': SIGNAL_TEXTS[prev[i]] if prev[i] >= 0 else IDLE_TEXT,
+                'price': float(f['price'][i]),
+                'pct': float(f['pct'][i]),
+                'breaks': int(self._breaks[r]),
+            }
+            events.append(event)
+            self.events.append(event)
+        self.stats['events'] += len(events)
+
+        self._active[rows] = active
+        self._top[rows] = idx
+
+        level, text, color, bias, cost_ratio = _labels(idx, f, bad)
+        table = pd.DataFrame({
+            'level': level,
+            'signal': text,
+            'color': color,
+            'bias': bias,
+            'cost_ratio': cost_ratio,
+            'since': self._since[rows],
+            'peak': self._peak[rows],
+            'sealed': self._sealed[rows],
+            'breaks': self._breaks[rows],
+        }, index=pd.Index(codes, name='code'))
+        return table, events
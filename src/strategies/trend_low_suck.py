@@ -1,8 +1,15 @@
+import os
+import sys
 import akshare as ak
 import pandas as pd
 import datetime
 import time
 
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if PROJECT_ROOT not in sys.path: sys.path.append(PROJECT_ROOT)
+
+from src.utils.kline_store import get_daily
+
 # ==========================================
 # 1. 策略配置 (Bolo Strategy Config)
 # ==========================================
@@ -44,7 +51,7 @@ def analyze_stock(code, name):
     """分析单只股票的历史K线，判断是否符合策略"""
     try:
         # 获取个股历史数据 (日线)
-        df_hist = ak.stock_zh_a_hist(symbol=code, period="daily", start_date=CONFIG['start_date'], adjust="qfq")
+        df_hist = get_daily(code, start_date=CONFIG['start_date'])
 
         if df_hist.empty or len(df_hist) < 15:
             return None
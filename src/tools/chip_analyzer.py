@@ -1,10 +1,37 @@
 # src/tools/chip_analyzer.py
-import akshare as ak
 import numpy as np
+import pandas as pd
+import os
+import sys
+import heapq
+import tempfile
+import time
 import warnings
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from functools import partial
 
 warnings.filterwarnings('ignore')
 
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if PROJECT_ROOT not in sys.path: sys.path.append(PROJECT_ROOT)
+
+from src.utils.kline_store import get_daily
+
+# --- 并发筹码分析默认参数 (pool_generator 可覆盖) ---
+CHIP_MAX_WORKERS = 8         # 同时在途的日线请求数
+CHIP_REQUEST_TIMEOUT = 15.0  # 单次请求超时 (秒)
+CHIP_MAX_RETRIES = 2         # 失败/超时后的重试次数
+CHIP_RETRY_BACKOFF = 1.0     # 第 n 次重试前等待 backoff * 2^(n-1) 秒
+
+
+def fetch_daily_kline(stock_code, start_date=None, timeout=None):
+    """
+    前复权日线，读本地日线库 (每只每天最多联网同步一次)
+    本地没有数据且联网失败时抛异常，由调用方决定是否重试
+    """
+    return get_daily(stock_code, start_date=start_date, timeout=timeout)
+
 
 def get_chip_metrics(stock_code, lookback_days=120):
     """
@@ -13,80 +40,141 @@ def get_chip_metrics(stock_code, lookback_days=120):
     :return: dict or None
     """
     try:
-        # 获取日线数据
-        df = ak.stock_zh_a_hist(symbol=stock_code, period="daily", adjust="qfq")
-        df = df.tail(lookback_days).copy()
-        df.reset_index(drop=True, inplace=True)
+        return calc_chip_metrics(fetch_daily_kline(stock_code), lookback_days)
+    except Exception as e:
+        # print(f"Chip analysis failed for {stock_code}: {e}") # 调试时可打开
+        return None
 
-        if df.empty: return None
 
-        # --- 1. 计算筹码分布 ---
-        chip_dict = {}
-        for index, row in df.iterrows():
-            avg_price = (row['最高'] + row['最低'] + row['收盘']) / 3
-            turnover = row['换手率'] / 100
-            if turnover > 1: turnover = 1
+def calc_chip_metrics(df, lookback_days=120):
+    """
+    由日线 DataFrame (akshare 列名) 计算筹码指标，不做网络请求
+    :return: dict or None
+    """
+    try:
+        if df is None or df.empty: return None
+        row = batch_chip_metrics(stack_ohlcv([df], lookback_days)).iloc[0]
+        if np.isnan(row['profit_ratio']): return None
+        metrics = {k: float(row[k]) for k in METRIC_COLUMNS}
+        metrics['rotten_days'] = int(metrics['rotten_days'])
+        metrics['limit_ups'] = int(metrics['limit_ups'])
+        return metrics
+    except Exception:
+        return None
 
-            # 衰减
-            for p in list(chip_dict.keys()):
-                chip_dict[p] = chip_dict[p] * (1 - turnover)
 
-            # 新增
-            p_key = round(avg_price, 2)
-            chip_dict[p_key] = chip_dict.get(p_key, 0) + turnover
+# ================= 筹码分布向量化内核 =================
+# 筹码模型: 第 i 天按均价 (高+低+收)/3 新增 换手率 份筹码，此后每天按 (1 - 当日换手) 衰减，
+# 所以第 i 天的筹码剩余 = t_i * prod_{j>i} (1 - t_j)，用反向累乘一次算出，不再逐日遍历价格字典。
 
-        # --- 2. 统计指标 ---
-        current_price = df.iloc[-1]['收盘']
-        prices = sorted(chip_dict.keys())
-        volumes = [chip_dict[p] for p in prices]
-        total_chips = sum(volumes)
+# stack_ohlcv 输出的第三维字段顺序 (akshare 日线列名)
+OHLCV_FIELDS = ['开盘', '最高', '最低', '收盘', '成交量', '涨跌幅', '换手率']
+_O, _H, _L, _C, _V, _PCT, _TO = range(len(OHLCV_FIELDS))
+
+METRIC_COLUMNS = ['profit_ratio', 'deviation', 'support_ratio', 'rotten_days', 'limit_ups', 'current_price']
+
+# 成本价格网格: 1 分一格。价格 = 刻度 / 100 (用除法，与 round(x, 2) 得到的 float 完全一致)
+TICKS_PER_YUAN = 100
+
+
+def stack_ohlcv(frames, lookback_days=120):
+    """
+    多只股票的日线 DataFrame -> (n_stocks, lookback_days, len(OHLCV_FIELDS)) float64 数组
+    各取最近 lookback_days 根，按最后一天右对齐，历史不足的在左侧补 NaN
+    """
+    out = np.full((len(frames), lookback_days, len(OHLCV_FIELDS)), np.nan)
+    for k, df in enumerate(frames):
+        if df is None or df.empty:
+            continue
+        n = min(len(df), lookback_days)
+        for j, col in enumerate(OHLCV_FIELDS):
+            out[k, lookback_days - n:, j] = df[col].to_numpy(dtype=np.float64)[len(df) - n:]
+    return out
 
-        if total_chips == 0: return None
 
-        avg_cost = np.average(prices, weights=volumes)
+def chip_weights(turnover):
+    """
+    换手率 (%, 最后一维为交易日) -> 每一天新增筹码在最后一天的剩余量
+    NaN (补齐的空白日) 既不新增也不衰减
+    """
+    t = np.minimum(np.nan_to_num(np.asarray(turnover, dtype=np.float64) / 100, nan=0.0), 1.0)
+    keep = 1.0 - t
+    # suffix[..., i] = prod_{j>i} keep_j
+    suffix = np.ones_like(keep)
+    suffix[..., :-1] = np.cumprod(keep[..., :0:-1], axis=-1)[..., ::-1]
+    return t * suffix
 
-        # 获利盘比例
-        profit_chips = sum([chip_dict[p] for p in prices if p < current_price])
-        profit_ratio = (profit_chips / total_chips) * 100
 
-        # 乖离率 (Deviation)
-        deviation = (current_price - avg_cost) / avg_cost * 100
+def cost_ticks(ohlcv):
+    """每日均价 (高+低+收)/3 落到价格网格上的整数刻度 (NaN 日为 -1)"""
+    avg = (ohlcv[..., _H] + ohlcv[..., _L] + ohlcv[..., _C]) / 3
+    ticks = np.rint(avg * TICKS_PER_YUAN)
+    return np.where(np.isnan(ticks), -1, ticks).astype(np.int64)
 
-        # 下方10%真空度 (Vacuum)
-        support_zone_low = current_price * 0.90
-        support_chips = sum([chip_dict[p] for p in prices if support_zone_low < p < current_price])
-        support_ratio = (support_chips / total_chips) * 100
 
-        # --- 3. 分析近期力度 (前几天走势) ---
-        # 简易版：只看是否出现过烂板(高换手+长上影)
-        recent_df = df.tail(5)
-        rotten_count = 0
-        limit_up_count = 0
+def chip_distribution(ohlcv):
+    """
+    单只股票 (n_days, fields) -> (网格价格, 各价位筹码量)，只返回有筹码的价位段
+    """
+    ticks = cost_ticks(ohlcv)
+    weights = chip_weights(ohlcv[:, _TO])
+    valid = ticks >= 0
+    if not valid.any():
+        return np.empty(0), np.empty(0)
+    base = ticks[valid].min()
+    chips = np.bincount(ticks[valid] - base, weights=weights[valid])
+    return (base + np.arange(len(chips))) / TICKS_PER_YUAN, chips
 
-        avg_vol = df['成交量'].tail(20).mean()
 
-        for _, r in recent_df.iterrows():
-            if r['涨跌幅'] > 9.5: limit_up_count += 1
+def batch_chip_metrics(ohlcv, codes=None, weights=None):
+    """
+    批量计算筹码指标 (stack_ohlcv 的输出)，一次调用处理全部股票
+    weights: 已知的各日筹码剩余量 (增量状态)，缺省时由换手率现算
+    返回 DataFrame[METRIC_COLUMNS]，无有效筹码的股票整行为 NaN
+    """
+    ohlcv = np.asarray(ohlcv, dtype=np.float64)
+    n_stocks = ohlcv.shape[0]
+    close = ohlcv[..., _C]
 
-            upper_shadow = (r['最高'] - max(r['开盘'], r['收盘'])) / r['收盘']
-            is_huge_vol = r['成交量'] > 1.8 * avg_vol
+    # --- 1. 筹码分布 (按天记账，同价位合并与否不影响下面的求和) ---
+    if weights is None:
+        weights = chip_weights(ohlcv[..., _TO])
+    ticks = cost_ticks(ohlcv)
+    price = np.where(ticks >= 0, ticks / TICKS_PER_YUAN, np.nan)
+    weights = np.where(np.isnan(price), 0.0, weights)
 
-            # 烂板定义：放量且有上影线，或放量滞涨
-            if (upper_shadow > 0.03 and is_huge_vol) or (is_huge_vol and abs(r['涨跌幅']) < 3):
-                rotten_count += 1
+    # 最后一天右对齐，收盘价即为现价
+    current = close[:, -1] if close.shape[1] else np.full(n_stocks, np.nan)
+    total = weights.sum(axis=1)
 
-        return {
-            'profit_ratio': profit_ratio,
-            'deviation': deviation,
-            'support_ratio': support_ratio,
-            'rotten_days': rotten_count,
-            'limit_ups': limit_up_count,
-            'current_price': current_price
-        }
+    with np.errstate(invalid='ignore', divide='ignore'):
+        # --- 2. 统计指标 ---
+        avg_cost = np.nansum(weights * np.nan_to_num(price), axis=1) / total
+        below = price < current[:, None]
+        profit_ratio = (weights * below).sum(axis=1) / total * 100
+        deviation = (current - avg_cost) / avg_cost * 100
+        support = below & (price > current[:, None] * 0.90)
+        support_ratio = (weights * support).sum(axis=1) / total * 100
 
-    except Exception as e:
-        # print(f"Chip analysis failed for {stock_code}: {e}") # 调试时可打开
-        return None
+        # --- 3. 近5日力度: 放量上影 / 放量滞涨 ---
+        vol20 = ohlcv[:, -20:, _V]
+        avg_vol = np.nansum(vol20, axis=1) / (~np.isnan(vol20)).sum(axis=1)
+        recent = ohlcv[:, -5:]
+        pct = recent[..., _PCT]
+        upper_shadow = (recent[..., _H] - np.maximum(recent[..., _O], recent[..., _C])) / recent[..., _C]
+        is_huge_vol = recent[..., _V] > 1.8 * avg_vol[:, None]
+        rotten = (is_huge_vol & (upper_shadow > 0.03)) | (is_huge_vol & (np.abs(pct) < 3))
+
+    result = pd.DataFrame({
+        'profit_ratio': profit_ratio,
+        'deviation': deviation,
+        'support_ratio': support_ratio,
+        'rotten_days': rotten.sum(axis=1).astype(np.float64),
+        'limit_ups': (pct > 9.5).sum(axis=1).astype(np.float64),
+        'current_price': current,
+    }, index=codes)
+    result.loc[~(total > 0)] = np.nan
+    return result
 
 
 def generate_chip_tag(metrics):
@@ -116,4 +204,255 @@ def generate_chip_tag(metrics):
     if rotten > 0 and (dev > 10):
         tags.append("👀分歧/烂板")
 
-    return "/".join(tags)
\ No newline at end of file
+    return "/".join(tags)
+
+# ================= 增量筹码状态 (按股票持久化) =================
+# 每只股票保存最近 lookback_days 根日线、各日筹码剩余量与最后处理的交易日。
+# 次日只拉取新 K 线：旧筹码整体乘一次 prod(1 - 新换手)，再追加新 K 线的筹码，移出窗口外的旧日。
+# 重叠的那根 K 线与状态不一致 (除权导致前复权价整体变化/数据修订) 或状态缺失时才全量重建。
+
+CHIP_STATE_VERSION = 1
+
+
+def _kline_arrays(df):
+    """日线 DataFrame -> (交易日 int YYYYMMDD, (n, len(OHLCV_FIELDS)) float64)"""
+    dates = pd.to_datetime(df['日期'].astype(str)).dt.strftime('%Y%m%d').astype(np.int64).to_numpy()
+    bars = np.column_stack([df[col].to_numpy(dtype=np.float64) for col in OHLCV_FIELDS])
+    return dates, bars
+
+
+def build_chip_state(df, lookback_days=120):
+    """全量构建筹码状态；没有日线返回 None"""
+    if df is None or df.empty:
+        return None
+    dates, bars = _kline_arrays(df.tail(lookback_days))
+    return {'dates': dates, 'bars': bars, 'weights': chip_weights(bars[:, _TO]),
+            'lookback_days': lookback_days}
+
+
+def advance_chip_state(state, df):
+    """
+    用从状态最后一个交易日 (含) 起拉取的日线推进状态
+    返回新状态；重叠 K 线对不上 (需要全量重建) 时返回 None
+    """
+    if df is None or df.empty:
+        return None
+    dates, bars = _kline_arrays(df)
+    last = state['dates'][-1]
+    i = int(np.searchsorted(dates, last))
+    if i >= len(dates) or dates[i] != last:
+        return None
+    if not np.allclose(bars[i], state['bars'][-1], rtol=1e-9, atol=1e-9, equal_nan=True):
+        return None
+
+    new_dates, new_bars = dates[i + 1:], bars[i + 1:]
+    if not len(new_dates):
+        return state
+    new_weights = chip_weights(new_bars[:, _TO])
+    # 旧筹码经历新 K 线的衰减: 一次乘法
+    t_new = np.minimum(np.nan_to_num(new_bars[:, _TO] / 100, nan=0.0), 1.0)
+    decay = np.prod(1.0 - t_new)
+
+    n = state['lookback_days']
+    return {
+        'dates': np.concatenate([state['dates'], new_dates])[-n:],
+        'bars': np.concatenate([state['bars'], new_bars])[-n:],
+        'weights': np.concatenate([state['weights'] * decay, new_weights])[-n:],
+        'lookback_days': n,
+    }
+
+
+def state_metrics(state):
+    """筹码状态 -> 指标 dict (与 calc_chip_metrics 同口径)；无有效筹码返回 None"""
+    row = batch_chip_metrics(state['bars'][None], weights=state['weights'][None]).iloc[0]
+    if np.isnan(row['profit_ratio']):
+        return None
+    metrics = {k: float(row[k]) for k in METRIC_COLUMNS}
+    metrics['rotten_days'] = int(metrics['rotten_days'])
+    metrics['limit_ups'] = int(metrics['limit_ups'])
+    return metrics
+
+
+class ChipStateStore:
+    """
+    每只股票一个 <code>.npz (交易日 / 日线 / 筹码剩余量)，写入先落唯一的临时文件再替换
+    (超时重试时被放弃的线程可能还在写同一只票，固定的 .tmp 会被两个写者交错写坏)
+    用法:
+        store = ChipStateStore(state_dir)
+        metrics, mode = update_chip_metrics('600000', store)
+    """
+
+    def __init__(self, state_dir, lookback_days=120):
+        self.state_dir = state_dir
+        self.lookback_days = lookback_days
+
+    def _path(self, code):
+        return os.path.join(self.state_dir, f'{code}.npz')
+
+    def load(self, code):
+        try:
+            with np.load(self._path(code)) as z:
+                if int(z['version']) != CHIP_STATE_VERSION or int(z['lookback_days']) != self.lookback_days:
+                    return None
+                return {'dates': z['dates'], 'bars': z['bars'], 'weights': z['weights'],
+                        'lookback_days': self.lookback_days}
+        except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile):
+            # 读不了 (截断 / 空文件 / 旧格式) 一律当作没有状态，全量重建后覆盖
+            return None
+
+    def save(self, code, state):
+        tmp = None
+        try:
+            os.makedirs(self.state_dir, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(prefix=f'{code}.', suffix='.tmp', dir=self.state_dir)
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, version=CHIP_STATE_VERSION, lookback_days=state['lookback_days'],
+                         dates=state['dates'], bars=state['bars'], weights=state['weights'])
+            os.replace(tmp, self._path(code))
+        except OSError as e:
+            # 状态写失败只影响下次速度，不影响本次结果
+            print(f"⚠️ 筹码状态写入失败 {code}: {e}")
+            if tmp and os.path.exists(tmp):
+                os.remove(tmp)
+
+
+def update_chip_metrics(stock_code, store, fetch=None):
+    """
+    增量计算筹码指标
+    :return: (metrics or None, 'incremental' | 'full')
+    """
+    fetch = fetch or fetch_daily_kline
+    state = store.load(stock_code)
+    new_state = None
+    if state is not None:
+        new_state = advance_chip_state(state, fetch(stock_code, start_date=str(state['dates'][-1])))
+    mode = 'incremental' if new_state is not None else 'full'
+    if new_state is None:
+        new_state = build_chip_state(fetch(stock_code), store.lookback_days)
+        if new_state is None:
+            return None, mode
+    if new_state is not state:
+        store.save(stock_code, new_state)
+    return state_metrics(new_state), mode
+
+
+# ================= 并发筹码分析 (盘后批量) =================
+
+def _timed_attempt(fetch, stock_code, lookback_days, store):
+    t0 = time.perf_counter()
+    if store is None:
+        metrics, mode = calc_chip_metrics(fetch(stock_code), lookback_days), 'full'
+    else:
+        metrics, mode = update_chip_metrics(stock_code, store, fetch)
+    return metrics, mode, time.perf_counter() - t0
+
+
+def analyze_chips(codes, max_workers=CHIP_MAX_WORKERS, timeout=CHIP_REQUEST_TIMEOUT,
+                  retries=CHIP_MAX_RETRIES, backoff=CHIP_RETRY_BACKOFF,
+                  lookback_days=120, fetch=None, on_result=None, store=None):
+    """
+    有界线程池并发计算多只股票的筹码指标
+    - 同时在途请求数不超过 max_workers
+    - 单次请求超过 timeout 秒视为失败 (线程无法强杀，超时请求继续占用一个名额直到返回)
+    - 失败/超时后按 backoff * 2^(n-1) 退避重试，最多 retries 次
+    :param on_result: 回调 (code, metrics, done, total)，在调用线程中按完成顺序触发，用于打印进度
+    :param store: ChipStateStore，给定时走增量筹码状态 (lookback_days 以 store 为准)
+    :return: ({code: metrics or None}, stats)
+    """
+    fetch = fetch or partial(fetch_daily_kline, timeout=timeout)
+    codes = list(dict.fromkeys(codes))
+    results = {}
+    stats = {'total': len(codes), 'ok': 0, 'empty': 0, 'failed': 0, 'timeouts': 0,
+             'retries': 0, 'latencies': [], 'workers': max_workers, 'elapsed': 0.0,
+             'incremental': 0, 'full': 0}
+    if not codes:
+        return results, stats
+
+    t_start = time.perf_counter()
+    queue = [(0.0, seq, code, 0) for seq, code in enumerate(codes)]  # (最早开始时间, 序号, 代码, 第几次尝试)
+    seq = len(codes)
+    in_flight = {}     # future -> (code, attempt, started)
+    abandoned = set()  # 已判超时但线程仍在运行的请求
+
+    def finish(code, metrics):
+        results[code] = metrics
+        if on_result:
+            on_result(code, metrics, len(results), len(codes))
+
+    def fail(code, attempt, now):
+        nonlocal seq
+        if attempt < retries:
+            stats['retries'] += 1
+            heapq.heappush(queue, (now + backoff * (2 ** attempt), seq, code, attempt + 1))
+            seq += 1
+        else:
+            stats['failed'] += 1
+            finish(code, None)
+
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='chip')
+    try:
+        while queue or in_flight:
+            now = time.perf_counter()
+            abandoned = {f for f in abandoned if not f.done()}
+
+            while queue and queue[0][0] <= now and len(in_flight) + len(abandoned) < max_workers:
+                _, _, code, attempt = heapq.heappop(queue)
+                f = executor.submit(_timed_attempt, fetch, code, lookback_days, store)
+                in_flight[f] = (code, attempt, now)
+
+            if not in_flight and len(abandoned) >= max_workers:
+                # 名额全部被超时请求占住：再等一个超时周期，仍无释放则放弃剩余代码
+                done, _ = wait(abandoned, timeout=timeout, return_when=FIRST_COMPLETED)
+                if not done:
+                    while queue:
+                        _, _, code, _ = heapq.heappop(queue)
+                        stats['failed'] += 1
+                        finish(code, None)
+                continue
+
+            wake = [started + timeout for _, _, started in in_flight.values()]
+            if queue:
+                wake.append(queue[0][0])
+            delay = max(0.0, min(wake) - now)
+            if in_flight or abandoned:
+                wait(set(in_flight) | abandoned, timeout=delay, return_when=FIRST_COMPLETED)
+            else:
+                time.sleep(delay)  # 只剩退避中的重试
+
+            now = time.perf_counter()
+            for f, (code, attempt, started) in list(in_flight.items()):
+                if f.done():
+                    del in_flight[f]
+                    try:
+                        metrics, mode, latency = f.result()
+                    except Exception:
+                        fail(code, attempt, now)
+                        continue
+                    stats['latencies'].append(latency)
+                    stats[mode] += 1
+                    stats['ok' if metrics else 'empty'] += 1
+                    finish(code, metrics)
+                elif now - started >= timeout:
+                    del in_flight[f]
+                    abandoned.add(f)
+                    stats['timeouts'] += 1
+                    fail(code, attempt, now)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    stats['elapsed'] = time.perf_counter() - t_start
+    return results, stats
+
+
+def format_chip_stats(stats):
+    """analyze_chips 统计 -> 一行中文摘要"""
+    text = (f"筹码分析: 成功 {stats['ok']}/{stats['total']}，无数据 {stats['empty']}，失败 {stats['failed']}"
+            f" (超时 {stats['timeouts']} 次，重试 {stats['retries']} 次)")
+    if stats.get('incremental'):
+        text += f" | 增量 {stats['incremental']} / 全量 {stats['full']}"
+    lat = stats['latencies']
+    if lat:
+        p50, p90 = np.percentile(lat, [50, 90])
+        text += f" | 单只耗时 p50 {p50:.2f}s / p90 {p90:.2f}s / max {max(lat):.2f}s"
+    text += f" | 总耗时 {stats['elapsed']:.1f}s (并发 {stats['workers']})"
+    return text
@@ -0,0 +1,198 @@
+# src/utils/auction_tape.py
+# ==============================================================================
+# 集合竞价快照带 (9:15 ~ 9:25)
+# 每只票一个定长环形缓冲 (时间 / 竞价涨幅 / 竞价金额)，整块预分配成 (代码 × 槽位) 数组。
+# 只有快照变化 (涨幅或金额不同) 时才写入一个槽位，值按阶梯函数理解:
+# 某时刻的值 = 该时刻及之前最后一次写入的值。
+# 轨迹特征 (9:20 前峰值、9:20 后撤单、9:25 前加速) 全部是整块数组运算。
+# ==============================================================================
+import numpy as np
+import pandas as pd
+
+# 时间统一用 当天秒数
+AUCTION_START = 9 * 3600 + 15 * 60     # 9:15 开始，可撤单
+CANCEL_CUTOFF = 9 * 3600 + 20 * 60     # 9:20 之后不能撤单
+AUCTION_END = 9 * 3600 + 25 * 60       # 9:25 撮合
+
+TAPE_CAPACITY = 200         # 9:15~9:25 共 600 秒，按 3 秒一帧全部变化也装得下
+WITHDRAW_AMT_DROP = 0.3    # 9:20 后金额比 9:20 前峰值少 30% 以上 -> 撤单
+WITHDRAW_PCT_DROP = 2.0    # 9:20 后涨幅比 9:20 前峰值低 2 个点以上 -> 撤单
+ACCEL_WINDOW = 60          # 加速判定窗口 (秒): 最近一个窗口的增量 vs 前一个窗口
+ACCEL_RATIO = 1.5
+
+FEATURE_COLUMNS = ['samples', 'pct', 'amt', 'pre_peak_amt', 'pre_peak_pct', 'post_min_amt', 'post_min_pct',
+                   'amt_drop', 'pct_drop', 'withdrawn', 'amt_recent', 'amt_prior', 'pct_recent', 'accelerating']
+
+
+def seconds_of_day(ts):
+    """datetime / Timestamp / 'HH:MM:SS' / 秒数 -> 当天秒数"""
+    if isinstance(ts, (int, float, np.integer, np.floating)):
+        return float(ts)
+    if isinstance(ts, str):
+        h, m, *s = (int(x) for x in ts.split(':'))
+        return h * 3600 + m * 60 + (s[0] if s else 0)
+    return ts.hour * 3600 + ts.minute * 60 + ts.second + ts.microsecond / 1e6
+
+
+class AuctionTape:
+    """
+    用法:
+        tape = AuctionTape()
+        changed = tape.record('09:16:03', df['code'], df['open_pct'], df['auc_amt'])  # 变化的代码
+        feats = tape.features(now='09:25:00', codes=changed)                          # 轨迹特征
+        t, pct, amt = tape.trajectory('600000')
+    """
+
+    def __init__(self, capacity=TAPE_CAPACITY):
+        self.capacity = capacity
+        self.codes = []
+        self._row = {}
+        self._index = pd.Index([], dtype=object)
+        self._t = np.full((0, capacity), np.nan)
+        self._pct = np.full((0, capacity), np.nan)
+        self._amt = np.full((0, capacity), np.nan)
+        self._count = np.zeros(0, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def _ensure_rows(self, codes):
+        """代码 -> 行号，新代码追加到末尾 (数组按块扩容)"""
+        new = [c for c in dict.fromkeys(codes) if c not in self._row]
+        if new:
+            start = len(self.codes)
+            for i, c in enumerate(new):
+                self._row[c] = start + i
+            self.codes.extend(new)
+            self._index = pd.Index(self.codes, dtype=object)
+            need = len(self.codes)
+            if need > len(self._count):
+                size = max(need, 2 * len(self._count), 256)
+                grow = size - len(self._count)
+                pad = np.full((grow, self.capacity), np.nan)
+                self._t = np.vstack([self._t, pad])
+                self._pct = np.vstack([self._pct, pad])
+                self._amt = np.vstack([self._amt, pad])
+                self._count = np.concatenate([self._count, np.zeros(grow, dtype=np.int64)])
+        return self._index.get_indexer(codes)
+
+    def _last(self, rows):
+        """各行最近一次写入的 (pct, amt)，没有写过的为 NaN"""
+        slot = (self._count[rows] - 1) % self.capacity
+        has = self._count[rows] > 0
+        pct = np.where(has, self._pct[rows, slot], np.nan)
+        amt = np.where(has, self._amt[rows, slot], np.nan)
+        return pct, amt
+
+    def record(self, ts, codes, pct, amt):
+        """
+        写入一帧快照，返回快照有变化的代码列表 (首次出现也算变化)
+        同一帧里重复的代码只取第一次出现
+        """
+        codes = pd.Series(np.asarray(codes, dtype=object))
+        first = ~codes.duplicated().to_numpy()
+        codes = codes[first].tolist()
+        pct = np.asarray(pct, dtype=np.float64)[first]
+        amt = np.asarray(amt, dtype=np.float64)[first]
+        if not codes:
+            return []
+
+        rows = self._ensure_rows(codes)
+        last_pct, last_amt = self._last(rows)
+        changed = (self._count[rows] == 0) | ~_same(last_pct, pct) | ~_same(last_amt, amt)
+        rows_c = rows[changed]
+        slot = self._count[rows_c] % self.capacity
+        self._t[rows_c, slot] = seconds_of_day(ts)
+        self._pct[rows_c, slot] = pct[changed]
+        self._amt[rows_c, slot] = amt[changed]
+        self._count[rows_c] += 1
+        return [c for c, ch in zip(codes, changed.tolist()) if ch]
+
+    def trajectory(self, code):
+        """某只票按时间排序的 (秒数, 涨幅, 金额)"""
+        row = self._row.get(code)
+        if row is None:
+            return np.empty(0), np.empty(0), np.empty(0)
+        n = min(self._count[row], self.capacity)
+        order = np.arange(self._count[row] - n, self._count[row]) % self.capacity
+        return self._t[row, order], self._pct[row, order], self._amt[row, order]
+
+    def _value_at(self, rows, values, at, since=None):
+        """阶梯值: 各行在 at 时刻 (含) 之前最后一次写入的值，之前没有写入的为 NaN；since 之前的写入不算"""
+        t = self._t[rows]
+        valid = t <= at                            # NaN 槽位比较为 False
+        if since is not None:
+            valid &= t >= since
+        tt = np.where(valid, t, -np.inf)
+        idx = np.argmax(tt, axis=1)
+        found = np.isfinite(tt[np.arange(len(rows)), idx])
+        return np.where(found, values[rows, idx], np.nan)
+
+    def features(self, now, codes=None):
+        """
+        轨迹特征 DataFrame (index=code, 列见 FEATURE_COLUMNS)
+        withdrawn: 9:20 后金额/涨幅相对 9:15~9:20 峰值明显回落 (9:20 前的挂单被撤)；
+                   9:15 之前的快照还是上一交易日的成交额/涨幅，不参与
+        accelerating: 9:22 之后最近 ACCEL_WINDOW 秒的金额增量超过前一窗口 ACCEL_RATIO 倍且涨幅不降
+        """
+        now = seconds_of_day(now)
+        if codes is None:
+            codes = self.codes
+        codes = [c for c in codes if c in self._row]
+        if not codes:
+            return pd.DataFrame(columns=FEATURE_COLUMNS)
+        rows = self._index.get_indexer(codes)
+
+        t, pct, amt = self._t[rows], self._pct[rows], self._amt[rows]
+        pre = (t >= AUCTION_START) & (t < CANCEL_CUTOFF)
+        post = (t >= CANCEL_CUTOFF) & (t <= now)
+        pre_peak_amt = np.max(np.where(pre, amt, -np.inf), axis=1)
+        pre_peak_pct = np.max(np.where(pre, pct, -np.inf), axis=1)
+        post_min_amt = np.min(np.where(post, amt, np.inf), axis=1)
+        post_min_pct = np.min(np.where(post, pct, np.inf), axis=1)
+
+        # 9:20 之后没有变化时，9:20 的值就是 9:20 之前最后写入的值
+        at_cut_amt = self._value_at(rows, self._amt, CANCEL_CUTOFF, since=AUCTION_START)
+        at_cut_pct = self._value_at(rows, self._pct, CANCEL_CUTOFF, since=AUCTION_START)
+        past_cut = now >= CANCEL_CUTOFF
+        post_min_amt = np.where(past_cut, np.fmin(post_min_amt, at_cut_amt), np.nan)
+        post_min_pct = np.where(past_cut, np.fmin(post_min_pct, at_cut_pct), np.nan)
+
+        has_pre = np.isfinite(pre_peak_amt)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            amt_drop = np.where(has_pre & (pre_peak_amt > 0), 1 - post_min_amt / pre_peak_amt, np.nan)
+        pct_drop = np.where(has_pre, pre_peak_pct - post_min_pct, np.nan)
+        withdrawn = (amt_drop >= WITHDRAW_AMT_DROP) | (pct_drop >= WITHDRAW_PCT_DROP)
+
+        amt_end = self._value_at(rows, self._amt, now)
+        amt_mid = self._value_at(rows, self._amt, now - ACCEL_WINDOW)
+        amt_start = self._value_at(rows, self._amt, now - 2 * ACCEL_WINDOW)
+        pct_end = self._value_at(rows, self._pct, now)
+        pct_mid = self._value_at(rows, self._pct, now - ACCEL_WINDOW)
+        amt_recent = amt_end - amt_mid
+        amt_prior = amt_mid - amt_start
+        pct_recent = pct_end - pct_mid
+        accelerating = ((now >= CANCEL_CUTOFF + 2 * ACCEL_WINDOW) & np.isfinite(amt_prior) & (amt_recent > 0)
+                        & (amt_recent > ACCEL_RATIO * np.fmax(amt_prior, 0)) & (pct_recent >= 0))
+
+        return pd.DataFrame({
+            'samples': self._count[rows],
+            'pct': pct_end,
+            'amt': amt_end,
+            'pre_peak_amt': np.where(has_pre, pre_peak_amt, np.nan),
+            'pre_peak_pct': np.where(has_pre, pre_peak_pct, np.nan),
+            'post_min_amt': post_min_amt,
+            'post_min_pct': post_min_pct,
+            'amt_drop': amt_drop,
+            'pct_drop': pct_drop,
+            'withdrawn': withdrawn,
+            'amt_recent': amt_recent,
+            'amt_prior': amt_prior,
+            'pct_recent': pct_recent,
+            'accelerating': accelerating,
+        }, index=pd.Index(codes, name='code'))
+
+
+def _same(a, b):
+    """逐元素相等 (两边都是 NaN 也算相等)"""
+    return (a == b) | (np.isnan(a) & np.isnan(b))
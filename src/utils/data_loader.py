@@ -1,8 +1,12 @@
 import os
 import re
+import numpy as np
 import pandas as pd
 import sys
 
+from src.utils.dataset_registry import get_table
+from src.utils.normalize import to_code, to_text, to_number
+
 def get_project_root():
     """Get the project root directory."""
     # This assumes the file is in src/utils/
@@ -214,13 +218,17 @@ def load_history_basics():
     
     try:
         # Load File with robust strategy
-        df = None
+        # 0. Tab export via shared columnar cache (same file pool_generator already parsed)
+        df = get_table(path)
+        if df is not None and len(df.columns) < 2: df = None
+
         # 1. Regex + UTF-8 (Prioritize for copied text)
-        try:
-             df = pd.read_csv(path, sep=r'\s+', encoding='utf-8', on_bad_lines='skip')
-             cols = [str(c) for c in df.columns]
-             if not any("代码" in c for c in cols): df = None
-        except: pass
+        if df is None:
+            try:
+                 df = pd.read_csv(path, sep=r'\s+', encoding='utf-8', on_bad_lines='skip')
+                 cols = [str(c) for c in df.columns]
+                 if not any("代码" in c for c in cols): df = None
+            except: pass
 
         # 2. Regex + GBK
         if df is None:
@@ -320,7 +328,8 @@ def parse_call_auction_file(file_path):
                 # Cleanup column names
                 temp_df.columns = [str(c).strip() for c in temp_df.columns]
                 
-                if any("代码" in c for c in temp_df.columns) and len(temp_df) > 0:
+                # 单列说明分隔符没切开 (例如空格分隔的文件被 \t+ 整行读成一列)
+                if len(temp_df.columns) > 1 and any("代码" in c for c in temp_df.columns) and len(temp_df) > 0:
                     df = temp_df
                     break
             except:
@@ -353,69 +362,51 @@ def parse_call_auction_file(file_path):
         print(f"❌ 关键列缺失: Code={col_code}, Amt={col_amt}, Pct={col_pct}")
         return None
 
-    res_map = {}
-    
-    for _, row in df.iterrows():
-        try:
-            # Code
-            raw_code = str(row[col_code])
-            code = re.sub(r"\D", "", raw_code).zfill(6)
-            
-            # Name
-            name = str(row[col_name]).strip() if col_name else "未知"
-            
-            # Amt
-            raw_amt = str(row[col_amt])
-            auc_val = 0.0
-            
-            # Handle "1.23亿", "500万", or raw large numbers
-            if '亿' in raw_amt:
-                auc_val = float(raw_amt.replace('亿', '')) * 10000
-            elif '万' in raw_amt:
-                auc_val = float(raw_amt.replace('万', ''))
-            elif raw_amt.replace('.','').replace('-','').isdigit():
-                val = float(raw_amt)
-                # Heuristic: If value > 1 Million, assume it's raw Unit (Yuan), convert to Wan
-                # If value < 100000, maybe it's already Wan? 
-                # THS usually exports Raw Yuan for "早盘竞价金额" (e.g. 4084080)
-                if val > 10000: 
-                    auc_val = val / 10000.0
-                else: 
-                    # Ambiguous case: 5000 could be 5000 Yuan or 5000 Wan. 
-                    # Assume Yuan for consistency with THS raw exports.
-                    auc_val = val / 10000.0
-            
-            # Pct
-            pct_val = 0.0
-            if col_pct:
-                try:
-                    pct_str = str(row[col_pct]).replace('%', '').replace('+', '')
-                    pct_val = float(pct_str)
-                except: pct_val = 0.0
-                
-            # Yesterday Amount
-            last_amt = 0.0
-            if col_last_amt:
-                try:
-                    r_last = str(row[col_last_amt])
-                    if '亿' in r_last:
-                        last_amt = float(r_last.replace('亿', '')) * 10000
-                    elif '万' in r_last:
-                        last_amt = float(r_last.replace('万', ''))
-                    elif r_last.replace('.','').isdigit():
-                        val = float(r_last)
-                        if val > 10000: last_amt = val / 10000.0
-                except: pass
+    # Code / Name
+    codes = to_code(df[col_code]).str.zfill(6)
+    names = to_text(df[col_name]).str.strip() if col_name else pd.Series("未知", index=df.index)
 
-            res_map[code] = {
-                'code': code,
-                'name': name,
-                'auc_amt': auc_val, # Unit: Wan
-                'open_pct': pct_val,
-                'last_amt': last_amt # Unit: Wan
-            }
-        except: continue
-        
-    if res_map:
-        return pd.DataFrame(list(res_map.values()))
-    return None
+    # Amt: Handle "1.23亿", "500万", or raw large numbers (Unit: Wan)
+    raw_amt = to_text(df[col_amt])
+    is_yi = raw_amt.str.contains('亿', regex=False)
+    is_wan = ~is_yi & raw_amt.str.contains('万', regex=False)
+    is_raw = ~is_yi & ~is_wan & raw_amt.str.replace('.', '', regex=False).str.replace('-', '', regex=False).str.isdigit()
+    amt_num = to_number(raw_amt.str.replace('亿', '', regex=False).str.replace('万', '', regex=False))
+    # THS usually exports Raw Yuan for "早盘竞价金额" (e.g. 4084080)
+    # Ambiguous case: 5000 could be 5000 Yuan or 5000 Wan. Assume Yuan for consistency with THS raw exports.
+    auc_val = np.select([is_yi, is_wan, is_raw], [amt_num * 10000, amt_num, amt_num / 10000.0], 0.0)
+    # 带单位/纯数字却解析失败的行直接丢弃
+    valid = ~((is_yi | is_wan | is_raw) & amt_num.isna())
+
+    # Pct
+    pct_val = pd.Series(0.0, index=df.index)
+    if col_pct:
+        pct_val = to_number(to_text(df[col_pct]).str.replace('%', '', regex=False).str.replace('+', '', regex=False)).fillna(0.0)
+
+    # Yesterday Amount
+    last_amt = pd.Series(0.0, index=df.index)
+    if col_last_amt:
+        r_last = to_text(df[col_last_amt])
+        l_yi = r_last.str.contains('亿', regex=False)
+        l_wan = ~l_yi & r_last.str.contains('万', regex=False)
+        l_raw = ~l_yi & ~l_wan & r_last.str.replace('.', '', regex=False).str.isdigit()
+        l_num = to_number(r_last.str.replace('亿', '', regex=False).str.replace('万', '', regex=False))
+        l_raw &= l_num > 10000
+        last_amt = pd.Series(np.select([l_yi, l_wan, l_raw], [l_num * 10000, l_num, l_num / 10000.0], 0.0),
+                             index=df.index).fillna(0.0)
+
+    out = pd.DataFrame({
+        'code': codes,
+        'name': names,
+        'auc_amt': auc_val, # Unit: Wan
+        'open_pct': pct_val,
+        'last_amt': last_amt # Unit: Wan
+    })[valid]
+
+    if out.empty:
+        return None
+
+    # 重复代码：保留首次出现的位置、最后一次出现的数值 (与逐行写 dict 一致)
+    order = out['code'].drop_duplicates(keep='first')
+    out = out.drop_duplicates('code', keep='last').set_index('code').loc[order].reset_index()
+    return out
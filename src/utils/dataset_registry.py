@@ -0,0 +1,94 @@
+# src/utils/dataset_registry.py
+# ==============================================================================
+# 进程内数据集注册表 (按交易日缓存已解析的同花顺 Table 导出)
+# 一次 pool_generator 运行里 今日/昨日/近5日 会被多个模块反复读取，
+# 这里保证每个文件在同一进程内只解析一次，其余调用直接拿共享的 DataFrame。
+# ==============================================================================
+import os
+import re
+import threading
+
+from src.utils.table_cache import read_ths_table
+
+_DATE_RE = re.compile(r'(20\d{6})')
+
+
+def trade_date_of(path):
+    """从文件名提取交易日 'YYYYMMDD'，没有日期 (如 Table.txt) 返回 None"""
+    m = _DATE_RE.search(os.path.basename(path))
+    return m.group(1) if m else None
+
+
+class DatasetRegistry:
+    """
+    key = 交易日 (文件名无日期时退化为绝对路径)
+    value = (源文件签名, DataFrame)；源文件被重新导出 (mtime/size 变化) 时重新加载
+
+    返回的是深拷贝：调用方原地改单元格 (.loc[...] = / fillna(inplace=True)) 也不会污染共享副本。
+    浅拷贝只在 pandas 3 的 Copy-on-Write 下才安全，requirements 仍允许 pandas 2；
+    拷贝 (字符串列只复制引用) 比重新解析文件便宜得多。
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._tables = {}
+        self.hits = 0
+        self.misses = 0
+        self.loads = {}  # key -> 实际解析次数
+
+    @staticmethod
+    def _signature(path):
+        st = os.stat(path)
+        return (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+
+    def get_table(self, path):
+        """读取 Table 导出 (DataFrame, 全部字符串列)；无法解析返回 None"""
+        if not path or not os.path.exists(path):
+            return None
+
+        key = trade_date_of(path) or os.path.abspath(path)
+        sig = self._signature(path)
+
+        with self._lock:
+            entry = self._tables.get(key)
+            if entry is not None and entry[0] == sig:
+                self.hits += 1
+                df = entry[1]
+                return df.copy() if df is not None else None
+
+            self.misses += 1
+            self.loads[key] = self.loads.get(key, 0) + 1
+            df = read_ths_table(path)
+            self._tables[key] = (sig, df)
+            return df.copy() if df is not None else None
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'datasets': len(self._tables),
+                'reparsed': {k: n for k, n in self.loads.items() if n > 1},
+            }
+
+    def summary(self):
+        s = self.stats()
+        text = f"数据集缓存: 命中 {s['hits']} / 加载 {s['misses']} (共 {s['datasets']} 个文件)"
+        if s['reparsed']:
+            text += f"，重复解析: {s['reparsed']}"
+        return text
+
+    def clear(self):
+        with self._lock:
+            self._tables.clear()
+            self.loads.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+# 进程级单例：所有模块必须通过 src.utils.dataset_registry 导入，保证共享同一份
+registry = DatasetRegistry()
+
+
+def get_table(path):
+    return registry.get_table(path)
@@ -0,0 +1,56 @@
+# src/utils/file_watch.py
+# ==============================================================================
+# 常驻进程的静态输入 (持仓 / 策略池 / 手动关注 / 竞价导出)
+# 解析结果留在内存里，每次取用前只 stat 一下源文件，签名 (路径, mtime, size) 变了才重新加载。
+# 签名口径同 dataset_registry。
+# ==============================================================================
+import os
+
+
+def file_signature(path):
+    """(绝对路径, mtime_ns, size)；文件不存在时后两项为 None"""
+    if not path:
+        return None
+    try:
+        st = os.stat(path)
+        return (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+    except OSError:
+        return (os.path.abspath(path), None, None)
+
+
+class WatchedInput:
+    """
+    用法:
+        holdings = WatchedInput(load_holdings, HOLDINGS_PATH)
+        data = holdings.get()     # 文件没变直接返回上次的结果
+        holdings.changed          # 本次 get() 是否重新加载过
+
+    paths 可以是路径、路径列表，或返回路径/路径列表的函数 (如 "目录里最新的竞价文件")
+    """
+
+    def __init__(self, loader, paths, name=None):
+        self.loader = loader
+        self.paths = paths
+        self.name = name or getattr(loader, '__name__', 'input')
+        self.value = None
+        self.changed = False
+        self.loads = 0
+        self._sig = object()      # 哨兵: 第一次一定加载
+
+    def _paths(self):
+        paths = self.paths() if callable(self.paths) else self.paths
+        if paths is None:
+            return []
+        return [paths] if isinstance(paths, str) else list(paths)
+
+    def signature(self):
+        return tuple(file_signature(p) for p in self._paths())
+
+    def get(self):
+        sig = self.signature()
+        self.changed = sig != self._sig
+        if self.changed:
+            self.value = self.loader()
+            self._sig = sig
+            self.loads += 1
+        return self.value
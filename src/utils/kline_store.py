@@ -0,0 +1,343 @@
+# src/utils/kline_store.py
+# ==============================================================================
+# 本地前复权日线库 (SQLite，所有模块共享)
+# 筹码分析 / 监管计算 / 妖股扫描 / 趋势低吸 以前各自 ak.stock_zh_a_hist 拉全量历史，
+# 现在统一从这里读：每只股票每天最多联网一次，只拉本地最后一根之后的 K 线。
+# 重叠的那根 K 线对不上 (除权导致前复权价整体变化) 时删掉该股重新全量拉取。
+# ==============================================================================
+import os
+import sqlite3
+import threading
+from contextlib import closing
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from src.utils.trade_calendar import get_calendar
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_DB_PATH = os.path.join(PROJECT_ROOT, 'data', '.cache', 'kline', 'daily_qfq.sqlite')
+
+# 首次同步拉取的历史长度 (自然日)；更早的区间有人请求时再向前补
+DEFAULT_HISTORY_DAYS = 730
+# 收盘后多久才认为当日 K 线定型 (之前拉到的当日 K 线不入库)
+SETTLE_TIME = '15:30'
+
+# 库字段 -> akshare 列名 (读出时还原成 akshare 的列名，调用方不用改)
+COLUMNS = {
+    'open': '开盘',
+    'close': '收盘',
+    'high': '最高',
+    'low': '最低',
+    'volume': '成交量',
+    'amount': '成交额',
+    'amplitude': '振幅',
+    'pct': '涨跌幅',
+    'chg': '涨跌额',
+    'turnover': '换手率',
+}
+_FIELDS = list(COLUMNS)
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS bars (
+    code TEXT NOT NULL,
+    date TEXT NOT NULL,
+    {', '.join(f'{f} REAL' for f in _FIELDS)},
+    PRIMARY KEY (code, date)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS sync_state (
+    code TEXT PRIMARY KEY,
+    covered_from TEXT NOT NULL,  -- 本地已覆盖的最早日期 (请求起点)
+    synced_at TEXT NOT NULL      -- 最近一次联网同步时间 'YYYYMMDD HH:MM'
+);
+"""
+
+# SQLite 单条语句变量上限 (老版本 999)
+_IN_CHUNK = 900
+
+
+def _ymd(value):
+    """'2026-01-13' / '20260113' / date -> '20260113'"""
+    return str(value).replace('-', '')[:8]
+
+
+def download_daily(code, start_date=None, end_date=None, timeout=None):
+    """akshare 前复权日线 (网络请求)；timeout 仅在 akshare 支持时传入"""
+    import inspect
+    import akshare as ak
+    kwargs = {}
+    if start_date:
+        kwargs['start_date'] = start_date
+    if end_date:
+        kwargs['end_date'] = end_date
+    if timeout and 'timeout' in inspect.signature(ak.stock_zh_a_hist).parameters:
+        kwargs['timeout'] = timeout
+    return ak.stock_zh_a_hist(symbol=code, period="daily", adjust="qfq", **kwargs)
+
+
+class KlineStore:
+    """
+    用法:
+        store = KlineStore()
+        df = store.get_daily('600000', start_date='20260101')   # 同 ak.stock_zh_a_hist 的列
+        df = store.get_daily('600000', include_live=True)       # 盘中末尾附上今天的实时 K 线 (不入库)
+        dates, arrs = store.panel(codes, ['收盘', '换手率'], days=120)
+    """
+
+    def __init__(self, db_path=None, download=None, history_days=DEFAULT_HISTORY_DAYS, now=None, calendar=None):
+        self.db_path = db_path or DEFAULT_DB_PATH
+        self.download = download or download_daily
+        self.history_days = history_days
+        self._now = now or datetime.now
+        self._calendar = calendar  # None -> 首次判断新鲜度时取共享交易日历
+        self._lock = threading.Lock()        # 写库串行
+        self._code_locks = {}                 # 同一只股票同时只有一个线程在同步
+        self.stats = {'network': 0, 'rebuilt': 0, 'fresh': 0, 'stale': 0, 'live': 0}
+        self._init_db()
+
+    # ---------------- 库 ----------------
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute('PRAGMA journal_mode=WAL')
+        return conn
+
+    def _init_db(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.executescript(_SCHEMA)
+
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def _code_lock(self, code):
+        with self._lock:
+            return self._code_locks.setdefault(code, threading.Lock())
+
+    def _state(self, conn, code):
+        row = conn.execute('SELECT covered_from, synced_at FROM sync_state WHERE code = ?', (code,)).fetchone()
+        last = conn.execute('SELECT MAX(date) FROM bars WHERE code = ?', (code,)).fetchone()[0]
+        return (row[0], row[1], last) if row else (None, None, last)
+
+    def _last_bar(self, conn, code, date):
+        return conn.execute(f'SELECT {", ".join(_FIELDS)} FROM bars WHERE code = ? AND date = ?',
+                            (code, date)).fetchone()
+
+    # ---------------- 同步 ----------------
+    def _settled_cutoff(self):
+        """
+        (已定型的最后一个自然日, 本次同步的时间戳)
+        收盘定型前拉到的当日 K 线是盘中数据，不入库
+        """
+        now = self._now()
+        today = now.strftime('%Y%m%d')
+        if now.strftime('%H:%M') >= SETTLE_TIME:
+            return today, now.strftime('%Y%m%d %H:%M')
+        return (now - timedelta(days=1)).strftime('%Y%m%d'), now.strftime('%Y%m%d %H:%M')
+
+    def _is_fresh(self, synced_at):
+        """
+        最近一次同步发生在最近一个已定型交易日的收盘之后 -> 不用再联网
+        (周五收盘后同步过，整个周末/长假都不再请求)
+        """
+        if not synced_at:
+            return False
+        cutoff, _ = self._settled_cutoff()
+        if self._calendar is None:
+            self._calendar = get_calendar()
+        cutoff = self._calendar.latest(cutoff) or cutoff
+        return synced_at >= f"{cutoff} {SETTLE_TIME}"
+
+    def _frame_to_rows(self, code, df, cutoff):
+        if df is None or df.empty:
+            return []
+        dates = df['日期'].map(_ymd)
+        keep = (dates <= cutoff).to_numpy()
+        values = [df[COLUMNS[f]].to_numpy(dtype=np.float64)[keep] for f in _FIELDS]
+        return [(code, d, *(None if np.isnan(v) else float(v) for v in vals))
+                for d, *vals in zip(dates[keep].tolist(), *values)]
+
+    def _write(self, code, rows, covered_from, synced_at, replace=False):
+        with self._lock, closing(self._connect()) as conn, conn:
+            if replace:
+                conn.execute('DELETE FROM bars WHERE code = ?', (code,))
+            conn.executemany(f'INSERT OR REPLACE INTO bars VALUES ({", ".join("?" * (len(_FIELDS) + 2))})', rows)
+            conn.execute('INSERT OR REPLACE INTO sync_state VALUES (?, ?, ?)', (code, covered_from, synced_at))
+
+    def sync(self, code, start_date=None, timeout=None):
+        """
+        保证本地覆盖 start_date 起的数据且今天已同步过。
+        返回 'fresh' (未联网) / 'incremental' / 'full'
+        联网失败时：本地已有数据则沿用旧数据 ('stale')，否则抛出异常
+        """
+        with self._code_lock(code):
+            with closing(self._connect()) as conn:
+                covered_from, synced_at, last = self._state(conn, code)
+                last_row = self._last_bar(conn, code, last) if last else None
+
+            cutoff, stamp = self._settled_cutoff()
+            default_start = (self._now() - timedelta(days=self.history_days)).strftime('%Y%m%d')
+            want_from = min(_ymd(start_date), default_start) if start_date else default_start
+            need_backfill = covered_from is not None and want_from < covered_from
+
+            if self._is_fresh(synced_at) and not need_backfill:
+                self._count('fresh')
+                return 'fresh'
+
+            try:
+                if last is not None and not need_backfill:
+                    # 增量: 从本地最后一天 (含) 拉，用重叠 K 线校验复权是否变化
+                    self._count('network')
+                    df = self.download(code, start_date=last, timeout=timeout)
+                    rows = self._frame_to_rows(code, df, cutoff)
+                    if rows and rows[0][1] == last and np.allclose(
+                            np.array(rows[0][2:], dtype=np.float64),
+                            np.array(last_row, dtype=np.float64), rtol=1e-9, atol=1e-9, equal_nan=True):
+                        self._write(code, rows[1:], covered_from, stamp)
+                        return 'incremental'
+                    self._count('rebuilt')
+                    want_from = min(want_from, covered_from or want_from)
+
+                # 全量 (首次 / 复权变化 / 需要向前补历史)
+                self._count('network')
+                df = self.download(code, start_date=want_from, timeout=timeout)
+                self._write(code, self._frame_to_rows(code, df, cutoff), want_from, stamp, replace=True)
+                return 'full'
+            except Exception:
+                if last is None:
+                    raise
+                self._count('stale')
+                return 'stale'
+
+    # ---------------- 读取 ----------------
+    def _live_bars(self, code, end_date=None, timeout=None):
+        """
+        今天盘中 (未定型) 的 K 线，只读不入库；收盘定型后 / 非交易日 / 联网失败返回 None
+        定型之后 sync 已经把当日 K 线写进库里，不再单独请求
+        """
+        now = self._now()
+        today = now.strftime('%Y%m%d')
+        if now.strftime('%H:%M') >= SETTLE_TIME or (end_date and _ymd(end_date) < today):
+            return None
+        if self._calendar is None:
+            self._calendar = get_calendar()
+        if not self._calendar.is_trading_day(today):
+            return None
+        try:
+            self._count('live')
+            df = self.download(code, start_date=today, end_date=today, timeout=timeout)
+        except Exception:
+            return None
+        if df is None or df.empty:
+            return None
+        df = df[(df['日期'].map(_ymd) == today).to_numpy()]
+        return df if not df.empty else None
+
+    def get_daily(self, code, start_date=None, end_date=None, days=None, sync=True, timeout=None,
+                  include_live=False):
+        """
+        单只股票日线 (列名同 ak.stock_zh_a_hist，日期为 'YYYY-MM-DD' 字符串，升序)
+        days: 只取最后 N 根
+        include_live: 盘中 (SETTLE_TIME 之前) 在末尾附上今天的实时 K 线 (收盘 = 现价)，
+                      与原来直接调 ak.stock_zh_a_hist 的结果一致；这根 K 线不入库
+        """
+        if sync:
+            self.sync(code, start_date=start_date, timeout=timeout)
+        sql = f'SELECT date, {", ".join(_FIELDS)} FROM bars WHERE code = ?'
+        params = [code]
+        if start_date:
+            sql += ' AND date >= ?'
+            params.append(_ymd(start_date))
+        if end_date:
+            sql += ' AND date <= ?'
+            params.append(_ymd(end_date))
+        sql += ' ORDER BY date'
+        with closing(self._connect()) as conn:
+            rows = conn.execute(sql, params).fetchall()
+        if days:
+            rows = rows[-days:]
+        df = pd.DataFrame(rows, columns=['date'] + _FIELDS)
+        out = pd.DataFrame({'日期': df['date'].str.slice(0, 4) + '-' + df['date'].str.slice(4, 6) + '-'
+                                   + df['date'].str.slice(6, 8),
+                            '股票代码': code})
+        for f in _FIELDS:
+            out[COLUMNS[f]] = df[f].astype(np.float64)
+
+        live = self._live_bars(code, end_date=end_date, timeout=timeout) if include_live else None
+        if live is not None:
+            last = out['日期'].iloc[-1].replace('-', '') if len(out) else ''
+            today = self._now().strftime('%Y%m%d')
+            if today > last:
+                row = {'日期': f"{today[:4]}-{today[4:6]}-{today[6:]}", '股票代码': code}
+                row.update({COLUMNS[f]: float(live[COLUMNS[f]].iloc[-1]) for f in _FIELDS})
+                out = pd.concat([out, pd.DataFrame([row])], ignore_index=True)
+                if days:
+                    out = out.iloc[-days:].reset_index(drop=True)
+        return out
+
+    def panel(self, codes, fields=('收盘',), start_date=None, end_date=None, days=None, sync=True):
+        """
+        多只股票按交易日对齐 -> (dates ['YYYYMMDD'], {列名: ndarray[n_codes, n_dates]})
+        某股当天没有 K 线 (停牌/未上市) 为 NaN；days 取对齐后最后 N 个交易日
+        """
+        codes = list(codes)
+        if sync:
+            for code in codes:
+                try:
+                    self.sync(code, start_date=start_date)
+                except Exception:
+                    pass
+        cols = [f for f in _FIELDS if COLUMNS[f] in fields]
+        frames = []
+        with closing(self._connect()) as conn:
+            for i in range(0, len(codes), _IN_CHUNK):
+                chunk = codes[i:i + _IN_CHUNK]
+                sql = (f'SELECT code, date, {", ".join(cols)} FROM bars '
+                       f'WHERE code IN ({", ".join("?" * len(chunk))})')
+                params = list(chunk)
+                if start_date:
+                    sql += ' AND date >= ?'
+                    params.append(_ymd(start_date))
+                if end_date:
+                    sql += ' AND date <= ?'
+                    params.append(_ymd(end_date))
+                frames.append(pd.DataFrame(conn.execute(sql, params).fetchall(), columns=['code', 'date'] + cols))
+        data = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=['code', 'date'] + cols)
+
+        dates = sorted(data['date'].unique().tolist())
+        if days:
+            dates = dates[-days:]
+        row = pd.Index(codes).get_indexer(data['code'])
+        col = pd.Index(dates).get_indexer(data['date'])
+        ok = (row >= 0) & (col >= 0)
+        arrays = {}
+        for f in cols:
+            arr = np.full((len(codes), len(dates)), np.nan)
+            arr[row[ok], col[ok]] = data[f].to_numpy(dtype=np.float64)[ok]
+            arrays[COLUMNS[f]] = arr
+        return dates, arrays
+
+    def summary(self):
+        s = self.stats
+        return (f"日线库: 联网 {s['network']} 次 / 当日已同步 {s['fresh']} / 复权重建 {s['rebuilt']}"
+                + (f" / 盘中实时 {s['live']}" if s['live'] else "")
+                + (f" / 离线沿用旧数据 {s['stale']}" if s['stale'] else ""))
+
+
+# 进程级单例：所有模块必须通过 src.utils.kline_store 导入，保证共享同一份
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = KlineStore()
+        return _store
+
+
+def get_daily(code, start_date=None, end_date=None, days=None, timeout=None, include_live=False):
+    return get_store().get_daily(code, start_date=start_date, end_date=end_date, days=days, timeout=timeout,
+                                 include_live=include_live)
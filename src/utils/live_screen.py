@@ -0,0 +1,58 @@
+# src/utils/live_screen.py
+# ==============================================================================
+# 终端增量刷新
+# 常驻监控每轮刷新整屏会闪，而且几十行里通常只有几行的数值变了。
+# 这里记住上一帧每一行的文本，按行号比较，只用 ANSI 光标定位重写变化的行；
+# 行数变少时把多出来的旧行清掉。Windows 终端由 colorama 翻译这些控制序列。
+# ==============================================================================
+import sys
+
+CLEAR_SCREEN = '\x1b[H\x1b[2J'
+CLEAR_LINE = '\x1b[2K'
+
+
+def _goto(line):
+    return f'\x1b[{line};1H'
+
+
+class LiveScreen:
+    """
+    用法:
+        screen = LiveScreen()
+        screen.draw(lines)      # 第一帧清屏整帧输出，之后只重写变化的行
+        screen.reset()          # 下一帧强制整屏重画 (比如中间打印过别的东西)
+    行内容里不要有换行，超过终端宽度会折行导致行号错位
+    """
+
+    def __init__(self, out=None):
+        self.out = out or sys.stdout
+        self._lines = None
+        self.stats = {'frames': 0, 'full': 0, 'lines': 0}
+
+    def reset(self):
+        self._lines = None
+
+    def draw(self, lines):
+        """输出一帧，返回实际重写的行数"""
+        lines = [str(line) for line in lines]
+        self.stats['frames'] += 1
+        if self._lines is None:
+            buf = [CLEAR_SCREEN, '\n'.join(lines), '\n']
+            written = len(lines)
+            self.stats['full'] += 1
+        else:
+            old = self._lines
+            buf = []
+            written = 0
+            for i, text in enumerate(lines):
+                if i >= len(old) or old[i] != text:
+                    buf.append(f'{_goto(i + 1)}{CLEAR_LINE}{text}')
+                    written += 1
+            for i in range(len(lines), len(old)):
+                buf.append(f'{_goto(i + 1)}{CLEAR_LINE}')
+            buf.append(_goto(len(lines) + 1))
+        self._lines = lines
+        self.stats['lines'] += written
+        self.out.write(''.join(buf))
+        self.out.flush()
+        return written
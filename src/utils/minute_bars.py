@@ -0,0 +1,218 @@
+# src/utils/minute_bars.py
+# ==============================================================================
+# 本地 1 分钟 K 线 (由盘中轮询快照聚合)
+# 监控每轮拿到的是 现价 + 当日累计成交量/成交额，这里按分钟槽位累成 OHLCV:
+# 每只票一行，预分配 241 个槽位 (09:30 集合竞价 + 上午 120 + 下午 120，同东财 1 分钟线)，
+# 跨日整块清空重用。本地即可算 VWAP、N 分钟涨速、日内/区间高低点，不用再调分钟历史接口。
+# 成交量单位沿用行情源 (东财/批量接口都是 手)，成交额 元。
+# ==============================================================================
+import numpy as np
+import pandas as pd
+
+from src.utils.auction_tape import seconds_of_day
+
+SLOTS = 241
+MORNING_OPEN = 9 * 3600 + 30 * 60
+MORNING_BARS = 120
+AFTERNOON_OPEN = 13 * 3600
+BAR_COLUMNS = ['时间', '开盘', '收盘', '最高', '最低', '成交量', '成交额']
+
+
+def minute_slot(ts):
+    """
+    时刻 -> 槽位: 9:30 前为 0 (竞价)；[9:30, 9:31) 为 1 (标签 09:31) ... 午休归到 11:30；
+    [13:00, 13:01) 为 121 ... 15:00 及之后归到 240
+    """
+    s = seconds_of_day(ts)
+    if s < MORNING_OPEN:
+        return 0
+    if s < AFTERNOON_OPEN:
+        return min(int((s - MORNING_OPEN) // 60) + 1, MORNING_BARS)
+    return min(int((s - AFTERNOON_OPEN) // 60) + MORNING_BARS + 1, SLOTS - 1)
+
+
+def slot_label(slot):
+    """槽位 -> 'HH:MM' (K 线结束时刻)"""
+    if slot <= MORNING_BARS:
+        minutes = 9 * 60 + 30 + slot
+    else:
+        minutes = 13 * 60 + slot - MORNING_BARS
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+class MinuteBars:
+    """
+    用法:
+        bars = MinuteBars()
+        bars.update(now, df['代码'], df['最新价'], df['成交量'], df['成交额'])   # 每轮快照 (累计量/额)
+        feats = bars.features(now, codes, speed_minutes=5)    # close/vwap/speed/high/low/bars
+        bars.vwap(codes, now=now, minutes=30)                 # 最近 30 分钟均价
+        bars.to_frame('600000')                               # 同 stock_zh_a_hist_min_em 的列
+    """
+
+    def __init__(self):
+        self.codes = []
+        self._row = {}
+        self._index = pd.Index([], dtype=object)
+        self._day = None
+        self._alloc(0)
+        self.stats = {'snapshots': 0}
+
+    def _alloc(self, n):
+        self._open = np.full((n, SLOTS), np.nan)
+        self._high = np.full((n, SLOTS), np.nan)
+        self._low = np.full((n, SLOTS), np.nan)
+        self._close = np.full((n, SLOTS), np.nan)
+        self._vol = np.zeros((n, SLOTS))
+        self._amt = np.zeros((n, SLOTS))
+        self._cum_vol = np.full(n, np.nan)     # 上一帧的累计量/额 (算增量)
+        self._cum_amt = np.full(n, np.nan)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def reset(self):
+        self.codes = []
+        self._row = {}
+        self._index = pd.Index([], dtype=object)
+        self._alloc(0)
+
+    def _ensure_rows(self, codes):
+        """代码 -> 行号，新代码追加 (数组按块扩容)"""
+        new = [c for c in dict.fromkeys(codes) if c not in self._row]
+        if new:
+            start = len(self.codes)
+            for i, c in enumerate(new):
+                self._row[c] = start + i
+            self.codes.extend(new)
+            self._index = pd.Index(self.codes, dtype=object)
+            if len(self.codes) > len(self._cum_vol):
+                size = max(len(self.codes), 2 * len(self._cum_vol), 64)
+                grow = size - len(self._cum_vol)
+                old = (self._open, self._high, self._low, self._close, self._vol, self._amt,
+                       self._cum_vol, self._cum_amt)
+                self._alloc(grow)
+                pad = (self._open, self._high, self._low, self._close, self._vol, self._amt,
+                       self._cum_vol, self._cum_amt)
+                (self._open, self._high, self._low, self._close, self._vol, self._amt,
+                 self._cum_vol, self._cum_amt) = (np.concatenate([a, b]) for a, b in zip(old, pad))
+        return self._index.get_indexer(codes)
+
+    def _rows(self, codes):
+        if codes is None:
+            codes = self.codes
+        codes = [c for c in codes if c in self._row]
+        return codes, self._index.get_indexer(codes)
+
+    def update(self, ts, codes, price, cum_volume, cum_amount):
+        """
+        写入一帧快照: 现价进当前分钟的 OHLC，累计量/额的增量记到当前分钟
+        某只票第一次出现时，之前的累计量全部记在当前分钟 (合计仍等于当日累计)；
+        累计值变小 (换了行情源) 时该帧增量记 0。现价缺失/为 0 的行跳过。
+        """
+        day = getattr(ts, 'date', lambda: None)()
+        if day is not None and day != self._day:
+            if self._day is not None:
+                self.reset()
+            self._day = day
+
+        codes = pd.Series(np.asarray(codes, dtype=object)).astype(str)
+        first = ~codes.duplicated().to_numpy()
+        price = np.asarray(price, dtype=np.float64)[first]
+        cum_vol = np.asarray(cum_volume, dtype=np.float64)[first]
+        cum_amt = np.asarray(cum_amount, dtype=np.float64)[first]
+        ok = np.isfinite(price) & (price > 0)
+        codes = codes[first][ok].tolist()
+        if not codes:
+            return 0
+        price, cum_vol, cum_amt = price[ok], cum_vol[ok], cum_amt[ok]
+
+        rows = self._ensure_rows(codes)
+        slot = minute_slot(ts)
+        d_vol = np.where(np.isnan(self._cum_vol[rows]), cum_vol, cum_vol - self._cum_vol[rows])
+        d_amt = np.where(np.isnan(self._cum_amt[rows]), cum_amt, cum_amt - self._cum_amt[rows])
+        d_vol = np.where(np.isfinite(d_vol) & (d_vol > 0), d_vol, 0.0)
+        d_amt = np.where(np.isfinite(d_amt) & (d_amt > 0), d_amt, 0.0)
+        self._cum_vol[rows] = np.where(np.isfinite(cum_vol), cum_vol, self._cum_vol[rows])
+        self._cum_amt[rows] = np.where(np.isfinite(cum_amt), cum_amt, self._cum_amt[rows])
+
+        self._open[rows, slot] = np.where(np.isnan(self._open[rows, slot]), price, self._open[rows, slot])
+        self._high[rows, slot] = np.fmax(self._high[rows, slot], price)
+        self._low[rows, slot] = np.fmin(self._low[rows, slot], price)
+        self._close[rows, slot] = price
+        self._vol[rows, slot] += d_vol
+        self._amt[rows, slot] += d_amt
+        self.stats['snapshots'] += 1
+        return len(codes)
+
+    def _last_close(self, rows, slot):
+        """各行在 slot (含) 之前最后一根 K 线的收盘价，没有为 NaN"""
+        if slot < 0:
+            return np.full(len(rows), np.nan)
+        close = self._close[rows, :slot + 1]
+        idx = np.where(np.isfinite(close), np.arange(slot + 1), -1).max(axis=1)
+        return np.where(idx >= 0, close[np.arange(len(rows)), np.maximum(idx, 0)], np.nan)
+
+    def _window(self, now, minutes):
+        """(起始槽位, 结束槽位)，minutes=None 为全天"""
+        end = minute_slot(now) if now is not None else SLOTS - 1
+        start = 0 if minutes is None else max(end - minutes + 1, 0)
+        return start, end
+
+    def vwap(self, codes=None, now=None, minutes=None):
+        """区间均价 = Σ成交额 / (Σ成交量 × 100)；没有成交为 NaN"""
+        codes, rows = self._rows(codes)
+        start, end = self._window(now, minutes)
+        amt = self._amt[rows, start:end + 1].sum(axis=1)
+        vol = self._vol[rows, start:end + 1].sum(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return pd.Series(np.where(vol > 0, amt / (vol * 100), np.nan), index=codes, dtype=float)
+
+    def speed(self, codes=None, now=None, minutes=5):
+        """N 分钟涨速 %: 当前价 vs N 分钟前那根 K 线的收盘价"""
+        codes, rows = self._rows(codes)
+        end = minute_slot(now) if now is not None else SLOTS - 1
+        cur = self._last_close(rows, end)
+        base = self._last_close(rows, end - minutes)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return pd.Series((cur / base - 1) * 100, index=codes, dtype=float)
+
+    def high_low(self, codes=None, now=None, minutes=None):
+        """区间最高/最低 (DataFrame: high, low)"""
+        codes, rows = self._rows(codes)
+        start, end = self._window(now, minutes)
+        with np.errstate(invalid='ignore'):
+            high = np.fmax.reduce(self._high[rows, start:end + 1], axis=1) if len(rows) else np.empty(0)
+            low = np.fmin.reduce(self._low[rows, start:end + 1], axis=1) if len(rows) else np.empty(0)
+        return pd.DataFrame({'high': high, 'low': low}, index=pd.Index(codes, name='code'))
+
+    def features(self, now, codes=None, speed_minutes=5):
+        """每只票一行: 最新价 / 全天 VWAP / N 分钟涨速 / 日内高低 / 已有 K 线根数"""
+        codes, rows = self._rows(codes)
+        end = minute_slot(now)
+        hl = self.high_low(codes, now=now)
+        return pd.DataFrame({
+            'close': self._last_close(rows, end),
+            'vwap': self.vwap(codes, now=now).to_numpy(),
+            'speed': self.speed(codes, now=now, minutes=speed_minutes).to_numpy(),
+            'high': hl['high'].to_numpy(),
+            'low': hl['low'].to_numpy(),
+            'bars': np.isfinite(self._close[rows, :end + 1]).sum(axis=1),
+        }, index=pd.Index(codes, name='code'))
+
+    def to_frame(self, code):
+        """某只票已有的 1 分钟 K 线 (列同 stock_zh_a_hist_min_em)"""
+        row = self._row.get(code)
+        if row is None:
+            return pd.DataFrame(columns=BAR_COLUMNS)
+        filled = np.flatnonzero(np.isfinite(self._close[row]))
+        day = self._day.strftime('%Y-%m-%d') + ' ' if self._day is not None else ''
+        return pd.DataFrame({
+            '时间': [f"{day}{slot_label(s)}:00" for s in filled],
+            '开盘': self._open[row, filled],
+            '收盘': self._close[row, filled],
+            '最高': self._high[row, filled],
+            '最低': self._low[row, filled],
+            '成交量': self._vol[row, filled],
+            '成交额': self._amt[row, filled],
+        })
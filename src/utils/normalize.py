@@ -0,0 +1,113 @@
+# src/utils/normalize.py
+# ==============================================================================
+# 同花顺/通达信导出的列级清洗工具 (向量化)
+# 把 "1.23亿" / "500万" / "+0.51%" / "--" 这类带单位字符串整列转成 float64，
+# 替代逐行 iterrows + safe_float 的写法。
+# ==============================================================================
+import numpy as np
+import pandas as pd
+
+_EMPTY_TOKENS = ['--', '', 'nan']
+
+# 常规十进制/科学计数写法走 Arrow/NumPy 批量转换，其余 (inf 等少数格子) 再交给 to_numeric
+_NUMBER_RE = r'[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?'
+
+
+def _as_object(series):
+    """统一成 object 列 (NaN 保持为 NaN)，兼容 pandas 2 object / pandas 3 str dtype"""
+    return series.astype(object).where(series.notna(), np.nan)
+
+
+def _clean(series):
+    """NaN -> ''，其余 str() + strip，返回字符串列"""
+    return series.fillna('').astype(str).str.strip()
+
+
+def to_float(series):
+    """
+    整列版 safe_float:
+      NaN / '--' / '' / 'nan' -> 0.0
+      去掉 '%' 与千分位 ','
+      '亿' -> x1e8, '万' -> x1e4 (同一单元格只认一个单位，'亿' 优先)
+      无法解析 -> 0.0
+    返回 float64 Series (index 与输入一致)
+    """
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        return series.astype(np.float64).fillna(0.0)
+
+    s = _clean(series)
+    is_yi = s.str.contains('亿', regex=False)
+    is_wan = s.str.contains('万', regex=False)
+    unit = np.where(is_yi, 100000000.0, np.where(is_wan, 10000.0, 1.0))
+
+    # '1万亿' 这种双单位: 去掉 '亿' 后仍残留 '万'，逐格版会解析失败 -> 0
+    values = to_number(s.str.replace(r'[%,亿万]', '', regex=True)).to_numpy()
+    values = np.where(is_yi & is_wan, np.nan, values)
+    # '--' / '' / 'nan' 与解析失败一样落到 NaN -> 0.0
+    return pd.Series(np.where(np.isnan(values), 0.0, values * unit), index=series.index)
+
+
+def to_number(series):
+    """整列 float()：无法解析的格子 -> NaN (不做单位换算)"""
+    s = _clean(series)
+    values = np.full(len(s), np.nan, dtype=np.float64)
+    fast = s.str.fullmatch(_NUMBER_RE).to_numpy(dtype=bool)
+    if fast.any():
+        values[fast] = s[fast].astype(np.float64).to_numpy()
+    rest = ~fast & ~s.isin(_EMPTY_TOKENS).to_numpy(dtype=bool)
+    if rest.any():
+        values[rest] = pd.to_numeric(s[rest], errors='coerce').astype(np.float64).to_numpy()
+    return pd.Series(values, index=series.index)
+
+
+def to_str(series):
+    """整列版 safe_str: NaN / 'nan' / '--' -> ''，其余 strip"""
+    s = _clean(series)
+    return s.mask(s.str.lower().isin(['nan', '--']), '')
+
+
+def to_code(series):
+    """整列提取数字代码 ('SH600000' -> '600000')，不补零"""
+    return _clean(series).str.replace(r'\D', '', regex=True)
+
+
+def to_text(series):
+    """等价于逐格 str(val)：NaN 变成 'nan'，不做 strip"""
+    return _as_object(series).fillna('nan').astype(str)
+
+
+def float_col(df, col, default=0.0):
+    """列存在时整列 to_float，否则返回常数列 (对应 row.get(None) 的兜底)"""
+    if col is None or col not in df.columns:
+        return pd.Series(default, index=df.index, dtype=np.float64)
+    return to_float(df[col])
+
+
+def str_col(df, col, default=''):
+    if col is None or col not in df.columns:
+        return pd.Series(default, index=df.index, dtype=object)
+    return to_str(df[col])
+
+
+def join_tags(*parts, sep='/'):
+    """逐行拼接非空字符串列，等价于 sep.join([p for p in row if p])"""
+    index = next((p.index for p in parts if isinstance(p, pd.Series)), None)
+    result = None
+    for p in parts:
+        p = pd.Series(np.asarray(p, dtype=object), index=index).fillna('')
+        if result is None:
+            result = p
+            continue
+        joined = np.where((result != '') & (p != ''), result + sep + p,
+                          np.where(result == '', p, result))
+        result = pd.Series(joined, index=index, dtype=object)
+    return result if result is not None else pd.Series(dtype=object)
+
+
+def to_records(df):
+    """
+    DataFrame -> [dict]，值为 Python 原生类型
+    (按列 tolist 后 zip，比 to_dict('records') 逐格装箱快得多)
+    """
+    cols = list(df.columns)
+    return [dict(zip(cols, row)) for row in zip(*(df[c].tolist() for c in cols))]
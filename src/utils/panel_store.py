@@ -0,0 +1,285 @@
+# src/utils/panel_store.py
+# ==============================================================================
+# 全市场日线面板 (交易日 × 代码) 持久化存储
+# 每个字段一个 float32 裸文件 (行 = 交易日, 列 = 代码)，配一个 meta.json。
+# 新的 Table-YYYYMMDD.txt 只追加一行，不重建；读取用 np.memmap，
+# 250 日全市场回看不需要再解析任何文本。
+# 缺失 (当天该代码不在导出里) 记为 NaN。
+# ==============================================================================
+import os
+import re
+import json
+import numpy as np
+
+from src.utils.dataset_registry import get_table
+from src.utils.normalize import to_code, to_str, to_text, float_col
+
+PANEL_VERSION = 2
+PANEL_DIRNAME = os.path.join('.cache', 'panel')
+
+# 面板字段 (单位与 Table 导出一致：金额/市值为元，涨幅为 %)
+FIELDS = [
+    'pct',        # 涨幅
+    'amount',     # 当日成交额
+    'price',      # 现价
+    'turnover',   # 换手
+    'auc_pct',    # 竞价涨幅
+    'auc_amt',    # 早盘竞价金额
+    'circ_mv',    # 流通市值
+    'boards',     # 连续涨停天数
+    'open_num',   # 涨停开板次数
+    'zt',         # 涨停标记 (1/0)，口径同原 F佬 历史: 涨幅>9.8 或 涨停/连板列非空
+]
+
+# 列宽按块预留，新股上市不必每天重写整个面板
+_CAPACITY_BLOCK = 512
+_DTYPE = np.float32
+_ITEMSIZE = np.dtype(_DTYPE).itemsize
+
+
+def _find_col(cols, include, exclude=()):
+    return next((c for c in cols if include in c and not any(x in c for x in exclude)), None)
+
+
+def extract_table_fields(df):
+    """
+    Table 导出 -> (codes, names, {field: float64 ndarray})
+    同一文件里代码重复时后出现的覆盖前面的 (与逐行写 dict 一致)
+    """
+    cols = df.columns
+    col_code = _find_col(cols, '代码')
+    if not col_code:
+        return [], [], {}
+
+    # 0112 之后的导出在 当日成交额 前面多了 昨日成交额，必须按名字取当日
+    col_amt = _find_col(cols, '当日成交额') or _find_col(cols, '成交额', ('3日', '5日', '昨日'))
+    col_map = {
+        'pct': _find_col(cols, '涨幅', ('竞价', '10', '20', '3', '开盘')),
+        'amount': col_amt,
+        'price': _find_col(cols, '现价'),
+        'turnover': _find_col(cols, '换手'),
+        'auc_pct': _find_col(cols, '竞价涨幅'),
+        'auc_amt': _find_col(cols, '早盘竞价金额'),
+        'circ_mv': _find_col(cols, '流通市值'),
+        'boards': _find_col(cols, '连续涨停') or _find_col(cols, '连板'),
+        'open_num': _find_col(cols, '开板次数'),
+    }
+
+    codes = to_code(df[col_code])
+    valid = (codes.str.len() == 6).to_numpy()
+    values = {f: float_col(df, c).to_numpy()[valid] for f, c in col_map.items()}
+    # 口径沿用原 F佬 历史: 第一个含 涨停/连板 的列只要不是空值 ('--'/空/nan) 就算涨停
+    col_zt = next((c for c in cols if '涨停' in c or '连板' in c), None)
+    zt_flag = ~to_text(df[col_zt]).isin(['--', '', 'nan']).to_numpy()[valid] if col_zt else False
+    values['zt'] = ((values['pct'] > 9.8) | zt_flag).astype(np.float64)
+
+    col_name = _find_col(cols, '名称')
+    names = to_str(df[col_name]).to_numpy()[valid].tolist() if col_name else [''] * int(valid.sum())
+    return codes.to_numpy()[valid].tolist(), names, values
+
+
+def _round_sig(x, mag, digits):
+    k = np.where(np.isfinite(mag), digits - 1 - mag, 0)
+    small = 10.0 ** np.maximum(k, 0)    # 小数: x * 10^k 取整后除回去 (10 的正幂是精确的)
+    large = 10.0 ** np.maximum(-k, 0)   # 大数: x / 10^-k 取整后乘回去
+    return np.rint(x * small / large) / small * large
+
+
+def as_float64(arr):
+    """
+    float32 -> float64 并还原导出时的十进制值 (9.8f -> 9.8 而不是 9.800000190734863)，
+    需要和阈值做精确比较 (涨幅 > 9.8 等) 时使用。
+    按 1~9 位有效数字依次取整，取位数最少且能原样转回同一 float32 的结果 (即最短十进制表示)
+    """
+    arr = np.asarray(arr)
+    x = arr.astype(np.float64)
+    if arr.dtype != _DTYPE:
+        return x
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mag = np.floor(np.log10(np.abs(x)))
+    out = x.copy()
+    todo = np.isfinite(mag)
+    for digits in range(1, 10):
+        if not todo.any():
+            break
+        cand = _round_sig(x, mag, digits)
+        hit = todo & (cand.astype(_DTYPE) == arr)
+        out[hit] = cand[hit]
+        todo &= ~hit
+    return out
+
+
+class PanelStore:
+    """
+    用法:
+        store = PanelStore(ths_dir)
+        store.sync()                          # 追加新导出的交易日
+        dates, pct = store.window('pct', 5)   # 最近5日 (5, n_codes)
+    """
+
+    def __init__(self, ths_dir, panel_dir=None):
+        self.ths_dir = ths_dir
+        self.panel_dir = panel_dir or os.path.join(ths_dir, PANEL_DIRNAME)
+        self._meta = self._load_meta()
+        self._code_idx = {c: i for i, c in enumerate(self._meta['codes'])}
+
+    # ---------------- meta ----------------
+    @property
+    def _meta_path(self):
+        return os.path.join(self.panel_dir, 'meta.json')
+
+    def _field_path(self, field):
+        return os.path.join(self.panel_dir, f'{field}.f32')
+
+    def _empty_meta(self):
+        return {'version': PANEL_VERSION, 'fields': FIELDS, 'capacity': 0,
+                'dates': [], 'codes': [], 'names': [], 'sources': {}}
+
+    def _load_meta(self):
+        try:
+            with open(self._meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta.get('version') == PANEL_VERSION and meta.get('fields') == FIELDS:
+                return meta
+        except (OSError, ValueError):
+            pass
+        return self._empty_meta()
+
+    def _save_meta(self):
+        tmp = self._meta_path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self._meta, f, ensure_ascii=False)
+        os.replace(tmp, self._meta_path)
+
+    @property
+    def dates(self):
+        return list(self._meta['dates'])
+
+    @property
+    def codes(self):
+        return list(self._meta['codes'])
+
+    @property
+    def names(self):
+        return list(self._meta['names'])
+
+    def code_index(self, code):
+        return self._code_idx.get(code)
+
+    # ---------------- 写入 ----------------
+    def _grow(self, n_codes):
+        """列数超过预留容量时按块扩容 (重写一次所有字段文件)"""
+        old_cap = self._meta['capacity']
+        new_cap = ((int(n_codes * 1.1) // _CAPACITY_BLOCK) + 1) * _CAPACITY_BLOCK
+        n_rows = len(self._meta['dates'])
+        for field in FIELDS:
+            grown = np.full((n_rows, new_cap), np.nan, dtype=_DTYPE)
+            if n_rows and old_cap:
+                raw = self._raw(field, n_rows, old_cap)
+                grown[:, :old_cap] = raw
+                del raw  # Windows 下文件仍被映射时无法 os.replace
+            tmp = self._field_path(field) + '.tmp'
+            grown.tofile(tmp)
+            os.replace(tmp, self._field_path(field))
+        self._meta['capacity'] = new_cap
+
+    def _register_codes(self, codes, names, is_latest):
+        for code, name in zip(codes, names):
+            idx = self._code_idx.get(code)
+            if idx is None:
+                self._code_idx[code] = len(self._meta['codes'])
+                self._meta['codes'].append(code)
+                self._meta['names'].append(name)
+            elif is_latest and name:
+                self._meta['names'][idx] = name
+        if len(self._meta['codes']) > self._meta['capacity']:
+            self._grow(len(self._meta['codes']))
+
+    def _write_row(self, row_no, codes, values):
+        cap = self._meta['capacity']
+        cols = np.fromiter((self._code_idx[c] for c in codes), dtype=np.int64, count=len(codes))
+        for field in FIELDS:
+            row = np.full(cap, np.nan, dtype=_DTYPE)
+            row[cols] = values[field]
+            path = self._field_path(field)
+            mode = 'r+b' if os.path.exists(path) else 'w+b'
+            with open(path, mode) as f:
+                f.seek(row_no * cap * _ITEMSIZE)
+                f.write(row.tobytes())
+                # 丢掉上次中断留下的半截行 (meta 没有记录的部分)
+                f.truncate(max(len(self._meta['dates']), row_no + 1) * cap * _ITEMSIZE)
+
+    def add_table(self, path, date):
+        """把一个 Table 导出写入面板：新交易日追加一行，已有交易日原地覆盖"""
+        df = get_table(path)
+        if df is None:
+            return False
+        codes, names, values = extract_table_fields(df)
+        if not codes:
+            return False
+
+        os.makedirs(self.panel_dir, exist_ok=True)
+        dates = self._meta['dates']
+        is_latest = not dates or date >= max(dates)
+        self._register_codes(codes, names, is_latest)
+
+        row_no = dates.index(date) if date in dates else len(dates)
+        self._write_row(row_no, codes, values)
+        if row_no == len(dates):
+            dates.append(date)
+
+        st = os.stat(path)
+        self._meta['sources'][date] = [st.st_mtime_ns, st.st_size]
+        self._save_meta()
+        return True
+
+    def sync(self):
+        """扫描 ths_dir，把新增/重新导出的 Table-YYYYMMDD.txt 写入面板，返回写入的交易日"""
+        if not os.path.exists(self.ths_dir):
+            return []
+        changed = []
+        for f in sorted(os.listdir(self.ths_dir)):
+            if not (f.startswith('Table') and f.endswith('.txt')):
+                continue
+            m = re.search(r'(20\d{6})', f)
+            if not m:
+                continue
+            date = m.group(1)
+            path = os.path.join(self.ths_dir, f)
+            st = os.stat(path)
+            if self._meta['sources'].get(date) == [st.st_mtime_ns, st.st_size]:
+                continue
+            try:
+                if self.add_table(path, date):
+                    changed.append(date)
+            except OSError as e:
+                # 面板目录不可写等情况：跳过该日，不影响主流程
+                print(f"⚠️ 面板写入失败 {f}: {e}")
+        return changed
+
+    # ---------------- 读取 ----------------
+    def _raw(self, field, n_rows, cap):
+        return np.memmap(self._field_path(field), dtype=_DTYPE, mode='r', shape=(n_rows, cap))
+
+    def field(self, name):
+        """
+        返回 (交易日升序, n_codes) 的 float32 数组。
+        行本身已按日期追加时是 memmap 视图 (零拷贝)，补录过旧日期时按日期重排 (拷贝)。
+        """
+        if name not in FIELDS:
+            raise KeyError(f"未知面板字段: {name}")
+        n_rows, n_codes = len(self._meta['dates']), len(self._meta['codes'])
+        if n_rows == 0:
+            return np.empty((0, n_codes), dtype=_DTYPE)
+        arr = self._raw(name, n_rows, self._meta['capacity'])[:, :n_codes]
+        order = np.argsort(self._meta['dates'], kind='stable')
+        if np.array_equal(order, np.arange(n_rows)):
+            return arr
+        return arr[order]
+
+    def window(self, name, days, end_date=None):
+        """最近 days 个交易日 (截至 end_date，含) -> (dates, ndarray[days, n_codes])"""
+        dates = sorted(self._meta['dates'])
+        end = len(dates) if end_date is None else int(np.searchsorted(dates, str(end_date), side='right'))
+        start = max(0, end - days)
+        return dates[start:end], self.field(name)[start:end]
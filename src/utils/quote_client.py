@@ -0,0 +1,241 @@
+# src/utils/quote_client.py
+# ==============================================================================
+# 实时行情提供者 (只取盯盘名单，不拉全市场)
+# 盘中监控/竞价筛选只关心持仓 + 策略池 + 手动关注的几十只票，以前每次刷新都拉
+# ak.stock_zh_a_spot_em() 全市场 ~5000 行再过滤。这里按新浪代码 (sh600000) 分批请求
+# hq.sinajs.cn，一个 requests.Session 复用连接 (keep-alive 连接池)，多批并发。
+# 返回和 stock_zh_a_spot_em 同名的列 (代码/名称/最新价/涨跌幅/成交量(手)/成交额(元)...)，
+# 批量接口失败或没有数据时退回全市场快照。
+# ==============================================================================
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+SINA_QUOTE_URL = 'http://hq.sinajs.cn'
+SINA_HEADERS = {
+    'Referer': 'https://finance.sina.com.cn',   # 没有 Referer 会被 403
+    'User-Agent': 'Mozilla/5.0',
+}
+BATCH_SIZE = 200        # 每个请求的代码数 (URL 长度有限)
+POOL_SIZE = 4           # 连接池大小 = 并发批数
+REQUEST_TIMEOUT = 3     # 秒
+
+SPOT_COLUMNS = ['代码', '名称', '最新价', '涨跌幅', '涨跌额', '今开', '昨收', '最高', '最低', '成交量', '成交额']
+TRADING_MINUTES = 240
+
+_LINE_RE = re.compile(r'hq_str_(?:sh|sz|bj)(\w+)="([^"]*)"')
+
+
+def sina_symbol(code, hint=None):
+    """6 位代码 -> 新浪代码；hint (策略池里的 sina_code) 前缀合法且和代码一致时直接用"""
+    code = str(code).zfill(6)
+    hint = str(hint or '').strip().lower()
+    if hint[:2] in ('sh', 'sz', 'bj') and hint[2:] == code:
+        return hint
+    if code.startswith(('6', '9')): return f"sh{code}"
+    if code.startswith(('8', '4')): return f"bj{code}"
+    return f"sz{code}"
+
+
+def parse_sina_quotes(text):
+    """
+    hq.sinajs.cn 返回文本 -> DataFrame (SPOT_COLUMNS)
+    字段: 0名称 1今开 2昨收 3最新 4最高 5最低 6买一 7卖一 8成交量(股) 9成交额(元) 10买一量 11买一价 ...
+    停牌/不存在的代码返回空串，跳过
+    竞价期间 (9:15~9:25) 最新价为 0：取买一价作虚拟撮合价，成交额取 买一价 × 买一量
+    """
+    names, rows = [], []
+    codes = []
+    for code, body in _LINE_RE.findall(text or ''):
+        f = body.split(',')
+        if len(f) < 12 or not f[0]:
+            continue
+        codes.append(code)
+        names.append(f[0])
+        rows.append(f[1:12])
+    if not rows:
+        return pd.DataFrame(columns=SPOT_COLUMNS)
+
+    v = pd.DataFrame(rows).apply(pd.to_numeric, errors='coerce').to_numpy(dtype=np.float64)
+    open_p, prev, price, high, low = v[:, 0], v[:, 1], v[:, 2], v[:, 3], v[:, 4]
+    vol, amt, b1_vol, b1_price = v[:, 7], v[:, 8], v[:, 9], v[:, 10]
+
+    in_auction = ~(price > 0) & (b1_price > 0)
+    price = np.where(in_auction, b1_price, price)
+    amt = np.where(in_auction & ~(amt > 0), b1_price * b1_vol, amt)
+    vol = np.where(in_auction & ~(vol > 0), b1_vol, vol)
+    price = np.where(price > 0, price, np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pct = np.where(prev > 0, np.round((price / prev - 1) * 100, 2), np.nan)
+
+    return pd.DataFrame({
+        '代码': codes,
+        '名称': names,
+        '最新价': price,
+        '涨跌幅': pct,
+        '涨跌额': np.round(price - prev, 3),
+        '今开': np.where(open_p > 0, open_p, price),
+        '昨收': prev,
+        '最高': np.where(high > 0, high, price),
+        '最低': np.where(low > 0, low, price),
+        '成交量': vol / 100,           # 股 -> 手 (同东财)
+        '成交额': amt,
+    })
+
+
+class SinaQuoteClient:
+    """
+    用法:
+        client = SinaQuoteClient()
+        df = client.fetch(['600000', '000001'], symbols={'600000': 'sh600000'})
+    """
+
+    def __init__(self, base_url=SINA_QUOTE_URL, batch_size=BATCH_SIZE, pool_size=POOL_SIZE,
+                 timeout=REQUEST_TIMEOUT, session=None):
+        self.base_url = base_url.rstrip('/')
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self._session = session
+        self._executor = None
+        self._lock = threading.Lock()
+        self.stats = {'requests': 0, 'bytes': 0, 'rows': 0}
+
+    @property
+    def session(self):
+        """延迟创建；连接池大小和并发批数一致，批次之间复用 keep-alive 连接"""
+        with self._lock:
+            if self._session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                s = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                s.mount('http://', adapter)
+                s.mount('https://', adapter)
+                s.headers.update(SINA_HEADERS)
+                self._session = s
+            return self._session
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.pool_size, thread_name_prefix='quote')
+            return self._executor
+
+    def _get(self, symbols):
+        resp = self.session.get(f"{self.base_url}/list={','.join(symbols)}", timeout=self.timeout)
+        resp.raise_for_status()
+        with self._lock:
+            self.stats['requests'] += 1
+            self.stats['bytes'] += len(resp.content)
+        return resp.content.decode('gbk', errors='replace')
+
+    def fetch(self, codes, symbols=None):
+        """codes 的实时行情 (SPOT_COLUMNS)；任何一批失败都抛出"""
+        symbols = symbols or {}
+        codes = list(dict.fromkeys(str(c).zfill(6) for c in codes))
+        if not codes:
+            return pd.DataFrame(columns=SPOT_COLUMNS)
+        sym = [sina_symbol(c, symbols.get(c)) for c in codes]
+        batches = [sym[i:i + self.batch_size] for i in range(0, len(sym), self.batch_size)]
+        if len(batches) == 1:
+            texts = [self._get(batches[0])]
+        else:
+            texts = list(self._pool().map(self._get, batches))
+        df = parse_sina_quotes('\n'.join(texts))
+        self.stats['rows'] += len(df)
+        return df
+
+
+def fetch_full_spot():
+    """东财全市场快照 (网络请求，~5000 行)"""
+    import akshare as ak
+    return ak.stock_zh_a_spot_em()
+
+
+class QuoteProvider:
+    """
+    用法:
+        provider = get_quote_provider()
+        df = provider.quotes(codes, symbols=sina_map)   # 只含 codes 的行 (列同 stock_zh_a_spot_em)
+        df = provider.quotes()                          # 全市场
+        provider.source                                 # 'batch' / 'full'
+    批量接口失败或一行都没拿到时退回全市场快照 (按 codes 过滤)
+    """
+
+    def __init__(self, client=None, full_spot=None):
+        self.client = client if client is not None else SinaQuoteClient()
+        self.full_spot = full_spot or fetch_full_spot
+        self.source = None
+        self.last_error = None
+        self.stats = {'batch': 0, 'full': 0, 'fallback': 0, 'missing': 0}
+
+    def _full(self, codes):
+        df = self.full_spot()
+        self.stats['full'] += 1
+        self.source = 'full'
+        if codes is not None:
+            df = df[df['代码'].astype(str).isin(set(codes))]
+        return df.reset_index(drop=True)
+
+    def quotes(self, codes=None, symbols=None):
+        if codes is None:
+            return self._full(None)
+        codes = [str(c).zfill(6) for c in codes]
+        try:
+            df = self.client.fetch(codes, symbols)
+            if df.empty and codes:
+                raise ValueError("批量行情无数据")
+        except Exception as e:
+            self.last_error = str(e)
+            self.stats['fallback'] += 1
+            return self._full(codes)
+        self.last_error = None
+        self.stats['batch'] += 1
+        self.stats['missing'] += len(set(codes) - set(df['代码']))
+        self.source = 'batch'
+        return df
+
+
+def fill_volume_ratio(df, avg_volume, now=None):
+    """
+    批量接口没有 '量比'：用 近5日日均成交量(手) 在本地补算
+    量比 = (今日成交量 / 已开盘分钟数) / (日均量 / 240)；没有基准的票为 NaN
+    (不能填 0: 0 会让 弱转强/放量拉升 永远不触发、缩量稳住 误触发，NaN 时量比相关信号都不判)
+    已有 '量比' 列时不动
+    """
+    if '量比' in df.columns or df.empty:
+        return df
+    minutes = trading_minutes(now or datetime.now())
+    base = df['代码'].map(avg_volume or {}).astype(float).to_numpy()
+    vol = pd.to_numeric(df['成交量'], errors='coerce').to_numpy(dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        vr = (vol / minutes) / (base / TRADING_MINUTES)
+    df = df.copy()
+    df['量比'] = np.round(np.where(np.isfinite(vr), vr, np.nan), 2)
+    return df
+
+
+def trading_minutes(now):
+    """当天已开盘的分钟数 (9:30~11:30, 13:00~15:00)，至少 1"""
+    t = now.hour * 60 + now.minute + now.second / 60
+    am = min(max(t - (9 * 60 + 30), 0), 120)
+    pm = min(max(t - 13 * 60, 0), 120)
+    return max(am + pm, 1.0)
+
+
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def get_quote_provider():
+    """进程级单例 (连接池跨刷新复用)"""
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            _provider = QuoteProvider()
+        return _provider
@@ -0,0 +1,64 @@
+# src/utils/rate_limit.py
+# ==============================================================================
+# 并发抓取用的限速与重试
+# 东方财富等接口对单 IP 的请求频率敏感，多线程抓取时所有线程共用一个令牌桶，
+# 保证整体请求速率不超过 rate 次/秒 (允许 capacity 次的瞬时突发)。
+# ==============================================================================
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    线程安全令牌桶
+    用法:
+        bucket = TokenBucket(rate=5, capacity=5)
+        bucket.acquire()   # 没有令牌时阻塞到补足为止
+    """
+
+    def __init__(self, rate, capacity=None, clock=time.monotonic, sleep=time.sleep):
+        if rate <= 0:
+            raise ValueError("rate 必须大于 0")
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self._tokens = self.capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._last = clock()
+        self._lock = threading.Lock()
+        self.waited = 0.0  # 累计因限速等待的秒数
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def acquire(self, tokens=1):
+        """
+        取 tokens 个令牌，返回本次等待的秒数
+        令牌不足时先记账 (余额可为负，后来者顺延排队)，再在锁外睡到轮到自己为止
+        """
+        with self._lock:
+            self._refill()
+            self._tokens -= tokens
+            wait = max(0.0, -self._tokens) / self.rate
+            self.waited += wait
+        if wait > 0:
+            self._sleep(wait)
+        return wait
+
+
+def retry_call(fn, *args, retries=2, backoff=0.5, limiter=None, **kwargs):
+    """
+    调用 fn(*args, **kwargs)，异常时按 backoff * 2^(n-1) 秒退避重试，最多 retries 次；
+    给定 limiter (TokenBucket) 时每次尝试前先取令牌。最后一次仍失败则抛出该异常
+    """
+    for attempt in range(retries + 1):
+        if limiter is not None:
+            limiter.acquire()
+        try:
+            return fn(*args, **kwargs)
+        except Exception:
+            if attempt >= retries:
+                raise
+            time.sleep(backoff * (2 ** attempt))
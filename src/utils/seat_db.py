@@ -0,0 +1,287 @@
+# src/utils/seat_db.py
+# ==============================================================================
+# 龙虎榜知名席位成交库 (SQLite，按交易日追加)
+# seat_trades: 每个交易日深度扫描命中的席位明细 (日期, 游资标签, 营业部, 代码, 买入, 卖出, 榜单类型)
+# seat_status: 由历史成交推导出的 锁仓/加仓 标记
+# 锁仓/加仓/多日持仓都是 (seat, code, date) 索引上的查询，回看窗口可以是任意 N 个上榜日；
+# lhb_famous_*.csv 和 pool_generator 的游资标签都从这里生成，不再解析格式化字符串。
+# ==============================================================================
+import os
+import sqlite3
+import threading
+from contextlib import closing
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_DB_PATH = os.path.join(PROJECT_ROOT, 'data', 'output', 'lhb', 'lhb_seats.sqlite')
+
+# 金额显著性阈值 (10万)，与 lhb_scanner 的操作判定一致
+SIG_AMOUNT = 100000
+LOCK_STATUS = "🔒 锁仓"
+ADD_STATUS = "➕ 加仓"
+SELL_ACTIONS = ('卖出', '做T')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS seat_trades (
+    date TEXT NOT NULL,        -- 'YYYYMMDD'
+    seat TEXT NOT NULL,        -- 游资标签
+    branch TEXT NOT NULL,      -- 营业部名称
+    code TEXT NOT NULL,
+    name TEXT NOT NULL,
+    buy REAL,                  -- 元，无法解析时为 NULL
+    sell REAL,
+    list_type TEXT NOT NULL,   -- 日 / 3日 / 严重异动
+    action TEXT NOT NULL       -- 买入 / 卖出 / 做T / 观望
+);
+CREATE INDEX IF NOT EXISTS idx_trades_seat_code ON seat_trades (seat, code, date);
+CREATE INDEX IF NOT EXISTS idx_trades_date ON seat_trades (date);
+CREATE TABLE IF NOT EXISTS seat_status (
+    date TEXT NOT NULL,
+    seat TEXT NOT NULL,
+    code TEXT NOT NULL,
+    name TEXT NOT NULL,
+    list_type TEXT NOT NULL,
+    status TEXT NOT NULL       -- 🔒 锁仓 / ➕ 加仓
+);
+CREATE INDEX IF NOT EXISTS idx_status_seat_code ON seat_status (seat, code, date);
+CREATE INDEX IF NOT EXISTS idx_status_date ON seat_status (date);
+"""
+
+
+def _in(values):
+    return ', '.join('?' * len(values))
+
+
+class SeatDB:
+    """
+    用法:
+        db = SeatDB()
+        db.record_day('20260116', hits)                        # hits: lhb_scanner.seat_hits 的结果
+        status = db.derive_status('20260116', today_codes)     # 锁仓/加仓
+        rows = famous_rows(db.summary('20260116'))             # lhb_famous_*.csv 的行
+    """
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or DEFAULT_DB_PATH
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute('PRAGMA journal_mode=WAL')
+        return conn
+
+    # ---------------- 写入 ----------------
+    def record_day(self, date, hits):
+        """写入某交易日的席位命中 (同一天重复扫描时整体替换，其它日期只追加不改)"""
+        rows = [(date, h['游资标签'], h['营业部名称'], str(h['股票代码']), str(h['股票名称']).strip(),
+                 h['买入金额'], h['卖出金额'], h['榜单标签'], h['操作']) for h in hits]
+        with self._lock, closing(self._connect()) as conn, conn:
+            conn.execute('DELETE FROM seat_trades WHERE date = ?', (date,))
+            conn.execute('DELETE FROM seat_status WHERE date = ?', (date,))
+            conn.executemany('INSERT INTO seat_trades VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+
+    # ---------------- 查询 ----------------
+    def dates(self, before=None, limit=None):
+        """有记录的交易日 (新 -> 旧)，before 不含当天"""
+        sql = 'SELECT DISTINCT date FROM seat_trades'
+        args = []
+        if before:
+            sql += ' WHERE date < ?'
+            args.append(before)
+        sql += ' UNION SELECT DISTINCT date FROM seat_status' + (' WHERE date < ?' if before else '')
+        args += [before] if before else []
+        sql = f'SELECT date FROM ({sql}) ORDER BY date DESC'
+        if limit:
+            sql += f' LIMIT {int(limit)}'
+        with closing(self._connect()) as conn:
+            return [r[0] for r in conn.execute(sql, args)]
+
+    def latest_date(self):
+        dates = self.dates(limit=1)
+        return dates[0] if dates else None
+
+    def holdings(self, date, window=1):
+        """
+        截至 date 前 window 个上榜日内仍视为持有的 (游资, 股票)
+        持有证据: 某榜单类型上聚合买入 > 10万，或当天被标记过 锁仓/加仓；
+        最后一次证据之后 (date 之前) 出现过卖出/做T 视为已离场
+        返回 [{seat, code, name, first_date, last_date, days}]，按 (seat, code) 排序
+        """
+        window_dates = self.dates(before=date, limit=window)
+        if not window_dates:
+            return []
+        ph = _in(window_dates)
+        sql = f"""
+            WITH branch_max AS (
+                SELECT date, seat, code, name, list_type, branch, MAX(COALESCE(buy, 0)) AS buy
+                FROM seat_trades WHERE date IN ({ph})
+                GROUP BY date, seat, code, list_type, branch
+            ), evidence AS (
+                SELECT date, seat, code, name FROM branch_max
+                GROUP BY date, seat, code, list_type HAVING SUM(buy) > {SIG_AMOUNT}
+                UNION ALL
+                SELECT date, seat, code, name FROM seat_status WHERE date IN ({ph})
+            ), held AS (
+                SELECT seat, code, MAX(name) AS name, MIN(date) AS first_date, MAX(date) AS last_date,
+                       COUNT(DISTINCT date) AS days
+                FROM evidence GROUP BY seat, code
+            )
+            SELECT seat, code, name, first_date, last_date, days FROM held h
+            WHERE NOT EXISTS (
+                SELECT 1 FROM seat_trades t
+                WHERE t.seat = h.seat AND t.code = h.code AND t.date > h.last_date AND t.date < ?
+                  AND t.action IN ({_in(SELL_ACTIONS)})
+            )
+            ORDER BY seat, code
+        """
+        args = window_dates + window_dates + [date] + list(SELL_ACTIONS)
+        keys = ['seat', 'code', 'name', 'first_date', 'last_date', 'days']
+        with closing(self._connect()) as conn:
+            return [dict(zip(keys, r)) for r in conn.execute(sql, args)]
+
+    def derive_status(self, date, today_codes, name_map=None, window=1):
+        """
+        根据前 window 个上榜日的持仓推导当日状态并写入 seat_status:
+          仍在今日龙虎榜、该游资今日未上榜        -> 🔒 锁仓
+          今日该游资只买不卖 (买入)               -> ➕ 加仓
+          今日有卖出/做T                          -> 不标记
+        返回写入的记录 [{seat, code, name, list_type, status}]
+        """
+        today_codes = set(today_codes)
+        name_map = name_map or {}
+        with closing(self._connect()) as conn:
+            today = {}
+            for seat, code, action, list_type in conn.execute(
+                    'SELECT seat, code, action, list_type FROM seat_trades WHERE date = ? ORDER BY rowid', (date,)):
+                t = today.setdefault((seat, code), {'sell': False, 'buy_type': None})
+                t['sell'] |= action in SELL_ACTIONS
+                if action == '买入' and t['buy_type'] is None:
+                    t['buy_type'] = list_type
+
+        status = []
+        for h in self.holdings(date, window):
+            if h['code'] not in today_codes:
+                continue
+            t = today.get((h['seat'], h['code']))
+            if t is None:
+                list_type, mark = '日', LOCK_STATUS
+            elif not t['sell'] and t['buy_type']:
+                list_type, mark = t['buy_type'], ADD_STATUS
+            else:
+                continue
+            status.append({'seat': h['seat'], 'code': h['code'], 'name': name_map.get(h['code'], h['name']),
+                           'list_type': list_type, 'status': mark})
+
+        with self._lock, closing(self._connect()) as conn, conn:
+            conn.execute('DELETE FROM seat_status WHERE date = ?', (date,))
+            conn.executemany('INSERT INTO seat_status VALUES (?, ?, ?, ?, ?, ?)',
+                             [(date, s['seat'], s['code'], s['name'], s['list_type'], s['status']) for s in status])
+        return status
+
+    def summary(self, date):
+        """
+        当日按游资聚合: 同一营业部同一榜单类型取最大金额，再按 (股票, 榜单类型) 把多个营业部相加
+        返回 {游资标签: [{name, list_type, buy, sell, statuses}]}，股票按名称排序、日榜在前
+        """
+        with closing(self._connect()) as conn:
+            trades = conn.execute("""
+                SELECT seat, name, list_type, MAX(COALESCE(buy, 0)), MAX(COALESCE(sell, 0)), MIN(rowid) AS first
+                FROM seat_trades WHERE date = ?
+                GROUP BY seat, branch, name, list_type ORDER BY first
+            """, (date,)).fetchall()
+            marks = conn.execute(
+                'SELECT seat, name, list_type, status FROM seat_status WHERE date = ? ORDER BY rowid',
+                (date,)).fetchall()
+
+        agg = {}
+        for seat, name, list_type, buy, sell, _ in trades:
+            item = agg.setdefault(seat, {}).setdefault((name, list_type), {'buy': 0, 'sell': 0, 'statuses': {}})
+            item['buy'] += buy
+            item['sell'] += sell
+        for seat, name, list_type, mark in marks:
+            item = agg.setdefault(seat, {}).setdefault((name, list_type), {'buy': 0, 'sell': 0, 'statuses': {}})
+            item['statuses'][mark] = None
+
+        result = {}
+        for seat, items in agg.items():
+            keys = sorted(items, key=lambda k: (k[0], k[1] != '日'))  # '日' comes first
+            result[seat] = [{'name': name, 'list_type': list_type, 'buy': items[(name, list_type)]['buy'],
+                             'sell': items[(name, list_type)]['sell'],
+                             'statuses': list(items[(name, list_type)]['statuses'])}
+                            for name, list_type in keys]
+        return result
+
+
+# ---------------- 导出 ----------------
+def _amount_str(amt):
+    if amt > 100000000:
+        return f"({amt / 100000000:.1f}亿)"
+    return f"({amt / 10000:.0f}万)"
+
+
+def _entries(item):
+    """
+    单只股票在 买入股票/卖出股票 两栏里的展示 -> (买入栏条目 or None, 卖出栏条目 or None)
+    条目 = (显示名, 状态注释, 金额注释)
+    """
+    display = item['name'] + (f"/{item['list_type']}" if item['list_type'] != '日' else '')
+    status = f"({'/'.join(item['statuses'])})" if item['statuses'] else ''
+    is_lock = LOCK_STATUS in item['statuses']
+
+    buy = sell = None
+    # 买入栏: 金额显著，或有非锁仓的状态标记；锁仓只显示名字
+    if item['buy'] > SIG_AMOUNT or (item['statuses'] and not is_lock):
+        buy = (display, status, _amount_str(item['buy']) if item['buy'] > SIG_AMOUNT else '')
+    elif is_lock:
+        buy = (display, status, '')
+    if item['sell'] > SIG_AMOUNT:
+        sell = (display, status, _amount_str(item['sell']))
+    return buy, sell
+
+
+def famous_rows(summary):
+    """summary -> lhb_famous_*.csv 的行 (按游资标签排序)"""
+    rows = []
+    for seat, items in summary.items():
+        buy_strs, sell_strs = [], []
+        for item in items:
+            buy, sell = _entries(item)
+            if buy:
+                buy_strs.append(''.join(buy))
+            if sell:
+                sell_strs.append(''.join(sell))
+        if not buy_strs and not sell_strs:
+            continue
+        rows.append({
+            '游资标签': seat,
+            '营业部名称': "多席位/聚合",
+            '买入股票': " ".join(buy_strs),
+            '卖出股票': " ".join(sell_strs),
+            '上榜次数': len(buy_strs) + len(sell_strs)
+        })
+    rows.sort(key=lambda x: x['游资标签'])
+    return rows
+
+
+def seat_tags(summary):
+    """
+    summary -> {股票名称: {标签}}，供 pool_generator 打游资标签
+    标签 = 前缀 + 游资 + /榜单类型 + (状态)(金额)；前缀 💰买入 🏃卖出 🔒锁仓 ➕加仓
+    """
+    seat_map = {}
+    for seat, items in summary.items():
+        for item in items:
+            for entry, default_prefix in zip(_entries(item), ("💰", "🏃")):
+                if entry is None:
+                    continue
+                _, status, amount = entry
+                prefix = default_prefix
+                if "锁仓" in status:
+                    prefix = "🔒"
+                elif "加仓" in status:
+                    prefix = "➕"
+                tag_info = f"/{item['list_type']}" if item['list_type'] != '日' else ''
+                seat_map.setdefault(item['name'], set()).add(f"{prefix}{seat}{tag_info}{status}{amount}")
+    return seat_map
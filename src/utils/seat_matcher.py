@@ -0,0 +1,156 @@
+# src/utils/seat_matcher.py
+# ==============================================================================
+# 知名游资席位识别 (Aho-Corasick 多模式匹配)
+# FAMOUS_SEATS 的全部关键词编译成一个自动机，营业部名称只需扫描一遍
+# 就能得到命中的全部游资标签；同名营业部的结果按名称缓存，重复出现直接查表。
+# 编译结果以 JSON 存在 data/.cache/seats/，席位配置变化 (内容哈希不同) 时自动重建。
+# ==============================================================================
+import os
+import json
+import hashlib
+import threading
+from collections import deque
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(os.path.dirname(CURRENT_DIR))
+SEAT_CACHE_DIR = os.path.join(PROJECT_ROOT, 'data', '.cache', 'seats')
+
+MATCHER_VERSION = 1
+
+
+def config_hash(seats):
+    """席位配置 {标签: [关键词]} 的内容哈希 (标签顺序也计入，影响输出顺序)"""
+    payload = json.dumps([[label, list(kws)] for label, kws in seats.items()], ensure_ascii=False)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+class SeatMatcher:
+    """
+    用法:
+        matcher = SeatMatcher(FAMOUS_SEATS)
+        matcher.labels_for('中信证券股份有限公司北京呼家楼证券营业部')  # ('呼家楼',)
+        matcher.match(df['营业部名称'])                               # 逐行标签元组
+
+    口径与原先的双重循环一致: 某标签任一关键词是营业部名称的子串即命中，
+    每个标签最多命中一次，结果按 FAMOUS_SEATS 中的标签顺序排列。
+    """
+
+    def __init__(self, seats=None, _compiled=None):
+        if _compiled is None:
+            _compiled = self._compile(seats)
+        self.labels = _compiled['labels']
+        self.hash = _compiled['hash']
+        self._goto = _compiled['goto']   # 每个状态: {字符: 下一状态}
+        self._fail = _compiled['fail']
+        self._out = _compiled['out']     # 每个状态: 命中的标签位掩码 (已沿失败链合并)
+        self._memo = {}
+        self._lock = threading.Lock()
+
+    # ---------------- 编译 ----------------
+    @staticmethod
+    def _compile(seats):
+        labels = list(seats)
+        goto, out = [{}], [0]
+        for idx, label in enumerate(labels):
+            for kw in seats[label]:
+                node = 0
+                for ch in kw:
+                    nxt = goto[node].get(ch)
+                    if nxt is None:
+                        nxt = len(goto)
+                        goto[node][ch] = nxt
+                        goto.append({})
+                        out.append(0)
+                    node = nxt
+                out[node] |= 1 << idx
+
+        # BFS 建失败指针，并把失败链上的输出并入当前状态
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in goto[node].items():
+                f = fail[node]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0)
+                out[nxt] |= out[fail[nxt]]
+                queue.append(nxt)
+
+        return {'labels': labels, 'hash': config_hash(seats), 'goto': goto, 'fail': fail, 'out': out}
+
+    def to_dict(self):
+        return {'version': MATCHER_VERSION, 'labels': self.labels, 'hash': self.hash,
+                'goto': self._goto, 'fail': self._fail, 'out': self._out}
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get('version') != MATCHER_VERSION:
+            raise ValueError("seat matcher 缓存版本不符")
+        return cls(_compiled=data)
+
+    # ---------------- 匹配 ----------------
+    def _scan(self, text):
+        goto, fail, out = self._goto, self._fail, self._out
+        node, mask = 0, out[0]
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            mask |= out[node]
+        return tuple(label for i, label in enumerate(self.labels) if mask >> i & 1)
+
+    def labels_for(self, branch):
+        """营业部名称 -> 命中的游资标签元组 (可能为空)"""
+        hit = self._memo.get(branch)
+        if hit is None:
+            hit = self._scan(branch)
+            with self._lock:
+                self._memo[branch] = hit
+        return hit
+
+    def match(self, branches):
+        """整列匹配: 去重后每个名称只扫描一次，返回与输入等长的标签元组列表"""
+        branches = [str(b) for b in branches]
+        table = {b: self.labels_for(b) for b in set(branches)}
+        return [table[b] for b in branches]
+
+
+_loaded = {}
+_loaded_lock = threading.Lock()
+
+
+def load_matcher(seats, cache_dir=None):
+    """
+    取编译好的匹配器: 进程内按配置哈希复用；磁盘缓存命中且哈希一致时直接加载，
+    否则重新编译并写回缓存 (写失败不影响使用)
+    """
+    cache_dir = cache_dir or SEAT_CACHE_DIR
+    key = (config_hash(seats), os.path.abspath(cache_dir))
+    with _loaded_lock:
+        if key in _loaded:
+            return _loaded[key]
+
+        path = os.path.join(cache_dir, 'seat_matcher.json')
+        matcher = None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                cached = SeatMatcher.from_dict(json.load(f))
+            if cached.hash == key[0]:
+                matcher = cached
+        except (OSError, ValueError, KeyError):
+            pass
+
+        if matcher is None:
+            matcher = SeatMatcher(seats)
+            try:
+                os.makedirs(cache_dir, exist_ok=True)
+                tmp = path + '.tmp'
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    json.dump(matcher.to_dict(), f, ensure_ascii=False)
+                os.replace(tmp, path)
+            except OSError:
+                pass
+
+        _loaded[key] = matcher
+        return matcher
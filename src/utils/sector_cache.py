@@ -0,0 +1,173 @@
+# src/utils/sector_cache.py
+# ==============================================================================
+# 板块涨幅快照缓存 (行业 + 热门概念)
+# ak.stock_board_industry_name_em / stock_board_concept_name_em 整表转成 {板块: 涨幅%}，
+# 存到 data/.cache/sector/sector_map.json。竞价窗口 (9:10~9:30) 内 30 秒过期，其余时间 5 分钟。
+# 脚本启动时 prefetch() 在后台线程拉取，和加载底库/策略池并行，用到时直接取结果。
+# ==============================================================================
+import os
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pandas as pd
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_CACHE_PATH = os.path.join(PROJECT_ROOT, 'data', '.cache', 'sector', 'sector_map.json')
+
+SECTOR_APIS = {
+    'industry': 'stock_board_industry_name_em',   # 行业板块 (全部)
+    'concept': 'stock_board_concept_name_em',     # 概念板块 (只取涨幅前 CONCEPT_TOP)
+}
+CONCEPT_TOP = 100
+AUCTION_WINDOW = ('09:10', '09:30')
+AUCTION_TTL = 30       # 秒
+DEFAULT_TTL = 300
+
+
+def download_board(kind):
+    """akshare 板块列表 (网络请求)"""
+    import akshare as ak
+    return getattr(ak, SECTOR_APIS[kind])()
+
+
+def board_pct_map(df, top=None):
+    """板块列表 -> {板块名称: 涨跌幅}，top 给定时只取涨幅最高的 top 个"""
+    if df is None or df.empty:
+        return {}
+    if top is not None:
+        df = df.sort_values(by='涨跌幅', ascending=False).head(top)
+    pct = pd.to_numeric(df['涨跌幅'], errors='coerce').astype(float)
+    return dict(zip(df['板块名称'].astype(str).tolist(), pct.tolist()))
+
+
+class SectorCache:
+    """
+    用法:
+        cache = get_sector_cache()
+        future = cache.prefetch()     # 启动时后台拉取
+        ...
+        sector_map = cache.get()      # 取结果 (后台还没完成就等它，不会重复请求)
+    """
+
+    def __init__(self, cache_path=None, download=None, now=None, concept_top=CONCEPT_TOP):
+        self.cache_path = cache_path or DEFAULT_CACHE_PATH
+        self.download = download or download_board
+        self._now = now or datetime.now
+        self.concept_top = concept_top
+        self._lock = threading.Lock()
+        self._memory = None        # {'fetched_at': epoch 秒, 'industry': {...}, 'concept': {...}}
+        self._future = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='sector')
+        self.stats = {'memory': 0, 'disk': 0, 'network': 0, 'failed': 0}
+        self.last_error = None
+
+    def ttl(self):
+        hm = self._now().strftime('%H:%M')
+        return AUCTION_TTL if AUCTION_WINDOW[0] <= hm < AUCTION_WINDOW[1] else DEFAULT_TTL
+
+    def _fresh(self, snap):
+        return snap is not None and 0 <= self._now().timestamp() - snap['fetched_at'] < self.ttl()
+
+    def _read_disk(self):
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                snap = json.load(f)
+            return snap if {'fetched_at', 'industry', 'concept'} <= set(snap) else None
+        except (OSError, ValueError):
+            return None
+
+    def _write_disk(self, snap):
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.cache_path)), exist_ok=True)
+            tmp = self.cache_path + '.tmp'
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(snap, f, ensure_ascii=False)
+            os.replace(tmp, self.cache_path)
+        except OSError:
+            pass
+
+    def _fetch(self):
+        """联网拉两张表；某张失败时保留另一张，都失败才抛出"""
+        snap = {'fetched_at': self._now().timestamp(), 'industry': {}, 'concept': {}}
+        errors = []
+        for kind, top in (('industry', None), ('concept', self.concept_top)):
+            try:
+                snap[kind] = board_pct_map(self.download(kind), top)
+            except Exception as e:
+                errors.append(f"{kind}: {e}")
+        self.stats['network'] += 1
+        if len(errors) == len(SECTOR_APIS):
+            raise ConnectionError('; '.join(errors))
+        self.last_error = '; '.join(errors) or None
+        self._write_disk(snap)
+        return snap
+
+    def _load(self):
+        """内存 -> 磁盘 -> 联网，返回快照 dict"""
+        if self._fresh(self._memory):
+            self.stats['memory'] += 1
+            return self._memory
+        snap = self._read_disk()
+        if self._fresh(snap):
+            self.stats['disk'] += 1
+        else:
+            snap = self._fetch()
+        self._memory = snap
+        return snap
+
+    def prefetch(self):
+        """后台拉取 (已有在途请求时复用)，返回 Future"""
+        with self._lock:
+            if self._future is None or (self._future.done() and not self._fresh(self._memory)):
+                self._future = self._executor.submit(self._load)
+            return self._future
+
+    def get(self, timeout=None):
+        """{板块名称: 涨跌幅%} (概念覆盖同名行业)；全部失败时返回 {} (错误见 last_error)"""
+        try:
+            snap = self.prefetch().result(timeout=timeout)
+        except Exception as e:
+            self.stats['failed'] += 1
+            self.last_error = str(e)
+            with self._lock:
+                self._future = None
+            return {}
+        return _merge(snap)
+
+    def latest(self):
+        """不等待: 过期时在后台刷新，先返回手里已有的快照 (可能稍旧，没有则 {})，供轮询循环用"""
+        future = self.prefetch()
+        snap = self._memory
+        if future.done() and future.exception() is None:
+            snap = future.result()
+        return _merge(snap) if snap else {}
+
+    def age(self):
+        """当前快照的秒数 (没有快照为 None)"""
+        snap = self._memory
+        return None if snap is None else self._now().timestamp() - snap['fetched_at']
+
+
+def _merge(snap):
+    merged = dict(snap['industry'])
+    merged.update(snap['concept'])
+    return merged
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_sector_cache():
+    """进程级单例"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = SectorCache()
+        return _cache
+
+
+def prefetch_sector_map():
+    return get_sector_cache().prefetch()
@@ -0,0 +1,133 @@
+# src/utils/table_cache.py
+# ==============================================================================
+# 同花顺 Table 导出文件的列式磁盘缓存
+# Table-YYYYMMDD.txt 解析一次后以 Parquet 存放在源文件旁的 .cache/ 目录,
+# 缓存键 = 路径 + mtime + size, 文件被重新导出后自动失效并重建。
+# ==============================================================================
+import os
+import json
+import numpy as np
+import pandas as pd
+
+CACHE_DIRNAME = '.cache'
+CACHE_VERSION = 1
+
+# 同花顺导出通常是 GBK，但复制粘贴/新版客户端可能是 UTF-8/UTF-16
+DEFAULT_ENCODINGS = ['gbk', 'utf-8', 'utf-16']
+
+# Parquet 依赖 pyarrow；未安装时退化为 pickle (同样是一次性磁盘读取)
+try:
+    import pyarrow  # noqa: F401
+    CACHE_FORMAT = 'parquet'
+except ImportError:
+    CACHE_FORMAT = 'pickle'
+
+
+def _cache_paths(source_path):
+    src_dir, filename = os.path.split(os.path.abspath(source_path))
+    cache_dir = os.path.join(src_dir, CACHE_DIRNAME)
+    ext = 'parquet' if CACHE_FORMAT == 'parquet' else 'pkl'
+    data_path = os.path.join(cache_dir, f"{filename}.{ext}")
+    meta_path = os.path.join(cache_dir, f"{filename}.meta.json")
+    return cache_dir, data_path, meta_path
+
+
+def _source_key(source_path, sep):
+    st = os.stat(source_path)
+    return {
+        'source': os.path.abspath(source_path),
+        'mtime_ns': st.st_mtime_ns,
+        'size': st.st_size,
+        'sep': sep,
+        'format': CACHE_FORMAT,
+        'version': CACHE_VERSION,
+    }
+
+
+def _load_cached(source_path, sep):
+    _, data_path, meta_path = _cache_paths(source_path)
+    if not (os.path.exists(data_path) and os.path.exists(meta_path)):
+        return None
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta != _source_key(source_path, sep):
+            return None
+        if CACHE_FORMAT == 'parquet':
+            df = pd.read_parquet(data_path)
+        else:
+            df = pd.read_pickle(data_path)
+        # Parquet 读回的缺失值可能是 None，统一还原为 NaN，与 read_csv 行为一致
+        return df.where(df.notna(), np.nan)
+    except Exception:
+        return None
+
+
+def _store_cached(source_path, sep, df):
+    cache_dir, data_path, meta_path = _cache_paths(source_path)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = data_path + '.tmp'
+        if CACHE_FORMAT == 'parquet':
+            df.to_parquet(tmp_path, index=False)
+        else:
+            df.to_pickle(tmp_path)
+        os.replace(tmp_path, data_path)
+        with open(meta_path, 'w', encoding='utf-8') as f:
+            json.dump(_source_key(source_path, sep), f)
+    except Exception as e:
+        # 缓存写失败 (只读目录等) 不影响主流程
+        print(f"⚠️ 缓存写入失败 {os.path.basename(source_path)}: {e}")
+
+
+def parse_ths_table(path, sep=r'\t+', encodings=None):
+    """
+    解析 Table 导出 (未走缓存)。
+    依次尝试编码，返回全部列为字符串、列名已 strip 的 DataFrame；失败返回 None
+    """
+    encodings = encodings or DEFAULT_ENCODINGS
+    for enc in encodings:
+        try:
+            # sep=r'\t+' 把连续的 tab 当作一个分隔符 (同花顺导出的 tab 数量不规则)
+            df = pd.read_csv(path, sep=sep, engine='python', encoding=enc, dtype=str)
+        except Exception:
+            continue
+        df.columns = [str(c).strip() for c in df.columns]
+        if any('代码' in c for c in df.columns):
+            return df
+    return None
+
+
+def read_ths_table(path, sep=r'\t+', encodings=None, use_cache=True):
+    """
+    读取 Table 导出，优先命中列式缓存。
+    缓存未命中时调用 parse_ths_table 解析并回填缓存。
+    返回 DataFrame (全部为字符串列) 或 None
+    """
+    if not os.path.exists(path):
+        return None
+
+    if use_cache:
+        df = _load_cached(path, sep)
+        if df is not None:
+            return df
+
+    df = parse_ths_table(path, sep=sep, encodings=encodings)
+    if df is not None and use_cache:
+        _store_cached(path, sep, df)
+    return df
+
+
+def clear_cache(directory):
+    """删除目录下的 .cache (源文件格式变化时手动调用)"""
+    cache_dir = os.path.join(directory, CACHE_DIRNAME)
+    if not os.path.isdir(cache_dir):
+        return 0
+    removed = 0
+    for f in os.listdir(cache_dir):
+        try:
+            os.remove(os.path.join(cache_dir, f))
+            removed += 1
+        except OSError:
+            pass
+    return removed
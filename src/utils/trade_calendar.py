@@ -0,0 +1,212 @@
+# src/utils/trade_calendar.py
+# ==============================================================================
+# A 股交易日历 (本地缓存，所有模块共享)
+# ak.tool_trade_date_hist_sina 的结果存到 data/.cache/calendar/trade_dates.json，
+# 每 REFRESH_DAYS 天 (或日期超出已知范围时) 才联网刷新一次。
+# 日历是升序 int 数组 (YYYYMMDD)，前/后一个交易日、区间交易日数都是 searchsorted，
+# 既能查单个日期也能整列查询。
+# 联网失败且没有缓存时退化为 周一~周五 日历 (不含节假日)，不落盘。
+# ==============================================================================
+import os
+import json
+import threading
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_CACHE_PATH = os.path.join(PROJECT_ROOT, 'data', '.cache', 'calendar', 'trade_dates.json')
+
+CALENDAR_VERSION = 1
+REFRESH_DAYS = 30
+# 退化日历覆盖的范围 (自然日)
+_FALLBACK_SPAN = 3 * 365
+
+
+def _ymd(value):
+    """'2026-01-13' / '20260113' / date / datetime / Timestamp -> '20260113'"""
+    if hasattr(value, 'strftime'):
+        return value.strftime('%Y%m%d')
+    return str(value).replace('-', '')[:8]
+
+
+def _to_int(values):
+    """标量或数组 -> int64 (YYYYMMDD)"""
+    arr = np.asarray(values)
+    if arr.dtype.kind in 'iu':
+        return arr.astype(np.int64)
+    if arr.dtype.kind == 'M':
+        text = np.datetime_as_string(arr.astype('datetime64[D]'))
+        return np.char.replace(text, '-', '').astype(np.int64)
+    if arr.ndim == 0:
+        return np.int64(_ymd(arr.item()))
+    return np.array([_ymd(v) for v in arr.ravel()], dtype=np.int64).reshape(arr.shape)
+
+
+def download_trade_dates():
+    """新浪交易日历 (网络请求) -> ['YYYYMMDD', ...]"""
+    import akshare as ak
+    df = ak.tool_trade_date_hist_sina()
+    return sorted(_ymd(d) for d in pd.to_datetime(df['trade_date']))
+
+
+def weekday_dates(start, end):
+    """周一~周五 (不含节假日)，联网失败时的退化日历"""
+    return [d.strftime('%Y%m%d') for d in pd.bdate_range(start, end)]
+
+
+class TradeCalendar:
+    """
+    用法:
+        cal = get_calendar()
+        cal.prev_trading_day('20260105')            # '20251231'
+        cal.next_trading_day(['20260101', '20260102'])  # array(['20260105', '20260105'])
+        cal.trading_days_between('20260101', '20260131')
+        cal.last_n(5)                               # 截至今天最近 5 个交易日 (旧 -> 新)
+
+    日期参数接受 'YYYYMMDD' / 'YYYY-MM-DD' / date / datetime，或它们的数组；
+    标量返回 'YYYYMMDD' (越界为 None)，数组返回等长 str ndarray (越界为 '')
+    """
+
+    def __init__(self, dates, source='sina'):
+        self._arr = np.unique(_to_int(list(dates))) if len(dates) else np.empty(0, dtype=np.int64)
+        self.source = source
+
+    def __len__(self):
+        return len(self._arr)
+
+    @property
+    def dates(self):
+        return [str(d) for d in self._arr]
+
+    @property
+    def first(self):
+        return str(self._arr[0]) if len(self._arr) else None
+
+    @property
+    def last(self):
+        return str(self._arr[-1]) if len(self._arr) else None
+
+    def _at(self, idx):
+        """按下标取值，越界位置给 0 (调用方用 valid 掩码区分)"""
+        if not len(self._arr):
+            return np.zeros(np.shape(idx), dtype=np.int64)
+        return self._arr[np.clip(idx, 0, len(self._arr) - 1)]
+
+    def _pick(self, idx, scalar):
+        valid = (idx >= 0) & (idx < len(self._arr))
+        if scalar:
+            return str(self._arr[idx]) if valid else None
+        return np.where(valid, self._at(idx).astype(str), '')
+
+    def is_trading_day(self, d):
+        q = _to_int(d)
+        idx = np.searchsorted(self._arr, q, side='left')
+        hit = (idx < len(self._arr)) & (self._at(idx) == q)
+        return bool(hit) if np.ndim(q) == 0 else hit
+
+    def latest(self, d=None):
+        """d (默认今天) 当天或之前最近的交易日"""
+        q = _to_int(datetime.now() if d is None else d)
+        return self._pick(np.searchsorted(self._arr, q, side='right') - 1, np.ndim(q) == 0)
+
+    def prev_trading_day(self, d, n=1):
+        """d 之前 (不含 d) 的第 n 个交易日"""
+        q = _to_int(d)
+        return self._pick(np.searchsorted(self._arr, q, side='left') - n, np.ndim(q) == 0)
+
+    def next_trading_day(self, d, n=1):
+        """d 之后 (不含 d) 的第 n 个交易日"""
+        q = _to_int(d)
+        return self._pick(np.searchsorted(self._arr, q, side='right') + n - 1, np.ndim(q) == 0)
+
+    def trading_days_between(self, start, end):
+        """[start, end] (两端都含) 之间的交易日数"""
+        lo = np.searchsorted(self._arr, _to_int(start), side='left')
+        hi = np.searchsorted(self._arr, _to_int(end), side='right')
+        count = np.maximum(hi - lo, 0)
+        return int(count) if np.ndim(count) == 0 else count
+
+    def between(self, start, end):
+        """[start, end] 之间的交易日列表 (旧 -> 新)"""
+        lo = np.searchsorted(self._arr, _to_int(start), side='left')
+        hi = np.searchsorted(self._arr, _to_int(end), side='right')
+        return [str(d) for d in self._arr[lo:hi]]
+
+    def last_n(self, n, end=None):
+        """截至 end (默认今天，含) 最近 n 个交易日 (旧 -> 新)"""
+        hi = np.searchsorted(self._arr, _to_int(datetime.now() if end is None else end), side='right')
+        return [str(d) for d in self._arr[max(0, hi - n):hi]]
+
+
+def load_calendar(cache_path=None, download=None, now=None):
+    """
+    读本地缓存；缓存过期 (超过 REFRESH_DAYS 天) 或今天已超出缓存范围时联网刷新。
+    刷新失败沿用旧缓存；完全没有缓存时退化为 周一~周五 日历
+    """
+    cache_path = cache_path or DEFAULT_CACHE_PATH
+    download = download or download_trade_dates
+    today = (now or datetime.now)()
+    today_str = today.strftime('%Y%m%d')
+
+    cached = None
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+        if cached.get('version') != CALENDAR_VERSION or not cached.get('dates'):
+            cached = None
+    except (OSError, ValueError):
+        pass
+
+    if cached:
+        age = (today - datetime.strptime(cached['fetched_at'], '%Y%m%d')).days
+        if age < REFRESH_DAYS and today_str <= cached['dates'][-1]:
+            return TradeCalendar(cached['dates'])
+
+    try:
+        dates = download()
+        if not dates:
+            raise ValueError("交易日历为空")
+        os.makedirs(os.path.dirname(os.path.abspath(cache_path)), exist_ok=True)
+        tmp = cache_path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'version': CALENDAR_VERSION, 'fetched_at': today_str, 'dates': dates}, f)
+        os.replace(tmp, cache_path)
+        return TradeCalendar(dates)
+    except Exception as e:
+        if cached:
+            print(f"⚠️ 交易日历刷新失败，沿用本地缓存: {e}")
+            return TradeCalendar(cached['dates'])
+        print(f"⚠️ 交易日历获取失败，按周一~周五近似 (不含节假日): {e}")
+        return TradeCalendar(weekday_dates(today - timedelta(days=_FALLBACK_SPAN),
+                                           today + timedelta(days=365)), source='weekday')
+
+
+_calendar = None
+_calendar_lock = threading.Lock()
+
+
+def get_calendar():
+    """进程级单例 (首次调用时加载)"""
+    global _calendar
+    with _calendar_lock:
+        if _calendar is None:
+            _calendar = load_calendar()
+        return _calendar
+
+
+def prev_trading_day(d, n=1):
+    return get_calendar().prev_trading_day(d, n)
+
+
+def next_trading_day(d, n=1):
+    return get_calendar().next_trading_day(d, n)
+
+
+def trading_days_between(start, end):
+    return get_calendar().trading_days_between(start, end)
+
+
+def last_n(n, end=None):
+    return get_calendar().last_n(n, end)
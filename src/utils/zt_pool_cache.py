@@ -0,0 +1,170 @@
+# src/utils/zt_pool_cache.py
+# ==============================================================================
+# 涨停池 / 炸板池 按交易日落盘缓存
+# ak.stock_zt_pool_em / ak.stock_zt_pool_zbgc_em 的历史日期结果不会再变，
+# 收盘定型后的每一天只联网一次，存到 data/.cache/zt_pool/{kind}_YYYYMMDD.parquet。
+# 多日回看时只补缺失的交易日，并发拉取。
+# 盘中 (未定型) 的当日数据照常联网，不落盘。
+# 空表只对休市日落盘: 接口在 data 为空 (被限流/数据未就绪) 时也返回空表，交易日的空结果下次重新拉。
+# ==============================================================================
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+import pandas as pd
+
+from src.utils.kline_store import SETTLE_TIME
+from src.utils.trade_calendar import get_calendar
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_CACHE_DIR = os.path.join(PROJECT_ROOT, 'data', '.cache', 'zt_pool')
+
+# kind -> akshare 接口名 (调用时再取属性，便于替换/打桩)
+POOL_APIS = {
+    'zt': 'stock_zt_pool_em',          # 涨停池
+    'zbgc': 'stock_zt_pool_zbgc_em',   # 炸板池
+}
+BACKFILL_WORKERS = 4
+
+# Parquet 依赖 pyarrow；未安装时退化为 pickle (同 table_cache)
+try:
+    import pyarrow  # noqa: F401
+    CACHE_FORMAT = 'parquet'
+except ImportError:
+    CACHE_FORMAT = 'pickle'
+
+
+def download_pool(kind, date):
+    """akshare 当日池子 (网络请求)"""
+    import akshare as ak
+    return getattr(ak, POOL_APIS[kind])(date=date)
+
+
+class ZtPoolCache:
+    """
+    用法:
+        cache = get_pool_cache()
+        df = cache.get('zt', '20260116')
+        pools = cache.ensure('zt', ['20260114', '20260115', '20260116'])   # {date: df}
+    """
+
+    def __init__(self, cache_dir=None, download=None, now=None, max_workers=BACKFILL_WORKERS,
+                 is_trading_day=None):
+        self.cache_dir = cache_dir or DEFAULT_CACHE_DIR
+        self.download = download or download_pool
+        self.is_trading_day = is_trading_day or (lambda d: get_calendar().is_trading_day(d))
+        self._now = now or datetime.now
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'network': 0, 'failed': 0}
+
+    def _path(self, kind, date):
+        ext = 'parquet' if CACHE_FORMAT == 'parquet' else 'pkl'
+        return os.path.join(self.cache_dir, f"{kind}_{date}.{ext}")
+
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def _settled(self, date):
+        """该日数据是否已定型 (过去的日期，或今天收盘之后)"""
+        now = self._now()
+        today = now.strftime('%Y%m%d')
+        return date < today or (date == today and now.strftime('%H:%M') >= SETTLE_TIME)
+
+    def _load(self, path):
+        if CACHE_FORMAT == 'parquet':
+            return pd.read_parquet(path)
+        return pd.read_pickle(path)
+
+    def _save(self, path, df):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp = path + '.tmp'
+        if CACHE_FORMAT == 'parquet':
+            df.to_parquet(tmp, index=False)
+        else:
+            df.to_pickle(tmp)
+        os.replace(tmp, path)
+
+    def cached(self, kind, date):
+        """只读缓存，没有返回 None"""
+        path = self._path(kind, date)
+        if not os.path.exists(path):
+            return None
+        try:
+            df = self._load(path)
+        except Exception:
+            return None
+        self._count('hits')
+        return df
+
+    def get(self, kind, date):
+        """取某日池子：有缓存读缓存，否则联网 (已定型的结果落盘；空表只在休市日落盘)；联网失败抛出"""
+        if kind not in POOL_APIS:
+            raise KeyError(f"未知池子类型: {kind}")
+        date = str(date).replace('-', '')[:8]
+        df = self.cached(kind, date)
+        if df is not None:
+            return df
+
+        self._count('network')
+        try:
+            df = self.download(kind, date)
+        except Exception:
+            self._count('failed')
+            raise
+        if df is None:
+            df = pd.DataFrame()
+        if self._settled(date) and not (df.empty and self.is_trading_day(date)):
+            try:
+                self._save(self._path(kind, date), df)
+            except Exception as e:
+                print(f"⚠️ 涨停池缓存写入失败 {kind} {date}: {e}")
+        return df
+
+    def ensure(self, kind, dates, max_workers=None):
+        """
+        批量取多日池子: 缓存命中的直接读，缺失的交易日并发补齐
+        返回 {date: DataFrame}，联网失败的日期不在结果里
+        """
+        dates = [str(d).replace('-', '')[:8] for d in dates]
+        result, missing = {}, []
+        for d in dates:
+            df = self.cached(kind, d)
+            if df is None:
+                missing.append(d)
+            else:
+                result[d] = df
+
+        if missing:
+            workers = max(1, min(max_workers or self.max_workers, len(missing)))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ztpool') as executor:
+                futures = {executor.submit(self.get, kind, d): d for d in missing}
+                for f in as_completed(futures):
+                    try:
+                        result[futures[f]] = f.result()
+                    except Exception:
+                        pass  # 某些日期可能没数据（节假日/接口不支持的过旧日期），忽略
+        return {d: result[d] for d in dates if d in result}
+
+    def summary(self):
+        s = self.stats
+        return f"涨停池缓存: 命中 {s['hits']} / 联网 {s['network']} / 失败 {s['failed']}"
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_pool_cache():
+    """进程级单例"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ZtPoolCache()
+        return _cache
+
+
+def get_pool(kind, date):
+    return get_pool_cache().get(kind, date)
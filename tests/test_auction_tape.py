@@ -0,0 +1,197 @@
+import os
+import sys
+import unittest
+from unittest import mock
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.auction_tape import AuctionTape, seconds_of_day
+from src.utils.rate_limit import TokenBucket
+
+
+class TestAuctionTape(unittest.TestCase):
+
+    def test_record_returns_changed_codes(self):
+        tape = AuctionTape()
+        self.assertEqual(tape.record('09:15:00', ['000001', '000002'], [1.0, 2.0], [100, 200]),
+                         ['000001', '000002'])
+        # 只有 000002 变化；新代码 000003 也算变化
+        changed = tape.record('09:15:03', ['000001', '000002', '000003', '000002'],
+                              [1.0, 2.5, 0.0, 9.0], [100, 200, 50, 1])
+        self.assertEqual(changed, ['000002', '000003'])
+        t, pct, amt = tape.trajectory('000002')
+        self.assertEqual(t.tolist(), [seconds_of_day('09:15:00'), seconds_of_day('09:15:03')])
+        self.assertEqual(pct.tolist(), [2.0, 2.5])
+        # NaN 与 NaN 视为未变化
+        tape.record('09:15:06', ['000004'], [np.nan], [np.nan])
+        self.assertEqual(tape.record('09:15:09', ['000004'], [np.nan], [np.nan]), [])
+
+    def test_ring_buffer_keeps_latest(self):
+        tape = AuctionTape(capacity=4)
+        for i in range(10):
+            tape.record(9 * 3600 + 15 * 60 + i, ['600000'], [float(i)], [float(i)])
+        t, pct, amt = tape.trajectory('600000')
+        self.assertEqual(pct.tolist(), [6.0, 7.0, 8.0, 9.0])
+        self.assertTrue(np.all(np.diff(t) > 0))
+
+    def test_grows_past_initial_block(self):
+        tape = AuctionTape()
+        codes = [f"{i:06d}" for i in range(700)]
+        self.assertEqual(len(tape.record('09:15:00', codes, np.ones(700), np.ones(700))), 700)
+        self.assertEqual(len(tape), 700)
+        self.assertEqual(tape.record('09:15:03', codes, np.ones(700), np.ones(700)), [])
+
+    def test_withdrawal_after_cutoff(self):
+        tape = AuctionTape()
+        codes = ['A', 'B', 'C']
+        tape.record('09:16:00', codes, [5.0, 3.0, 2.0], [1000, 500, 300])
+        tape.record('09:19:30', codes, [8.0, 3.5, 2.0], [3000, 600, 300])   # A 9:20 前猛挂
+        feats = tape.features('09:19:45')
+        self.assertFalse(feats['withdrawn'].any())                          # 9:20 前不判
+        tape.record('09:20:05', codes, [2.0, 3.6, 2.0], [900, 650, 300])    # A 撤单
+        feats = tape.features('09:21:00')
+        self.assertTrue(feats.loc['A', 'withdrawn'])
+        self.assertAlmostEqual(feats.loc['A', 'amt_drop'], 0.7)
+        self.assertAlmostEqual(feats.loc['A', 'pct_drop'], 6.0)
+        self.assertFalse(feats.loc['B', 'withdrawn'])
+        # C 9:20 后没有新快照，沿用 9:20 前的值: 没有回落
+        self.assertAlmostEqual(feats.loc['C', 'amt_drop'], 0.0)
+        self.assertFalse(feats.loc['C', 'withdrawn'])
+
+    def test_pre_auction_snapshots_ignored(self):
+        tape = AuctionTape()
+        tape.record('09:05:00', ['A', 'B'], [9.0, 4.0], [50000, 40000])   # 9:15 前还是上一交易日的成交额/涨幅
+        tape.record('09:16:00', ['A'], [2.0], [800])
+        tape.record('09:20:30', ['A'], [2.1], [900])
+        feats = tape.features('09:21:00')
+        self.assertEqual(feats.loc['A', 'pre_peak_amt'], 800)
+        self.assertAlmostEqual(feats.loc['A', 'amt_drop'], 0.0)
+        self.assertFalse(feats.loc['A', 'withdrawn'])
+        # B 竞价期间没有快照: 没有 9:20 前的峰值可比，不判撤单
+        self.assertTrue(np.isnan(feats.loc['B', 'pre_peak_amt']))
+        self.assertFalse(feats.loc['B', 'withdrawn'])
+
+    def test_acceleration_into_close(self):
+        tape = AuctionTape()
+        codes = ['A', 'B']
+        tape.record('09:21:00', codes, [2.0, 2.0], [100, 100])
+        tape.record('09:22:30', codes, [2.1, 2.0], [150, 200])
+        tape.record('09:24:00', codes, [2.0, 2.0], [150, 300])
+        tape.record('09:24:50', codes, [3.0, 1.5], [400, 500])   # A 放量上攻，B 放量但价格回落
+        feats = tape.features('09:25:00')
+        self.assertTrue(feats.loc['A', 'accelerating'])
+        self.assertFalse(feats.loc['B', 'accelerating'])
+        self.assertEqual(feats.loc['A', 'amt_recent'], 250)
+        # 9:22 之前不判加速
+        self.assertFalse(tape.features('09:21:30')['accelerating'].any())
+
+    def test_features_subset_and_unknown(self):
+        tape = AuctionTape()
+        tape.record('09:15:00', ['A', 'B'], [1.0, 2.0], [1, 2])
+        feats = tape.features('09:16:00', ['B', 'ZZZ'])
+        self.assertEqual(feats.index.tolist(), ['B'])
+        self.assertTrue(tape.features('09:16:00', ['ZZZ']).empty)
+
+
+class FakeClock:
+    def __init__(self, start):
+        self.t = start
+
+    def monotonic(self):
+        return self.t
+
+    def sleep(self, seconds):
+        self.t += seconds
+
+    def now(self):
+        return datetime(2026, 10, 16) + pd.Timedelta(seconds=self.t)
+
+
+class TestAuctionPoller(unittest.TestCase):
+
+    def setUp(self):
+        from src.monitors.auction_poller import AuctionPoller
+        self.AuctionPoller = AuctionPoller
+        self.history_map = {
+            c: {'circ_mv': 500000.0, 'yest_pct': 1.0, 'boards': 0, 'industry': '未知', 'yest_bid_amt': 0.0}
+            for c in ('600001', '600002', '600003')
+        }
+        self.pool_map = {'600001': '', '600002': '', '600003': ''}
+
+    def make_fetch(self, frames):
+        calls = {'n': 0}
+
+        def fetch():
+            i = min(calls['n'], len(frames) - 1)
+            calls['n'] += 1
+            frame = frames[i]
+            if isinstance(frame, Exception):
+                raise frame
+            return frame.copy()
+        return fetch, calls
+
+    def frame(self, pct, amt):
+        return pd.DataFrame({'code': ['600001', '600002', '600003'], 'name': ['a', 'b', 'c'],
+                             'open_pct': pct, 'auc_amt': amt})
+
+    def test_incremental_rescore_and_withdraw_penalty(self):
+        clock = FakeClock(seconds_of_day('09:19:00'))
+        frames = [
+            self.frame([2.0, 2.0, 2.0], [100.0, 100.0, 100.0]),
+            self.frame([2.0, 2.0, 2.0], [100.0, 100.0, 100.0]),   # 无变化
+            self.frame([2.0, 2.0, 2.0], [100.0, 20.0, 100.0]),    # 9:20 后 600002 撤单
+        ]
+        fetch, calls = self.make_fetch(frames)
+        limiter = TokenBucket(rate=1 / 40, capacity=1, clock=clock.monotonic, sleep=clock.sleep)
+        poller = self.AuctionPoller(self.history_map, self.pool_map, targets=set(self.pool_map),
+                                    last_amt={'600001': 1000.0, '600002': 1000.0, '600003': 1000.0},
+                                    fetch=fetch, limiter=limiter, now=clock.now)
+
+        self.assertEqual(len(poller.poll_once()), 3)
+        base = poller.ranked().set_index('code')['score'].to_dict()
+        self.assertEqual(poller.poll_once(), [])            # 令牌桶等 40 秒 -> 9:19:40
+        self.assertEqual(poller.stats['rescored'], 3)
+        self.assertEqual(poller.poll_once(), ['600002'])    # 9:20:20
+        self.assertEqual(poller.stats['rescored'], 4)       # 只重算了一只
+        self.assertEqual(calls['n'], 3)
+
+        ranked = poller.ranked().set_index('code')
+        self.assertEqual(ranked.loc['600002', 'score'], base['600002'] - 20)
+        self.assertIn('撤单', ranked.loc['600002', 'decision'])
+        self.assertEqual(ranked.loc['600001', 'score'], base['600001'])
+        self.assertEqual(ranked.index[-1], '600002')
+
+    def test_run_until_and_fetch_failure(self):
+        clock = FakeClock(seconds_of_day('09:24:50'))
+        fetch, calls = self.make_fetch([ConnectionError("offline"),
+                                        self.frame([3.0, 3.0, 3.0], [100.0, 100.0, 100.0])])
+        limiter = TokenBucket(rate=1 / 3, capacity=1, clock=clock.monotonic, sleep=clock.sleep)
+        poller = self.AuctionPoller(self.history_map, self.pool_map, targets=set(self.pool_map),
+                                    last_amt={c: 1000.0 for c in self.pool_map},
+                                    fetch=fetch, limiter=limiter, now=clock.now)
+        # 失败重试的退避也走假时钟
+        with mock.patch('src.utils.rate_limit.time.sleep', clock.sleep):
+            ranked = poller.run(until=seconds_of_day('09:25:05'))
+        self.assertEqual(len(ranked), 3)
+        self.assertGreaterEqual(poller.stats['polls'], 1)
+        self.assertGreaterEqual(clock.t, seconds_of_day('09:25:05'))
+
+    def test_run_waits_for_auction_start(self):
+        clock = FakeClock(seconds_of_day('09:10:00'))
+        polled_at = []
+        fetch, _ = self.make_fetch([self.frame([3.0, 3.0, 3.0], [100.0, 100.0, 100.0])])
+        limiter = TokenBucket(rate=1 / 3, capacity=1, clock=clock.monotonic, sleep=clock.sleep)
+        poller = self.AuctionPoller(self.history_map, self.pool_map, targets=set(self.pool_map),
+                                    fetch=lambda: polled_at.append(clock.t) or fetch(),
+                                    limiter=limiter, now=clock.now, sleep=clock.sleep)
+        poller.run(until=seconds_of_day('09:15:10'))
+        self.assertGreaterEqual(min(polled_at), seconds_of_day('09:15:00'))
+        self.assertFalse(poller.tape.features('09:15:10')['withdrawn'].any())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,158 @@
+import os
+import sys
+import unittest
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from monitors.call_auction_screener import analyze_stock, clean_code, evaluate_batch, scan_ddd_market, watch_codes
+from strategies.ddd_mode import check_ddd_strategy
+
+
+def legacy_scan(live_df, history_map, pool_map, sector_map, valid_codes, manual_focus):
+    """原 main() 的逐行循环 (iterrows + analyze_stock)，作为对照"""
+    results, seen = [], set()
+    for _, row in live_df.iterrows():
+        code = clean_code(row['code'])
+        if code in seen:
+            continue
+        seen.add(code)
+        if code not in valid_codes and str(row['name']) not in manual_focus:
+            continue
+        res = analyze_stock(row, history_map, pool_map, "Rising", sector_map)
+        if res:
+            results.append(res)
+    results.sort(key=lambda x: (x['score'], x['open_pct']), reverse=True)
+    return results
+
+
+def make_market(n=400, seed=7):
+    rng = np.random.default_rng(seed)
+    codes = [f"{600000 + i:06d}" for i in range(n)]
+    industries = ['半导体', '军工', '银行', '白酒', '未收录']
+    live = pd.DataFrame({
+        'code': codes,
+        'name': [f"股票{i}" for i in range(n)],
+        'open_pct': np.round(rng.uniform(-8, 10.5, n), 2),
+        'auc_amt': np.round(rng.uniform(0, 5000, n), 1),
+        'last_amt': np.where(rng.random(n) < 0.2, 0.0, np.round(rng.uniform(500, 80000, n), 1)),
+    })
+    raw = rng.choice(['1.5亿', '3200万', '25000000', '--', '0.8亿'], n)
+    live['昨日成交额'] = raw
+    # 重复代码: 保留首次出现
+    live = pd.concat([live, live.iloc[:5].assign(open_pct=9.99)], ignore_index=True)
+
+    history_map = {}
+    for i, c in enumerate(codes):
+        if i % 11 == 0:
+            continue  # 不在底库
+        history_map[c] = {
+            'yest_amt': float(rng.uniform(1000, 90000)),
+            'circ_mv': float(rng.choice([0.0, rng.uniform(2e5, 9e5), rng.uniform(2e9, 9e9)])),
+            'yest_pct': float(np.round(rng.uniform(-10, 10), 2)),
+            'boards': int(rng.integers(0, 4)),
+            'yest_bid_amt': float(rng.choice([0.0, rng.uniform(1e6, 3e7)])),  # 元
+            'industry': str(rng.choice(industries)),
+        }
+
+    # 几只能通过 DDD 2进3 的票 (竞价增量比 > 1.7)
+    for c in codes[1:5]:
+        history_map[c].update(boards=2, yest_bid_amt=300_0000.0)
+    live.loc[1:4, 'open_pct'] = 4.0
+    live.loc[1:4, 'auc_amt'] = 900.0
+
+    tags = ['A大焚诀', 'F佬低吸', '趋势', '加速', '', '首板']
+    pool_map = {c: str(rng.choice(tags)) for c in codes if rng.random() < 0.6}
+    pool_map.update({c: '首板' for c in codes[1:5]})
+    sector_map = {'半导体': 2.3, '军工': -1.2, '银行': 0.4, '白酒': 1.5}
+    valid_codes = set(pool_map) | set(codes[::7])
+    manual_focus = {'股票3', '股票5'}
+    return live, history_map, pool_map, sector_map, valid_codes, manual_focus
+
+
+class TestEvaluateBatch(unittest.TestCase):
+
+    def test_matches_row_by_row(self):
+        live, history_map, pool_map, sector_map, valid_codes, manual_focus = make_market()
+        expected = legacy_scan(live, history_map, pool_map, sector_map, valid_codes, manual_focus)
+        got = evaluate_batch(live, history_map, pool_map, sector_map,
+                             targets=valid_codes, focus_names=manual_focus).to_dict('records')
+
+        self.assertGreater(len(expected), 50)
+        self.assertTrue(any('💎' in r['decision'] for r in expected))
+        self.assertEqual([r['code'] for r in got], [r['code'] for r in expected])
+        for g, e in zip(got, expected):
+            for key in ('score', 'decision', 'sector_info', 'boards'):
+                self.assertEqual(g[key], e[key], (e['code'], key))
+            for key in ('open_pct', 'auc', 'r_yest', 'r_mv', 'circ_mv', 'yest_pct'):
+                self.assertAlmostEqual(g[key], e[key], places=9, msg=(e['code'], key))
+            if 'last_amt' in e:
+                self.assertAlmostEqual(g['last_amt'], e['last_amt'], places=9)
+
+    def test_ddd_market_scan(self):
+        live, history_map, pool_map, _, _, _ = make_market(n=3000, seed=5)
+        hits = scan_ddd_market(live, history_map)
+        self.assertGreater(len(hits), 0)
+        self.assertTrue(set(hits['boards']) <= {1, 2, 3})
+
+        # 逐只对照: 同一批票用 check_ddd_strategy (元口径) 打分
+        expected = {}
+        for _, row in live.drop_duplicates('code').iterrows():
+            info = history_map.get(row['code'])
+            if info is None or not 1 <= info['boards'] <= 3 or row['open_pct'] > 9.8:
+                continue
+            last_amt = row['last_amt']
+            if last_amt == 0:
+                raw = str(row['昨日成交额'])
+                last_amt = (float(raw[:-1]) * 10000 if raw.endswith('亿') else
+                            float(raw[:-1]) if raw.endswith('万') else
+                            float(raw) / 10000 if raw.replace('.', '').isdigit() else 0)
+            circ = info['circ_mv'] / 10000 if info['circ_mv'] > 1e8 else info['circ_mv']
+            if last_amt == 0 or circ == 0:
+                continue
+            score, dec, detail = check_ddd_strategy(
+                {'auc_amt': row['auc_amt'] * 10000, 'open_pct': row['open_pct']},
+                {'turnover': last_amt * 10000, 'circ_mv': circ * 10000,
+                 'board_count': info['boards'], 'last_bid_amt': info['yest_bid_amt']})
+            if score > 0:
+                expected[row['code']] = (score, dec, detail)
+        got = {r['code']: (r['score'], r['decision'], r['detail']) for r in hits.to_dict('records')}
+        self.assertEqual(got, expected)
+
+    def test_yest_amount_units(self):
+        live = pd.DataFrame({
+            'code': ['000001', '000002', '000003', '000004'],
+            'name': ['a', 'b', 'c', 'd'],
+            'open_pct': [1.0, 1.0, 1.0, 1.0],
+            'auc_amt': [100.0, 100.0, 100.0, 100.0],
+            '昨日成交额': ['1.5亿', '1500万', '20000000', '--'],
+        })
+        history_map = {c: {'circ_mv': 50000.0, 'yest_pct': 0.0, 'boards': 0, 'industry': '未知'}
+                       for c in live['code']}
+        pool_map = {c: '' for c in live['code']}
+        out = evaluate_batch(live, history_map, pool_map).set_index('code')
+        self.assertAlmostEqual(out.loc['000001', 'last_amt'], 15000.0)
+        self.assertAlmostEqual(out.loc['000002', 'last_amt'], 1500.0)
+        self.assertAlmostEqual(out.loc['000003', 'last_amt'], 2000.0)
+        self.assertNotIn('000004', out.index)  # 昨额无法解析 -> 0 -> 丢弃
+
+    def test_empty_and_out_of_scope(self):
+        live, history_map, pool_map, sector_map, _, _ = make_market(n=30)
+        self.assertTrue(evaluate_batch(pd.DataFrame(), history_map, pool_map).empty)
+        out = evaluate_batch(live, history_map, pool_map, sector_map, targets=set(), focus_names=set())
+        self.assertTrue(out.empty)
+        self.assertIn('decision', out.columns)
+
+    def test_watch_codes(self):
+        history_map = {'000001': {'boards': 0}, '000002': {'boards': 2}, '000003': {'boards': '3'},
+                       '000004': {'boards': 5}, '000005': {}}
+        # 关注范围 + 昨日 1~3 板 (DDD 候选)
+        self.assertEqual(watch_codes({'600000'}, {'000001'}, history_map), ['000002', '000003', '600000'])
+        # 手动关注里有名称时按代码请求不全 -> 全市场
+        self.assertIsNone(watch_codes({'600000'}, {'平安银行'}, history_map))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,280 @@
+import os
+import sys
+import time
+import shutil
+import tempfile
+import threading
+import unittest
+import numpy as np
+import pandas as pd
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.tools.chip_analyzer import (calc_chip_metrics, analyze_chips, format_chip_stats, stack_ohlcv,
+                                     batch_chip_metrics, chip_distribution, METRIC_COLUMNS,
+                                     ChipStateStore, update_chip_metrics)
+
+
+def make_kline(seed, n=60):
+    rng = np.random.default_rng(seed)
+    close = 10 * np.cumprod(1 + rng.normal(0.002, 0.03, n))
+    high = close * (1 + rng.uniform(0, 0.04, n))
+    low = close * (1 - rng.uniform(0, 0.04, n))
+    return pd.DataFrame({'日期': pd.bdate_range('2025-06-02', periods=n).strftime('%Y-%m-%d'),
+                         '开盘': (high + low) / 2, '收盘': close, '最高': high, '最低': low,
+                         '成交量': rng.integers(1e4, 1e6, n), '涨跌幅': rng.normal(0, 4, n),
+                         '换手率': rng.uniform(0.5, 20, n)})
+
+
+def legacy_chips(df, lookback_days=120):
+    """原逐日字典实现，用作对照"""
+    df = df.tail(lookback_days).reset_index(drop=True)
+    chip_dict = {}
+    for _, row in df.iterrows():
+        turnover = min(row['换手率'] / 100, 1)
+        for p in list(chip_dict.keys()):
+            chip_dict[p] = chip_dict[p] * (1 - turnover)
+        p_key = round((row['最高'] + row['最低'] + row['收盘']) / 3, 2)
+        chip_dict[p_key] = chip_dict.get(p_key, 0) + turnover
+    return chip_dict
+
+
+def legacy_metrics(df, lookback_days=120):
+    df = df.tail(lookback_days).reset_index(drop=True)
+    chip_dict = legacy_chips(df, lookback_days)
+    current_price = df.iloc[-1]['收盘']
+    prices = sorted(chip_dict)
+    total = sum(chip_dict[p] for p in prices)
+    avg_cost = np.average(prices, weights=[chip_dict[p] for p in prices])
+    profit = sum(chip_dict[p] for p in prices if p < current_price)
+    support = sum(chip_dict[p] for p in prices if current_price * 0.90 < p < current_price)
+    avg_vol = df['成交量'].tail(20).mean()
+    rotten = limit_ups = 0
+    for _, r in df.tail(5).iterrows():
+        if r['涨跌幅'] > 9.5: limit_ups += 1
+        upper_shadow = (r['最高'] - max(r['开盘'], r['收盘'])) / r['收盘']
+        huge = r['成交量'] > 1.8 * avg_vol
+        if (upper_shadow > 0.03 and huge) or (huge and abs(r['涨跌幅']) < 3):
+            rotten += 1
+    return {'profit_ratio': profit / total * 100, 'deviation': (current_price - avg_cost) / avg_cost * 100,
+            'support_ratio': support / total * 100, 'rotten_days': rotten, 'limit_ups': limit_ups,
+            'current_price': current_price}
+
+
+class TestChipKernel(unittest.TestCase):
+
+    def assertMetricsEqual(self, got, want):
+        self.assertEqual(set(got), set(want))
+        for k in want:
+            self.assertAlmostEqual(got[k], want[k], places=9, msg=k)
+
+    def test_matches_legacy_loop(self):
+        frames = [make_kline(s, n) for s, n in [(1, 200), (2, 60), (3, 12), (4, 3), (5, 120)]]
+        frames[4].loc[[5, 50, 118], '换手率'] = [150.0, 100.0, 0.0]  # 换手 >100% 截断为整体换手
+        for df in frames:
+            self.assertMetricsEqual(calc_chip_metrics(df), legacy_metrics(df))
+
+    def test_batch_equals_single(self):
+        codes = [f'{i:06d}' for i in range(40)]
+        frames = [make_kline(i, 30 + i * 5) for i in range(40)]
+        frames[7] = frames[7].iloc[:0]
+        result = batch_chip_metrics(stack_ohlcv(frames), codes=codes)
+        self.assertEqual(list(result.columns), METRIC_COLUMNS)
+        self.assertTrue(result.loc['000007'].isna().all())
+        for code, df in zip(codes, frames):
+            if df.empty:
+                self.assertIsNone(calc_chip_metrics(df))
+                continue
+            for k, v in legacy_metrics(df).items():
+                self.assertAlmostEqual(result.loc[code, k], v, places=9)
+
+    def test_distribution_on_tick_grid(self):
+        df = make_kline(9, 80)
+        prices, chips = chip_distribution(stack_ohlcv([df])[0])
+        legacy = legacy_chips(df)
+        nz = chips > 0
+        self.assertEqual(prices[nz].tolist(), sorted(legacy))
+        np.testing.assert_allclose(chips[nz], [legacy[p] for p in sorted(legacy)], rtol=1e-12)
+        self.assertTrue(np.allclose(np.diff(prices), 0.01))
+
+
+class TestAnalyzeChips(unittest.TestCase):
+
+    def test_results_merged_by_code(self):
+        codes = ['600001', '000002', '300003', '600001']
+        results, stats = analyze_chips(codes, max_workers=3, fetch=lambda c: make_kline(int(c)))
+        self.assertEqual(set(results), {'600001', '000002', '300003'})
+        for c, m in results.items():
+            self.assertEqual(m, calc_chip_metrics(make_kline(int(c))))
+        self.assertEqual((stats['total'], stats['ok'], stats['failed']), (3, 3, 0))
+        self.assertEqual(len(stats['latencies']), 3)
+        self.assertIn('成功 3/3', format_chip_stats(stats))
+
+    def test_concurrency_is_bounded(self):
+        lock = threading.Lock()
+        active, peak = [0], [0]
+
+        def fetch(code):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.02)
+            with lock:
+                active[0] -= 1
+            return make_kline(1)
+
+        results, _ = analyze_chips([f'{i:06d}' for i in range(12)], max_workers=3, fetch=fetch)
+        self.assertEqual(len(results), 12)
+        self.assertLessEqual(peak[0], 3)
+        self.assertGreater(peak[0], 1)
+
+    def test_retry_with_backoff_then_give_up(self):
+        calls = {}
+
+        def fetch(code):
+            calls[code] = calls.get(code, 0) + 1
+            if code == '000001' and calls[code] < 3:
+                raise ConnectionError('reset')
+            if code == '000002':
+                raise ConnectionError('down')
+            return make_kline(2)
+
+        results, stats = analyze_chips(['000001', '000002'], max_workers=2, retries=2, backoff=0.01, fetch=fetch)
+        self.assertIsNotNone(results['000001'])
+        self.assertIsNone(results['000002'])
+        self.assertEqual(calls, {'000001': 3, '000002': 3})
+        self.assertEqual(stats['retries'], 4)
+        self.assertEqual(stats['failed'], 1)
+
+    def test_timeout_counts_as_failure(self):
+        def fetch(code):
+            if code == '000009':
+                time.sleep(0.5)
+            return make_kline(3)
+
+        progress = []
+        t0 = time.perf_counter()
+        results, stats = analyze_chips(['000009', '000001'], max_workers=2, timeout=0.05, retries=0,
+                                       fetch=fetch, on_result=lambda c, m, done, total: progress.append((c, done, total)))
+        self.assertLess(time.perf_counter() - t0, 0.4)
+        self.assertIsNone(results['000009'])
+        self.assertEqual(stats['timeouts'], 1)
+        self.assertEqual(sorted(progress), [('000001', 1, 2), ('000009', 2, 2)])
+
+    def test_empty_input(self):
+        results, stats = analyze_chips([])
+        self.assertEqual(results, {})
+        self.assertEqual(stats['total'], 0)
+
+
+class FakeKlineSource:
+    """按交易日截断的日线源：模拟每天多一根 K 线，可整体改价模拟除权"""
+
+    def __init__(self, full):
+        self.full = full
+        self.upto = len(full)
+        self.calls = []
+
+    def __call__(self, code, start_date=None):
+        self.calls.append(start_date)
+        df = self.full.iloc[:self.upto]
+        if start_date:
+            df = df[df['日期'].str.replace('-', '') >= start_date]
+        return df.reset_index(drop=True)
+
+
+class TestIncrementalChipState(unittest.TestCase):
+
+    def setUp(self):
+        self.state_dir = tempfile.mkdtemp()
+        self.store = ChipStateStore(self.state_dir, lookback_days=120)
+
+    def tearDown(self):
+        shutil.rmtree(self.state_dir)
+
+    def assertMetricsEqual(self, got, want):
+        for k in METRIC_COLUMNS:
+            self.assertAlmostEqual(got[k], want[k], places=9, msg=k)
+
+    def test_daily_increment_matches_full_rebuild(self):
+        src = FakeKlineSource(make_kline(11, 200))
+        src.upto = 150
+        metrics, mode = update_chip_metrics('600001', self.store, src)
+        self.assertEqual(mode, 'full')
+        self.assertMetricsEqual(metrics, calc_chip_metrics(src.full.iloc[:150]))
+
+        for upto in [151, 152, 160, 200]:   # 逐日 / 跳过几天
+            src.upto = upto
+            metrics, mode = update_chip_metrics('600001', self.store, src)
+            self.assertEqual(mode, 'incremental')
+            self.assertMetricsEqual(metrics, calc_chip_metrics(src.full.iloc[:upto]))
+        # 增量只拉取状态最后一天起的 K 线
+        self.assertEqual(src.calls[-1], src.full['日期'].iloc[159].replace('-', ''))
+
+    def test_adjustment_change_triggers_rebuild(self):
+        src = FakeKlineSource(make_kline(12, 130))
+        src.upto = 120
+        update_chip_metrics('000002', self.store, src)
+        adjusted = src.full.copy()
+        adjusted[['开盘', '最高', '最低', '收盘']] *= 0.95   # 除权后前复权价整体下移
+        src.full = adjusted
+        src.upto = 121
+        metrics, mode = update_chip_metrics('000002', self.store, src)
+        self.assertEqual(mode, 'full')
+        self.assertMetricsEqual(metrics, calc_chip_metrics(adjusted.iloc[:121]))
+
+    def test_corrupt_or_foreign_state_is_rebuilt(self):
+        src = FakeKlineSource(make_kline(13, 60))
+        update_chip_metrics('300003', self.store, src)
+        self.assertIsNone(ChipStateStore(self.state_dir, lookback_days=60).load('300003'))
+        with open(os.path.join(self.state_dir, '300003.npz'), 'wb') as f:
+            f.write(b'broken')
+        _, mode = update_chip_metrics('300003', self.store, src)
+        self.assertEqual(mode, 'full')
+        self.assertIsNotNone(self.store.load('300003'))
+
+    def test_truncated_or_empty_state_is_rebuilt(self):
+        src = FakeKlineSource(make_kline(14, 60))
+        update_chip_metrics('300004', self.store, src)
+        path = os.path.join(self.state_dir, '300004.npz')
+        with open(path, 'rb') as f:
+            data = f.read()
+        for broken in (data[:len(data) // 2], b''):      # 写到一半被打断 / 空文件
+            with open(path, 'wb') as f:
+                f.write(broken)
+            self.assertIsNone(self.store.load('300004'))
+            _, mode = update_chip_metrics('300004', self.store, src)
+            self.assertEqual(mode, 'full')
+            self.assertIsNotNone(self.store.load('300004'))
+
+    def test_concurrent_saves_do_not_corrupt_state(self):
+        src = FakeKlineSource(make_kline(15, 120))
+        update_chip_metrics('300005', self.store, src)
+        state = self.store.load('300005')
+        # 超时重试时两个线程会同时写同一只票
+        threads = [threading.Thread(target=lambda: [self.store.save('300005', state) for _ in range(20)])
+                   for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        loaded = self.store.load('300005')
+        self.assertIsNotNone(loaded)
+        np.testing.assert_array_equal(loaded['weights'], state['weights'])
+        self.assertEqual(os.listdir(self.state_dir), ['300005.npz'])     # 临时文件都已替换掉
+
+    def test_analyze_chips_uses_store(self):
+        frames = {f'{i:06d}': FakeKlineSource(make_kline(i, 80)) for i in range(1, 6)}
+        fetch = lambda code, start_date=None: frames[code](code, start_date)
+        _, stats = analyze_chips(list(frames), max_workers=2, fetch=fetch, store=self.store)
+        self.assertEqual((stats['full'], stats['incremental']), (5, 0))
+        results, stats = analyze_chips(list(frames), max_workers=2, fetch=fetch, store=self.store)
+        self.assertEqual((stats['full'], stats['incremental']), (0, 5))
+        self.assertIn('增量 5 / 全量 0', format_chip_stats(stats))
+        for code, src in frames.items():
+            self.assertMetricsEqual(results[code], calc_chip_metrics(src.full))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import os
+import sys
+import time
+import shutil
+import tempfile
+import unittest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.dataset_registry import DatasetRegistry, trade_date_of
+
+TABLE_CONTENT = (
+    "代码\t名称\t涨幅\t现价\n"
+    "SH600000\t浦发银行\t-0.77%\t11.57\n"
+    "SZ000001\t平安银行\t+1.20%\t12.00\n"
+)
+
+
+class TestDatasetRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.test_dir, 'Table-20260113.txt')
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write(TABLE_CONTENT)
+        self.registry = DatasetRegistry()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_trade_date_key(self):
+        self.assertEqual(trade_date_of(self.path), '20260113')
+        self.assertIsNone(trade_date_of('/x/Table.txt'))
+
+    def test_file_parsed_once(self):
+        first = self.registry.get_table(self.path)
+        second = self.registry.get_table(self.path)
+        self.assertEqual(len(first), 2)
+        self.assertEqual(second['名称'].tolist(), ['浦发银行', '平安银行'])
+        stats = self.registry.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+        self.assertEqual(stats['reparsed'], {})
+
+    def test_consumer_changes_do_not_leak(self):
+        df = self.registry.get_table(self.path)
+        df['extra'] = 1
+        df.drop(columns=['现价'], inplace=True)
+        again = self.registry.get_table(self.path)
+        self.assertNotIn('extra', again.columns)
+        self.assertIn('现价', again.columns)
+
+    def test_inplace_cell_writes_do_not_leak(self):
+        # pandas 2 没有 Copy-on-Write: 浅拷贝上的原地写会改到共享副本
+        df = self.registry.get_table(self.path)
+        df.loc[0, '名称'] = '改过'
+        self.assertEqual(self.registry.get_table(self.path)['名称'].tolist(), ['浦发银行', '平安银行'])
+
+    def test_reexport_reloads(self):
+        self.registry.get_table(self.path)
+        time.sleep(0.01)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write("SZ300059\t东方财富\t-2.24%\t24.49\n")
+        df = self.registry.get_table(self.path)
+        self.assertEqual(len(df), 3)
+        self.assertEqual(self.registry.stats()['reparsed'], {'20260113': 2})
+
+    def test_missing_file(self):
+        self.assertIsNone(self.registry.get_table(os.path.join(self.test_dir, 'Table-20260101.txt')))
+        self.assertEqual(self.registry.stats()['misses'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
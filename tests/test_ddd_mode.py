@@ -0,0 +1,64 @@
+import os
+import sys
+import unittest
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from strategies.ddd_mode import batch_ddd, check_ddd_strategy
+
+
+class TestBatchDDD(unittest.TestCase):
+
+    def scalar(self, bid, pct, turnover, circ, boards, prev):
+        return check_ddd_strategy(
+            {'auc_amt': bid, 'open_pct': pct},
+            {'turnover': turnover, 'circ_mv': circ, 'board_count': boards, 'last_bid_amt': prev})
+
+    def test_matches_scalar_version(self):
+        rng = np.random.default_rng(11)
+        n = 20000
+        circ = rng.choice([15e8, 20e8, 24e8, 27e8, 60e8, 0.0], n) * rng.uniform(0.8, 1.2, n)
+        turnover = rng.choice([0.0, 1.0], n, p=[0.05, 0.95]) * rng.uniform(5e7, 8e8, n)
+        bid = rng.uniform(0, 0.04, n) * circ + rng.uniform(0, 3e7, n)
+        pct = np.round(rng.uniform(-2, 10, n), 2)
+        pct[:20] = [1.8, 3.7, 3.0, 5.0, 1.79, 3.69, 3.01, 5.01, np.nan, 4.0] * 2
+        boards = rng.integers(0, 5, n).astype(float)
+        prev = rng.choice([0.0, -1.0, 1.0], n, p=[0.1, 0.02, 0.88]) * rng.uniform(1e6, 3e7, n)
+
+        score, decision, detail = batch_ddd(bid, pct, turnover, circ, boards, prev)
+        expected = [self.scalar(*args) for args in zip(bid, pct, turnover, circ, boards, prev)]
+
+        self.assertEqual(score.tolist(), [e[0] for e in expected])
+        self.assertEqual(decision.tolist(), [e[1] for e in expected])
+        self.assertEqual(detail.tolist(), [e[2] for e in expected])
+        # 三种池子都有命中
+        for label in ('1进2', '2进3', '3进4'):
+            self.assertTrue(any(label in d for d in decision))
+
+    def test_tiers_and_messages(self):
+        score, decision, detail = batch_ddd(
+            bid_amt=[2000_0000, 2000_0000, 3000_0000, 500_0000, 500_0000, 600_0000],
+            bid_pct=[5.5, 4.0, 4.0, 4.0, 4.0, 4.0],
+            turnover_prev=[2e8, 2e8, 1e8, 2e8, 2e8, 2e8],
+            circ_mv=[15e8, 25e8, 15e8, 30e8, 30e8, 2e8],
+            boards=[1, 1, 1, 2, 2, 3],
+            bid_amt_prev=[0, 0, 0, 300_0000, 0, 500_0000],
+        )
+        self.assertEqual(score.tolist(), [90, 85, 0, 90, 0, 95])
+        self.assertEqual(decision[0], "💎DDD/1进2(微盘)")
+        self.assertEqual(decision[1], "💎DDD/1进2(小盘)")
+        self.assertEqual(detail[2], "Fail:竞昨比>18%")
+        self.assertEqual(detail[3], "竞增比:1.67")
+        self.assertEqual(detail[4], "缺昨日竞价")
+        self.assertEqual(detail[5], "竞值比:3.0%")
+
+    def test_nan_boards_is_data_error(self):
+        score, _, detail = batch_ddd([1e7], [5.0], [1e8], [1e9], [np.nan], [1e6])
+        self.assertEqual(score.tolist(), [0])
+        self.assertEqual(detail.tolist(), ["数据错误"])
+
+
+if __name__ == '__main__':
+    unittest.main()
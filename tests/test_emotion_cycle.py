@@ -7,7 +7,8 @@ import pandas as pd
 # Add src to sys.path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from src.core.emotion_cycle import EmotionalCycleEngine
+from src.core.emotion_cycle import EmotionalCycleEngine, panel_mood
+import numpy as np
 from src.config import ProjectConfig
 
 class TestEmotionalCycleEngine(unittest.TestCase):
@@ -15,7 +16,7 @@ class TestEmotionalCycleEngine(unittest.TestCase):
         self.engine = EmotionalCycleEngine()
         self.config = ProjectConfig()
 
-    @patch('src.core.emotion_cycle.ak.stock_zt_pool_em')
+    @patch('src.core.emotion_cycle.get_pool_cache')
     def test_determine_phase_rising(self, mock_ak):
         # Mock recent data: Height increasing, Count stable
         # Day 1: 3 limit ups, max height 2
@@ -31,7 +32,7 @@ class TestEmotionalCycleEngine(unittest.TestCase):
         phase = self.engine.determine_phase()
         self.assertEqual(phase, self.config.PHASE_RISING)
 
-    @patch('src.core.emotion_cycle.ak.stock_zt_pool_em')
+    @patch('src.core.emotion_cycle.get_pool_cache')
     def test_determine_phase_ice_point(self, mock_ak):
         # Mock recent data: Height very low
         self.engine.history_stats = [
@@ -43,7 +44,7 @@ class TestEmotionalCycleEngine(unittest.TestCase):
         phase = self.engine.determine_phase()
         self.assertEqual(phase, self.config.PHASE_ICE_POINT)
 
-    @patch('src.core.emotion_cycle.ak.stock_zt_pool_em')
+    @patch('src.core.emotion_cycle.get_pool_cache')
     def test_determine_phase_decline(self, mock_ak):
         # Mock recent data: Height dropping significantly
         self.engine.history_stats = [
@@ -65,5 +66,74 @@ class TestEmotionalCycleEngine(unittest.TestCase):
         phase = self.engine.determine_phase()
         self.assertEqual(phase, self.config.PHASE_DECLINE)
 
+    def test_fetch_market_mood_uses_day_cache(self):
+        import tempfile
+        from datetime import datetime
+        from src.utils.trade_calendar import TradeCalendar, weekday_dates
+        from src.utils.zt_pool_cache import ZtPoolCache
+
+        calls = []
+
+        def fake_pool(kind, date):
+            calls.append(date)
+            return pd.DataFrame({'代码': ['000001', '000002'], '连板数': [1, int(date[-1]) + 1]})
+
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = ZtPoolCache(tmp, download=fake_pool, now=lambda: datetime(2026, 1, 12, 16, 0))
+            calendar = TradeCalendar(weekday_dates('2026-01-01', '2026-01-12'))
+            with patch('src.core.emotion_cycle.get_pool_cache', return_value=cache), \
+                 patch('src.core.emotion_cycle.get_calendar', return_value=calendar), \
+                 patch('src.core.emotion_cycle.datetime') as mock_dt:
+                mock_dt.datetime.now.return_value = datetime(2026, 1, 12, 16, 0)
+                mock_dt.timedelta = __import__('datetime').timedelta
+                stats = self.engine.fetch_market_mood(days=7)
+                self.assertEqual([s['date'] for s in stats],
+                                 ['20260106', '20260107', '20260108', '20260109', '20260112'])
+                self.assertEqual(stats[-1], {'date': '20260112', 'limit_up_count': 2, 'max_height': 3})
+                self.engine.fetch_market_mood(days=7)
+
+        # 周末不请求；第二次全部命中缓存
+        self.assertEqual(sorted(calls), ['20260106', '20260107', '20260108', '20260109', '20260112'])
+
+
+class TestPanelMood(unittest.TestCase):
+    def test_matches_per_day_counts(self):
+        nan = np.nan
+        # 4 只股票 x 3 天；第 4 只是 ST
+        pct = np.array([[10.0, 10.0, 1.0, 10.0],
+                        [10.0, -2.0, 10.0, 5.0],
+                        [3.0, nan, 10.0, 10.0]], dtype=np.float32)
+        boards = np.array([[1, 0, 0, 2], [2, 0, 1, 0], [0, nan, 2, 1]], dtype=np.float32)
+        open_num = np.array([[0, 0, 2, 0], [1, 0, 0, 0], [0, nan, 0, 0]], dtype=np.float32)
+        zt = np.array([[1, 1, 0, 1], [1, 0, 1, 0], [0, nan, 1, 1]], dtype=np.float32)
+        auc = np.array([[0, 0, 0, 0], [4.0, 1.0, 0, 0], [2.0, nan, 3.0, 0]], dtype=np.float32)
+        stats = panel_mood(['d0', 'd1', 'd2'], pct, boards, open_num, zt, auc_pct=auc,
+                           not_st=[True, True, True, False])
+
+        self.assertEqual([s['date'] for s in stats], ['d1', 'd2'])
+        d1, d2 = stats
+        self.assertEqual((d1['limit_up_count'], d1['max_height']), (2, 2))
+        self.assertEqual((d1['zhaban_count'], d1['zhaban_rate']), (0, 0.0))
+        # d0 涨停 2 只 (第 1 只 1 板、第 2 只连板数 0 按 1 板)，d1 只有第 1 只继续涨停
+        self.assertEqual(d1['promotion_rates'], {'1进2': {'count': 2, 'promoted': 1, 'rate': 50.0}})
+        self.assertEqual(d1['promotion_rate'], 50.0)
+        self.assertEqual(d1['yesterday_zt_premium'], 4.0)       # (10 + -2) / 2
+        self.assertEqual(d1['yesterday_zt_open_premium'], 2.5)  # (4 + 1) / 2
+        self.assertEqual((d2['limit_up_count'], d2['max_height']), (1, 2))
+        self.assertEqual(d2['promotion_rates'], {'1进2': {'count': 1, 'promoted': 1, 'rate': 100.0},
+                                                 '2进3': {'count': 1, 'promoted': 0, 'rate': 0.0}})
+        self.assertEqual(d2['yesterday_zt_premium'], 6.5)       # (3 + 10) / 2
+
+    def test_engine_panel_backend_feeds_determine_phase(self):
+        engine = EmotionalCycleEngine(backend='panel')
+        with patch.object(EmotionalCycleEngine, 'fetch_panel_mood',
+                          lambda self, days: setattr(self, 'history_stats', [
+                              {'date': '20260108', 'limit_up_count': 10, 'max_height': 2},
+                              {'date': '20260109', 'limit_up_count': 12, 'max_height': 5}]) or self.history_stats):
+            engine.fetch_market_mood(days=5)
+        self.assertEqual(engine.determine_phase(), ProjectConfig().PHASE_RISING)
+        with self.assertRaises(ValueError):
+            EmotionalCycleEngine(backend='unknown')
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,54 @@
+import os
+import sys
+import unittest
+import numpy as np
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.strategies.f_lao_model import check_fen_jue, batch_fen_jue, FEN_JUE_TAGS
+
+
+class TestBatchFenJue(unittest.TestCase):
+
+    def random_panel(self, n_days=5, n_codes=2000, seed=0):
+        rng = np.random.default_rng(seed)
+        pct = np.round(rng.normal(0, 4, (n_days, n_codes)), 2)
+        amount = rng.integers(1, 6, (n_days, n_codes)) * 1e8  # ties on purpose
+        is_zt = rng.random((n_days, n_codes)) < 0.15
+        pct[rng.random((n_days, n_codes)) < 0.1] = np.nan  # suspended / not listed yet
+        return pct, amount, is_zt
+
+    def legacy_tags(self, pct, amount, is_zt):
+        out = []
+        for j in range(pct.shape[1]):
+            hist = [{'pct': pct[i, j], 'amount': amount[i, j], 'is_zt': bool(is_zt[i, j])}
+                    for i in range(pct.shape[0]) if not np.isnan(pct[i, j])]
+            out.append(check_fen_jue(hist))
+        return out
+
+    def test_matches_per_stock_model(self):
+        pct, amount, is_zt = self.random_panel()
+        matrix = batch_fen_jue(pct, amount, is_zt)
+        expected = self.legacy_tags(pct, amount, is_zt)
+        got = [[t for t, hit in zip(FEN_JUE_TAGS, row) if hit] for row in matrix]
+        self.assertEqual(got, expected)
+        self.assertTrue(matrix.any())
+
+    def test_longer_trend_is_stricter(self):
+        pct, amount, is_zt = self.random_panel(n_days=8, seed=1)
+        m3 = batch_fen_jue(pct, amount, is_zt, trend_days=3)
+        m5 = batch_fen_jue(pct, amount, is_zt, trend_days=5)
+        trend3 = m3[:, 0] | m3[:, 1]
+        trend5 = m5[:, 0] | m5[:, 1]
+        self.assertFalse((trend5 & ~trend3).any())
+
+    def test_short_window(self):
+        pct, amount, is_zt = self.random_panel(n_days=2)
+        self.assertFalse(batch_fen_jue(pct, amount, is_zt).any())
+        with self.assertRaises(ValueError):
+            batch_fen_jue(pct, amount, is_zt, trend_days=2)
+
+
+if __name__ == '__main__':
+    unittest.main()
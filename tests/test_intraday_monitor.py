@@ -0,0 +1,226 @@
+import io
+import os
+import sys
+import shutil
+import tempfile
+import time
+import unittest
+from datetime import datetime
+
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.file_watch import WatchedInput
+from src.utils.live_screen import LiveScreen
+
+
+def touch(path, text):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))   # 保证 mtime 前进
+
+
+class TestWatchedInput(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, 'holdings.txt')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_reload_only_on_change(self):
+        touch(self.path, 'a')
+        reads = []
+
+        def loader():
+            if not os.path.exists(self.path):
+                return None
+            with open(self.path, encoding='utf-8') as f:
+                reads.append(f.read())
+            return reads[-1]
+
+        w = WatchedInput(loader, self.path)
+        self.assertEqual(w.get(), 'a')
+        self.assertTrue(w.changed)
+        self.assertEqual(w.get(), 'a')
+        self.assertFalse(w.changed)
+        touch(self.path, 'bb')
+        self.assertEqual(w.get(), 'bb')
+        os.remove(self.path)
+        self.assertIsNone(w.get())                # 删除也是变化
+        self.assertEqual(w.loads, 3)
+
+    def test_dynamic_paths(self):
+        latest = {'path': None}
+        w = WatchedInput(lambda: latest['path'], lambda: latest['path'])
+        self.assertIsNone(w.get())
+        self.assertEqual(w.loads, 1)
+        other = os.path.join(self.tmp, 'auction2.txt')
+        touch(other, 'x')
+        latest['path'] = other                    # 出现了更新的竞价文件
+        self.assertEqual(w.get(), other)
+        self.assertEqual(w.loads, 2)
+
+
+class TestLiveScreen(unittest.TestCase):
+
+    def test_rewrites_only_changed_lines(self):
+        out = io.StringIO()
+        screen = LiveScreen(out)
+        self.assertEqual(screen.draw(['head', 'r1', 'r2', 'r3']), 4)
+        self.assertTrue(out.getvalue().startswith('\x1b[H\x1b[2J'))
+
+        out.seek(0), out.truncate()
+        self.assertEqual(screen.draw(['head', 'r1', 'R2', 'r3']), 1)
+        self.assertIn('\x1b[3;1H\x1b[2KR2', out.getvalue())
+        self.assertNotIn('r1', out.getvalue())
+
+        out.seek(0), out.truncate()
+        self.assertEqual(screen.draw(['head', 'r1']), 0)          # 变短: 清掉第 3、4 行
+        self.assertIn('\x1b[3;1H\x1b[2K', out.getvalue())
+        self.assertIn('\x1b[4;1H\x1b[2K', out.getvalue())
+
+        screen.reset()
+        self.assertEqual(screen.draw(['head', 'r1']), 2)
+        self.assertEqual(screen.stats['full'], 2)
+
+
+class FakeProvider:
+    def __init__(self, frames, delay=0.0):
+        self.frames = frames
+        self.delay = delay
+        self.calls = []
+        self.source = None
+
+    def quotes(self, codes, symbols=None):
+        time.sleep(self.delay)
+        self.calls.append(list(codes))
+        frame = self.frames[min(len(self.calls), len(self.frames)) - 1]
+        if isinstance(frame, Exception):
+            raise frame
+        self.source = 'batch'
+        return frame.copy()
+
+
+def spot(pct_a, pct_b):
+    return pd.DataFrame({
+        '代码': ['600001', '000002'], '名称': ['甲', '乙'],
+        '最新价': [10.0 * (1 + pct_a / 100), 20.0 * (1 + pct_b / 100)], '涨跌幅': [pct_a, pct_b],
+        '最高': [10.2, 20.5], '最低': [9.8, 19.8], '今开': [10.0, 20.0],
+        '成交量': [10000.0, 5000.0], '成交额': [1.02e7, 1.01e7], '量比': [1.0, 1.0],
+    })
+
+
+class TestIntradayMonitor(unittest.TestCase):
+
+    def setUp(self):
+        from src.monitors import intraday_monitor
+        self.mod = intraday_monitor
+        self.tmp = tempfile.mkdtemp()
+        self.hold_path = os.path.join(self.tmp, 'holdings.txt')
+        touch(self.hold_path, '600001')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def make(self, provider, delay=0.0):
+        def fetch_index():
+            time.sleep(delay)
+            return {'price': 3000.0, 'pct': 0.5, 'sh_amt': 4e11, 'sz_amt': 5e11, 'sh_vr': 1.0}
+
+        def fetch_sectors():
+            time.sleep(delay)
+            return "半导体(3.0%)"
+
+        monitor = self.mod.IntradayMonitor(provider=provider, fetch_index=fetch_index, fetch_sectors=fetch_sectors,
+                                           volume_baseline=lambda codes: {}, screen=LiveScreen(io.StringIO()),
+                                           now=lambda: datetime(2026, 10, 16, 10, 0, 0))
+        self.hold_loads = []
+
+        def load_holdings():
+            self.hold_loads.append(1)
+            with open(self.hold_path, encoding='utf-8') as f:
+                return {code: {'cost': 10.0, 'vol': 100} for code in f.read().split()}
+
+        monitor.holdings = WatchedInput(load_holdings, self.hold_path, name='持仓')
+        monitor.pool = WatchedInput(lambda: {'000002': {'tag': '首板', 'sina_code': 'sz000002'}}, [], name='策略池')
+        monitor.manual = WatchedInput(lambda: {}, [], name='手动关注')
+        monitor.auction = WatchedInput(lambda: ({}, ""), [], name='竞价')
+        return monitor
+
+    def test_fetches_overlap_and_static_inputs_stay_loaded(self):
+        provider = FakeProvider([spot(1.0, 2.0)], delay=0.3)
+        monitor = self.make(provider, delay=0.3)
+        start = time.monotonic()
+        frame = monitor.refresh()
+        self.assertLess(time.monotonic() - start, 0.75)    # 三个 0.3 秒请求并发
+        self.assertEqual([r['code'] for r in frame['rows']], ['600001'])   # 持仓必显示
+        self.assertEqual(provider.calls, [['000002', '600001']])
+        self.assertEqual(monitor.reloaded, ['持仓', '策略池', '手动关注', '竞价'])
+
+        monitor.refresh()
+        self.assertEqual(monitor.reloaded, [])
+        self.assertEqual(len(self.hold_loads), 1)
+        touch(self.hold_path, '600001 000002')
+        frame = monitor.refresh()
+        self.assertEqual(monitor.reloaded, ['持仓'])
+        self.assertEqual([r['code'] for r in frame['rows']], ['000002', '600001'])
+
+    def test_run_redraws_changed_rows_and_survives_failures(self):
+        provider = FakeProvider([spot(1.0, 2.0), spot(1.0, 2.0), ConnectionError("offline"), spot(1.5, 2.0)])
+        monitor = self.make(provider)
+        written = []
+        draw = monitor.screen.draw
+        monitor.screen.draw = lambda lines: written.append(draw(lines)) or written[-1]
+        frame = monitor.run(interval=0, max_ticks=4)
+
+        total = len(self.mod.frame_lines(monitor.last_frame)) + 1
+        self.assertEqual(written[0], total)
+        self.assertEqual(written[1], 1)          # 数据没变: 只有状态行
+        self.assertEqual(written[2], 1)          # 行情失败: 保留上一帧，只改状态行
+        self.assertEqual(written[3], 2)          # 一只票变了 + 状态行
+        self.assertEqual(monitor.stats['failed'], 1)
+        self.assertAlmostEqual(frame['rows'][0]['pct'], 1.5)
+
+
+class FakeStore:
+    def __init__(self, volumes):
+        self.volumes = volumes
+        self.synced = []
+
+    def sync(self, code):
+        self.synced.append(code)
+        if code not in self.volumes:
+            raise ConnectionError("offline")
+        return 'full'
+
+    def panel(self, codes, fields, days=None, sync=True):
+        import numpy as np
+        return [], {'成交量': np.array([self.volumes.get(c, [np.nan] * 5) for c in codes], dtype=float)}
+
+
+class TestVolumeBaseline(unittest.TestCase):
+
+    def test_syncs_codes_and_leaves_missing_blank(self):
+        from unittest import mock
+        from src.monitors import intraday_monitor
+        store = FakeStore({'600001': [1000.0, 2000.0, 3000.0, 2000.0, 2000.0]})
+        with mock.patch('src.utils.kline_store.get_store', return_value=store):
+            base = intraday_monitor.load_volume_baseline(['600001', '000002'])
+        self.assertEqual(sorted(store.synced), ['000002', '600001'])
+        self.assertEqual(base, {'600001': 2000.0})
+
+    def test_missing_volume_ratio_rendered_as_dash(self):
+        from src.monitors.intraday_monitor import collect_display_rows, format_row
+        df = spot(1.0, 2.0)
+        df['量比'] = float('nan')
+        rows = collect_display_rows(df, {'600001': {'cost': 10.0}}, {}, {}, {}, 0.0, datetime(2026, 10, 16, 10, 0))
+        self.assertIn(' - ', format_row(rows[0]))
+        self.assertNotIn('nan', format_row(rows[0]))
+
+
+if __name__ == '__main__':
+    unittest.main()
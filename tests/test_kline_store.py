@@ -0,0 +1,178 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.kline_store import KlineStore
+from src.utils.trade_calendar import TradeCalendar, weekday_dates
+
+
+def make_bars(seed, start='2025-11-03', n=60):
+    rng = np.random.default_rng(seed)
+    close = np.round(10 * np.cumprod(1 + rng.normal(0, 0.02, n)), 2)
+    return pd.DataFrame({
+        '日期': pd.bdate_range(start, periods=n).date,   # akshare 返回 datetime.date
+        '股票代码': '',
+        '开盘': close, '收盘': close, '最高': close * 1.02, '最低': close * 0.98,
+        '成交量': rng.integers(1e4, 1e6, n).astype(float), '成交额': rng.uniform(1e7, 1e9, n),
+        '振幅': 4.0, '涨跌幅': rng.normal(0, 3, n).round(2), '涨跌额': 0.1, '换手率': rng.uniform(1, 9, n),
+    })
+
+
+class FakeSource:
+    """模拟 akshare：只返回 now 当天及以前的 K 线，记录每次请求"""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.bars = {}
+        self.calls = []
+        self.offline = False
+
+    def __call__(self, code, start_date=None, end_date=None, timeout=None):
+        self.calls.append((code, start_date))
+        if self.offline:
+            raise ConnectionError('offline')
+        df = self.bars[code]
+        dates = pd.Series([d.strftime('%Y%m%d') for d in df['日期']], index=df.index)
+        keep = dates <= self.clock.now.strftime('%Y%m%d')
+        if start_date:
+            keep &= dates >= start_date
+        return df[keep].reset_index(drop=True)
+
+
+class Clock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class TestKlineStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.clock = Clock(datetime(2026, 1, 12, 16, 0))
+        self.src = FakeSource(self.clock)
+        self.src.bars['600000'] = make_bars(1)
+        self.src.bars['000001'] = make_bars(2, start='2025-12-01', n=40)
+        self.calendar = TradeCalendar(weekday_dates('2025-01-01', '2026-12-31'))
+        self.store = KlineStore(os.path.join(self.tmp, 'k.sqlite'), download=self.src, now=self.clock,
+                                calendar=self.calendar)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_one_network_call_per_day(self):
+        df = self.store.get_daily('600000')
+        self.assertEqual(list(df.columns[:4]), ['日期', '股票代码', '开盘', '收盘'])
+        self.assertEqual(df['日期'].iloc[-1], '2026-01-12')
+        self.assertEqual(len(self.src.calls), 1)
+
+        self.store.get_daily('600000', days=10)
+        self.store.get_daily('600000', start_date='20251201')
+        self.assertEqual(len(self.src.calls), 1)
+        self.assertEqual(self.store.stats['fresh'], 2)
+
+    def test_next_day_fetches_only_new_bars(self):
+        self.store.get_daily('600000')
+        self.clock.now = datetime(2026, 1, 14, 16, 0)
+        self.assertEqual(self.store.sync('600000'), 'incremental')
+        self.assertEqual(self.src.calls[-1], ('600000', '20260112'))
+        df = self.store.get_daily('600000', sync=False)
+        full = self.src.bars['600000']
+        expected = full[[d <= self.clock.now.date() for d in full['日期']]]
+        self.assertEqual(len(df), len(expected))
+        np.testing.assert_array_equal(df['收盘'].to_numpy(), expected['收盘'].to_numpy())
+
+    def test_adjustment_change_rebuilds(self):
+        self.store.get_daily('600000')
+        adjusted = self.src.bars['600000'].copy()
+        adjusted[['开盘', '收盘', '最高', '最低']] *= 0.9
+        self.src.bars['600000'] = adjusted
+        self.clock.now = datetime(2026, 1, 13, 16, 0)
+        self.assertEqual(self.store.sync('600000'), 'full')
+        df = self.store.get_daily('600000', sync=False)
+        self.assertAlmostEqual(df['收盘'].iloc[0], adjusted['收盘'].iloc[0])
+        self.assertEqual(self.store.stats['rebuilt'], 1)
+
+    def test_intraday_bar_not_stored(self):
+        self.clock.now = datetime(2026, 1, 13, 10, 30)
+        df = self.store.get_daily('600000')
+        self.assertEqual(df['日期'].iloc[-1], '2026-01-12')
+        # 盘中已同步过，收盘定型后再同步一次把当日 K 线补进来
+        self.assertEqual(self.store.sync('600000'), 'fresh')
+        self.clock.now = datetime(2026, 1, 13, 15, 45)
+        self.assertEqual(self.store.sync('600000'), 'incremental')
+        self.assertEqual(self.store.get_daily('600000', sync=False)['日期'].iloc[-1], '2026-01-13')
+
+    def test_include_live_appends_unsettled_bar(self):
+        self.store.get_daily('600000')                       # 01-12 收盘后已入库
+        self.clock.now = datetime(2026, 1, 13, 10, 30)
+        df = self.store.get_daily('600000', include_live=True, days=11)
+        self.assertEqual(len(df), 11)
+        self.assertEqual(df['日期'].iloc[-1], '2026-01-13')
+        today = self.src.bars['600000'].set_index(self.src.bars['600000']['日期'].astype(str))
+        self.assertAlmostEqual(df['收盘'].iloc[-1], today.loc['2026-01-13', '收盘'])
+        self.assertEqual(df['股票代码'].iloc[-1], '600000')
+        # 实时 K 线不入库
+        self.assertEqual(self.store.get_daily('600000', sync=False)['日期'].iloc[-1], '2026-01-12')
+        # 截止日期在今天之前 / 收盘定型后: 不额外请求
+        calls = len(self.src.calls)
+        self.store.get_daily('600000', end_date='20260112', include_live=True)
+        self.clock.now = datetime(2026, 1, 13, 15, 45)
+        df = self.store.get_daily('600000', include_live=True)
+        self.assertEqual(df['日期'].iloc[-1], '2026-01-13')
+        self.assertEqual(len(self.src.calls), calls + 1)     # 只有定型后那次增量同步
+        self.assertEqual(self.store.stats['live'], 1)
+
+    def test_no_sync_over_weekend(self):
+        self.clock.now = datetime(2026, 1, 16, 16, 0)   # 周五收盘后
+        self.store.get_daily('600000')
+        for day in (17, 18):                             # 周六、周日
+            self.clock.now = datetime(2026, 1, day, 20, 0)
+            self.assertEqual(self.store.sync('600000'), 'fresh')
+        self.clock.now = datetime(2026, 1, 19, 16, 0)   # 周一收盘后
+        self.assertEqual(self.store.sync('600000'), 'incremental')
+
+    def test_offline_falls_back_to_local_data(self):
+        self.store.get_daily('600000')
+        self.clock.now = datetime(2026, 1, 13, 16, 0)
+        self.src.offline = True
+        self.assertEqual(self.store.sync('600000'), 'stale')
+        self.assertEqual(len(self.store.get_daily('600000', sync=False)), len(pd.bdate_range('2025-11-03', '2026-01-12')))
+        with self.assertRaises(ConnectionError):
+            self.store.get_daily('000001')
+
+    def test_backfill_earlier_start(self):
+        store = KlineStore(os.path.join(self.tmp, 'b.sqlite'), download=self.src, now=self.clock, history_days=30,
+                           calendar=self.calendar)
+        self.assertEqual(len(store.get_daily('600000')), len(pd.bdate_range('2025-12-13', '2026-01-12')))
+        df = store.get_daily('600000', start_date='20251103')
+        self.assertEqual(df['日期'].iloc[0], '2025-11-03')
+        self.assertEqual(self.src.calls[-1], ('600000', '20251103'))
+        store.get_daily('600000', start_date='20251110')
+        self.assertEqual(len(self.src.calls), 2)
+
+    def test_panel_aligns_dates(self):
+        dates, arrs = self.store.panel(['600000', '000001', '999999'], fields=['收盘', '换手率'], days=35)
+        self.assertEqual(len(dates), 35)
+        self.assertEqual(dates[-1], '20260112')
+        close = arrs['收盘']
+        self.assertEqual(close.shape, (3, 35))
+        self.assertTrue(np.isnan(close[2]).all())           # 无数据的代码整行 NaN
+        first = dates.index('20251201')
+        self.assertTrue(np.isnan(close[1, :first]).all())   # 上市前 NaN
+        self.assertFalse(np.isnan(close[1, first:]).any())
+        self.assertEqual(close[0, -1], self.src.bars['600000'].set_index('日期')['收盘'].loc[datetime(2026, 1, 12).date()])
+
+
+if __name__ == '__main__':
+    unittest.main()
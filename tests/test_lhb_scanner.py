@@ -0,0 +1,85 @@
+import os
+import sys
+import time
+import threading
+import unittest
+import pandas as pd
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.lhb_scanner import scan_seat_details, seat_hits
+
+
+def fake_detail(code):
+    return pd.DataFrame({'交易营业部名称': [f'营业部{code}'], '类型': ['日涨幅偏离值达7%'],
+                         '买入金额': [1e7], '卖出金额': [0.0]})
+
+
+class TestScanSeatDetails(unittest.TestCase):
+    def test_results_keep_input_order_and_report_failures(self):
+        codes = [f'{i:06d}' for i in range(12)]
+
+        def fetch(code, date_str, limiter, retries, backoff):
+            limiter.acquire()
+            time.sleep(0.002 * (12 - int(code)))  # 越靠前的代码完成得越晚
+            if code in ('000003', '000007'):
+                raise ConnectionError(f"reset {code}")
+            return fake_detail(code)
+
+        details, failures = scan_seat_details(codes, '20261016', max_workers=4,
+                                              rate=1000, burst=1000, fetch=fetch)
+        self.assertEqual([c for c, _ in details], codes)
+        for code, df in details:
+            if code in ('000003', '000007'):
+                self.assertIsNone(df)
+            else:
+                self.assertEqual(df['交易营业部名称'].iloc[0], f'营业部{code}')
+        self.assertEqual([f['code'] for f in failures], ['000003', '000007'])
+        self.assertIn('ConnectionError', failures[0]['error'])
+
+    def test_shared_rate_limit(self):
+        stamps = []
+        lock = threading.Lock()
+
+        def fetch(code, date_str, limiter, retries, backoff):
+            limiter.acquire()
+            with lock:
+                stamps.append(time.monotonic())
+            return fake_detail(code)
+
+        codes = [f'{i:06d}' for i in range(10)]
+        _, failures = scan_seat_details(codes, '20261016', max_workers=8, rate=50, burst=2, fetch=fetch)
+        self.assertEqual(failures, [])
+        # 2 个突发之后其余 8 次受 50 次/秒 限制，至少约 0.16 秒
+        self.assertGreaterEqual(max(stamps) - min(stamps), 8 / 50 * 0.9)
+
+
+class TestSeatHits(unittest.TestCase):
+    def test_labels_actions_and_order(self):
+        seats = {'甲': ['金马路'], '乙': ['马路', '黄河路']}
+        detail_a = pd.DataFrame({
+            '交易营业部名称': ['大连金马路营业部', '某某营业部', '大连黄河路营业部'],
+            '类型': ['日涨幅偏离值达7%', '连续三个交易日', '严重异常波动'],
+            '买入金额': [3e7, 1e8, '1,000'],
+            '卖出金额': [2e6, 0.0, 2e5],
+        })
+        detail_b = pd.DataFrame({'交易营业部名称': ['金马路'], '类型': ['连续3个交易日'],
+                                 '买入金额': [3e6], '卖出金额': [2e6]})
+        hits = seat_hits([('000001', detail_a), ('000002', None), ('000003', detail_b)],
+                         {'000001': '甲股', '000003': '丙股'}, seats=seats)
+        got = [(h['股票代码'], h['游资标签'], h['操作'], h['榜单标签']) for h in hits]
+        self.assertEqual(got, [
+            ('000001', '甲', '买入', '日'),     # 3000万 vs 200万 -> 买入远大于卖出
+            ('000001', '乙', '买入', '日'),     # 同一营业部可命中多个标签，按配置顺序
+            ('000001', '乙', '卖出', '严重异动'),  # '1,000' 无法解析按 0 计
+            ('000003', '甲', '做T', '3日'),
+            ('000003', '乙', '做T', '3日'),
+        ])
+        self.assertEqual(hits[0]['股票名称'], '甲股')
+        self.assertEqual(list(hits[0]), ['游资标签', '营业部名称', '股票代码', '股票名称',
+                                         '操作', '买入金额', '卖出金额', '榜单标签'])
+
+
+if __name__ == '__main__':
+    unittest.main()
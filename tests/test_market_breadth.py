@@ -0,0 +1,103 @@
+import os
+import sys
+import unittest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.market_breadth import (market_frame, compute_market_stats, breadth_histogram,
+                                     HIST_LABELS)
+
+
+def item(code, name, pct, **kw):
+    d = {'code': code, 'name': name, 'today_pct': pct, 'open_pct': 0.0, 'limit_days': 0,
+         'is_zt': pct > 9.8, 'open_num': 0, 'tag': ''}
+    d.update(kw)
+    return d
+
+
+def legacy_stats(all_data, yesterday_data):
+    """原 calculate_market_stats 的逐只实现，用作对照"""
+    limit_up = limit_down = max_height = 0
+    for x in all_data:
+        if 'ST' in x['name'].upper():
+            continue
+        if x.get('today_pct', 0) > 9.8: limit_up += 1
+        if x.get('today_pct', 0) < -9.0: limit_down += 1
+        max_height = max(max_height, x.get('limit_days', 0))
+    total = n = 0
+    for c in [c for c, v in yesterday_data.items() if v.get('is_zt')]:
+        curr = next((x for x in all_data if x['code'] == c), None)
+        if curr:
+            total += curr.get('open_pct', 0)
+            n += 1
+    return {'limit_up_count': limit_up, 'limit_down_count': limit_down, 'highest_space': max_height,
+            'yesterday_limit_up_premium': round(total / n, 2) if n else 0}
+
+
+class TestMarketBreadth(unittest.TestCase):
+
+    def setUp(self):
+        self.today = [
+            item('600001', '甲股份', 10.0, open_pct=3.0, limit_days=2),
+            item('000002', '乙科技', 10.02, open_pct=-1.0, limit_days=1),
+            item('300003', '丙电子', 20.0, open_pct=5.0, limit_days=3),
+            item('600004', '丁能源', 4.0, open_pct=2.0),
+            item('000005', '戊传媒', 6.0, tag='炸板/短剧'),
+            item('002006', '*ST己', -5.0, limit_days=7),
+            item('600007', '庚重工', -10.0),
+            item('000008', '辛材料', 0.0, open_num=2),
+        ]
+        self.yest = {
+            '600001': item('600001', '甲股份', 10.0, limit_days=1),
+            '000002': item('000002', '乙科技', 5.0),
+            '300003': item('300003', '丙电子', 20.0, limit_days=2),
+            '600004': item('600004', '丁能源', 10.0, limit_days=1),
+            '002006': item('002006', '*ST己', 5.0, limit_days=6, is_zt=True),
+            '600009': item('600009', '壬退市', 10.0, limit_days=1),
+        }
+
+    def test_legacy_keys_match(self):
+        stats = compute_market_stats(self.today, self.yest)
+        for k, v in legacy_stats(self.today, self.yest).items():
+            self.assertEqual(stats[k], v, k)
+
+    def test_premium_close_and_promotion(self):
+        stats = compute_market_stats(self.today, self.yest)
+        # 昨日涨停且今日在表: 600001, 300003, 600004, 002006 (ST 计入溢价)
+        self.assertEqual(stats['yesterday_limit_up_premium_close'], round((10 + 20 + 4 - 5) / 4, 2))
+        rates = stats['promotion_rates']
+        self.assertEqual(rates['1进2'], {'count': 3, 'promoted': 1, 'rate': 33.33})
+        self.assertEqual(rates['2进3'], {'count': 1, 'promoted': 1, 'rate': 100.0})
+        self.assertNotIn('6进7', rates)
+
+    def test_zhaban_rate(self):
+        stats = compute_market_stats(self.today, self.yest)
+        self.assertEqual(stats['zhaban_count'], 2)
+        self.assertEqual(stats['zhaban_rate'], round(2 / 5 * 100, 2))
+
+    def test_histogram_bins(self):
+        hist = breadth_histogram([-9.5, -9.0, -0.1, 0.0, 0.1, 3.0, 9.8, 9.81])
+        self.assertEqual(list(hist), HIST_LABELS)
+        self.assertEqual(hist['<-9%'], 1)
+        self.assertEqual(hist['-9~-7%'], 1)
+        self.assertEqual(hist['-3~0%'], 1)
+        self.assertEqual(hist['0%'], 1)
+        self.assertEqual(hist['0~3%'], 2)
+        self.assertEqual(hist['7~9.8%'], 1)
+        self.assertEqual(hist['>9.8%'], 1)
+        stats = compute_market_stats(self.today, self.yest)
+        self.assertEqual(sum(stats['breadth_histogram'].values()), 7)
+
+    def test_duplicate_codes_keep_first_and_empty_input(self):
+        frame = market_frame([item('600001', '甲', 1.0), item('600001', '甲', 5.0)])
+        self.assertEqual(len(frame), 1)
+        self.assertEqual(frame.loc['600001', 'today_pct'], 1.0)
+        stats = compute_market_stats([], {})
+        self.assertEqual(stats['limit_up_count'], 0)
+        self.assertEqual(stats['yesterday_limit_up_premium'], 0)
+        self.assertEqual(stats['promotion_rates'], {})
+
+
+if __name__ == '__main__':
+    unittest.main()
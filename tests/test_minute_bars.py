@@ -0,0 +1,102 @@
+import os
+import sys
+import unittest
+from datetime import datetime, timedelta
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.minute_bars import MinuteBars, minute_slot, slot_label, SLOTS
+
+
+def at(hh, mm, ss=0, day=16):
+    return datetime(2026, 10, day, hh, mm, ss)
+
+
+class TestSlots(unittest.TestCase):
+
+    def test_slot_mapping(self):
+        self.assertEqual(minute_slot(at(9, 25)), 0)
+        self.assertEqual(minute_slot(at(9, 30)), 1)
+        self.assertEqual(minute_slot(at(9, 30, 59)), 1)
+        self.assertEqual(minute_slot(at(11, 29, 30)), 120)
+        self.assertEqual(minute_slot(at(12, 10)), 120)      # 午休归到 11:30
+        self.assertEqual(minute_slot(at(13, 0)), 121)
+        self.assertEqual(minute_slot(at(15, 3)), SLOTS - 1)
+        self.assertEqual([slot_label(s) for s in (0, 1, 120, 121, 240)],
+                         ['09:30', '09:31', '11:30', '13:01', '15:00'])
+
+
+class TestMinuteBars(unittest.TestCase):
+
+    def setUp(self):
+        self.bars = MinuteBars()
+
+    def feed(self, ts, prices, vols, amts, codes=('600001', '000002')):
+        return self.bars.update(ts, list(codes), prices, vols, amts)
+
+    def test_ohlcv_from_cumulative_snapshots(self):
+        self.feed(at(9, 31, 0), [10.0, 20.0], [100, 50], [100_000, 100_000])
+        self.feed(at(9, 31, 20), [10.3, 20.0], [150, 50], [151_500, 100_000])
+        self.feed(at(9, 31, 40), [9.9, 0.0], [160, 60], [161_400, 120_000])     # 0 价跳过
+        self.feed(at(9, 32, 5), [10.1, 20.2], [200, 70], [201_800, 140_200])
+
+        bars = self.bars.to_frame('600001')
+        self.assertEqual(bars['时间'].tolist(), ['2026-10-16 09:32:00', '2026-10-16 09:33:00'])
+        first = bars.iloc[0]
+        self.assertEqual((first['开盘'], first['最高'], first['最低'], first['收盘']), (10.0, 10.3, 9.9, 9.9))
+        self.assertEqual(first['成交量'], 160)
+        self.assertEqual(bars['成交量'].sum(), 200)                  # 增量合计 = 当日累计
+        self.assertAlmostEqual(self.bars.vwap(['600001'])['600001'], 201_800 / 20_000)
+        self.assertAlmostEqual(self.bars.vwap(['600001'], now=at(9, 32, 5), minutes=1)['600001'],
+                               (201_800 - 161_400) / 4_000)
+        hl = self.bars.high_low(now=at(9, 32, 5))
+        self.assertEqual((hl.loc['600001', 'high'], hl.loc['600001', 'low']), (10.3, 9.9))
+        self.assertEqual(self.bars.to_frame('000002')['成交量'].tolist(), [50, 20])   # 跳过那帧的量记到下一根
+
+    def test_speed_and_gaps(self):
+        for m, p in enumerate([10.0, 10.1, 10.2, 10.3, 10.4, 10.5]):
+            self.feed(at(10, m, 30), [p, 20.0], [100 * (m + 1)] * 2, [1e5 * (m + 1)] * 2)
+        speed = self.bars.speed(now=at(10, 5, 30), minutes=5)
+        self.assertAlmostEqual(speed['600001'], 5.0)
+        self.assertAlmostEqual(speed['000002'], 0.0)
+        self.assertTrue(np.isnan(self.bars.speed(['600001'], now=at(10, 3, 0), minutes=5)['600001']))   # 不够 5 分钟
+        # 中间缺几分钟没轮询到: 用 N 分钟前最近一根的收盘
+        self.feed(at(10, 9, 10), [11.0, 20.0], [900, 900], [9e5, 9e5])
+        self.assertAlmostEqual(self.bars.speed(['600001'], now=at(10, 9, 10))['600001'], (11.0 / 10.4 - 1) * 100)
+
+    def test_features_growth_and_rollover(self):
+        codes = [f"{i:06d}" for i in range(150)]
+        self.feed(at(10, 0), np.full(150, 5.0), np.full(150, 10.0), np.full(150, 5000.0), codes=codes)
+        self.feed(at(10, 1), [6.0], [20.0], [11000.0], codes=['999999'])
+        self.assertEqual(len(self.bars), 151)
+        feats = self.bars.features(at(10, 1), ['999999', 'nope', '000001'])
+        self.assertEqual(feats.index.tolist(), ['999999', '000001'])
+        self.assertEqual(feats.loc['000001', 'bars'], 1)
+        self.assertAlmostEqual(feats.loc['000001', 'vwap'], 5.0)
+        self.feed(at(9, 31, day=17), [10.0, 20.0], [5, 5], [5000, 10000])      # 新的一天
+        self.assertEqual(len(self.bars), 2)
+        self.assertEqual(self.bars.to_frame('600001')['时间'].tolist(), ['2026-10-17 09:32:00'])
+
+    def test_monitor_speed_from_local_bars(self):
+        from src.monitors.intraday_monitor import collect_display_rows, format_row
+        import pandas as pd
+        t0 = at(10, 0)
+        holdings = {'600001': {'cost': 10.0}}
+        for m, p in enumerate([10.0, 10.05, 10.1, 10.1, 10.15, 10.2]):
+            df = pd.DataFrame({'代码': ['600001'], '名称': ['甲'], '最新价': [p], '涨跌幅': [1.0],
+                               '最高': [10.2], '今开': [10.0], '量比': [1.0],
+                               '成交量': [1000.0 * (m + 1)], '成交额': [1.01e6 * (m + 1)]})
+            self.bars.update(t0 + timedelta(minutes=m), df['代码'], df['最新价'], df['成交量'], df['成交额'])
+        rows = collect_display_rows(df, holdings, {}, {}, {}, 0.0, t0 + timedelta(minutes=5), bars=self.bars)
+        self.assertAlmostEqual(rows[0]['speed5'], 2.0)
+        rows = collect_display_rows(df, holdings, {}, {}, {}, 0.0, t0 + timedelta(minutes=5))
+        self.assertTrue(np.isnan(rows[0]['speed5']))         # 没有本地线且源里无此列: 留空，不是 0
+        self.assertIn("1.00\x1b[0m     - ", format_row(rows[0]))   # 涨幅后面的 5分% 列显示 '-'
+        rows = collect_display_rows(df.assign(**{'5分钟涨跌': 0.8}), holdings, {}, {}, {}, 0.0, t0)
+        self.assertEqual(rows[0]['speed5'], 0.8)             # 源里有这一列时照用
+
+
+if __name__ == '__main__':
+    unittest.main()
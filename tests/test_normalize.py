@@ -0,0 +1,57 @@
+import os
+import sys
+import unittest
+import numpy as np
+import pandas as pd
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.normalize import to_float, to_str, to_code, float_col, join_tags, to_records
+from src.core.data_loader import safe_float, safe_str
+
+
+class TestNormalize(unittest.TestCase):
+
+    RAW = ['1.5亿', '500万', '+0.51%', '--', '', None, np.nan, 'nan', '1,234.5',
+           '1万亿', 'abc', ' 3.2 ', '-0.77%', '1e3', '%', ' -- ']
+
+    def test_to_float_matches_safe_float(self):
+        series = pd.Series(self.RAW, dtype=object)
+        self.assertEqual(to_float(series).tolist(), [safe_float(v) for v in self.RAW])
+
+    def test_to_float_keeps_index(self):
+        series = pd.Series(['1', '2万'], index=[10, 20])
+        result = to_float(series)
+        self.assertEqual(result.index.tolist(), [10, 20])
+        self.assertEqual(result.dtype, np.float64)
+        self.assertEqual(result.tolist(), [1.0, 20000.0])
+
+    def test_to_str_matches_safe_str(self):
+        series = pd.Series(self.RAW, dtype=object)
+        self.assertEqual(to_str(series).tolist(), [safe_str(v) for v in self.RAW])
+
+    def test_to_code(self):
+        self.assertEqual(to_code(pd.Series(['SH600000', '300750', np.nan])).tolist(), ['600000', '300750', ''])
+
+    def test_missing_column_defaults(self):
+        df = pd.DataFrame({'代码': ['600000', '000001']})
+        self.assertEqual(float_col(df, None).tolist(), [0.0, 0.0])
+        self.assertEqual(float_col(df, '现价').tolist(), [0.0, 0.0])
+
+    def test_join_tags(self):
+        a = pd.Series(['首板', '', '', 'x'])
+        b = pd.Series(['2板', '3板', '', ''])
+        c = pd.Series(['AI', '', '机器人', 'y'])
+        self.assertEqual(join_tags(a, b, c).tolist(), ['首板/2板/AI', '3板', '机器人', 'x/y'])
+
+    def test_to_records_native_types(self):
+        df = pd.DataFrame({'a': np.array([1, 2], dtype=np.int64), 'b': [True, False], 'c': ['x', 'y']})
+        records = to_records(df)
+        self.assertEqual(records, [{'a': 1, 'b': True, 'c': 'x'}, {'a': 2, 'b': False, 'c': 'y'}])
+        self.assertIs(type(records[0]['a']), int)
+        self.assertIs(type(records[0]['b']), bool)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+import os
+import sys
+import time
+import shutil
+import tempfile
+import unittest
+import numpy as np
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.panel_store import PanelStore, as_float64
+from src.utils.dataset_registry import registry
+from src.strategies.f_lao_model import load_ths_history
+
+HEADER = "代码\t名称\t涨幅\t现价\t昨日成交额\t当日成交额\t连续涨停天数\n"
+
+
+def table(rows):
+    return HEADER + "".join("\t".join(r) + "\n" for r in rows)
+
+
+class TestPanelStore(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        registry.clear()
+        self.write('20260107', [('SH600000', '浦发银行', '1.00%', '10.00', '1亿', '2亿', '--'),
+                                ('SZ000001', '平安银行', '9.80%', '12.00', '1亿', '3亿', '--')])
+        self.write('20260108', [('SH600000', '浦发银行', '-0.77%', '9.92', '2亿', '1.5亿', '--'),
+                                ('SZ300001', '新股', '20.00%', '30.00', '--', '5000万', '1')])
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+        registry.clear()
+
+    def write(self, date, rows):
+        with open(os.path.join(self.test_dir, f'Table-{date}.txt'), 'w', encoding='utf-8') as f:
+            f.write(table(rows))
+
+    def test_sync_builds_panel(self):
+        store = PanelStore(self.test_dir)
+        self.assertEqual(store.sync(), ['20260107', '20260108'])
+        self.assertEqual(store.dates, ['20260107', '20260108'])
+        self.assertEqual(store.codes, ['600000', '000001', '300001'])
+
+        pct = as_float64(store.field('pct'))
+        self.assertEqual(pct.shape, (2, 3))
+        self.assertEqual(pct[:, 0].tolist(), [1.0, -0.77])
+        self.assertTrue(np.isnan(pct[0, 2]))  # 300001 not listed yet
+
+        # 当日成交额, not the 昨日成交额 column that precedes it
+        self.assertEqual(as_float64(store.field('amount'))[0, 0], 2e8)
+        self.assertEqual(store.field('zt')[:, 1].tolist()[0], 0.0)  # 9.80 is not > 9.8
+        self.assertEqual(store.field('zt')[1, 2], 1.0)
+
+    def test_zt_keeps_legacy_definition(self):
+        # 原 F佬 历史: 涨停/连板列只要非空就算涨停 (哪怕是 0)，不看连板数是否 > 0
+        self.write('20260109', [('SH600000', '浦发银行', '2.00%', '10.12', '1亿', '1亿', '0'),
+                                ('SZ000001', '平安银行', '3.00%', '12.36', '1亿', '1亿', '--'),
+                                ('SZ300001', '新股', '10.50%', '33.15', '1亿', '1亿', '')])
+        store = PanelStore(self.test_dir)
+        store.sync()
+        self.assertEqual(store.field('zt')[-1].tolist(), [1.0, 0.0, 1.0])
+        self.assertEqual(store.field('boards')[-1, 0], 0.0)
+
+    def test_incremental_append(self):
+        store = PanelStore(self.test_dir)
+        store.sync()
+        size = os.path.getsize(os.path.join(store.panel_dir, 'pct.f32'))
+
+        self.write('20260109', [('SH600000', '浦发银行', '2.00%', '10.12', '1.5亿', '1.8亿', '--')])
+        reopened = PanelStore(self.test_dir)
+        self.assertEqual(reopened.sync(), ['20260109'])
+        self.assertEqual(os.path.getsize(os.path.join(store.panel_dir, 'pct.f32')), size * 3 // 2)
+        dates, pct = reopened.window('pct', 2)
+        self.assertEqual(dates, ['20260108', '20260109'])
+        self.assertEqual(as_float64(pct)[:, 0].tolist(), [-0.77, 2.0])
+        self.assertEqual(PanelStore(self.test_dir).sync(), [])
+
+    def test_reexport_overwrites_row(self):
+        store = PanelStore(self.test_dir)
+        store.sync()
+        time.sleep(0.01)
+        self.write('20260108', [('SH600000', '浦发银行', '-1.50%', '9.85', '2亿', '1.5亿', '--')])
+        self.assertEqual(store.sync(), ['20260108'])
+        self.assertEqual(len(store.dates), 2)
+        self.assertEqual(as_float64(store.field('pct'))[1, 0], -1.5)
+
+    def test_backfilled_date_sorted(self):
+        self.write('20260106', [('SH600000', '浦发银行', '0.50%', '9.90', '1亿', '1亿', '--')])
+        store = PanelStore(self.test_dir)
+        store.sync()
+        self.write('20260105', [('SH600000', '浦发银行', '0.10%', '9.85', '1亿', '1亿', '--')])
+        store.sync()
+        dates, pct = store.window('pct', 3)
+        self.assertEqual(dates, ['20260106', '20260107', '20260108'])
+        self.assertEqual(as_float64(pct)[:, 0].tolist(), [0.5, 1.0, -0.77])
+
+    def test_capacity_growth(self):
+        store = PanelStore(self.test_dir)
+        store.sync()
+        rows = [(f'SZ{i:06d}', f'股票{i}', '1.00%', '1.00', '1万', '1万', '--') for i in range(1000)]
+        self.write('20260109', rows)
+        store.sync()
+        self.assertGreaterEqual(store._meta['capacity'], len(store.codes))
+        pct = as_float64(store.field('pct'))
+        self.assertEqual(pct[0, 0], 1.0)   # old rows survive the rewrite
+        self.assertEqual(pct[2, store.code_index('000999')], 1.0)
+
+    def test_as_float64_restores_decimals(self):
+        arr = np.array([9.8, -0.77, np.nan, 9416000000.0, 14682027.0], dtype=np.float32)
+        self.assertEqual(as_float64(arr)[[0, 1, 3, 4]].tolist(), [9.8, -0.77, 9416000000.0, 14682027.0])
+
+    def test_f_lao_history_adapter(self):
+        hist = load_ths_history(self.test_dir, days=5)
+        self.assertEqual(list(hist), ['600000', '000001', '300001'])
+        self.assertEqual(hist['600000'][1], {'date': '20260108', 'pct': -0.77, 'amount': 150000000.0,
+                                             'price': 9.92, 'name': '浦发银行', 'is_zt': False})
+        self.assertEqual(len(hist['000001']), 1)
+        self.assertTrue(hist['300001'][0]['is_zt'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import os
+import sys
+import unittest
+import pandas as pd
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.pool_generator import (build_universe, apply_rules, assemble_tags, concept_tags,
+                                     zt_type_tags, POOL_RULES)
+
+
+def item(code, name, pct, **kw):
+    d = {'code': code, 'name': name, 'today_pct': pct, 'amount': 1e8, 'limit_days': 0,
+         'is_zt': False, 'open_num': 0, 'open_pct': 0.0, 'tag': ''}
+    d.update(kw)
+    return d
+
+
+class TestPoolRules(unittest.TestCase):
+
+    def setUp(self):
+        self.all_data = [
+            item('600001', '甲股份', 10.0, is_zt=True, limit_days=2, open_num=1, tag='2板/机器人'),
+            item('000002', '乙科技', 1.5, amount=25e8, tag='AI/算力'),
+            item('300003', '丙电子', -9.5),
+            item('600004', '丁能源', 0.5),
+            item('000005', '戊传媒', 2.0, tag='炸板/短剧'),
+            item('002006', '己集团', 3.0),
+            item('600007', '庚重工', 10.0, is_zt=True, open_pct=10.0),
+        ]
+        self.ctx = {
+            'base_focus': {'002006': '关注', '600004': '雷科(3板/军工)'},
+            'holdings_map': {'002006': '关注'},
+            'f_lao_map': {'600004': '雷科(3板/军工)'},
+            'manual_recognition_map': {},
+            'broken_pool_map': {'000005': {'amount': 1e7, 'tag': '炸板'}},
+            'lhb_codes': {'300003'},
+            'lhb_seat_map': {'乙科技': {'🏃呼家楼', '🔒陈小群(🔒 锁仓)'}},
+            'fen_jue_map': {'600004': ['👀焚诀/分歧低吸']},
+        }
+
+    def run_rules(self, rules=POOL_RULES):
+        u = build_universe(self.all_data)
+        selected, cols = apply_rules(u, self.ctx, rules)
+        sel = u[selected]
+        cols = {k: v[selected] for k, v in cols.items()}
+        shape = ("[" + zt_type_tags(sel) + "]").where(zt_type_tags(sel) != '', '')
+        tags = assemble_tags(list(cols.values()) + [shape, concept_tags(sel, cols['manual'])])
+        return dict(zip(sel['code'], tags))
+
+    def test_tags(self):
+        tags = self.run_rules()
+        self.assertEqual(tags['600001'], '3板/回封(炸1次)/[换手板]/机器人')
+        self.assertEqual(tags['000002'], '🔒陈小群(🔒 锁仓)/🏃呼家楼/★人气/成交/AI/算力')
+        self.assertEqual(tags['300003'], '🐉龙虎榜/📉跌停/博弈修复')
+        self.assertEqual(tags['600004'], 'F佬/雷科(3板/军工)/👀焚诀/分歧低吸')
+        self.assertEqual(tags['000005'], '🔥A大焚诀/爆量/👀焚诀预期/炸板/短剧')
+        self.assertEqual(tags['002006'], '持仓/己集团')
+        self.assertEqual(tags['600007'], '首板/[一字]')
+
+    def test_unselected_rows_dropped(self):
+        self.all_data.append(item('600008', '辛股份', 1.0))
+        self.assertNotIn('600008', self.run_rules())
+
+    def test_new_rule_is_one_table_row(self):
+        rule = ('small_cap', True, lambda u, ctx: (u['code'] == '600008', '小盘'))
+        self.all_data.append(item('600008', '辛股份', 1.0))
+        tags = self.run_rules(POOL_RULES + [rule])
+        self.assertEqual(tags['600008'], '小盘')
+
+
+if __name__ == '__main__':
+    unittest.main()
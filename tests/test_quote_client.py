@@ -0,0 +1,169 @@
+import os
+import sys
+import threading
+import unittest
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.quote_client import (QuoteProvider, SinaQuoteClient, fill_volume_ratio, parse_sina_quotes,
+                                    sina_symbol, trading_minutes)
+
+
+def sina_line(symbol, name, open_p, prev, price, high, low, vol, amt, b1_vol=0, b1_price=0.0):
+    fields = [name, open_p, prev, price, high, low, price, price, vol, amt, b1_vol, b1_price]
+    fields += [0] * 18 + ['2026-10-16', '10:00:00', '00']
+    return f'var hq_str_{symbol}="{",".join(str(f) for f in fields)}";'
+
+
+QUOTES = {
+    'sh600000': sina_line('sh600000', '浦发银行', 8.5, 8.4, 8.82, 8.9, 8.45, 1230000, 10800000.0),
+    'sz000001': sina_line('sz000001', '平安银行', 11.0, 11.0, 10.89, 11.05, 10.8, 500000, 5450000.0),
+    'sz300750': sina_line('sz300750', '宁德时代', 0, 200.0, 0, 0, 0, 0, 0, b1_vol=3000, b1_price=204.0),
+    'bj830799': sina_line('bj830799', '艾融软件', 20.0, 20.0, 20.5, 20.6, 19.9, 10000, 205000.0),
+}
+
+
+class StandInSina(BaseHTTPRequestHandler):
+    """本地替身: /list=sh600000,sz000001 -> 新浪 hq 格式 (GBK)，未知代码返回空串"""
+    protocol_version = 'HTTP/1.1'     # keep-alive
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.paths.append(self.path)
+            server.peers.add(self.client_address)
+        if server.fail:
+            self.send_response(503)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        symbols = self.path.split('list=', 1)[-1].split(',')
+        body = '\n'.join(QUOTES.get(s, f'var hq_str_{s}="";') for s in symbols).encode('gbk')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/javascript; charset=GBK')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestParse(unittest.TestCase):
+
+    def test_symbols(self):
+        self.assertEqual(sina_symbol('600000'), 'sh600000')
+        self.assertEqual(sina_symbol('1'), 'sz000001')
+        self.assertEqual(sina_symbol('830799'), 'bj830799')
+        # 策略池的 sina_code 和代码一致时沿用，不一致 (手动关注的粗略猜测) 时重新推断
+        self.assertEqual(sina_symbol('600000', 'SH600000'), 'sh600000')
+        self.assertEqual(sina_symbol('830799', 'sh830799'), 'sh830799')
+        self.assertEqual(sina_symbol('830799', 'sz000001'), 'bj830799')
+
+    def test_parse_columns_and_units(self):
+        df = parse_sina_quotes('\n'.join(QUOTES.values()) + '\nvar hq_str_sz000002="";').set_index('代码')
+        self.assertEqual(len(df), 4)
+        row = df.loc['600000']
+        self.assertEqual(row['名称'], '浦发银行')
+        self.assertAlmostEqual(row['涨跌幅'], 5.0)
+        self.assertAlmostEqual(row['成交量'], 12300.0)          # 股 -> 手
+        self.assertAlmostEqual(row['成交额'], 10800000.0)       # 元
+        # 竞价期间最新价为 0: 买一价作撮合价，金额 = 买一价 × 买一量
+        auc = df.loc['300750']
+        self.assertAlmostEqual(auc['最新价'], 204.0)
+        self.assertAlmostEqual(auc['涨跌幅'], 2.0)
+        self.assertAlmostEqual(auc['成交额'], 204.0 * 3000)
+        self.assertTrue(parse_sina_quotes('').empty)
+
+    def test_volume_ratio(self):
+        self.assertEqual(trading_minutes(datetime(2026, 10, 16, 9, 20)), 1.0)
+        self.assertEqual(trading_minutes(datetime(2026, 10, 16, 10, 30)), 60.0)
+        self.assertEqual(trading_minutes(datetime(2026, 10, 16, 12, 0)), 120.0)
+        self.assertEqual(trading_minutes(datetime(2026, 10, 16, 15, 30)), 240.0)
+        df = pd.DataFrame({'代码': ['A', 'B'], '成交量': [3000.0, 100.0]})
+        out = fill_volume_ratio(df, {'A': 6000.0}, now=datetime(2026, 10, 16, 10, 30))
+        # A: (3000/60) / (6000/240) = 2.0；B 没有基准 -> NaN (不是 0)
+        self.assertEqual(out['量比'].iloc[0], 2.0)
+        self.assertTrue(np.isnan(out['量比'].iloc[1]))
+        self.assertNotIn('量比', df.columns)
+        with_vr = df.assign(量比=[1.1, 1.2])
+        self.assertIs(fill_volume_ratio(with_vr, {'A': 1.0}), with_vr)
+
+
+class TestQuoteClient(unittest.TestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), StandInSina)
+        self.server.lock = threading.Lock()
+        self.server.paths = []
+        self.server.peers = set()
+        self.server.fail = False
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def tearDown(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+
+    def test_batches_over_pooled_connections(self):
+        client = SinaQuoteClient(base_url=self.url, batch_size=2, pool_size=2)
+        codes = ['600000', '000001', '300750', '830799', '000002']
+        df = client.fetch(codes + ['600000'], symbols={'830799': 'sh830799'})
+        self.assertEqual(sorted(df['代码']), ['000001', '300750', '600000'])
+        # 5 只去重后分 3 批；池里的 sina_code 原样带上
+        self.assertEqual(len(self.server.paths), 3)
+        self.assertTrue(any('sh830799' in p for p in self.server.paths))
+        for _ in range(5):
+            client.fetch(codes)
+        # 18 次请求复用连接池里的连接 (每个连接一个客户端端口)
+        self.assertEqual(client.stats['requests'], 18)
+        self.assertLessEqual(len(self.server.peers), 2)
+
+    def test_provider_fallback_to_full_spot(self):
+        full = pd.DataFrame({'代码': ['600000', '000001', '999999'], '名称': ['a', 'b', 'c'],
+                             '最新价': [1.0, 2.0, 3.0], '量比': [1.0, 1.0, 1.0]})
+        calls = []
+
+        def full_spot():
+            calls.append(1)
+            return full
+
+        provider = QuoteProvider(client=SinaQuoteClient(base_url=self.url), full_spot=full_spot)
+        df = provider.quotes(['600000', '000001'])
+        self.assertEqual(provider.source, 'batch')
+        self.assertEqual(calls, [])
+        self.assertEqual(len(df), 2)
+
+        # 批量接口报错 -> 全市场快照按名单过滤
+        self.server.fail = True
+        df = provider.quotes(['600000', '000001'])
+        self.assertEqual(provider.source, 'full')
+        self.assertEqual(sorted(df['代码']), ['000001', '600000'])
+        self.assertIsNotNone(provider.last_error)
+        # 名单里的代码一只都没返回 (全停牌/代码写错) 也退回
+        self.server.fail = False
+        provider.quotes(['000002'])
+        self.assertEqual(provider.stats, {'batch': 1, 'full': 2, 'fallback': 2, 'missing': 0})
+        # 不给名单就是全市场
+        self.assertEqual(len(provider.quotes()), 3)
+
+    def test_unreachable_server_falls_back(self):
+        url = self.url
+        self.server.shutdown()
+        self.server.server_close()
+        self.server = None
+        provider = QuoteProvider(client=SinaQuoteClient(base_url=url, timeout=0.5),
+                                 full_spot=lambda: pd.DataFrame({'代码': ['600000'], '最新价': [np.nan]}))
+        self.assertEqual(len(provider.quotes(['600000'])), 1)
+        self.assertEqual(provider.source, 'full')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import os
+import sys
+import threading
+import unittest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.rate_limit import TokenBucket, retry_call
+
+
+class FakeClock:
+    """假时钟：sleep 只推进时间，不真正等待"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.lock = threading.Lock()
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        with self.lock:
+            self.now += seconds
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_burst_then_rate(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=5, capacity=3, clock=clock, sleep=clock.sleep)
+        for _ in range(3):
+            self.assertEqual(bucket.acquire(), 0.0)
+        # 桶空后每个令牌需要 1/rate 秒
+        for _ in range(10):
+            bucket.acquire()
+        self.assertAlmostEqual(clock.now, 10 / 5)
+        self.assertAlmostEqual(bucket.waited, 10 / 5)
+
+    def test_refill_capped_by_capacity(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=2, capacity=2, clock=clock, sleep=clock.sleep)
+        bucket.acquire(2)
+        clock.now += 100  # 空闲很久也只补满 capacity 个
+        self.assertEqual(bucket.acquire(2), 0.0)
+        self.assertAlmostEqual(bucket.acquire(), 0.5)
+
+    def test_invalid_rate(self):
+        with self.assertRaises(ValueError):
+            TokenBucket(rate=0)
+
+
+class TestRetryCall(unittest.TestCase):
+    def test_retries_until_success(self):
+        calls = []
+
+        def flaky(x):
+            calls.append(x)
+            if len(calls) < 3:
+                raise ConnectionError("boom")
+            return x * 2
+
+        self.assertEqual(retry_call(flaky, 21, retries=2, backoff=0), 42)
+        self.assertEqual(len(calls), 3)
+
+    def test_raises_after_last_attempt_and_uses_limiter(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=1, capacity=1, clock=clock, sleep=clock.sleep)
+
+        def broken():
+            raise TimeoutError("slow")
+
+        with self.assertRaises(TimeoutError):
+            retry_call(broken, retries=1, backoff=0, limiter=bucket)
+        # 两次尝试各取一个令牌：第二个等了 1 秒
+        self.assertAlmostEqual(bucket.waited, 1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.seat_db import SeatDB, famous_rows, seat_tags, LOCK_STATUS, ADD_STATUS
+
+
+def hit(seat, code, name, action, buy=0.0, sell=0.0, list_type='日', branch=None):
+    return {'游资标签': seat, '营业部名称': branch or f'{seat}营业部', '股票代码': code, '股票名称': name,
+            '操作': action, '买入金额': buy, '卖出金额': sell, '榜单标签': list_type}
+
+
+class TestSeatDB(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.db = SeatDB(os.path.join(self.tmp, 'seats.sqlite'))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_summary_and_exports(self):
+        self.db.record_day('20260105', [
+            hit('养家', '000001', '甲', '买入', buy=2e6, branch='A'),
+            hit('养家', '000001', '甲', '买入', buy=3e6, branch='A', list_type='3日'),
+            hit('养家', '000001', '甲', '买入', buy=1e8, branch='B'),
+            hit('养家', '000001', '甲', '买入', buy=2.5e6, branch='A'),   # 同营业部同榜单取最大
+            hit('陈小群', '000002', '乙', '卖出', sell=5e6),
+            hit('陈小群', '000003', '丙', '观望', buy=5e4),
+        ])
+        rows = famous_rows(self.db.summary('20260105'))
+        self.assertEqual(rows, [
+            {'游资标签': '养家', '营业部名称': '多席位/聚合', '买入股票': '甲(1.0亿) 甲/3日(300万)',
+             '卖出股票': '', '上榜次数': 2},
+            {'游资标签': '陈小群', '营业部名称': '多席位/聚合', '买入股票': '', '卖出股票': '乙(500万)', '上榜次数': 1},
+        ])
+        self.assertEqual(seat_tags(self.db.summary('20260105')),
+                         {'甲': {'💰养家(1.0亿)', '💰养家/3日(300万)'}, '乙': {'🏃陈小群(500万)'}})
+
+        # 同一天重复扫描整体替换
+        self.db.record_day('20260105', [hit('养家', '000009', '丁', '买入', buy=2e6)])
+        self.assertEqual(list(seat_tags(self.db.summary('20260105'))), ['丁'])
+
+    def test_lock_chain_add_and_exit(self):
+        self.db.record_day('20260105', [hit('养家', '000001', '甲', '买入', buy=5e6),
+                                        hit('赵老哥', '000002', '乙', '买入', buy=5e6, list_type='3日')])
+        # 次日仍在榜、未上榜 -> 锁仓；只买不卖 -> 加仓
+        self.db.record_day('20260106', [hit('赵老哥', '000002', '乙', '买入', buy=3e6, list_type='3日')])
+        status = self.db.derive_status('20260106', ['000001', '000002'])
+        self.assertEqual([(s['seat'], s['code'], s['status']) for s in status],
+                         [('养家', '000001', LOCK_STATUS), ('赵老哥', '000002', ADD_STATUS)])
+        summary = self.db.summary('20260106')
+        self.assertEqual(famous_rows(summary)[0]['买入股票'], '甲(🔒 锁仓)')
+        self.assertEqual(famous_rows(summary)[1]['买入股票'], '乙/3日(➕ 加仓)(300万)')
+        self.assertEqual(seat_tags(summary), {'甲': {'🔒养家(🔒 锁仓)'}, '乙': {'➕赵老哥/3日(➕ 加仓)(300万)'}})
+
+        # 锁仓逐日延续；今日卖出的不再标记
+        self.db.record_day('20260107', [hit('赵老哥', '000002', '乙', '卖出', sell=8e6, list_type='3日')])
+        status = self.db.derive_status('20260107', ['000001', '000002'])
+        self.assertEqual([(s['seat'], s['status']) for s in status], [('养家', LOCK_STATUS)])
+
+        # 已不在今日龙虎榜 -> 不标记
+        self.db.record_day('20260108', [])
+        self.assertEqual(self.db.derive_status('20260108', ['000002']), [])
+        self.assertEqual(self.db.latest_date(), '20260107')  # 无命中的交易日不留记录
+
+    def test_holdings_window(self):
+        self.db.record_day('20260105', [hit('养家', '000001', '甲', '买入', buy=5e6)])
+        self.db.record_day('20260106', [hit('方新侠', '000005', '戊', '观望')])
+        self.db.record_day('20260107', [])
+        self.assertEqual(self.db.holdings('20260107', window=1), [])
+        held = self.db.holdings('20260107', window=3)
+        self.assertEqual(held, [{'seat': '养家', 'code': '000001', 'name': '甲', 'first_date': '20260105',
+                                 'last_date': '20260105', 'days': 1}])
+
+        # 买入之后出现过卖出/做T -> 已离场
+        self.db.record_day('20260106', [hit('养家', '000001', '甲', '做T', buy=2e6, sell=2e6)])
+        held = self.db.holdings('20260107', window=3)
+        self.assertEqual([(h['last_date'], h['days']) for h in held], [('20260106', 2)])
+        self.db.record_day('20260106', [hit('养家', '000001', '甲', '卖出', sell=2e6)])
+        self.assertEqual(self.db.holdings('20260107', window=3), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
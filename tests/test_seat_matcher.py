@@ -0,0 +1,69 @@
+import os
+import sys
+import json
+import random
+import shutil
+import tempfile
+import unittest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.seat_matcher import SeatMatcher, load_matcher
+from src.core.lhb_scanner import FAMOUS_SEATS
+
+
+def brute_force(seats, branch):
+    """原先的双重循环口径"""
+    return tuple(label for label, kws in seats.items() if any(kw in branch for kw in kws))
+
+
+class TestSeatMatcher(unittest.TestCase):
+    def test_matches_nested_loop_on_famous_seats(self):
+        matcher = SeatMatcher(FAMOUS_SEATS)
+        keywords = [kw for kws in FAMOUS_SEATS.values() for kw in kws]
+        rng = random.Random(7)
+        for _ in range(3000):
+            parts = [rng.choice(keywords + ['证券营业部', '有限公司', '路', '中国']) for _ in range(rng.randint(0, 3))]
+            branch = ''.join(parts)
+            if branch and rng.random() < 0.3:
+                cut = rng.randint(0, len(branch))
+                branch = branch[cut:] + branch[:cut]
+            self.assertEqual(matcher.labels_for(branch), brute_force(FAMOUS_SEATS, branch), branch)
+
+    def test_overlapping_keywords_and_label_order(self):
+        seats = {'B': ['她', 'hers'], 'A': ['he', 'she'], 'C': ['his', 'x']}
+        matcher = SeatMatcher(seats)
+        for text in ['ushers', 'his', 'ahishers', 'h', '', 'xhe']:
+            self.assertEqual(matcher.labels_for(text), brute_force(seats, text), text)
+        self.assertEqual(matcher.labels_for('ushers'), ('B', 'A'))
+        self.assertEqual(matcher.match(['ushers', 'zz', 'ushers']), [('B', 'A'), (), ('B', 'A')])
+
+
+class TestLoadMatcher(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_disk_cache_rebuilt_on_config_change(self):
+        path = os.path.join(self.tmp, 'seat_matcher.json')
+        m1 = load_matcher({'A': ['甲']}, cache_dir=self.tmp)
+        self.assertEqual(m1.labels_for('某甲营业部'), ('A',))
+        with open(path, encoding='utf-8') as f:
+            hash1 = json.load(f)['hash']
+
+        # 磁盘缓存可直接恢复出同样的匹配器
+        with open(path, encoding='utf-8') as f:
+            restored = SeatMatcher.from_dict(json.load(f))
+        self.assertEqual(restored.labels_for('某甲营业部'), ('A',))
+
+        m2 = load_matcher({'A': ['甲'], 'B': ['乙']}, cache_dir=self.tmp)
+        self.assertEqual(m2.labels_for('甲乙'), ('A', 'B'))
+        with open(path, encoding='utf-8') as f:
+            self.assertNotEqual(json.load(f)['hash'], hash1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+import os
+import sys
+import shutil
+import tempfile
+import threading
+import unittest
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.sector_cache import SectorCache, board_pct_map
+
+
+def boards(names, pcts):
+    return pd.DataFrame({'板块名称': names, '涨跌幅': pcts})
+
+
+class FakeDownload:
+    def __init__(self, fail=()):
+        self.calls = []
+        self.fail = set(fail)
+        self.gate = None
+
+    def __call__(self, kind):
+        if self.gate is not None:
+            self.gate.wait(5)
+        self.calls.append(kind)
+        if kind in self.fail:
+            raise ConnectionError("offline")
+        if kind == 'industry':
+            return boards(['半导体', '银行'], [2.5, -0.6])
+        return boards(['AI', '卫星', '半导体', '冷门'], [3.0, 1.0, 4.0, -2.0])
+
+
+class TestSectorCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, 'sector_map.json')
+        self.now = datetime(2026, 10, 16, 9, 25, 5)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def make(self, download, now=None):
+        return SectorCache(cache_path=self.path, download=download, now=now or (lambda: self.now),
+                           concept_top=3)
+
+    def test_board_pct_map_top(self):
+        df = boards(['a', 'b', 'c'], [1.0, '3.5', 2.0])
+        self.assertEqual(board_pct_map(df), {'a': 1.0, 'b': 3.5, 'c': 2.0})
+        self.assertEqual(board_pct_map(boards(['a', 'b', 'c'], [1.0, 3.5, 2.0]), top=2), {'b': 3.5, 'c': 2.0})
+        self.assertEqual(board_pct_map(pd.DataFrame()), {})
+
+    def test_merge_and_concept_top(self):
+        download = FakeDownload()
+        sector_map = self.make(download).get()
+        # 概念只取前 3，同名概念覆盖行业
+        self.assertEqual(sector_map, {'半导体': 4.0, '银行': -0.6, 'AI': 3.0, '卫星': 1.0})
+        self.assertEqual(sorted(download.calls), ['concept', 'industry'])
+
+    def test_memory_and_disk_reuse_within_ttl(self):
+        download = FakeDownload()
+        cache = self.make(download)
+        cache.get()
+        cache.get()
+        self.assertEqual(len(download.calls), 2)          # 第二次命中内存
+        # 新进程 (新实例) 读磁盘
+        other = FakeDownload()
+        self.assertEqual(self.make(other).get()['AI'], 3.0)
+        self.assertEqual(other.calls, [])
+
+    def test_auction_ttl_expires(self):
+        download = FakeDownload()
+        clock = {'t': self.now}
+        cache = self.make(download, now=lambda: clock['t'])
+        cache.get()
+        clock['t'] = self.now + timedelta(seconds=20)
+        cache.get()
+        self.assertEqual(len(download.calls), 2)
+        clock['t'] = self.now + timedelta(seconds=31)     # 竞价窗口 30 秒过期
+        cache.get()
+        self.assertEqual(len(download.calls), 4)
+        # 盘中 5 分钟
+        clock['t'] = datetime(2026, 10, 16, 10, 0, 0)
+        cache.get()
+        clock['t'] = datetime(2026, 10, 16, 10, 4, 0)
+        cache.get()
+        self.assertEqual(len(download.calls), 6)
+
+    def test_partial_and_total_failure(self):
+        cache = self.make(FakeDownload(fail={'concept'}))
+        self.assertEqual(cache.get(), {'半导体': 2.5, '银行': -0.6})
+        self.assertIn('concept', cache.last_error)
+
+        cache = SectorCache(cache_path=os.path.join(self.tmp, 'x.json'),
+                            download=FakeDownload(fail={'industry', 'concept'}), now=lambda: self.now)
+        self.assertEqual(cache.get(), {})
+        self.assertEqual(cache.stats['failed'], 1)
+        self.assertFalse(os.path.exists(os.path.join(self.tmp, 'x.json')))
+
+    def test_prefetch_runs_once_in_background(self):
+        download = FakeDownload()
+        download.gate = threading.Event()
+        cache = self.make(download)
+        future = cache.prefetch()
+        self.assertIs(cache.prefetch(), future)           # 在途请求复用
+        self.assertEqual(cache.latest(), {})              # 不等待
+        download.gate.set()
+        self.assertEqual(cache.get()['AI'], 3.0)
+        self.assertEqual(len(download.calls), 2)
+        self.assertEqual(cache.latest()['AI'], 3.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,156 @@
+import os
+import sys
+import unittest
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.strategies.signal_engine import SignalEngine, batch_signals
+
+
+def make_quotes(n, seed=7):
+    rng = np.random.default_rng(seed)
+    prev = rng.uniform(3, 60, n)
+    open_p = prev * (1 + rng.uniform(-0.05, 0.06, n))
+    pct = np.round(rng.uniform(-8, 21, n), 2)
+    price = np.round(prev * (1 + pct / 100), 2)
+    high = np.maximum(price, open_p) * (1 + rng.choice([0, 0.01, 0.12], n))
+    vol = rng.choice([0, 1000, 50000], n).astype(float)
+    amt = vol * 100 * price * (1 + rng.uniform(-0.06, 0.06, n))
+    return pd.DataFrame({
+        '代码': [f"{i:06d}" for i in range(n)], '名称': ['某股'] * n,
+        '最新价': price, '涨跌幅': pct, '最高': high, '最低': price * 0.95, '今开': open_p,
+        '量比': np.round(rng.uniform(0.3, 4.0, n), 2), '成交额': amt, '成交量': vol,
+    })
+
+
+class TestBatchSignals(unittest.TestCase):
+
+    def test_matches_check_signals(self):
+        from src.monitors.intraday_monitor import check_signals
+        df = make_quotes(3000)
+        holding = np.arange(len(df)) % 3 == 0
+        cost = np.where(np.arange(len(df)) % 2 == 0, df['最新价'].to_numpy() * 1.05, 0.0)
+        for index_pct in (0.4, -0.8):
+            level, text, color, bias, cost_ratio = batch_signals(
+                df['最新价'], df['涨跌幅'], df['最高'], df['今开'], df['量比'], df['成交额'], df['成交量'],
+                cost, holding, index_pct)
+            for i, row in enumerate(df.to_dict('records')):
+                info = {'cost': cost[i]} if holding[i] else None
+                ref = check_signals(pd.Series(row), info, '', index_pct, '10:00:00')
+                self.assertEqual((level[i], text[i], color[i]), ref[:3], msg=row)
+                self.assertAlmostEqual(bias[i], ref[3])
+                self.assertAlmostEqual(cost_ratio[i], ref[4])
+        self.assertGreater(len(set(text)), 6)   # 数据覆盖了大部分信号
+
+    def test_bad_rows(self):
+        level, text, _, bias, _ = batch_signals([np.nan, 10.0], [1.0, 1.0], [10.0, 10.0], [10.0, 10.0],
+                                                [1.0, 1.0], [0, 0], [0, 0], [0, 0], [False, False], 0.0)
+        self.assertEqual(list(level), [0, 0])
+        self.assertEqual(list(text), ["", "观察"])
+        self.assertEqual(bias[0], 0.0)
+
+    def test_missing_volume_ratio(self):
+        # 没有量比基准 (NaN): 只是量比相关条件不成立，其余信号照常 (同 check_signals)
+        from src.monitors.intraday_monitor import check_signals
+        df = make_quotes(600, seed=3)
+        df['量比'] = np.nan
+        holding = np.arange(len(df)) % 2 == 0
+        cost = np.zeros(len(df))
+        level, text, color, _, _ = batch_signals(
+            df['最新价'], df['涨跌幅'], df['最高'], df['今开'], df['量比'], df['成交额'], df['成交量'],
+            cost, holding, 0.2)
+        for i, row in enumerate(df.to_dict('records')):
+            info = {'cost': 0.0} if holding[i] else None
+            self.assertEqual((level[i], text[i], color[i]), check_signals(pd.Series(row), info, '', 0.2, '10:00:00')[:3])
+        self.assertNotIn("", set(text))
+        self.assertNotIn("👀缩量稳住", set(text))      # vr < 0.9 不能因为缺量比而成立
+
+
+class TestSignalEngine(unittest.TestCase):
+
+    def setUp(self):
+        self.t0 = datetime(2026, 10, 16, 10, 0, 0)
+        self.engine = SignalEngine(cooldown=300)
+
+    def tick(self, seconds, price, pct=2.0, high=None, open_p=10.0, vwap=10.0, holding=True, code='600001'):
+        """持仓股单票一轮；乖离由 price/vwap 控制"""
+        vol = 10000.0
+        return self.engine.update(self.t0 + timedelta(seconds=seconds), [code], price=[price], pct=[pct],
+                                  high=[high if high is not None else price], open=[open_p], vr=[1.0],
+                                  amt=[vwap * vol * 100], vol=[vol], cost=[0.0], holding=[holding],
+                                  index_pct=0.0)
+
+    def test_transitions_hysteresis_and_cooldown(self):
+        table, events = self.tick(0, 10.42)                  # 乖离 4.2% -> 急拉卖T
+        self.assertEqual([e['signal'] for e in events], ["🚀急拉卖T"])
+        self.assertEqual(events[0]['prev'], "观察")
+        table, events = self.tick(5, 10.43)
+        self.assertEqual(events, [])                         # 状态没变不重复报
+        table, events = self.tick(10, 10.39)                 # 3.9%: 跌破进入线但在回差带内
+        self.assertEqual(events, [])
+        self.assertEqual(table.loc['600001', 'signal'], "🚀急拉卖T")
+        self.assertEqual(table.loc['600001', 'since'], self.t0.timestamp())
+        table, events = self.tick(15, 10.36)                 # 3.6%: 退出
+        self.assertEqual(table.loc['600001', 'signal'], "观察")
+        self.assertEqual(events, [])                         # 退回观察不提醒
+        table, events = self.tick(20, 10.41)                 # 冷却期内再次进入: 状态切换但不提醒
+        self.assertEqual(table.loc['600001', 'signal'], "🚀急拉卖T")
+        self.assertEqual(events, [])
+        self.assertEqual(self.engine.stats['suppressed'], 1)
+        self.tick(25, 10.30)
+        table, events = self.tick(400, 10.45)                # 冷却结束
+        self.assertEqual([e['signal'] for e in events], ["🚀急拉卖T"])
+        self.assertEqual(len(self.engine.events), 2)
+
+    def test_without_hysteresis_flickers(self):
+        engine = SignalEngine(hysteresis=False, cooldown=0)
+        self.engine = engine
+        signals = [self.tick(i * 5, p)[0].loc['600001', 'signal'] for i, p in enumerate([10.42, 10.39, 10.42])]
+        self.assertEqual(signals, ["🚀急拉卖T", "观察", "🚀急拉卖T"])
+        self.assertEqual(engine.stats['events'], 2)
+
+    def test_seal_break_and_peak(self):
+        # 策略池票: 涨停 -> 开板回落
+        self.tick(0, 11.0, pct=10.0, high=11.0, holding=False)
+        table, events = self.tick(5, 10.98, pct=9.7, high=11.0, holding=False)      # 回差带内仍算封板
+        self.assertTrue(table.loc['600001', 'sealed'])
+        table, events = self.tick(10, 10.7, pct=7.0, high=11.0, holding=False)
+        self.assertFalse(table.loc['600001', 'sealed'])
+        self.assertEqual(table.loc['600001', 'breaks'], 1)
+        self.assertEqual(events[0]['signal'], "⚠️炸板回落")
+        self.assertEqual(events[0]['prev'], "🚀涨停封板")
+        self.assertEqual(events[0]['breaks'], 1)
+        self.assertEqual(table.loc['600001', 'peak'], 11.0)
+
+    def test_new_codes_and_day_rollover(self):
+        self.tick(0, 10.42)
+        table, events = self.tick(5, 10.42, code='000002')
+        self.assertEqual(len(self.engine), 2)
+        self.assertEqual(len(events), 1)
+        self.t0 += timedelta(days=1)
+        table, events = self.tick(0, 10.42)                  # 新的一天，状态和冷却清空
+        self.assertEqual(len(events), 1)
+        self.assertEqual(len(self.engine), 1)
+
+    def test_monitor_rows_use_engine(self):
+        from src.monitors.intraday_monitor import collect_display_rows
+        df = make_quotes(200)
+        holdings = {c: {'cost': 10.0} for c in df['代码'][:20]}
+        pool = {c: {'tag': ''} for c in df['代码'][20:]}
+        engine = SignalEngine()
+        rows = collect_display_rows(df, holdings, pool, {}, {}, 0.3, self.t0, engine=engine)
+        first = engine.stats['events']
+        again = collect_display_rows(df, holdings, pool, {}, {}, 0.3, self.t0 + timedelta(seconds=5), engine=engine)
+        self.assertEqual(rows, again)
+        self.assertEqual(len(engine), 200)
+        self.assertGreater(first, 0)
+        self.assertEqual(engine.stats['events'], first)      # 同样的行情第二轮不再报
+        self.assertTrue(all(r['is_hold'] for r in rows[:20]))
+
+
+if __name__ == '__main__':
+    unittest.main()
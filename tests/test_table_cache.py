@@ -0,0 +1,64 @@
+import os
+import sys
+import time
+import shutil
+import tempfile
+import unittest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.table_cache import read_ths_table, parse_ths_table, _cache_paths
+
+TABLE_CONTENT = (
+    "代码\t\t    名称\t\t涨幅\t\t现价\t\t当日成交额\n"
+    "SH600000\t浦发银行\t-0.77%\t\t11.57\t\t5.78亿\n"
+    "SZ000001\t平安银行\t+1.20%\t\t12.00\t\t--\n"
+)
+
+
+class TestTableCache(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.test_dir, 'Table-20260113.txt')
+        with open(self.path, 'w', encoding='gbk') as f:
+            f.write(TABLE_CONTENT)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_cache_roundtrip_matches_parser(self):
+        """Cached frame must be identical to a fresh parse"""
+        fresh = parse_ths_table(self.path)
+        first = read_ths_table(self.path)
+        _, data_path, meta_path = _cache_paths(self.path)
+        self.assertTrue(os.path.exists(data_path))
+        self.assertTrue(os.path.exists(meta_path))
+
+        cached = read_ths_table(self.path)
+        self.assertEqual(list(cached.columns), ['代码', '名称', '涨幅', '现价', '当日成交额'])
+        self.assertEqual(list(cached.columns), list(fresh.columns))
+        self.assertEqual(cached['名称'].tolist(), fresh['名称'].tolist())
+        self.assertEqual(first['涨幅'].tolist(), ['-0.77%', '+1.20%'])
+
+    def test_cache_invalidated_on_reexport(self):
+        """Rewriting the source (new mtime/size) must trigger a re-parse"""
+        read_ths_table(self.path)
+        time.sleep(0.01)
+        with open(self.path, 'a', encoding='gbk') as f:
+            f.write("SZ300059\t东方财富\t-2.24%\t\t24.49\t\t172.98亿\n")
+        df = read_ths_table(self.path)
+        self.assertEqual(len(df), 3)
+        self.assertEqual(df.iloc[-1]['名称'], '东方财富')
+
+    def test_unparseable_file_returns_none(self):
+        bad = os.path.join(self.test_dir, 'Table-bad.txt')
+        with open(bad, 'w', encoding='utf-8') as f:
+            f.write("名称\t现价\n浦发银行\t10.00\n")
+        self.assertIsNone(read_ths_table(bad))
+        self.assertIsNone(read_ths_table(os.path.join(self.test_dir, 'missing.txt')))
+
+
+if __name__ == '__main__':
+    unittest.main()
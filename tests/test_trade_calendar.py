@@ -0,0 +1,95 @@
+import os
+import sys
+import json
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, date
+import numpy as np
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.trade_calendar import TradeCalendar, load_calendar, weekday_dates
+
+# 2026 元旦: 1/1 ~ 1/3 休市
+DATES = [d for d in weekday_dates('2025-12-01', '2026-01-31') if d not in ('20260101', '20260102')]
+
+
+class TestTradeCalendar(unittest.TestCase):
+    def setUp(self):
+        self.cal = TradeCalendar(DATES)
+
+    def test_scalar_lookups(self):
+        self.assertEqual(self.cal.prev_trading_day('20260105'), '20251231')
+        self.assertEqual(self.cal.prev_trading_day('2026-01-05', n=2), '20251230')
+        self.assertEqual(self.cal.next_trading_day(date(2025, 12, 31)), '20260105')
+        self.assertEqual(self.cal.next_trading_day(datetime(2026, 1, 3, 9, 30)), '20260105')
+        self.assertEqual(self.cal.latest('20260103'), '20251231')
+        self.assertEqual(self.cal.latest('20260105'), '20260105')
+        self.assertTrue(self.cal.is_trading_day('20260105'))
+        self.assertFalse(self.cal.is_trading_day('20260102'))
+        self.assertIsNone(self.cal.prev_trading_day('20251201'))
+        self.assertIsNone(self.cal.next_trading_day('20260130'))
+
+    def test_ranges(self):
+        self.assertEqual(self.cal.trading_days_between('20251229', '20260109'), 8)
+        self.assertEqual(self.cal.trading_days_between('20260101', '20260103'), 0)
+        self.assertEqual(self.cal.between('20251231', '20260106'), ['20251231', '20260105', '20260106'])
+        self.assertEqual(self.cal.last_n(3, end='20260104'), ['20251229', '20251230', '20251231'])
+
+    def test_vectorized(self):
+        days = np.array(['20260101', '20260105', '20251201', '2026-01-07'])
+        np.testing.assert_array_equal(self.cal.prev_trading_day(days),
+                                      ['20251231', '20251231', '', '20260106'])
+        np.testing.assert_array_equal(self.cal.next_trading_day(days),
+                                      ['20260105', '20260106', '20251202', '20260108'])
+        np.testing.assert_array_equal(self.cal.is_trading_day([20260102, 20260105]), [False, True])
+        np.testing.assert_array_equal(
+            self.cal.trading_days_between(['20251229', '20260105'], ['20260105', '20260109']), [4, 5])
+        # 与逐个查询一致
+        queries = weekday_dates('2025-11-20', '2026-02-10')
+        np.testing.assert_array_equal(self.cal.prev_trading_day(queries),
+                                      [self.cal.prev_trading_day(d) or '' for d in queries])
+
+
+class TestLoadCalendar(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, 'trade_dates.json')
+        self.calls = 0
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def download(self):
+        self.calls += 1
+        return DATES
+
+    def offline(self):
+        self.calls += 1
+        raise ConnectionError("offline")
+
+    def test_cached_until_stale(self):
+        now = lambda: datetime(2026, 1, 6, 9, 0)
+        cal = load_calendar(self.path, self.download, now)
+        self.assertEqual(cal.dates, DATES)
+        load_calendar(self.path, self.download, now)
+        self.assertEqual(self.calls, 1)
+        with open(self.path, encoding='utf-8') as f:
+            self.assertEqual(json.load(f)['fetched_at'], '20260106')
+
+        # 超出缓存覆盖范围 -> 刷新；刷新失败沿用旧缓存
+        cal = load_calendar(self.path, self.offline, lambda: datetime(2026, 2, 2))
+        self.assertEqual(self.calls, 2)
+        self.assertEqual(cal.last, '20260130')
+
+    def test_weekday_fallback_without_cache(self):
+        cal = load_calendar(self.path, self.offline, lambda: datetime(2026, 1, 6))
+        self.assertEqual(cal.source, 'weekday')
+        self.assertEqual(cal.prev_trading_day('20260105'), '20260102')
+        self.assertFalse(os.path.exists(self.path))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import os
+import sys
+import shutil
+import tempfile
+import threading
+import unittest
+from datetime import datetime
+import pandas as pd
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.zt_pool_cache import ZtPoolCache
+
+
+class FakePools:
+    def __init__(self):
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def __call__(self, kind, date):
+        with self.lock:
+            self.calls.append((kind, date))
+        if date == '20260107':
+            raise ConnectionError("offline")
+        if date == '20260108':
+            return pd.DataFrame()
+        n = int(date[-2:])
+        return pd.DataFrame({'代码': [f'{i:06d}' for i in range(n)], '名称': ['某股'] * n,
+                             '连板数': list(range(1, n + 1))})
+
+
+class TestZtPoolCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.src = FakePools()
+        self.now = datetime(2026, 1, 9, 10, 0)
+        self.holidays = {'20260108'}           # 当作休市日: 空表可以落盘
+        self.cache = ZtPoolCache(self.tmp, download=self.src, now=lambda: self.now,
+                                 is_trading_day=lambda d: d not in self.holidays)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_only_missing_days_fetched(self):
+        days = ['20260105', '20260106', '20260107', '20260108']
+        pools = self.cache.ensure('zt', days)
+        self.assertEqual(list(pools), ['20260105', '20260106', '20260108'])   # 失败的日期不返回
+        self.assertEqual(len(pools['20260106']), 6)
+        self.assertTrue(pools['20260108'].empty)
+        self.assertEqual(len(self.src.calls), 4)
+
+        # 再次回看: 只有上次失败的那天需要联网
+        pools = self.cache.ensure('zt', days + ['20260109'])
+        self.assertEqual(sorted(self.src.calls[4:]), [('zt', '20260107'), ('zt', '20260109')])
+        self.assertEqual(pools['20260105']['连板数'].tolist(), [1, 2, 3, 4, 5])
+        self.assertEqual(self.cache.stats['hits'], 3)
+
+    def test_intraday_today_not_cached(self):
+        self.cache.get('zbgc', '20260109')
+        self.cache.get('zbgc', '20260109')
+        self.assertEqual(self.src.calls, [('zbgc', '20260109')] * 2)
+        self.now = datetime(2026, 1, 9, 16, 0)   # 收盘定型后
+        self.cache.get('zbgc', '20260109')
+        self.cache.get('zbgc', '20260109')
+        self.assertEqual(len(self.src.calls), 3)
+        with self.assertRaises(ConnectionError):
+            self.cache.get('zt', '20260107')
+
+    def test_empty_trading_day_not_cached(self):
+        # 交易日返回空表多半是限流/数据未就绪，不能当作 "当天 0 涨停" 永久缓存
+        self.holidays = set()
+        self.assertTrue(self.cache.get('zt', '20260108').empty)
+        self.assertIsNone(self.cache.cached('zt', '20260108'))
+        self.cache.get('zt', '20260108')
+        self.assertEqual(self.src.calls, [('zt', '20260108')] * 2)
+
+
+if __name__ == '__main__':
+    unittest.main()